@@ -1,18 +1,23 @@
 import base64
 import json
-import asyncio
 import logging
+import time
 import functions_framework
 from typing import Dict, Any
 from google.cloud import firestore
 import os
 
 from platforms.ebay import EbayPlatform
+from shared.clients import get_genai_client
+from shared.conditions import normalize_condition
 from shared.firestore.client import get_firestore_client
+from shared.llm.usage import record_llm_call
+from shared.llm.regions import STAGE_LISTING, get_region_pool
+from shared.llm.resilience import RetryPolicy, retry_async
+from shared.runtime import run_coroutine, run_worker
 
 # New GenAI SDK
 try:
-    from google import genai
     from google.genai import types
 except ImportError:
     raise ImportError("google-genai>=0.8.0 is required.")
@@ -40,49 +45,50 @@ def validate_environment() -> Dict[str, str]:
 env_vars = validate_environment()
 GCP_PROJECT = env_vars["GCP_PROJECT"]
 DEFAULT_LLM_MODEL = os.getenv("DEFAULT_LLM_MODEL", "gemini-2.0-flash")
+# Die Beschreibung ist optional (Fallback: Originaltext) - daher wenige, kurze Retries
+LISTING_RETRY_POLICY = RetryPolicy(max_retries=2, base_delay_seconds=1.0, max_delay_seconds=8.0)
 
-# GenAI Client Initialization
-try:
+
+# GenAI Client: erst beim ersten Listing gebaut (shared.clients), danach wiederverwendet
+def get_listing_genai_client():
+    """Vertex AI wenn ein Projekt gesetzt ist, sonst API Key (Local Dev), sonst None."""
     project_id = GCP_PROJECT
-    location = os.environ.get("GCP_REGION", "us-central1")
-    
-    if project_id:
-        genai_client = genai.Client(
-            vertexai=True,
+    api_key = None if project_id else os.getenv("GEMINI_API_KEY")
+    if not project_id and not api_key:
+        logger.warning("No Project ID or API Key found. GenAI client might fail.")
+        return None
+    try:
+        return get_genai_client(
             project=project_id,
-            location=location
+            location=get_region_pool().regions_for(STAGE_LISTING)[0],
+            api_key=api_key,
         )
-        logger.info(f"Gemini client configured for Vertex AI (project={project_id}, location={location})")
-    else:
-        # Fallback to API Key for local dev if set
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            genai_client = genai.Client(api_key=api_key)
-            logger.info("Gemini client configured with API Key (Local Dev Mode)")
-        else:
-            logger.warning("No Project ID or API Key found. GenAI client might fail.")
-            genai_client = None
-
-except Exception as e:
-    logger.error(f"Failed to configure Gemini client: {e}")
-    genai_client = None
+    except Exception as e:
+        logger.error(f"Failed to configure Gemini client: {e}")
+        return None
+
 
 async def enhance_product_description_with_llm(user_id: str, book_data: Dict[str, Any]) -> str:
     """
     Enhance product description using Gemini API.
     Falls back to original description if LLM is unavailable.
     """
+    genai_client = get_listing_genai_client()
     if not genai_client:
         logger.info("Gemini client not available, using original description")
         return book_data.get("description", "")
     
+    # Zustand aus Gutachten oder Freitext einheitlich benennen
+    condition = normalize_condition(book_data.get('condition') or book_data.get('ai_condition_grade'))
+    condition_label = condition.label if condition else book_data.get('condition', 'N/A')
+
     try:
         prompt = f"""
         Create a compelling marketplace listing description for this book:
         
         Title: {book_data.get('title', 'N/A')}
         Author: {book_data.get('author', 'N/A')}
-        Condition: {book_data.get('condition', 'N/A')}
+        Condition: {condition_label}
         Original Description: {book_data.get('description', 'N/A')}
         
         Requirements:
@@ -95,13 +101,35 @@ async def enhance_product_description_with_llm(user_id: str, book_data: Dict[str
         Return ONLY the description text, no additional formatting.
         """
         
-        response = genai_client.models.generate_content(
-            model=DEFAULT_LLM_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=300
+        async def attempt():
+            call_start = time.perf_counter()
+            generate = lambda client: client.aio.models.generate_content(
+                model=DEFAULT_LLM_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=0.7,
+                    max_output_tokens=300
+                )
             )
+            try:
+                if GCP_PROJECT:
+                    # Vertex AI: regional client pool fails over to the next region on 429/503
+                    response = await get_region_pool().call(
+                        STAGE_LISTING, generate, project=GCP_PROJECT, description="Listing description"
+                    )
+                else:
+                    response = await generate(genai_client)
+            except Exception:
+                record_llm_call("gemini_listing_description", DEFAULT_LLM_MODEL, None, (time.perf_counter() - call_start) * 1000, success=False)
+                raise
+            record_llm_call("gemini_listing_description", DEFAULT_LLM_MODEL, response, (time.perf_counter() - call_start) * 1000)
+            return response
+        
+        response = await retry_async(
+            attempt,
+            policy=LISTING_RETRY_POLICY,
+            breaker_key=DEFAULT_LLM_MODEL,
+            description=f"Listing description '{book_data.get('title', 'N/A')}'",
         )
         
         logger.info(f"Enhanced description via Gemini API")
@@ -119,7 +147,7 @@ PLATFORMS = {
 @functions_framework.cloud_event
 def handle_listing_request(cloud_event: Any) -> None:
     """Triggered by a Pub/Sub message to create a listing on a marketplace."""
-    return asyncio.run(_async_handle_listing_request(cloud_event))
+    return run_coroutine(_async_handle_listing_request(cloud_event))
 
 
 async def _async_handle_listing_request(cloud_event: Any) -> None:
@@ -145,7 +173,7 @@ async def _async_handle_listing_request(cloud_event: Any) -> None:
 
     try:
         # Enhance product description using Gemini API
-        if genai_client:
+        if get_listing_genai_client():
             enhanced_description = await enhance_product_description_with_llm(uid, book_data)
             if enhanced_description:
                 book_data["description"] = enhanced_description
@@ -235,4 +263,12 @@ def delist_book_everywhere(cloud_event: Any) -> None:
             listing.reference.update({"status": "delisted"})
 
     except Exception as e:
-        pass
\ No newline at end of file
+        pass
+
+
+if __name__ == "__main__":
+    # Worker-Modus: Listing-Requests auf PUBSUB_SUBSCRIPTION, Delisting optional auf DELIST_SUBSCRIPTION
+    handlers = {os.environ["PUBSUB_SUBSCRIPTION"]: _async_handle_listing_request}
+    if os.environ.get("DELIST_SUBSCRIPTION"):
+        handlers[os.environ["DELIST_SUBSCRIPTION"]] = delist_book_everywhere
+    run_worker(handlers)
@@ -1,5 +1,16 @@
 from .base import MarketplacePlatform
 from ebaysdk.trading import Connection as Trading
+from shared.conditions import Condition, condition_of
+
+# eBay condition IDs for the Books category (there is no separate "Poor")
+EBAY_CONDITION_IDS = {
+    Condition.NEW: "1000",
+    Condition.LIKE_NEW: "2750",
+    Condition.VERY_GOOD: "4000",
+    Condition.GOOD: "5000",
+    Condition.ACCEPTABLE: "6000",
+    Condition.POOR: "6000",
+}
 
 class EbayPlatform(MarketplacePlatform):
     """
@@ -16,6 +27,11 @@ class EbayPlatform(MarketplacePlatform):
             siteid="77"  # Germany
         )
 
+    @staticmethod
+    def _condition_id(book: dict) -> str:
+        condition = condition_of(book.get("condition") or book.get("ai_condition_grade"))
+        return EBAY_CONDITION_IDS[condition] if condition else "3000"  # Used
+
     def create_listing(self, book: dict) -> str:
         """
         Creates a new listing for a book on eBay using AddFixedPriceItem.
@@ -31,7 +47,7 @@ class EbayPlatform(MarketplacePlatform):
                 "CategoryMappingAllowed": "true",
                 "Country": "DE",
                 "Currency": "EUR",
-                "ConditionID": "3000", # Used
+                "ConditionID": self._condition_id(book),
                 "DispatchTimeMax": "3",
                 "ListingDuration": "GTC", # Good 'Til Canceled
                 "ListingType": "FixedPriceItem",
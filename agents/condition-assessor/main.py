@@ -31,62 +31,58 @@ from datetime import datetime
 from io import BytesIO
 from PIL import Image
 
-from google.cloud import storage, pubsub_v1
 import functions_framework
 
 # New GenAI SDK
 try:
-    from google import genai
     from google.genai import types
 except ImportError:
     raise ImportError("google-genai>=0.8.0 is required.")
 
+from shared.clients import get_genai_client, get_publisher_client, get_storage_client, topic_path
+from shared.conditions import ABAA_GRADES, CONDITION_PRICE_FACTORS, Condition, condition_of
 from shared.firestore.client import get_firestore_client, update_book
+from shared.firestore.outbox import OutboxEvent, get_outbox_relay
+from shared.image_processing import ImageNormalizationConfig, normalize_image
+from shared.llm.json_extraction import parse_last_json_object
+from shared.llm.context_cache import PromptPrefix, get_prompt_cache
+from shared.llm.usage import record_llm_call
+from shared.llm.regions import STAGE_CONDITION, get_region_pool
+from shared.llm.resilience import RetryPolicy, retry_async
+from shared.runtime import run_coroutine, run_worker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Pub/Sub Publisher
-publisher = pubsub_v1.PublisherClient()
 PROJECT_ID = os.environ.get("GCP_PROJECT") or os.environ.get("GOOGLE_CLOUD_PROJECT")
 
 # ============================================================================
-# CLIENT INITIALIZATION
+# CLIENT INITIALIZATION (lazy)
 # ============================================================================
-# IMPORTANT: Initialize storage client before any other Google library
-# that might be affected by genai.configure() which sets a global API key.
-# This ensures the storage client uses Application Default Credentials (ADC).
-storage_client = storage.Client()
-logger.info("Storage client initialized successfully.")
-
-# GenAI Client Initialization
-try:
-    # Use Vertex AI by default in production
-    project_id = os.environ.get("GCP_PROJECT") or os.environ.get("GOOGLE_CLOUD_PROJECT")
-    location = os.environ.get("GCP_REGION", "us-central1")
-    
-    if project_id:
-        genai_client = genai.Client(
-            vertexai=True,
-            project=project_id,
-            location=location
-        )
-        logger.info(f"Gemini client configured for Vertex AI (project={project_id}, location={location})")
-    else:
-        # Fallback to API Key for local dev if set
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            genai_client = genai.Client(api_key=api_key)
-            logger.info("Gemini client configured with API Key (Local Dev Mode)")
-        else:
-            logger.warning("No Project ID or API Key found. GenAI client might fail.")
-            genai_client = None
-
-except Exception as e:
-    logger.error(f"Failed to configure Gemini client: {e}")
-    # Don't exit yet, allow function to start but fail on request if needed
-    genai_client = None
+# Storage, Pub/Sub and GenAI clients are built on first use via shared.clients
+# and reused for the lifetime of the instance. Storage always uses
+# Application Default Credentials (ADC), independent of the GenAI API key.
+
+def get_assessment_project_id() -> Optional[str]:
+    return os.environ.get("GCP_PROJECT") or os.environ.get("GOOGLE_CLOUD_PROJECT")
+
+
+def get_assessment_genai_client() -> Optional[Any]:
+    """Vertex AI by default in production, API key for local dev, None if neither is configured."""
+    project_id = get_assessment_project_id()
+    # Preferred region of the condition stage (LLM_REGIONS_CONDITION / LLM_REGIONS / GCP_REGION / us-central1)
+    location = get_region_pool().regions_for(STAGE_CONDITION)[0]
+    api_key = None if project_id else os.getenv("GEMINI_API_KEY")
+    if not project_id and not api_key:
+        logger.warning("No Project ID or API Key found. GenAI client might fail.")
+        return None
+    try:
+        return get_genai_client(project=project_id, location=location, api_key=api_key)
+    except Exception as e:
+        logger.error(f"Failed to configure Gemini client: {e}")
+        # Don't exit, fail on request instead
+        return None
 
 
 def validate_environment() -> Dict[str, str]:
@@ -106,6 +102,29 @@ def validate_environment() -> Dict[str, str]:
     return required_vars
 
 
+# Static part of the prompt (sent as system instruction, referenced via the context cache)
+CONDITION_ASSESSMENT_INSTRUCTIONS = """
+You are an expert antiquarian bookseller and professional book condition grader.
+You will be provided with a set of images of a single book.
+
+Your task is to analyze the book's condition and output strictly valid JSON matching this schema:
+{
+  "grade": "Fine|Very Fine|Good|Fair|Poor",
+  "score": <number 0-100>,
+  "price_factor": <number 0.1-1.0>,
+  "confidence": <number 0.0-1.0>,
+  "summary": "<concise professional summary of condition>",
+  "defects": ["<defect 1>", "<defect 2>"],
+  "components": {
+    "cover": { "score": <0-100>, "description": "..." },
+    "spine": { "score": <0-100>, "description": "..." },
+    "pages": { "score": <0-100>, "description": "..." },
+    "binding": { "score": <0-100>, "description": "..." }
+  }
+}
+"""
+
+
 class ConditionGrade(Enum):
     """Standardized condition grades based on ABAA/ILAB standards"""
     FINE = "Fine"                    # 90-100% - Like new, minimal wear
@@ -123,6 +142,7 @@ class ConditionScore:
     details: Dict[str, Any]
     price_factor: float
     component_scores: Dict[str, float]
+    usage: Optional[Dict[str, Any]] = None  # Token usage and cost (LLMUsage)
 
 class VertexAIConditionAssessor:
     """Main condition assessment agent using Gemini Pro Vision"""
@@ -135,13 +155,18 @@ class VertexAIConditionAssessor:
         self.project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         self.user_id = user_id
         
-        # Initialize clients
-        self.storage_client = storage_client
-        self.client = genai_client
+        # Initialize clients (GenAI lazily on first assessor, Storage on first gs:// download)
+        self.client = get_assessment_genai_client()
         
         # Configuration
         self.model_name = "gemini-2.0-flash-001"  # Use stable flash model for cost/speed efficiency
         self.temperature = 0.1  # Low temperature for analytical consistency
+        self.retry_policy = RetryPolicy(max_retries=2, base_delay_seconds=2.0)
+        # Condition grading needs more detail than identification (creases, foxing, spine wear)
+        self.image_config = ImageNormalizationConfig(
+            max_edge_px=int(os.environ.get("CONDITION_IMAGE_MAX_EDGE_PX", "2048")),
+            jpeg_quality=int(os.environ.get("CONDITION_IMAGE_JPEG_QUALITY", "90")),
+        )
 
     async def assess_book_condition(
         self, 
@@ -182,31 +207,47 @@ class VertexAIConditionAssessor:
             )
             
             contents = image_parts + [prompt_text]
+            prompt_prefix = PromptPrefix(
+                key="condition_assessment",
+                model=self.model_name,
+                system_instruction=CONDITION_ASSESSMENT_INSTRUCTIONS,
+            )
             
-            # Retry logic for 429 Resource Exhausted
-            max_retries = 3
-            base_delay = 2
-            
-            for attempt in range(max_retries):
+            async def attempt() -> ConditionScore:
+                call_start = time.perf_counter()
+                generate = lambda client: get_prompt_cache().generate_content(
+                    client, prompt_prefix, contents, generation_config
+                )
                 try:
-                    response = self.client.models.generate_content(
-                        model=self.model_name,
-                        contents=contents,
-                        config=generation_config
+                    if get_assessment_project_id():
+                        # Vertex AI: regional client pool fails over to the next region on 429/503
+                        response = await get_region_pool().call(
+                            STAGE_CONDITION,
+                            generate,
+                            project=get_assessment_project_id(),
+                            description=f"Condition assessment ({self.model_name})",
+                        )
+                    else:
+                        response = await generate(self.client)
+                except Exception:
+                    record_llm_call(
+                        "gemini_condition_assessment", self.model_name, None, (time.perf_counter() - call_start) * 1000, success=False
                     )
-                    return self._parse_llm_response(response.text)
-                
-                except Exception as e:
-                    error_str = str(e)
-                    if "429" in error_str or "Resource has been exhausted" in error_str:
-                        if attempt < max_retries - 1:
-                            sleep_time = base_delay * (2 ** attempt)
-                            logger.warning(f"⚠️ Quota exceeded (429). Retrying in {sleep_time}s... (Attempt {attempt + 1}/{max_retries})")
-                            time.sleep(sleep_time)
-                            continue
-                    
-                    logger.error(f"Error during GenAI condition assessment: {error_str}")
                     raise
+                usage = record_llm_call(
+                    "gemini_condition_assessment", self.model_name, response, (time.perf_counter() - call_start) * 1000
+                )
+                condition_score = self._parse_llm_response(response.text)
+                condition_score.usage = usage.model_dump() if usage else None
+                return condition_score
+            
+            # Retries with full-jitter backoff, server retry hints and a per-model circuit breaker
+            return await retry_async(
+                attempt,
+                policy=self.retry_policy,
+                breaker_key=self.model_name,
+                description=f"Condition assessment ({self.model_name})",
+            )
             
         except Exception as e:
             logger.error(f"Error during GenAI condition assessment: {str(e)}")
@@ -216,16 +257,21 @@ class VertexAIConditionAssessor:
         image_parts = []
         for idx, img in enumerate(images):
             try:
+                image_bytes = None
                 gcs_uri = img.get('gcs_uri') or img.get('imageUrl')
                 if gcs_uri and gcs_uri.startswith('gs://'):
                     image_bytes = await self._fetch_gcs_image(gcs_uri)
-                    if image_bytes:
-                         image_parts.append(types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"))
                 elif img.get('content'):
                     b64_content = img.get('content')
                     if "," in b64_content: b64_content = b64_content.split(",")[1]
                     image_bytes = base64.b64decode(b64_content)
-                    image_parts.append(types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"))
+                if image_bytes:
+                    normalized = await asyncio.to_thread(normalize_image, image_bytes, self.image_config)
+                    logger.info(
+                        f"Image {idx+1}: {normalized.original_mime_type} {normalized.original_size_bytes}B -> "
+                        f"{normalized.mime_type} {normalized.size_bytes}B ({normalized.duration_ms:.0f}ms)"
+                    )
+                    image_parts.append(types.Part.from_bytes(data=normalized.data, mime_type=normalized.mime_type))
             except Exception as e:
                 logger.error(f"Failed to process image {idx+1}: {e}")
                 continue
@@ -236,9 +282,9 @@ class VertexAIConditionAssessor:
             parts = gcs_uri.replace("gs://", "").split("/", 1)
             if len(parts) != 2: return None
             bucket_name, blob_name = parts
-            bucket = self.storage_client.bucket(bucket_name)
+            bucket = get_storage_client().bucket(bucket_name)
             blob = bucket.blob(blob_name)
-            return blob.download_as_bytes()
+            return await asyncio.to_thread(blob.download_as_bytes)
         except Exception as e:
             logger.error(f"GCS download error for {gcs_uri}: {e}")
             return None
@@ -249,48 +295,33 @@ class VertexAIConditionAssessor:
             title = metadata.get('title', 'Unknown')
             year = metadata.get('year') or metadata.get('publication_year') or 'Unknown'
             publisher = metadata.get('publisher', 'Unknown')
-            meta_context = f"\nBOOK CONTEXT:\nTitle: {title}\nYear: {year}\nPublisher: {publisher}\n"
+            meta_context = f"BOOK CONTEXT:\nTitle: {title}\nYear: {year}\nPublisher: {publisher}\n\n"
 
-        return f"""
-You are an expert antiquarian bookseller and professional book condition grader.
-You have been provided with a set of images of a single book.
-
-{meta_context}
-
-Your task is to analyze the book's condition and output strictly valid JSON matching this schema:
-{{
-  "grade": "Fine|Very Fine|Good|Fair|Poor",
-  "score": <number 0-100>,
-  "price_factor": <number 0.1-1.0>,
-  "confidence": <number 0.0-1.0>,
-  "summary": "<concise professional summary of condition>",
-  "defects": ["<defect 1>", "<defect 2>"],
-  "components": {{
-    "cover": {{ "score": <0-100>, "description": "..." }},
-    "spine": {{ "score": <0-100>, "description": "..." }},
-    "pages": {{ "score": <0-100>, "description": "..." }},
-    "binding": {{ "score": <0-100>, "description": "..." }}
-  }}
-}}
-"""
+        return f"{meta_context}Assess the condition of the book shown in these images."
 
     def _parse_llm_response(self, response_text: str) -> ConditionScore:
         try:
-            clean_text = response_text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(clean_text)
-            grade_str = data.get('grade', 'Good').strip().upper().replace(" ", "_")
-            grade_map = {"FINE": ConditionGrade.FINE, "VERY_FINE": ConditionGrade.VERY_FINE, "GOOD": ConditionGrade.GOOD, "FAIR": ConditionGrade.FAIR, "POOR": ConditionGrade.POOR}
-            grade = grade_map.get(grade_str, ConditionGrade.GOOD)
+            data = parse_last_json_object(response_text)
+            # Map off-scale answers ("Very Good", "Sehr gut", "near fine") onto the ABAA grades too
+            condition = condition_of(data.get('grade'), Condition.GOOD)
+            grade = ConditionGrade(ABAA_GRADES[condition])
             components = data.get('components', {})
             component_scores = {k: float(components.get(k, {}).get('score', 0)) for k in ['cover', 'spine', 'pages', 'binding']}
             details = {'summary': data.get('summary', ''), 'defects_list': data.get('defects', []), 'cover_defects': components.get('cover', {}).get('description', ''), 'spine_defects': components.get('spine', {}).get('description', ''), 'pages_defects': components.get('pages', {}).get('description', ''), 'binding_defects': components.get('binding', {}).get('description', '')}
-            return ConditionScore(overall_score=float(data.get('score', 0)), grade=grade, confidence=float(data.get('confidence', 0.5)), price_factor=float(data.get('price_factor', 0.5)), details=details, component_scores=component_scores)
+            return ConditionScore(overall_score=float(data.get('score', 0)), grade=grade, confidence=float(data.get('confidence', 0.5)), price_factor=float(data.get('price_factor', CONDITION_PRICE_FACTORS[condition])), details=details, component_scores=component_scores)
         except Exception as e:
             logger.error(f"Failed to parse LLM response: {e}")
             return ConditionScore(overall_score=0.0, grade=ConditionGrade.GOOD, confidence=0.0, price_factor=0.5, details={'summary': 'Assessment failed.'}, component_scores={})
 
 @functions_framework.cloud_event
 def assess_condition_handler(cloud_event: Any):
+    result = run_coroutine(_async_assess_condition_handler(cloud_event))
+    # CPU is throttled after the response: flush the outbox here (the status is already committed)
+    get_outbox_relay().flush(timeout=10.0)
+    return result
+
+async def _async_assess_condition_handler(cloud_event: Any):
+    """Shared handler for Cloud Function and worker mode."""
     try:
         message_data = base64.b64decode(cloud_event.data["message"]["data"]).decode('utf-8')
         message_json = json.loads(message_data)
@@ -300,7 +331,7 @@ def assess_condition_handler(cloud_event: Any):
         raw_images = message_json.get('image_urls', [])
         images_list = [{"gcs_uri": img} for img in raw_images if isinstance(img, str)]
         metadata = message_json.get('metadata', {})
-        asyncio.run(process_assessment(user_id, book_id, images_list, metadata))
+        await process_assessment(user_id, book_id, images_list, metadata)
         return 'OK', 200
     except Exception as e:
         logger.error(f"Error: {e}")
@@ -343,9 +374,11 @@ async def process_assessment(user_id: str, book_id: str, images: List[Dict], met
     try:
         assessor = VertexAIConditionAssessor(user_id=user_id)
         condition_score = await assessor.assess_book_condition(images, metadata)
-        assessment_data = {'book_id': book_id, 'uid': user_id, 'overall_score': condition_score.overall_score, 'grade': condition_score.grade.value, 'confidence': condition_score.confidence, 'component_scores': condition_score.component_scores, 'details': condition_score.details, 'price_factor': condition_score.price_factor, 'timestamp': datetime.utcnow().isoformat(), 'agent_version': '2.0.0'}
+        assessment_data = {'book_id': book_id, 'uid': user_id, 'overall_score': condition_score.overall_score, 'grade': condition_score.grade.value, 'confidence': condition_score.confidence, 'component_scores': condition_score.component_scores, 'details': condition_score.details, 'price_factor': condition_score.price_factor, 'usage': condition_score.usage, 'timestamp': datetime.utcnow().isoformat(), 'agent_version': '2.0.0'}
         db.collection('users', user_id, 'condition_assessments').document(book_id).set(assessment_data)
-        update_book(user_id, book_id, {'status': 'condition_assessed', 'ai_condition_grade': condition_score.grade.value, 'ai_condition_score': condition_score.overall_score, 'condition_assessed_at': datetime.utcnow().isoformat(), 'price_factor': condition_score.price_factor})
+        # Completion event goes into the same batch as the status (outbox) and is published asynchronously
+        image_urls = [img.get('gcs_uri') or img.get('imageUrl') for img in images]
+        update_book(user_id, book_id, {'status': 'condition_assessed', 'ai_condition_grade': condition_score.grade.value, 'ai_condition_score': condition_score.overall_score, 'condition_assessed_at': datetime.utcnow().isoformat(), 'price_factor': condition_score.price_factor}, events=completion_events(user_id, book_id, image_urls))
         
         # Robust update of request status
         try:
@@ -356,10 +389,6 @@ async def process_assessment(user_id: str, book_id: str, images: List[Dict], met
                 logger.warning(f"⚠️ Request document not found, skipping status update: {book_id}")
         except Exception as e:
             logger.error(f"Error updating request status: {e}")
-
-        # Extract image URLs for the completion event
-        image_urls = [img.get('gcs_uri') or img.get('imageUrl') for img in images]
-        await publish_completion_event(user_id, book_id, image_urls)
     except Exception as e:
         logger.error(f"Error: {e}")
         try:
@@ -368,21 +397,37 @@ async def process_assessment(user_id: str, book_id: str, images: List[Dict], met
         except: pass
         update_book(user_id, book_id, {'status': 'condition_failed', 'error_message': str(e)})
 
-async def publish_completion_event(user_id: str, book_id: str, image_urls: List[str] = None) -> None:
-    if not PROJECT_ID:
-        logger.error("❌ No PROJECT_ID found, cannot publish completion event!")
-        return
-    # Updated topic to trigger Strategist Agent explicitly
-    topic_path = publisher.topic_path(PROJECT_ID, 'condition-assessment-completed')
-    message = {
+def completion_message(user_id: str, book_id: str, image_urls: List[str] = None) -> Dict[str, Any]:
+    return {
         'bookId': book_id,
         'uid': user_id,
         'status': 'condition_assessed',
         'imageUrls': image_urls or [],
         'timestamp': datetime.utcnow().isoformat()
     }
+
+def completion_events(user_id: str, book_id: str, image_urls: List[str] = None) -> List[OutboxEvent]:
+    """Completion event for the outbox (empty without PROJECT_ID)."""
+    if not PROJECT_ID:
+        logger.error("❌ No PROJECT_ID found, cannot publish completion event!")
+        return []
+    # Updated topic to trigger Strategist Agent explicitly
+    return [OutboxEvent(topic_path(PROJECT_ID, 'condition-assessment-completed'), completion_message(user_id, book_id, image_urls))]
+
+async def publish_completion_event(user_id: str, book_id: str, image_urls: List[str] = None) -> None:
+    """Direct publish without a status change (idempotency path: book was already assessed)."""
+    if not PROJECT_ID:
+        logger.error("❌ No PROJECT_ID found, cannot publish completion event!")
+        return
+    completed_topic_path = topic_path(PROJECT_ID, 'condition-assessment-completed')
+    message = completion_message(user_id, book_id, image_urls)
     try:
-        publisher.publish(topic_path, data=json.dumps(message).encode('utf-8')).result()
+        get_publisher_client().publish(completed_topic_path, data=json.dumps(message).encode('utf-8')).result()
         logger.info(f"📤 Published completion event for {book_id} to topic 'condition-assessment-completed'")
     except Exception as e:
         logger.error(f"❌ Failed to publish: {e}")
+
+
+if __name__ == "__main__":
+    # Worker mode: streaming pull on PUBSUB_SUBSCRIPTION instead of Cloud Function
+    run_worker(_async_assess_condition_handler)
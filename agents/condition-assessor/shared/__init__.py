@@ -1 +0,0 @@
-"""Shared modules for the book management system."""
\ No newline at end of file
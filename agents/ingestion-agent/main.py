@@ -1,17 +1,32 @@
 import os
 import json
-import base64
 import asyncio
+import base64
 import logging
 import functions_framework
 from typing import Any
-from google.cloud import pubsub_v1
+from google.api_core.exceptions import FailedPrecondition
 from google.cloud import firestore
 
 # Imports aus der Shared Library
-from shared.simplified_ingestion.models import BookIngestionRequest
-from shared.simplified_ingestion.core import ingest_book_with_retry, IngestionException
+from shared.clients import LazyClient, topic_path
+from shared.firestore.outbox import OutboxEvent, commit_with_events, get_outbox_relay
+from shared.llm.hedging import hedging_summary
+from shared.runtime import run_coroutine, run_worker
+from shared.simplified_ingestion.models import BookIngestionRequest, EarlyIdentification
+from shared.simplified_ingestion.core import ingest_book_with_retry, early_identification_covers, IngestionException
+from shared.simplified_ingestion.cascade import get_cascade_stats
 from shared.simplified_ingestion.config import IngestionConfig
+from shared.simplified_ingestion.duplicates import (
+    PerceptualHashIndex,
+    FirestoreHashStore,
+    configure_duplicate_index,
+)
+from shared.simplified_ingestion.isbn import (
+    IsbnCatalog,
+    FirestoreIsbnStore,
+    configure_isbn_catalog,
+)
 
 # Konfiguriere Logging
 logging.basicConfig(level=logging.INFO)
@@ -41,39 +56,77 @@ if model_env:
     INGESTION_CONFIG = IngestionConfig(enable_grounding=True, model=model_env)
 else:
     INGESTION_CONFIG = IngestionConfig(enable_grounding=True)
+# Streaming: Preisrecherche startet, sobald ISBN bzw. Titel/Autor im Stream stehen
+INGESTION_CONFIG.enable_streaming = os.environ.get("INGESTION_STREAMING", "true").lower() != "false"
+# Modell-Kaskade: schnelles Modell ohne Grounding zuerst, Eskalation auf das konfigurierte Modell bei Zweifel
+INGESTION_CONFIG.enable_cascade = os.environ.get("INGESTION_CASCADE", "false").lower() == "true"
+INGESTION_CONFIG.cascade_fast_model = os.environ.get("INGESTION_FAST_MODEL", INGESTION_CONFIG.cascade_fast_model)
+# Hedged Requests: Zusatzanfrage (optional in zweiter Region), wenn ein Call ungewöhnlich lange dauert
+INGESTION_CONFIG.enable_hedging = os.environ.get("INGESTION_HEDGING", "false").lower() == "true"
+INGESTION_CONFIG.hedge_region = os.environ.get("INGESTION_HEDGE_REGION") or None
 
-# Firestore Client Initialisierung (dynamisch)
-try:
-    project_id = get_project_id()
-    db = firestore.Client(project=project_id)
-except Exception as e:
-    logger.critical(f"Failed to initialize Firestore client: {e}")
-    raise
+# Clients werden erst beim ersten Event gebaut (Cold Start ohne Client-Setup)
+_db = LazyClient(lambda: firestore.Client(project=get_project_id()), "Firestore client")
 
 def get_firestore_client():
-    return db
-
-# Initialize Pub/Sub client
-try:
-    project_id = get_project_id()
-    publisher = pubsub_v1.PublisherClient()
-    # FIX: Korrektes Topic für Condition Assessor (gemäß Eventarc Trigger)
-    condition_topic_path = publisher.topic_path(project_id, "condition-assessment-jobs")
-    # NEU: Topic für Price Research
-    price_topic_path = publisher.topic_path(project_id, "price-research-requests")
-    logger.info(f"Pub/Sub publisher initialized.")
-    logger.info(f"Condition Topic: {condition_topic_path}")
-    logger.info(f"Price Topic: {price_topic_path}")
-except Exception as e:
-    logger.critical(f"Failed to initialize Pub/Sub publisher: {e}", exc_info=True)
-    # Fail fast: Ohne Pub/Sub können wir nicht arbeiten
-    raise
+    return _db.get()
+
+
+def _configure_ingestion_state() -> bool:
+    """Einmalige Konfiguration der prozessweiten Indizes (braucht Firestore)."""
+    db = get_firestore_client()
+    # Duplikat-Index über Cover-Hashes: in Firestore persistiert, wird beim ersten Buch lazy geladen
+    configure_duplicate_index(PerceptualHashIndex(
+        max_distance=INGESTION_CONFIG.duplicate_max_distance,
+        store=FirestoreHashStore(db),
+    ))
+    # Lokaler ISBN-Katalog für den Barcode-Fast-Path (Read-Through auf Firestore)
+    configure_isbn_catalog(IsbnCatalog(store=FirestoreIsbnStore(db)))
+    return True
+
+_ingestion_state = LazyClient(_configure_ingestion_state, "Ingestion state (duplicate index, ISBN catalog)")
+
+# Topic-Pfade brauchen keinen Client; ohne GCP_PROJECT scheitert der Import weiterhin sofort
+project_id = get_project_id()
+# FIX: Korrektes Topic für Condition Assessor (gemäß Eventarc Trigger)
+condition_topic_path = topic_path(project_id, "condition-assessment-jobs")
+# NEU: Topic für Price Research
+price_topic_path = topic_path(project_id, "price-research-requests")
+logger.info(f"Condition Topic: {condition_topic_path}")
+logger.info(f"Price Topic: {price_topic_path}")
+
+def _write_final_result(db: Any, book_ref: Any, final_data: dict, events: list, attempts: int = 3) -> None:
+    """
+    Schreibt das Ingestion-Ergebnis samt Outbox-Events, ohne einen 'priced' Status zu überschreiben.
+
+    Der frühe Preis-Job kann vor der Ingestion fertig sein. Der Status wird dann
+    weggelassen; die Precondition auf update_time fängt einen Preis-Write zwischen
+    Lesen und Schreiben ab (dann neu lesen).
+    """
+    for attempt in range(attempts):
+        snapshot = book_ref.get()
+        data = dict(final_data)
+        if snapshot.exists and (snapshot.to_dict() or {}).get('status') == 'priced':
+            data.pop('status', None)
+        batch = db.batch()
+        option = db.write_option(last_update_time=snapshot.update_time) if snapshot.exists else None
+        batch.update(book_ref, data, option=option)
+        try:
+            commit_with_events(batch, events, db=db)
+            return
+        except FailedPrecondition:
+            if attempt == attempts - 1:
+                raise
+            logger.info(f"🔁 Book {book_ref.id} changed while writing the ingestion result, retrying")
+
 
 @functions_framework.cloud_event
 def ingestion_analysis_agent(cloud_event: Any):
     """Wrapper für die Cloud Function."""
     try:
-        asyncio.run(_async_ingestion_analysis_agent(cloud_event))
+        run_coroutine(_async_ingestion_analysis_agent(cloud_event))
+        # Nach der Antwort wird die CPU gedrosselt: Outbox hier leeren (der Status ist bereits committed)
+        get_outbox_relay().flush(timeout=10.0)
         return "OK", 200
     except (json.JSONDecodeError, ValueError, KeyError) as e:
         # Permanente Fehler (Datenformat falsch, Felder fehlen) -> Kein Retry
@@ -105,6 +158,8 @@ async def _async_ingestion_analysis_agent(cloud_event: Any) -> None:
 
     logger.info(f"📨 Received Pub/Sub message - bookId: {book_id}, uid: {uid}, images: {len(image_urls)}")
     logger.info(f"Processing book {book_id} for user {uid} with {len(image_urls)} images")
+    db = get_firestore_client()
+    _ingestion_state.get()
     book_ref = db.collection('users').document(uid).collection('books').document(book_id)
 
     @firestore.transactional
@@ -125,13 +180,41 @@ async def _async_ingestion_analysis_agent(cloud_event: Any) -> None:
         logger.info(f"✅ Updated status to 'ingesting' for {book_id}")
         return True
 
+    # Firestore-Client ist synchron: alle Roundtrips im Thread, damit die im Worker-Modus
+    # geteilte Event Loop für die anderen Nachrichten frei bleibt
     transaction = db.transaction()
-    should_process = check_and_update_status(transaction)
+    should_process = await asyncio.to_thread(check_and_update_status, transaction)
 
     if not should_process:
         return
 
 
+    # Frühe Identifikation, mit der die Preisrecherche bereits gestartet wurde (leer ohne frühen Trigger)
+    early_identity = []
+
+    async def publish_early_price_research(event: EarlyIdentification) -> None:
+        """Startet die Preisrecherche, bevor die Ingestion fertig ist."""
+        if not price_topic_path:
+            return
+        # Das Buch-Dokument ist noch nicht geschrieben: die Metadaten reisen in der Nachricht mit
+        payload = {
+            "bookId": book_id,
+            "uid": uid,
+            "isbn": event.isbn,
+            "title": event.title or '',
+            "author": event.author or '',
+            "publisher": event.publisher,
+            "edition": event.edition,
+            "early": True,
+        }
+        # Über die Outbox wie alle Folge-Events (kein Statuswechsel, nur die Outbox-Einträge)
+        await asyncio.to_thread(commit_with_events, db.batch(), [OutboxEvent(price_topic_path, payload)], db=db)
+        early_identity.append(event)
+        logger.info(
+            f"⚡ Queued early price research job for book {book_id} "
+            f"after {event.elapsed_ms:.0f}ms ({event.source}, ISBN: {bool(event.isbn)})"
+        )
+
     try:
         request = BookIngestionRequest(
             book_id=book_id,
@@ -141,7 +224,11 @@ async def _async_ingestion_analysis_agent(cloud_event: Any) -> None:
         
         # Aufruf der Shared Library Logik
         # Hier wird jetzt Search Grounding aktiv genutzt (via INGESTION_CONFIG)
-        result = await ingest_book_with_retry(request, config=INGESTION_CONFIG)
+        result = await ingest_book_with_retry(
+            request,
+            config=INGESTION_CONFIG,
+            on_early_identification=publish_early_price_research,
+        )
         
         if result.book_data:
             final_data = {
@@ -163,51 +250,55 @@ async def _async_ingestion_analysis_agent(cloud_event: Any) -> None:
                 "_metadata": {
                     "processing_time_ms": result.processing_time_ms,
                     "simplified_ingestion": True,
+                    "duplicate_of": result.duplicate_of,
+                    "barcode_isbn": result.barcode_isbn,
                     "grounding_metadata": result.grounding_metadata.model_dump() if result.grounding_metadata else None,
+                    "llm_usage": result.usage.model_dump() if result.usage else None,
+                    "model_tier": result.model_tier,
                     "library_version": "v3.0.0" 
                 }
             }
-            book_ref.update(final_data)
-            logger.info(f"Simplified ingestion processed for book {book_id} with status {final_data['status']}")
-
-            if publisher:
-                # 1. Trigger Condition Assessment
-                if condition_topic_path:
-                    try:
-                        payload = {"book_id": book_id, "user_id": uid, "image_urls": image_urls, "metadata": final_data}
-                        data = json.dumps(payload).encode("utf-8")
-                        publisher.publish(condition_topic_path, data)
-                        logger.info(f"✅ Successfully published condition assessment job for book {book_id}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to trigger condition assessment for book {book_id}: {e}")
-                
-                # 2. Trigger Price Research (auch OHNE ISBN als Fallback via Titel/Autor)
-                isbn = final_data.get('isbn')
-                title = final_data.get('title', '')
-                authors = final_data.get('authors', [])
-                author_str = authors[0] if authors else ''
-                
-                # Trigger, if we have an ISBN OR (Title AND Author)
-                if price_topic_path and (isbn or (title and author_str)):
-                    try:
-                        payload = {
-                            "bookId": book_id, 
-                            "uid": uid, 
-                            "isbn": isbn, 
-                            "title": title,
-                            "author": author_str
-                        }
-                        data = json.dumps(payload).encode("utf-8")
-                        publisher.publish(price_topic_path, data)
-                        logger.info(f"✅ Successfully published price research job for book {book_id} (ISBN: {bool(isbn)})")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to trigger price research for book {book_id}: {e}")
-            else:
-                logger.error("❌ Pub/Sub publisher not initialized.")
+            # Folge-Events landen im selben Batch wie der Status (Outbox) und werden asynchron publiziert
+            events = []
+
+            # 1. Trigger Condition Assessment
+            if condition_topic_path:
+                payload = {"book_id": book_id, "user_id": uid, "image_urls": image_urls, "metadata": final_data}
+                events.append(OutboxEvent(condition_topic_path, payload))
+
+            # 2. Trigger Price Research (auch OHNE ISBN als Fallback via Titel/Autor)
+            isbn = final_data.get('isbn')
+            title = final_data.get('title', '')
+            authors = final_data.get('authors', [])
+            author_str = authors[0] if authors else ''
+
+            # Früher Trigger und das finale Ergebnis bringt nichts Neues -> kein zweiter Job
+            if early_identity and early_identification_covers(early_identity[0], result.book_data):
+                logger.info(f"⏭️ Price research for book {book_id} already started early, skipping final trigger")
+            # Trigger, if we have an ISBN OR (Title AND Author)
+            elif price_topic_path and (isbn or (title and author_str)):
+                payload = {
+                    "bookId": book_id,
+                    "uid": uid,
+                    "isbn": isbn,
+                    "title": title,
+                    "author": author_str
+                }
+                events.append(OutboxEvent(price_topic_path, payload))
+
+            await asyncio.to_thread(_write_final_result, db, book_ref, final_data, events)
+            logger.info(
+                f"Simplified ingestion processed for book {book_id} with status {final_data['status']} "
+                f"({len(events)} follow-up events queued)"
+            )
+            if INGESTION_CONFIG.enable_cascade:
+                logger.info(f"🪜 Cascade stats: {json.dumps(get_cascade_stats().summary())}")
+            if INGESTION_CONFIG.enable_hedging:
+                logger.info(f"🏁 Hedging stats: {json.dumps(hedging_summary())}")
 
         else:
             logger.warning(f"Ingestion for book {book_id} failed: Gemini returned no book data.")
-            book_ref.update({
+            await asyncio.to_thread(book_ref.update, {
                 'status': 'analysis_failed',
                 'error_message': 'Gemini returned no book data.',
                 'error_type': 'INGESTION_NO_DATA',
@@ -215,11 +306,16 @@ async def _async_ingestion_analysis_agent(cloud_event: Any) -> None:
 
     except IngestionException as e:
         logger.error(f"Simplified ingestion failed for book {book_id}: {e.error.error_message}")
-        book_ref.update({
+        await asyncio.to_thread(book_ref.update, {
             'status': 'analysis_failed',
             'error_message': e.error.error_message,
             'error_type': e.error.error_type,
         })
     except Exception as e:
         logger.error(f"Unexpected error for book {book_id}: {e}", exc_info=True)
-        book_ref.update({'status': 'analysis_failed', 'error_message': str(e)})
+        await asyncio.to_thread(book_ref.update, {'status': 'analysis_failed', 'error_message': str(e)})
+
+
+if __name__ == "__main__":
+    # Worker-Modus: Streaming Pull auf PUBSUB_SUBSCRIPTION statt Cloud Function
+    run_worker(_async_ingestion_analysis_agent)
@@ -1,3 +0,0 @@
-from .orchestrator import PriceResearchOrchestrator
-
-__all__ = ["PriceResearchOrchestrator"]
@@ -1,55 +1,103 @@
+import asyncio
 import base64
 import json
 import os
-import asyncio
 import logging
 import functions_framework
 from cloudevents.http import CloudEvent
 from shared.firestore.client import get_firestore_client
 from shared.price_research.orchestrator import PriceResearchOrchestrator
-from shared.apis.price_grounding import PriceGroundingClient
+from shared.apis.price_grounding import PriceGroundingClient, load_price_grounding_config_from_env
+from shared.price_research.market_cache import FirestoreMarketDataStore, MarketDataCache, load_market_cache_config_from_env
+from shared.price_research.single_flight import FirestoreLeaseStore
+from shared.price_research.batch_pricing import load_batch_pricing_config_from_env
+from shared.clients import LazyClient
+from shared.runtime import run_coroutine, run_worker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize components once (outside the handler for warm starts)
-db = get_firestore_client()
+def _build_orchestrator() -> PriceResearchOrchestrator:
+    grounding_client = PriceGroundingClient(config=load_price_grounding_config_from_env())
+    db = get_firestore_client()
+    # Marktdaten sind mandantenübergreifend: LRU im Prozess, Read-Through auf Firestore market_data,
+    # gleichzeitige Suchen nach demselben Buch laufen nur einmal (auch über Instanzen, per Lease)
+    market_cache = MarketDataCache(store=FirestoreMarketDataStore(db), config=load_market_cache_config_from_env(), leases=FirestoreLeaseStore(db))
+    return PriceResearchOrchestrator(db, grounding_client, market_cache=market_cache)
 
-async def run_price_research(isbn: str, title: str, book_id: str, uid: str):
-    """Async wrapper to ensure components are created in the correct loop."""
-    grounding_client = PriceGroundingClient()
-    price_orchestrator = PriceResearchOrchestrator(db, grounding_client)
-    
-    # Der Condition-Assessor sollte idealerweise vorher gelaufen sein
-    condition_report = None
+
+# Einmal pro Prozess: alle Handler laufen auf derselben persistenten Event Loop (shared.runtime),
+# die async Clients samt offenen Verbindungen überleben so warme Aufrufe
+_orchestrator = LazyClient(_build_orchestrator, "PriceResearchOrchestrator")
+
+def _load_condition_reports(uid: str, book_ids: list) -> dict:
+    """Condition Reports des Condition Assessors in einem Firestore-Roundtrip (book_id -> Report, fehlende fehlen)."""
+    db = get_firestore_client()
+    assessments = db.collection('users').document(uid).collection('condition_assessments')
     try:
-        doc = db.collection('users').document(uid).collection('condition_assessments').document(book_id).get()
-        if doc.exists:
-            condition_report = doc.to_dict()
+        return {doc.id: doc.to_dict() for doc in db.get_all([assessments.document(book_id) for book_id in book_ids]) if doc.exists}
     except Exception as e:
-        logger.warning(f"Konnte Condition Report nicht laden: {e}")
+        logger.warning(f"Konnte Condition Reports nicht laden: {e}")
+        return {}
+
+async def run_price_research(isbn: str, title: str, book_id: str, uid: str, metadata: dict = None):
+    """Lädt den Condition Report und startet die Preisrecherche (metadata=None: Metadaten aus dem Buch-Dokument)."""
+    price_orchestrator = _orchestrator.get()
+    
+    # Der Condition-Assessor sollte idealerweise vorher gelaufen sein
+    # Firestore-Client ist synchron: im Thread, damit die geteilte Event Loop frei bleibt
+    condition_report = (await asyncio.to_thread(_load_condition_reports, uid, [book_id])).get(book_id)
 
     await price_orchestrator.research_and_price(
         isbn=isbn,
         title=title,
         book_id=book_id,
         uid=uid,
-        condition_report=condition_report
+        condition_report=condition_report,
+        metadata=metadata,
     )
 
+async def run_batch_price_research(uid: str, books: list):
+    """Bepreist einen ganzen Bestand (Nachricht mit 'books') mit gepackten KI-Analysen."""
+    books = [book for book in books if book.get('bookId')]
+    # Alle Reports mit einem get_all statt einem Roundtrip pro Buch
+    reports = await asyncio.to_thread(_load_condition_reports, uid, [book['bookId'] for book in books])
+    batch = [
+        {
+            'book_id': book['bookId'],
+            'uid': uid,
+            'isbn': book.get('isbn'),
+            'title': book.get('title', ''),
+            'condition_report': reports.get(book['bookId']),
+        }
+        for book in books
+    ]
+    results = await _orchestrator.get().research_and_price_batch(batch, config=load_batch_pricing_config_from_env())
+    logger.info(f"✅ Batch price research completed: {len(results)}/{len(batch)} books priced")
+
 @functions_framework.cloud_event
 def price_research_handler(cloud_event: CloudEvent) -> None:
     """
     Triggered by: projects/{project}/topics/price-research-requests
     """
+    run_coroutine(_async_price_research_handler(cloud_event))
+
+async def _async_price_research_handler(cloud_event: CloudEvent) -> None:
+    """Gemeinsamer Handler für Cloud Function und Worker-Modus."""
     try:
         # Decode Pub/Sub message
         message_bytes = base64.b64decode(cloud_event.data["message"]["data"])
         message_data = json.loads(message_bytes.decode('utf-8'))
         
-        book_id = message_data.get('bookId')
         uid = message_data.get('uid')
+        if uid and message_data.get('books'):
+            # Bulk-Lot (z.B. Nachlass): {uid, books: [{bookId, isbn, title}, ...]}
+            logger.info(f"🚀 Starting batch price research for {len(message_data['books'])} books")
+            await run_batch_price_research(uid, message_data['books'])
+            return
+
+        book_id = message_data.get('bookId')
         isbn = message_data.get('isbn')
         title = message_data.get('title', '')
         
@@ -57,17 +105,35 @@ def price_research_handler(cloud_event: CloudEvent) -> None:
             logger.error(f"Missing required data in message: {message_data}")
             return
 
-        logger.info(f"🚀 Starting background price research for '{title}' (Book: {book_id})")
+        metadata = None
+        if message_data.get('early'):
+            # Früher Trigger der Ingestion: das Buch-Dokument ist evtl. noch nicht geschrieben,
+            # daher die Metadaten aus der Nachricht statt aus Firestore
+            metadata = {
+                'isbn': isbn,
+                'title': title,
+                'author': message_data.get('author') or 'Unknown Author',
+                'publisher': message_data.get('publisher'),
+                'year': message_data.get('year'),
+                'edition': message_data.get('edition'),
+            }
+
+        logger.info(f"🚀 Starting background price research for '{title}' (Book: {book_id}, early: {metadata is not None})")
         
-        # Run async logic
-        asyncio.run(run_price_research(
+        await run_price_research(
             isbn=isbn,
             title=title,
             book_id=book_id,
-            uid=uid
-        ))
+            uid=uid,
+            metadata=metadata,
+        )
         
         logger.info(f"✅ Background price research completed for {book_id}")
         
     except Exception as e:
         logger.error(f"❌ Error in price_research_handler: {str(e)}", exc_info=True)
+
+
+if __name__ == "__main__":
+    # Worker-Modus: Streaming Pull auf PUBSUB_SUBSCRIPTION statt Cloud Function
+    run_worker(_async_price_research_handler)
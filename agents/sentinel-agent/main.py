@@ -6,8 +6,9 @@ from typing import Dict, Any
 
 import functions_framework
 
+from shared.clients import get_publisher_client, topic_path as build_topic_path
 from shared.firestore.client import get_firestore_client
-from google.cloud import pubsub_v1
+from shared.runtime import run_worker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,8 +57,13 @@ def sentinel_agent(cloud_event: Any) -> None:
     book_ref.update({"status": "sold"})
 
     # Publish delist message
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = publisher.topic_path(os.environ['GCP_PROJECT'], 'delist-book-everywhere')
+    publisher = get_publisher_client()
+    topic_path = build_topic_path(os.environ['GCP_PROJECT'], 'delist-book-everywhere')
     new_message = json.dumps({"bookId": book_id, "uid": uid}).encode('utf-8')
     future = publisher.publish(topic_path, new_message)
     future.result()
+
+
+if __name__ == "__main__":
+    # Worker-Modus: Streaming Pull auf PUBSUB_SUBSCRIPTION statt Cloud Function (sync Handler laufen in Threads)
+    run_worker(sentinel_agent)
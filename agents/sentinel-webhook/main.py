@@ -3,7 +3,8 @@ import logging
 import json
 from typing import Dict, Any, Tuple
 from flask import Flask, request, jsonify
-from google.cloud import pubsub_v1
+
+from shared.clients import get_publisher_client, topic_path as build_topic_path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -61,8 +62,8 @@ def ebay_webhook() -> Tuple[Dict[str, Any], int]:
         return jsonify({"status": "error", "message": "Missing itemId or userId in payload"}), 400
 
     # Publish a structured message
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = publisher.topic_path(os.environ['GCP_PROJECT'], 'sale-notification-received')
+    publisher = get_publisher_client()
+    topic_path = build_topic_path(os.environ['GCP_PROJECT'], 'sale-notification-received')
     
     message_data = {
         "bookId": book_id,
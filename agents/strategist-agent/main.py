@@ -4,19 +4,23 @@ import os
 import sys
 import asyncio
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 import functions_framework
 from cloudevents.http import CloudEvent
-from google.cloud import pubsub_v1
 
 # PATH HACK: Ensure local imports work in Cloud Functions
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from shared.clients import get_publisher_client
 from shared.firestore.client import get_firestore_client, update_book, get_book
 from shared.price_research.orchestrator import PriceResearchOrchestrator
-from shared.apis.price_grounding import PriceGroundingClient
+from shared.apis.price_grounding import PriceGroundingClient, load_price_grounding_config_from_env
+from shared.price_research.market_cache import FirestoreMarketDataStore, MarketDataCache, load_market_cache_config_from_env
+from shared.price_research.single_flight import FirestoreLeaseStore
+from shared.runtime import run_coroutine, run_worker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,8 +34,13 @@ db = None
 publisher = None
 orchestrator = None
 PROJECT_ID = None
+_init_lock = threading.Lock()
 
 def init_globals():
+    with _init_lock:
+        _init_globals()
+
+def _init_globals():
     global db, publisher, orchestrator, PROJECT_ID
     
     if PROJECT_ID is None:
@@ -44,22 +53,27 @@ def init_globals():
         logger.info(f"✅ Firestore initialized for {PROJECT_ID}")
 
     if publisher is None:
-        publisher = pubsub_v1.PublisherClient()
+        publisher = get_publisher_client()
         
     if orchestrator is None:
         # Wir nutzen Gemini 2.5 Flash für schnelle Analyse, aber Pro für Suche (via Grounding Client Default)
         # Der Orchestrator managed das intern.
-        grounding_client = PriceGroundingClient(project_id=PROJECT_ID)
+        grounding_client = PriceGroundingClient(project_id=PROJECT_ID, config=load_price_grounding_config_from_env())
         orchestrator = PriceResearchOrchestrator(
             db=db, 
             grounding_client=grounding_client,
-            project_id=PROJECT_ID
+            project_id=PROJECT_ID,
+            market_cache=MarketDataCache(store=FirestoreMarketDataStore(db), config=load_market_cache_config_from_env(), leases=FirestoreLeaseStore(db)),
         )
         logger.info("✅ PriceResearchOrchestrator initialized")
 
 @functions_framework.cloud_event
 def strategist_agent(cloud_event: CloudEvent) -> Any:
     """Entry Point für Cloud Function."""
+    return run_coroutine(_async_strategist_agent(cloud_event))
+
+async def _async_strategist_agent(cloud_event: Any) -> Any:
+    """Gemeinsamer Handler für Cloud Function und Worker-Modus."""
     try:
         init_globals()
         
@@ -71,8 +85,7 @@ def strategist_agent(cloud_event: CloudEvent) -> Any:
         pubsub_message = base64.b64decode(cloud_event.data["message"]["data"]).decode('utf-8')
         event_data = json.loads(pubsub_message)
         
-        # Async Loop starten
-        asyncio.run(process_pricing_request(event_data))
+        await process_pricing_request(event_data)
         return 'OK', 200
         
     except Exception as e:
@@ -169,15 +182,14 @@ async def _acquire_lock(uid: str, book_id: str) -> bool:
         })
         return True
 
-    return set_lock_in_transaction(transaction, book_ref)
+    # Im Worker-Modus teilen sich viele Nachrichten die Loop: blockierende Firestore Calls in einen Thread
+    return await asyncio.to_thread(set_lock_in_transaction, transaction, book_ref)
 
 async def _get_condition_data(uid: str, book_id: str) -> Optional[Dict[str, Any]]:
     try:
-        # Asynchron wäre besser, aber Client ist sync. Wir wrappen es nicht extra, da Cloud Run schnell ist.
-        # Oder doch? Firestore sync call blockiert Event Loop.
-        # Aber hier ist es okay, da wir eh nur einen Request pro Instanz/Thread haben (Concurreny 1 default).
+        # Sync Client: im Worker-Modus laufen viele Nachrichten auf einer Loop, daher in einem Thread
         doc_ref = db.collection('users').document(uid).collection('condition_assessments').document(book_id)
-        doc = doc_ref.get()
+        doc = await asyncio.to_thread(doc_ref.get)
         return doc.to_dict() if doc.exists else None
     except Exception as e:
         logger.error(f"Error fetching condition: {e}")
@@ -192,3 +204,8 @@ async def _publish_listing_request(uid: str, book_id: str) -> None:
         logger.info(f"📤 Published listing request for {book_id}")
     except Exception as e:
         logger.error(f"Failed to publish listing: {e}")
+
+
+if __name__ == "__main__":
+    # Worker-Modus: Streaming Pull auf PUBSUB_SUBSCRIPTION statt Cloud Function
+    run_worker(_async_strategist_agent)
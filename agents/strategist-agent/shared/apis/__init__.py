@@ -1,3 +0,0 @@
-from .price_grounding import PriceGroundingClient, PriceData
-
-__all__ = ["PriceGroundingClient", "PriceData"]
@@ -8,8 +8,6 @@ from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 import firebase_admin
 from firebase_admin import credentials, auth
-from google.cloud import storage, pubsub_v1
-import json
 import requests
 import google.auth
 from google.auth.transport import requests as google_requests
@@ -20,6 +18,7 @@ import traceback
 # Load environment variables
 load_dotenv()
 
+def _repair_environment():
     """
     Repairs environment variables globally in os.environ before any clients are initialized.
     This fixes the persistent Pub/Sub topic path error caused by concatenated env vars.
@@ -51,11 +50,18 @@ load_dotenv()
                 os.environ["GCP_PROJECT_ID"] = val
 
 
+_repair_environment()
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from shared.firestore.client import update_book, get_book, set_book, create_condition_assessment_request, delete_book
+from shared.firestore.outbox import OutboxEvent
+from shared.clients import LazyClient, get_storage_client, topic_path as build_topic_path
+from shared.conditions import ABAA_GRADES, ABAA_PRICE_FACTORS, normalize_condition
+
+DEFAULT_OVERRIDE_PRICE_FACTOR = 0.7
 
 app = Flask(__name__)
 
@@ -123,23 +129,16 @@ elif os.path.exists(service_account_path):
 else:
     print("ℹ️  No explicit key file found. Relying on Standard ADC (gcloud auth application-default login) or Metadata Server.")
 
-# Initialize Firebase Admin SDK
-try:
+# Firebase Admin SDK, Storage and Pub/Sub are initialized lazily on first use
+# (shared.clients): health checks and cold starts don't pay for them.
+def _initialize_firebase():
     # ApplicationDefault automatically picks up GOOGLE_APPLICATION_CREDENTIALS or ADC
     cred = credentials.ApplicationDefault()
-    firebase_admin.initialize_app(cred)
+    app_instance = firebase_admin.initialize_app(cred)
     print("✅ Firebase Admin SDK initialized with ApplicationDefault credentials")
-except Exception as e:
-    print(f"❌ Error initializing Firebase Admin SDK: {e}")
-
-# Initialize Google Cloud clients
-try:
-    # Client() automatically picks up GOOGLE_APPLICATION_CREDENTIALS or ADC
-    storage_client = storage.Client()
-    publisher = pubsub_v1.PublisherClient()
-    print("✅ Google Cloud Clients (Storage, PubSub) initialized")
-except Exception as e:
-    print(f"❌ Error initializing Google Cloud clients: {e}")
+    return app_instance
+
+_firebase_app = LazyClient(_initialize_firebase, "Firebase Admin SDK")
 
 # Get critical variables 
 project_id = os.environ.get("GCP_PROJECT")
@@ -156,15 +155,18 @@ if not bucket_name:
     raise ValueError("GCS_BUCKET_NAME environment variable not set or invalid.")
 
 topic_name = "ingestion-requests"
-topic_path = publisher.topic_path(project_id, topic_name)
+topic_path = build_topic_path(project_id, topic_name)
 
 logger.info(f"🔧 Generated topic_path: '{topic_path}'")
 
 # Condition Assessment Topic
 condition_assessment_topic = "trigger-condition-assessment"
-condition_assessment_topic_path = publisher.topic_path(project_id, condition_assessment_topic)
+condition_assessment_topic_path = build_topic_path(project_id, condition_assessment_topic)
 
-bucket = storage_client.bucket(bucket_name)
+
+def get_bucket():
+    """Upload bucket (Storage client is created on first use)."""
+    return get_storage_client().bucket(bucket_name)
 
 # LLM Manager Removal: No longer initializing UserLLMManager
 
@@ -180,6 +182,7 @@ def _get_uid_from_token():
         max_retries = 3
         for attempt in range(max_retries):
             try:
+                _firebase_app.get()
                 decoded_token = auth.verify_id_token(token_value)
                 return decoded_token['uid'], None
             except Exception as verify_error:
@@ -213,7 +216,7 @@ def upload_book():
         return jsonify({"error": "filename is required"}), 400
 
     blob_path = f"uploads/{uid}/{secure_filename(file_name)}"
-    blob = bucket.blob(blob_path)
+    blob = get_bucket().blob(blob_path)
 
     # LOGGING: Diagnose Content-Type issues
     client_content_type = request.json.get('contentType')
@@ -315,29 +318,20 @@ def start_processing():
         "title": filename,
         "created_at": datetime.datetime.utcnow().isoformat()
     }
-    set_book(uid, book_id, new_book)
-    logger.info(f"✅ Created Firestore document for book_id: {book_id} with status: pending_analysis")
-
-    # Send all fields required by the ingestion agent (uid, bookId, imageUrls)
-    message_data = json.dumps({
+    # Send all fields required by the ingestion agent (uid, bookId, imageUrls).
+    # The message is written to the outbox in the same batch as the book and published asynchronously.
+    ingestion_event = OutboxEvent(topic_path, {
         "bookId": book_id,
         "uid": uid,
         "imageUrls": gcs_uris
-    }).encode('utf-8')
-    logger.info(f"📤 Publishing to Pub/Sub with bookId: {book_id}")
-    logger.info(f"📍 Topic path: {topic_path}")
-    logger.info(f"📦 Message size: {len(message_data)} bytes")
+    })
     try:
-        future = publisher.publish(topic_path, data=message_data)
-        logger.info(f"⏳ Waiting for Pub/Sub confirmation...")
-        message_id = future.result(timeout=10.0)  # 10 second timeout
-        logger.info(f"✅ Published message with ID: {message_id}")
+        set_book(uid, book_id, new_book, events=[ingestion_event])
     except Exception as e:
-        logger.error(f"❌ Pub/Sub publish failed: {type(e).__name__}: {str(e)}")
+        logger.error(f"❌ Creating book {book_id} failed: {type(e).__name__}: {str(e)}")
         logger.error(f"📋 Full traceback:\n{traceback.format_exc()}")
-        logger.error(f"🔍 Topic path was: {topic_path}")
-        logger.error(f"🔍 Project ID: {project_id}")
-        return jsonify({"error": "Failed to publish message", "details": str(e)}), 500
+        return jsonify({"error": "Failed to start processing", "details": str(e)}), 500
+    logger.info(f"✅ Created Firestore document for book_id: {book_id} with status: pending_analysis (ingestion event queued for {topic_path})")
 
     return jsonify({"message": "Processing started", "bookId": book_id}), 202
 
@@ -373,17 +367,16 @@ def reprocess_book(book_id):
     if 'isbn' in corrected_data:
         update_payload['isbn'] = corrected_data['isbn']
         
-    update_book(uid, book_id, update_payload)
-
-    message_data = json.dumps({
+    reprocess_event = OutboxEvent(topic_path, {
         "bookId": book_id,
         "userId": uid,
         "corrected_data": corrected_data
-    }).encode('utf-8')
+    })
     try:
-        publisher.publish(topic_path, data=message_data).result()
+        update_book(uid, book_id, update_payload, events=[reprocess_event])
     except Exception as e:
-        return jsonify({"error": "Failed to publish reprocessing message"}), 500
+        logger.error(f"Error queueing reprocessing for book {book_id}: {str(e)}")
+        return jsonify({"error": "Failed to queue book for reprocessing"}), 500
 
     return jsonify({"message": "Book is being reprocessed."}), 200
 
@@ -442,23 +435,16 @@ def assess_condition():
         
         create_condition_assessment_request(uid, book_id, assessment_payload)
         
-        # Update book status to indicate assessment is in progress
-        update_book(uid, book_id, {'status': 'condition_assessment_pending'})
-
-        # Publish message to Pub/Sub for Condition Assessment Agent
-        message_data = json.dumps({
+        # Update book status to indicate assessment is in progress; the job for the
+        # Condition Assessment Agent goes through the outbox in the same batch
+        assessment_event = OutboxEvent(condition_assessment_topic_path, {
             "book_id": book_id,
             "user_id": uid,
             "image_urls": [img['gcs_uri'] for img in images],
             "metadata": enhanced_metadata
-        }).encode('utf-8')
-        
-        try:
-            publisher.publish(condition_assessment_topic_path, data=message_data).result()
-            logger.info(f"Published condition assessment job for book {book_id}")
-        except Exception as pub_error:
-            logger.error(f"Failed to publish condition assessment message: {str(pub_error)}")
-            # Continue even if Pub/Sub fails - the Firestore trigger should still work
+        })
+        update_book(uid, book_id, {'status': 'condition_assessment_pending'}, events=[assessment_event])
+        logger.info(f"Queued condition assessment job for book {book_id}")
         
         return jsonify({
             "message": "Condition assessment request created successfully.",
@@ -519,16 +505,12 @@ def override_condition():
         if not book_doc:
             return jsonify({"error": "Book not found or not authorized"}), 404
 
-        # Calculate price factor for override grade
-        grade_factors = {
-            'Fine': 1.0,
-            'Very Fine': 0.85,
-            'Good': 0.65,
-            'Fair': 0.45,
-            'Poor': 0.25
-        }
-        
-        price_factor = grade_factors.get(override_grade, 0.7)
+        # Map the grade onto the ABAA scale (also accepts German labels and typos);
+        # unknown grades keep the default factor of 0.7 as before
+        condition = normalize_condition(override_grade)
+        if condition is not None:
+            override_grade = ABAA_GRADES[condition.condition]
+        price_factor = ABAA_PRICE_FACTORS.get(override_grade, DEFAULT_OVERRIDE_PRICE_FACTOR)
 
         # Update condition assessment with override
         from shared.firestore.client import get_firestore_client
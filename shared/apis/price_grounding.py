@@ -6,8 +6,7 @@ Nutzt Vertex AI Gemini 2.5 Pro mit Search Grounding für ISBN/Titel-basierte Pre
 import os
 import json
 import logging
-import asyncio
-import re
+import time
 from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field
 # Patch aiohttp for google-genai compatibility issue
@@ -17,9 +16,15 @@ if not hasattr(aiohttp, 'ClientConnectorDNSError'):
         aiohttp.ClientConnectorDNSError = aiohttp.ClientConnectorError
     except:
         pass
-from google import genai
 from google.genai import types
 
+from shared.clients import get_genai_client
+from shared.llm.json_extraction import parse_last_json_object
+from shared.llm.usage import LLMUsage, record_llm_call
+from shared.llm.hedging import HedgePolicy, get_hedger
+from shared.llm.regions import STAGE_PRICE_GROUNDING, get_region_pool
+from shared.llm.resilience import RetryPolicy, retry_async
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -30,9 +35,28 @@ class PriceGroundingConfig:
     retry_attempts: int = 3
     retry_delay_seconds: float = 2.0
     retry_exponential_base: float = 2.0
+    # Hedged Requests: Zusatzanfrage, wenn ein Call länger als das Perzentil der letzten Calls dauert
+    enable_hedging: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_max_extra_ratio: float = 0.1
+    hedge_location: Optional[str] = None  # None = gleiche Region
 
 DEFAULT_CONFIG = PriceGroundingConfig()
 
+
+def load_price_grounding_config_from_env() -> PriceGroundingConfig:
+    """
+    PriceGroundingConfig mit Overrides aus der Umgebung.
+
+    PRICE_GROUNDING_HEDGING=true aktiviert Hedged Requests,
+    PRICE_GROUNDING_HEDGE_REGION schickt die Zusatzanfrage in eine zweite Region.
+    """
+    return PriceGroundingConfig(
+        enable_hedging=os.environ.get("PRICE_GROUNDING_HEDGING", "false").lower() == "true",
+        hedge_location=os.environ.get("PRICE_GROUNDING_HEDGE_REGION") or None,
+    )
+
 @dataclass
 class PriceData:
     """Strukturierte Preisdaten von einem Verkäufer."""
@@ -49,25 +73,40 @@ class MarketQueryResult:
     offers: List[PriceData]
     confidence_score: float
     reasoning: str
+    usage: Optional[LLMUsage] = None
+    failed: bool = False  # Suche/Parsing fehlgeschlagen (kein echtes "keine Angebote")
 
 class PriceGroundingClient:
     """Client für Gemini-basierte Preissuche mit Search Grounding."""
     
-    def __init__(self, project_id: Optional[str] = None, location: str = "us-central1", config: PriceGroundingConfig = DEFAULT_CONFIG):
+    def __init__(self, project_id: Optional[str] = None, location: Optional[str] = None, config: PriceGroundingConfig = DEFAULT_CONFIG):
         self.project_id = project_id or os.getenv("GCP_PROJECT")
+        # None = Regionen der Stufe price_grounding aus dem Region Pool (Failover bei 429)
         self.location = location
         self.config = config
         
-        # Initialisierung analog zu ingestion-agent: Versuche API Key, sonst Vertex AI
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if api_key:
-             self.client = genai.Client(api_key=api_key)
-        else:
-            self.client = genai.Client(
-                vertexai=True,
-                project=self.project_id,
-                location=self.location
-            )
+        # Eigener Client (Tests); sonst prozessweit geteilte Clients aus shared.clients
+        self._client = None
+
+    @property
+    def client(self) -> Any:
+        """GenAI Client: API Key (GOOGLE_API_KEY) wenn gesetzt, sonst Vertex AI in der bevorzugten Region."""
+        if self._client is not None:
+            return self._client
+        return get_genai_client(
+            project=self.project_id,
+            location=self.location or get_region_pool().regions_for(STAGE_PRICE_GROUNDING)[0],
+            api_key=os.environ.get("GOOGLE_API_KEY"),
+        )
+
+    @client.setter
+    def client(self, value: Any) -> None:
+        self._client = value
+
+    @property
+    def uses_region_pool(self) -> bool:
+        """Vertex AI ohne eigenen Client: Calls laufen über den Region Pool."""
+        return self._client is None and not os.environ.get("GOOGLE_API_KEY")
 
     async def search_market_prices(
         self, 
@@ -85,7 +124,7 @@ class PriceGroundingClient:
         
         # Ensure we have at least ISBN or Title+Author
         if not isbn and not title:
-            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Missing search parameters (No ISBN or Title)")
+            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Missing search parameters (No ISBN or Title)", failed=True)
 
         prompt = self._build_combined_search_prompt(
             isbn=isbn, 
@@ -128,35 +167,79 @@ class PriceGroundingClient:
 
         search_identifier = isbn if isbn else title
 
-        for attempt in range(self.config.retry_attempts + 1):
+        policy = RetryPolicy(
+            max_retries=self.config.retry_attempts,
+            base_delay_seconds=self.config.retry_delay_seconds,
+            multiplier=self.config.retry_exponential_base,
+        )
+
+        hedger = get_hedger(
+            f"gemini_price_grounding:{self.config.model}",
+            HedgePolicy(
+                enabled=self.config.enable_hedging,
+                percentile=self.config.hedge_percentile,
+                min_samples=self.config.hedge_min_samples,
+                max_extra_ratio=self.config.hedge_max_extra_ratio,
+            ),
+        )
+
+        def generate(call_client: Any) -> Any:
+            return call_client.aio.models.generate_content(
+                model=self.config.model,
+                contents=prompt,
+                config=generate_content_config
+            )
+
+        async def generate_primary() -> Any:
+            if not self.uses_region_pool:
+                return await generate(self.client)
+            return await get_region_pool().call(
+                STAGE_PRICE_GROUNDING,
+                generate,
+                regions=[self.location] if self.location else None,
+                project=self.project_id,
+                description=f"Grounding search {search_identifier}",
+            )
+
+        hedge = None
+        if self.config.enable_hedging and self.config.hedge_location and self.uses_region_pool:
+            hedge_client = get_region_pool().client(self.config.hedge_location, project=self.project_id)
+            hedge = lambda: generate(hedge_client)
+
+        async def attempt() -> Tuple[Any, Optional[LLMUsage]]:
+            call_start = time.perf_counter()
             try:
-                if attempt > 0:
-                    logger.info(f"Retrying search for {search_identifier} (Attempt {attempt}/{self.config.retry_attempts})")
-                
-                # Use aio for async call
-                response = await self.client.aio.models.generate_content(
-                    model=self.config.model,
-                    contents=prompt,
-                    config=generate_content_config
+                response = await hedger.call(generate_primary, hedge=hedge)
+            except Exception:
+                record_llm_call(
+                    "gemini_price_grounding", self.config.model, None, (time.perf_counter() - call_start) * 1000, success=False
                 )
-                
-                return self._process_response(response, search_identifier)
-
-            except Exception as e:
-                is_retryable = '429' in str(e) or 'quota' in str(e).lower() or 'resource exhausted' in str(e).lower()
-                if not is_retryable or attempt >= self.config.retry_attempts:
-                    logger.error(f"❌ Grounding search failed for {search_identifier} after {attempt} retries: {e}", exc_info=True)
-                    # Return empty result on failure to avoid crashing the flow
-                    return MarketQueryResult(
-                        offers=[],
-                        confidence_score=0.0,
-                        reasoning=f"Search failed: {str(e)}"
-                    )
-                
-                delay = self.config.retry_delay_seconds * (self.config.retry_exponential_base ** attempt)
-                await asyncio.sleep(delay)
+                raise
+            usage = record_llm_call(
+                "gemini_price_grounding", self.config.model, response, (time.perf_counter() - call_start) * 1000
+            )
+            return response, usage
+
+        try:
+            response, usage = await retry_async(
+                attempt,
+                policy=policy,
+                breaker_key=self.config.model,
+                description=f"Grounding search {search_identifier}",
+            )
+        except Exception as e:
+            logger.error(f"❌ Grounding search failed for {search_identifier}: {e}", exc_info=True)
+            # Return empty result on failure to avoid crashing the flow
+            return MarketQueryResult(
+                offers=[],
+                confidence_score=0.0,
+                reasoning=f"Search failed: {str(e)}",
+                failed=True
+            )
 
-        return MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Max retries reached")
+        result = self._process_response(response, search_identifier)
+        result.usage = usage
+        return result
 
     def _process_response(self, response: Any, identifier: str) -> MarketQueryResult:
         """Parses the Gemini response using robust patterns."""
@@ -164,7 +247,7 @@ class PriceGroundingClient:
         
         if not result_text.strip():
             logger.warning(f"⚠️ Empty response from Gemini Grounding for {identifier}. Finish reason: {finish_reason}")
-            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"Empty response from AI (Reason: {finish_reason})")
+            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"Empty response from AI (Reason: {finish_reason})", failed=True)
 
         try:
             result_json = self._parse_json_response(result_text)
@@ -198,10 +281,10 @@ class PriceGroundingClient:
             logger.error(f"❌ Failed to parse response for {identifier}. Error: {e}")
             # Try to debug by logging truncated text
             logger.error(f"❌ Problematic text (first 200 chars): {result_text[:200]}")
-            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"JSON Parse Error: {str(e)}")
+            return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"JSON Parse Error: {str(e)}", failed=True)
         except Exception as e:
              logger.error(f"❌ Unexpected error processing response for {identifier}: {e}", exc_info=True)
-             return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"Processing Error: {str(e)}")
+             return MarketQueryResult(offers=[], confidence_score=0.0, reasoning=f"Processing Error: {str(e)}", failed=True)
 
     def _get_response_text(self, response: Any) -> Tuple[str, Optional[str]]:
         """Safely extracts text from the response and returns it along with the finish reason."""
@@ -234,16 +317,8 @@ class PriceGroundingClient:
         return "", finish_reason
 
     def _parse_json_response(self, text: str) -> Dict[str, Any]:
-        """Robustly parses JSON from text, handling Markdown blocks and raw JSON."""
-        match = re.search(r"(\{.*\})", text, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-            return json.loads(json_str)
-        else:
-            clean_text = re.sub(r"^```json\s*", "", text, flags=re.MULTILINE)
-            clean_text = re.sub(r"^```\s*", "", clean_text, flags=re.MULTILINE)
-            clean_text = re.sub(r"```$", "", clean_text, flags=re.MULTILINE).strip()
-            return json.loads(clean_text)
+        """Robustly parses JSON from text, handling Markdown blocks, surrounding prose and truncation."""
+        return parse_last_json_object(text)
 
     def _build_combined_search_prompt(
         self, 
@@ -0,0 +1,194 @@
+"""
+Lazy, thread-safe Factories für Google Cloud und GenAI Clients.
+
+Clients werden erst beim ersten Zugriff gebaut (nicht beim Modul-Import) und
+danach prozessweit wiederverwendet. Cold Starts zahlen so nur für die Clients,
+die ein Request wirklich braucht; Pfade ohne Pub/Sub oder Gemini bauen diese
+Clients nie. Auch die zugehörigen Bibliotheken werden erst in der Factory
+importiert.
+
+Usage:
+    from shared.clients import get_genai_client, get_publisher_client
+
+    client = get_genai_client(project=project_id, location="europe-west1")
+    get_publisher_client().publish(topic_path, data)
+
+In Tests setzt reset_clients() alle Singletons zurück.
+"""
+
+import importlib.util
+import logging
+import threading
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyClient(Generic[T]):
+    """
+    Baut ein Objekt beim ersten get() (Double-Checked Locking) und cached es.
+
+    Schlägt die Factory fehl, wird nichts gecached - der nächste Aufruf versucht es erneut.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: Optional[str] = None):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "client")
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    self._instance = instance
+                    logger.info(f"✅ {self._name} initialized")
+        return instance
+
+    def set(self, instance: Optional[T]) -> None:
+        """Setzt die Instanz explizit (z.B. Stub in Tests). None setzt zurück."""
+        with self._lock:
+            self._instance = instance
+
+    def reset(self) -> None:
+        self.set(None)
+
+
+class LazyClientPool:
+    """Wie LazyClient, aber je Schlüssel (z.B. Projekt + Region) eine eigene Instanz."""
+
+    def __init__(self, factory: Callable[..., Any], name: str):
+        self._factory = factory
+        self._name = name
+        self._instances: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, label: str = "", **kwargs: Any) -> Any:
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = self._factory(**kwargs)
+                    self._instances[key] = instance
+                    logger.info(f"✅ {self._name} initialized {label}".rstrip())
+        return instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+
+# ============================================================================
+# FACTORIES
+# ============================================================================
+
+def _build_storage_client():
+    from google.cloud import storage
+    return storage.Client()
+
+
+def _build_publisher_client():
+    from google.cloud import pubsub_v1
+    return pubsub_v1.PublisherClient()
+
+
+def _build_subscriber_client():
+    from google.cloud import pubsub_v1
+    return pubsub_v1.SubscriberClient()
+
+
+def _build_genai_client(project: Optional[str], location: Optional[str], api_key: Optional[str]):
+    from google import genai
+    if api_key:
+        return genai.Client(api_key=api_key)
+    if not project:
+        raise RuntimeError("GenAI client needs a GCP project (Vertex AI) or an API key.")
+    return genai.Client(vertexai=True, project=project, location=location)
+
+
+_storage = LazyClient(_build_storage_client, "Cloud Storage client")
+_publisher = LazyClient(_build_publisher_client, "Pub/Sub publisher")
+_subscriber = LazyClient(_build_subscriber_client, "Pub/Sub subscriber")
+_genai = LazyClientPool(_build_genai_client, "GenAI client")
+
+
+def get_storage_client():
+    """Prozessweiter google.cloud.storage.Client."""
+    return _storage.get()
+
+
+def get_publisher_client():
+    """Prozessweiter pubsub_v1.PublisherClient (bündelt Publishes, thread-safe)."""
+    return _publisher.get()
+
+
+def get_subscriber_client():
+    """Prozessweiter pubsub_v1.SubscriberClient (Streaming Pull im Worker-Modus)."""
+    return _subscriber.get()
+
+
+def set_storage_client(client: Any) -> None:
+    """Ersetzt den prozessweiten Storage Client (Tests, Replay). None setzt zurück."""
+    _storage.set(client)
+
+
+def set_publisher_client(client: Any) -> None:
+    """Ersetzt den prozessweiten Publisher (Tests, Replay). None setzt zurück."""
+    _publisher.set(client)
+
+
+def get_genai_client(
+    project: Optional[str] = None,
+    location: Optional[str] = None,
+    api_key: Optional[str] = None,
+):
+    """
+    Prozessweiter genai.Client je (project, location) bzw. API Key.
+
+    Args:
+        project: GCP Projekt für Vertex AI
+        location: Vertex AI Region
+        api_key: API Key (Developer API, hat Vorrang vor Vertex AI)
+
+    Returns:
+        genai.Client
+
+    Raises:
+        RuntimeError: Wenn weder Projekt noch API Key gesetzt sind
+    """
+    if api_key:
+        key, label = ("api_key", api_key), "(API key)"
+    else:
+        key, label = ("vertexai", project, location), f"(project={project}, location={location})"
+    return _genai.get(key, label=label, project=project, location=location, api_key=api_key)
+
+
+def module_available(name: str) -> bool:
+    """Ob ein (optionales) Modul installiert ist, ohne es zu importieren."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+
+def topic_path(project: str, topic: str) -> str:
+    """Pub/Sub Topic-Pfad ohne Client (PublisherClient.topic_path ohne Instanz)."""
+    return f"projects/{project}/topics/{topic}"
+
+
+def reset_clients() -> None:
+    """Verwirft alle gecachten Clients (Tests, Credential-Wechsel)."""
+    _storage.reset()
+    _publisher.reset()
+    _subscriber.reset()
+    _genai.reset()
@@ -0,0 +1,228 @@
+"""
+Einheitliche Zustandsskala für Preisfindung, Zustandsbewertung und Listing.
+
+Im System gibt es mehrere Zustandsvokabulare:
+- Freitext der Angebote aus der Preissuche ("Wie neu", "Gebraucht - Sehr gut", ...)
+- ABAA-Grades des Condition Assessors (Fine/Very Fine/Good/Fair/Poor)
+- Condition (dieses Modul, re-exportiert in shared.price_research.models)
+- Manuelle Overrides im Dashboard
+
+normalize_condition() bildet alles auf die ordinale Skala `Condition` ab:
+1. Exakter Treffer in einer vorberechneten Tabelle (normalisierter Text)
+2. Phrase im Text (ein kompilierter Regex, längste Phrase zuerst)
+3. Fuzzy-Fallback für Tippfehler (difflib)
+
+Ergebnisse werden gecacht; wiederkehrende Händlertexte kosten einen Dict-Lookup.
+"""
+
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Condition(str, Enum):
+    NEW = "new"
+    LIKE_NEW = "like_new"
+    VERY_GOOD = "very_good"
+    GOOD = "good"
+    ACCEPTABLE = "acceptable"
+    POOR = "poor"
+
+
+# Ordinale Skala (höher = besser)
+CONDITION_RANK: Dict[Condition, int] = {
+    Condition.POOR: 0,
+    Condition.ACCEPTABLE: 1,
+    Condition.GOOD: 2,
+    Condition.VERY_GOOD: 3,
+    Condition.LIKE_NEW: 4,
+    Condition.NEW: 5,
+}
+
+# Preisfaktor relativ zu einem neuen Exemplar
+CONDITION_PRICE_FACTORS: Dict[Condition, float] = {
+    Condition.NEW: 1.0,
+    Condition.LIKE_NEW: 0.9,
+    Condition.VERY_GOOD: 0.8,
+    Condition.GOOD: 0.65,
+    Condition.ACCEPTABLE: 0.45,
+    Condition.POOR: 0.25,
+}
+
+# Anzeige im Listing
+CONDITION_LABELS_DE: Dict[Condition, str] = {
+    Condition.NEW: "Neu",
+    Condition.LIKE_NEW: "Wie neu",
+    Condition.VERY_GOOD: "Sehr gut",
+    Condition.GOOD: "Gut",
+    Condition.ACCEPTABLE: "Akzeptabel",
+    Condition.POOR: "Schlecht",
+}
+
+# Grades des Condition Assessors (FINE = wie neu, VERY_FINE = leichte Gebrauchsspuren)
+ABAA_GRADES: Dict[Condition, str] = {
+    Condition.NEW: "Fine",
+    Condition.LIKE_NEW: "Fine",
+    Condition.VERY_GOOD: "Very Fine",
+    Condition.GOOD: "Good",
+    Condition.ACCEPTABLE: "Fair",
+    Condition.POOR: "Poor",
+}
+
+# Preisfaktor je ABAA-Grade für manuelle Overrides im Dashboard (Fine deckt Neu und Wie neu ab)
+ABAA_PRICE_FACTORS: Dict[str, float] = {
+    "Fine": 1.0,
+    "Very Fine": 0.85,
+    "Good": 0.65,
+    "Fair": 0.45,
+    "Poor": 0.25,
+}
+
+_ALIASES: Dict[Condition, List[str]] = {
+    Condition.NEW: [
+        "neu", "new", "brand new", "brandneu", "fabrikneu", "nagelneu", "neuware",
+        "originalverpackt", "ovp", "neu ovp", "ungelesen", "unread",
+    ],
+    Condition.LIKE_NEW: [
+        "wie neu", "like new", "as new", "neuwertig", "fast neu", "mint", "fine",
+        "gebraucht wie neu", "used like new",
+    ],
+    Condition.VERY_GOOD: [
+        "sehr gut", "very good", "very fine", "near fine", "sehr gut erhalten",
+        "hervorragend", "ausgezeichnet", "excellent", "gebraucht sehr gut", "used very good",
+        "leichte gebrauchsspuren", "minimale gebrauchsspuren", "kaum gebrauchsspuren",
+    ],
+    Condition.GOOD: [
+        "gut", "good", "gut erhalten", "befriedigend", "gebraucht gut", "used good",
+        "normale gebrauchsspuren", "altersgemäß gut",
+    ],
+    Condition.ACCEPTABLE: [
+        "akzeptabel", "acceptable", "ausreichend", "fair", "mäßig",
+        "gebraucht akzeptabel", "used acceptable", "deutliche gebrauchsspuren",
+        "starke gebrauchsspuren", "leseexemplar", "reading copy", "ex library", "bibliotheksexemplar",
+    ],
+    Condition.POOR: [
+        "schlecht", "poor", "mangelhaft", "ungenügend", "beschädigt", "stark beschädigt",
+        "damaged", "defekt",
+    ],
+}
+
+# Nur ohne genauere Angabe: "Gebraucht" allein heißt in der Regel "Gut"
+_WEAK_ALIASES: Dict[str, Condition] = {
+    "gebraucht": Condition.GOOD,
+    "used": Condition.GOOD,
+    "second hand": Condition.GOOD,
+    "antiquarisch": Condition.GOOD,
+}
+
+FUZZY_CUTOFF = 0.8
+
+
+@dataclass(frozen=True)
+class ConditionMatch:
+    """Ergebnis der Normalisierung."""
+    condition: Condition
+    method: str  # "exact" | "phrase" | "fuzzy"
+    score: float = 1.0  # Ähnlichkeit beim Fuzzy-Treffer
+
+    @property
+    def rank(self) -> int:
+        return CONDITION_RANK[self.condition]
+
+    @property
+    def price_factor(self) -> float:
+        return CONDITION_PRICE_FACTORS[self.condition]
+
+    @property
+    def label(self) -> str:
+        return CONDITION_LABELS_DE[self.condition]
+
+
+def _fold(text: str) -> str:
+    """Kleinschreibung, ohne Akzente/Umlaute, Satzzeichen und Unterstriche als Leerzeichen."""
+    text = unicodedata.normalize("NFKD", text.replace("ß", "ss"))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+
+def _build_lookup() -> Dict[str, Condition]:
+    lookup = {_fold(alias): condition for condition, aliases in _ALIASES.items() for alias in aliases}
+    for condition in Condition:
+        lookup[_fold(condition.value)] = condition
+        lookup[_fold(condition.name)] = condition
+    return lookup
+
+
+def _compile(aliases: List[str]) -> "re.Pattern[str]":
+    # Längste Phrase zuerst, damit "sehr gut erhalten" vor "sehr gut" vor "gut" greift
+    ordered = sorted(set(aliases), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(alias) for alias in ordered) + r")\b")
+
+
+_LOOKUP = _build_lookup()
+_PHRASES = _compile(list(_LOOKUP))
+_WEAK_LOOKUP = {_fold(alias): condition for alias, condition in _WEAK_ALIASES.items()}
+_WEAK_PHRASES = _compile(list(_WEAK_LOOKUP))
+_FUZZY_KEYS = [key for key in _LOOKUP if len(key) >= 4]
+
+
+def _fuzzy(text: str) -> Optional[Tuple[Condition, float]]:
+    tokens = text.split()
+    # Ganzer Text, dann Wortpaare und Einzelwörter (Händlertexte enthalten oft mehr als den Zustand)
+    candidates = [text] + [" ".join(tokens[i:i + 2]) for i in range(len(tokens) - 1)] + tokens
+    best: Optional[Tuple[Condition, float]] = None
+    for candidate in candidates:
+        if len(candidate) < 4:
+            continue
+        for key in difflib.get_close_matches(candidate, _FUZZY_KEYS, n=1, cutoff=FUZZY_CUTOFF):
+            score = difflib.SequenceMatcher(None, candidate, key).ratio()
+            if best is None or score > best[1]:
+                best = (_LOOKUP[key], score)
+    return best
+
+
+@lru_cache(maxsize=4096)
+def _normalize_folded(text: str) -> Optional[ConditionMatch]:
+    condition = _LOOKUP.get(text) or _WEAK_LOOKUP.get(text)
+    if condition is not None:
+        return ConditionMatch(condition, "exact")
+    match = _PHRASES.search(text)
+    if match:
+        return ConditionMatch(_LOOKUP[match.group(0)], "phrase")
+    fuzzy = _fuzzy(text)
+    if fuzzy:
+        return ConditionMatch(fuzzy[0], "fuzzy", round(fuzzy[1], 3))
+    match = _WEAK_PHRASES.search(text)
+    if match:
+        return ConditionMatch(_WEAK_LOOKUP[match.group(0)], "phrase")
+    return None
+
+
+def normalize_condition(value: Any) -> Optional[ConditionMatch]:
+    """
+    Ordnet einen Zustand aus beliebigem Vokabular der Skala Condition zu.
+
+    Args:
+        value: Freitext, ABAA-Grade, Condition oder ConditionGrade-ähnliches Enum
+
+    Returns:
+        ConditionMatch oder None, wenn nichts erkannt wurde
+    """
+    if isinstance(value, Condition):
+        return ConditionMatch(value, "exact")
+    if isinstance(value, Enum):
+        value = value.value
+    if not isinstance(value, str):
+        return None
+    text = _fold(value)
+    return _normalize_folded(text) if text else None
+
+
+def condition_of(value: Any, default: Optional[Condition] = None) -> Optional[Condition]:
+    """Wie normalize_condition(), liefert aber nur die Condition (oder default)."""
+    match = normalize_condition(value)
+    return match.condition if match else default
@@ -1,16 +1,22 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from google.cloud import firestore  # type: ignore
 
-_db: Optional[firestore.Client] = None
+from shared.clients import LazyClient
+from shared.firestore.outbox import OutboxEvent, commit_with_events
+
+_db: LazyClient[firestore.Client] = LazyClient(lambda: firestore.Client(), "Firestore client")
 
 def get_firestore_client() -> firestore.Client:
     """
-    Lazily initializes and returns the Firestore client.
+    Lazily initializes and returns the Firestore client (thread-safe, process-wide).
+    """
+    return _db.get()
+
+def set_firestore_client(client: Optional[Any]) -> None:
+    """
+    Replaces the process-wide Firestore client (tests, replay). None resets it.
     """
-    global _db
-    if _db is None:
-        _db = firestore.Client()
-    return _db
+    _db.set(client)
 
 def _get_user_books_collection(user_id: str):
     """
@@ -26,13 +32,24 @@ def add_book(user_id: str, book_data: Dict[str, Any]) -> str:
     _, doc_ref = _get_user_books_collection(user_id).add(book_data)
     return doc_ref.id
 
-def set_book(user_id: str, book_id: str, book_data: Dict[str, Any]):
+def set_book(user_id: str, book_id: str, book_data: Dict[str, Any], events: Optional[List[OutboxEvent]] = None):
     """
     Creates or overwrites a book document with a specific ID in a user's subcollection.
+    Events are written to the outbox in the same batch and published asynchronously.
     """
     doc_ref = _get_user_books_collection(user_id).document(book_id)
+    if events:
+        return _commit_with_events(lambda batch: batch.set(doc_ref, book_data), events)
     doc_ref.set(book_data)
 
+def _commit_with_events(write, events: List[OutboxEvent]):
+    """
+    Applies a write and its outbox events atomically in one batch.
+    """
+    batch = get_firestore_client().batch()
+    write(batch)
+    return commit_with_events(batch, events)
+
 # Define the valid status transitions for the book lifecycle
 VALID_STATUS_TRANSITIONS = {
     "pending_analysis": ["ingesting", "failed", "condition_assessment_pending"],
@@ -51,13 +68,19 @@ VALID_STATUS_TRANSITIONS = {
     "failed": ["ingesting", "pending_analysis"]
 }
 
-def update_book(user_id: str, book_id: str, data: Dict[str, Any]):
+def update_book(user_id: str, book_id: str, data: Dict[str, Any], events: Optional[List[OutboxEvent]] = None):
     """
     Updates a book document with the provided data in a user's subcollection.
-    Includes validation for status transitions.
+    Includes validation for status transitions. Events are written to the
+    outbox in the same batch and published asynchronously.
     """
     doc_ref = _get_user_books_collection(user_id).document(book_id)
 
+    def write(update: Dict[str, Any]):
+        if events:
+            return _commit_with_events(lambda batch: batch.update(doc_ref, update), events)
+        return doc_ref.update(update)
+
     if 'status' in data:
         current_doc = doc_ref.get()
         if current_doc.exists:
@@ -69,7 +92,7 @@ def update_book(user_id: str, book_id: str, data: Dict[str, Any]):
                 # but still allow updating other fields.
                 if current_status == 'priced' and new_status == 'condition_assessed':
                     data['status'] = 'priced'
-                    return doc_ref.update(data)
+                    return write(data)
 
                 # Relaxed validation: If status is unknown, allow any transition (fail open)
                 # to prevent deadlocks during development/migrations.
@@ -80,7 +103,7 @@ def update_book(user_id: str, book_id: str, data: Dict[str, Any]):
                         f"Invalid status transition from '{current_status}' to '{new_status}'. Allowed: {allowed_transitions}"
                     )
     
-    doc_ref.update(data)
+    return write(data)
 
 def get_book(user_id: str, book_id: str) -> Optional[Dict[str, Any]]:
     """
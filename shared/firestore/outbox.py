@@ -0,0 +1,367 @@
+"""
+Transactional outbox for Pub/Sub events that belong to a Firestore state change.
+
+Writing a status and then publishing is two steps, so a crash in between leaves
+the book stuck. With the outbox, the event is written to the `outbox`
+collection in the same batch (or transaction) as the status change. A relay
+then publishes it:
+
+- Fast path: after the commit the entry is handed to the process-wide relay.
+  A background thread publishes in batches and deletes the published entries.
+  The request handler does not wait for Pub/Sub.
+- Sweep: entries nobody published (the writing process died, or CPU was
+  throttled after the response) become due after `stale_after_seconds`. Any
+  relay sweeping the collection claims them with a precondition and publishes
+  them. Failed publishes are retried with backoff. After `max_attempts` the
+  entry is parked as dead (`next_attempt_at = None`).
+
+Delivery is at-least-once: consumers already de-duplicate by book status.
+
+Usage:
+    batch = db.batch()
+    batch.update(book_ref, {"status": "ingested"})
+    commit_with_events(batch, [OutboxEvent("trigger-condition-assessment", payload)])
+
+    update_book(uid, book_id, {"status": "condition_assessed"}, events=[...])
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.clients import get_publisher_client, topic_path
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "outbox"
+
+
+@dataclass
+class OutboxEvent:
+    """A Pub/Sub message to publish once the surrounding write has committed."""
+    topic: str  # Short topic name or projects/<project>/topics/<topic>
+    payload: Dict[str, Any]
+    attributes: Dict[str, str] = field(default_factory=dict)
+    ordering_key: str = ""
+
+    def topic_path(self) -> str:
+        if self.topic.startswith("projects/"):
+            return self.topic
+        project = os.environ.get("GCP_PROJECT") or os.environ.get("GOOGLE_CLOUD_PROJECT")
+        if not project:
+            raise ValueError(f"Outbox topic '{self.topic}' needs GCP_PROJECT")
+        return topic_path(project, self.topic)
+
+
+@dataclass(frozen=True)
+class OutboxConfig:
+    batch_size: int = 100  # Entries per publish round / Firestore batch
+    flush_interval_seconds: float = 0.05  # Max wait to fill a batch
+    publish_timeout_seconds: float = 30.0
+    stale_after_seconds: float = 30.0  # When unpublished entries become due for the sweep
+    sweep_interval_seconds: float = 60.0
+    max_attempts: int = 10
+    backoff_seconds: float = 5.0  # Doubles per failed attempt
+    max_backoff_seconds: float = 600.0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def stage_events(writer: Any, events: List[OutboxEvent], db: Any = None, config: Optional[OutboxConfig] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Adds outbox entries to a WriteBatch or Transaction (not committed yet).
+
+    Returns:
+        (document reference, entry) per event, to hand to the relay after the commit
+    """
+    from shared.firestore.client import get_firestore_client
+
+    db = db or get_firestore_client()
+    config = config or get_outbox_relay().config
+    now = _now()
+    staged = []
+    for event in events:
+        entry = {
+            "topic": event.topic_path(),
+            "data": json.dumps(event.payload).encode("utf-8"),
+            "attributes": dict(event.attributes),
+            "ordering_key": event.ordering_key,
+            "created_at": now,
+            "next_attempt_at": now + timedelta(seconds=config.stale_after_seconds),
+            "attempts": 0,
+        }
+        ref = db.collection(OUTBOX_COLLECTION).document()
+        writer.set(ref, entry)
+        staged.append((ref, entry))
+    return staged
+
+
+def commit_with_events(batch: Any, events: List[OutboxEvent], db: Any = None) -> List[str]:
+    """
+    Stages the events into the batch, commits it and hands them to the relay.
+
+    Args:
+        batch: WriteBatch that already contains the state change
+        events: Events to publish after the commit
+        db: Firestore client (default: process-wide client)
+
+    Returns:
+        Outbox entry IDs
+    """
+    relay = get_outbox_relay()
+    staged = stage_events(batch, events, db=db, config=relay.config)
+    batch.commit()
+    relay.enqueue(staged)
+    return [ref.id for ref, _ in staged]
+
+
+@dataclass
+class OutboxStats:
+    enqueued: int = 0
+    published: int = 0
+    failed: int = 0
+    dead: int = 0
+    swept: int = 0
+    batches: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class OutboxRelay:
+    """
+    Publishes outbox entries in batches from a background thread.
+
+    Args:
+        config: OutboxConfig
+        db: Firestore client (default: process-wide client)
+        publisher: Pub/Sub publisher (default: process-wide client)
+        sweep: Whether the background thread also sweeps stale entries
+    """
+
+    def __init__(self, config: Optional[OutboxConfig] = None, db: Any = None, publisher: Any = None, sweep: bool = True):
+        self.config = config or OutboxConfig()
+        self.stats = OutboxStats()
+        self._db = db
+        self._publisher = publisher
+        self._sweep_enabled = sweep
+        self._queue: "queue.Queue[Tuple[Any, Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @property
+    def db(self) -> Any:
+        if self._db is None:
+            from shared.firestore.client import get_firestore_client
+            return get_firestore_client()
+        return self._db
+
+    @property
+    def publisher(self) -> Any:
+        return self._publisher or get_publisher_client()
+
+    # ------------------------------------------------------------------
+    # Fast path
+    # ------------------------------------------------------------------
+
+    def enqueue(self, staged: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Hands committed entries to the background thread (does not block)."""
+        if not staged:
+            return
+        with self._idle:
+            self._pending += len(staged)
+        for item in staged:
+            self._queue.put(item)
+        self.stats.enqueued += len(staged)
+        self.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until all enqueued entries were handled (e.g. before a Cloud Function returns)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Publishes what is queued, then stops the background thread."""
+        self.flush(timeout)
+        self._stop.set()
+        self._queue.put(None)  # Wakes the thread
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._publish(batch)
+                except Exception as e:
+                    # Entries stay in the outbox and are picked up by a sweep
+                    logger.error(f"❌ Outbox publish round failed: {e}")
+                finally:
+                    with self._idle:
+                        self._pending -= len(batch)
+                        self._idle.notify_all()
+            if self._sweep_enabled and time.monotonic() - self._last_sweep >= self.config.sweep_interval_seconds:
+                self._last_sweep = time.monotonic()
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"❌ Outbox sweep failed: {e}")
+
+    def _next_batch(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        try:
+            first = self._queue.get(timeout=min(1.0, self.config.sweep_interval_seconds))
+        except queue.Empty:
+            return []
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.config.flush_interval_seconds
+        while len(batch) < self.config.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def _publish(self, batch: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Publishes a batch; deletes published entries and schedules retries for the rest."""
+        publisher = self.publisher
+        futures = []
+        for ref, entry in batch:
+            kwargs = {"ordering_key": entry["ordering_key"]} if entry.get("ordering_key") else {}
+            try:
+                futures.append(publisher.publish(entry["topic"], entry["data"], **kwargs, **entry.get("attributes", {})))
+            except Exception as e:
+                futures.append(e)
+
+        done, failed = [], []
+        for (ref, entry), future in zip(batch, futures):
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                future.result(timeout=self.config.publish_timeout_seconds)
+                done.append(ref)
+            except Exception as e:
+                logger.warning(f"⚠️ Outbox publish to {entry['topic']} failed: {e}")
+                failed.append((ref, entry))
+
+        writer = self.db.batch()
+        for ref in done:
+            writer.delete(ref)
+        for ref, entry in failed:
+            attempts = entry.get("attempts", 0) + 1
+            if attempts >= self.config.max_attempts:
+                writer.update(ref, {"attempts": attempts, "next_attempt_at": None, "dead_at": _now()})
+                self.stats.dead += 1
+                logger.error(f"❌ Outbox entry {ref.id} for {entry['topic']} gave up after {attempts} attempts")
+            else:
+                backoff = min(self.config.backoff_seconds * 2 ** (attempts - 1), self.config.max_backoff_seconds)
+                writer.update(ref, {"attempts": attempts, "next_attempt_at": _now() + timedelta(seconds=backoff)})
+        try:
+            writer.commit()
+        except Exception as e:
+            # Published entries stay in the outbox and are sent again by a sweep (at-least-once)
+            logger.error(f"❌ Outbox bookkeeping failed: {e}")
+        self.stats.published += len(done)
+        self.stats.failed += len(failed)
+        self.stats.batches += 1
+        if done:
+            logger.info(f"📤 Outbox published {len(done)} events ({len(failed)} failed)")
+
+    # ------------------------------------------------------------------
+    # Sweep
+    # ------------------------------------------------------------------
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """
+        Publishes due entries that no relay handled yet.
+
+        Each entry is claimed by pushing next_attempt_at forward with a
+        last-update precondition, so concurrent sweeps don't both take it.
+
+        Returns:
+            Number of claimed entries
+        """
+        db = self.db
+        now = _now()
+        due = (
+            db.collection(OUTBOX_COLLECTION)
+            .where("next_attempt_at", "<=", now)
+            .limit(limit or self.config.batch_size)
+            .stream()
+        )
+        claimed = []
+        lease = now + timedelta(seconds=self.config.stale_after_seconds)
+        for snapshot in due:
+            try:
+                option = db.write_option(last_update_time=snapshot.update_time) if getattr(snapshot, "update_time", None) else None
+                kwargs = {"option": option} if option is not None else {}
+                snapshot.reference.update({"next_attempt_at": lease}, **kwargs)
+            except Exception as e:
+                logger.debug(f"Outbox entry {snapshot.id} claimed elsewhere: {e}")
+                continue
+            claimed.append((snapshot.reference, snapshot.to_dict()))
+        if claimed:
+            logger.info(f"🧹 Outbox sweep claimed {len(claimed)} stale events")
+            self.stats.swept += len(claimed)
+            self._publish(claimed)
+        return len(claimed)
+
+
+# ============================================================================
+# PROCESS-WIDE RELAY
+# ============================================================================
+
+_default_relay: Optional[OutboxRelay] = None
+_default_relay_lock = threading.Lock()
+
+
+def get_outbox_relay() -> OutboxRelay:
+    """Returns the process-wide outbox relay."""
+    global _default_relay
+    if _default_relay is None:
+        with _default_relay_lock:
+            if _default_relay is None:
+                _default_relay = OutboxRelay()
+    return _default_relay
+
+
+def configure_outbox_relay(relay: Optional[OutboxRelay]) -> None:
+    """Replaces the process-wide relay (tests). None stops and resets it."""
+    global _default_relay
+    with _default_relay_lock:
+        previous, _default_relay = _default_relay, relay
+    if previous is not None and previous is not relay:
+        previous.stop(timeout=1.0)
@@ -71,8 +71,8 @@ def create_health_check_handler(
         # GCS check
         if check_gcs:
             try:
-                from google.cloud import storage  # type: ignore
-                client = storage.Client()
+                from shared.clients import get_storage_client
+                client = get_storage_client()
                 bucket_name = os.getenv("GCS_BUCKET_NAME")
                 if bucket_name:
                     bucket = client.bucket(bucket_name)
@@ -169,8 +169,8 @@ def cloud_function_health_check(
     # GCS check
     if check_gcs:
         try:
-            from google.cloud import storage  # type: ignore
-            client = storage.Client()
+            from shared.clients import get_storage_client
+            client = get_storage_client()
             bucket_name = os.getenv("GCS_BUCKET_NAME")
             if bucket_name:
                 bucket = client.bucket(bucket_name)
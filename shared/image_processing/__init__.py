@@ -0,0 +1,28 @@
+from .normalizer import (
+    ImageNormalizationConfig,
+    NormalizedImage,
+    normalize_image,
+    sniff_mime_type,
+    mime_type_from_path,
+    estimate_image_tokens,
+)
+from .perceptual_hash import (
+    ImageHashes,
+    compute_image_hashes,
+    hamming_distance,
+)
+from .barcode import BARCODE_SUPPORTED, decode_ean13
+
+__all__ = [
+    "ImageNormalizationConfig",
+    "NormalizedImage",
+    "normalize_image",
+    "sniff_mime_type",
+    "mime_type_from_path",
+    "estimate_image_tokens",
+    "ImageHashes",
+    "compute_image_hashes",
+    "hamming_distance",
+    "BARCODE_SUPPORTED",
+    "decode_ean13",
+]
@@ -0,0 +1,76 @@
+"""
+Lokale Barcode-Erkennung (EAN-13) auf der CPU.
+
+Die meisten neueren Bücher tragen auf der Rückseite einen EAN-13 Barcode mit
+der ISBN. Der Scan läuft auf den Originalbytes (nach der Normalisierung auf
+1024px sind die Striche oft zu schmal) und dekodiert JPEGs per DCT-Scaling in
+halber Auflösung (~90ms für ein 12 MP Foto).
+
+Decoder (optional, in dieser Reihenfolge):
+- zxing-cpp (`pip install zxing-cpp`, keine System-Abhängigkeiten)
+- pyzbar (braucht libzbar)
+Ohne Decoder liefert decode_ean13() immer eine leere Liste.
+"""
+
+import io
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+try:
+    import zxingcpp
+except ImportError:
+    zxingcpp = None
+
+try:
+    from pyzbar import pyzbar
+except ImportError:
+    pyzbar = None
+
+
+BARCODE_SUPPORTED = Image is not None and (zxingcpp is not None or pyzbar is not None)
+
+# draft() wählt die kleinste DCT-Skalierung, die mindestens diese Größe liefert
+# (12 MP Foto -> 1512x2016). Bei kleinerer Auflösung gehen Barcodes verloren.
+BARCODE_SCAN_EDGE_PX = 1500
+
+
+def decode_ean13(data: bytes) -> List[str]:
+    """
+    Dekodiert alle EAN-13 Barcodes in einem Bild.
+
+    CPU-gebunden: In async Code über asyncio.to_thread() aufrufen.
+
+    Args:
+        data: Rohe Bilddaten (möglichst nicht herunterskaliert)
+
+    Returns:
+        Liste der 13-stelligen Codes (ohne Prüfung, ob es eine ISBN ist)
+    """
+    if not BARCODE_SUPPORTED:
+        return []
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format == "JPEG":
+                img.draft("L", (BARCODE_SCAN_EDGE_PX, BARCODE_SCAN_EDGE_PX))
+            img = ImageOps.exif_transpose(img).convert("L")
+
+        if zxingcpp is not None:
+            results = zxingcpp.read_barcodes(img, formats=zxingcpp.BarcodeFormat.EAN13)
+            codes = [result.text for result in results]
+        else:
+            results = pyzbar.decode(img, symbols=[pyzbar.ZBarSymbol.EAN13])
+            codes = [result.data.decode("ascii") for result in results]
+    except Exception as e:
+        logger.warning(f"⚠️ Barcode-Scan fehlgeschlagen: {e}")
+        return []
+
+    return [code for code in codes if len(code) == 13 and code.isdigit()]
@@ -0,0 +1,277 @@
+"""
+Bild-Normalisierung vor Gemini Calls.
+
+Handy-Fotos gehen sonst in voller Auflösung (12 MP, 3-4 MB) an Gemini. Für die
+Identifikation reichen ~1024px, für die Zustandsbewertung etwas mehr. Die
+Normalisierung:
+1. Erkennt das echte Format anhand der Magic Bytes (statt "image/jpeg" zu raten)
+2. Wendet die EXIF-Orientierung an
+3. Entfernt Metadaten (EXIF, GPS, Thumbnails)
+4. Skaliert auf eine konfigurierbare maximale Kantenlänge herunter
+5. Kodiert als JPEG neu
+
+Pillow ist optional: Ohne Pillow werden die Bilder unverändert, aber mit
+korrektem MIME-Type durchgereicht. HEIC wird nur dekodiert, wenn pillow-heif
+installiert ist.
+"""
+
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_SUPPORTED = Image is not None
+except ImportError:
+    HEIF_SUPPORTED = False
+
+
+# Gemini rechnet Bilder in 768x768 Kacheln ab, jede Kachel kostet 258 Tokens.
+# Bilder bis 384px in beiden Dimensionen zählen als eine Kachel.
+GEMINI_TILE_SIZE = 768
+GEMINI_TOKENS_PER_TILE = 258
+
+
+@dataclass
+class ImageNormalizationConfig:
+    """
+    Konfiguration für die Bild-Normalisierung.
+
+    Attributes:
+        max_edge_px: Maximale Kantenlänge nach dem Skalieren (None = nicht skalieren)
+        jpeg_quality: JPEG-Qualität beim Neu-Kodieren (1-95)
+        enabled: Ob überhaupt normalisiert werden soll
+    """
+    max_edge_px: Optional[int] = 1024
+    jpeg_quality: int = 85
+    enabled: bool = True
+
+
+@dataclass
+class NormalizedImage:
+    """Ergebnis der Normalisierung eines Bildes."""
+    data: bytes
+    mime_type: str
+    original_mime_type: str
+    original_size_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    original_width: Optional[int] = None
+    original_height: Optional[int] = None
+    duration_ms: float = 0.0
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_size_bytes - self.size_bytes)
+
+
+def sniff_mime_type(data: bytes, default: str = "image/jpeg") -> str:
+    """
+    Erkennt den MIME-Type anhand der Magic Bytes.
+
+    Args:
+        data: Bilddaten (die ersten 16 Bytes reichen)
+        default: Rückgabewert wenn das Format unbekannt ist
+
+    Returns:
+        MIME-Type, z.B. "image/png"
+    """
+    head = data[:16]
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in (b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis"):
+            return "image/heic"
+        if brand in (b"mif1", b"msf1", b"heif"):
+            return "image/heif"
+        if brand in (b"avif", b"avis"):
+            return "image/avif"
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return "image/tiff"
+    if head.startswith(b"BM"):
+        return "image/bmp"
+    return default
+
+
+def mime_type_from_path(path: str, default: str = "image/jpeg") -> str:
+    """Leitet den MIME-Type aus der Dateiendung ab (für gs:// URIs ohne Download)."""
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    return {
+        "jpg": "image/jpeg",
+        "jpeg": "image/jpeg",
+        "png": "image/png",
+        "webp": "image/webp",
+        "gif": "image/gif",
+        "heic": "image/heic",
+        "heif": "image/heif",
+        "avif": "image/avif",
+        "tif": "image/tiff",
+        "tiff": "image/tiff",
+        "bmp": "image/bmp",
+    }.get(extension, default)
+
+
+def estimate_image_tokens(width: Optional[int], height: Optional[int]) -> int:
+    """Schätzt die Gemini Input-Tokens für ein Bild der gegebenen Größe."""
+    if not width or not height:
+        return GEMINI_TOKENS_PER_TILE
+    if width <= GEMINI_TILE_SIZE // 2 and height <= GEMINI_TILE_SIZE // 2:
+        return GEMINI_TOKENS_PER_TILE
+    tiles_x = -(-width // GEMINI_TILE_SIZE)
+    tiles_y = -(-height // GEMINI_TILE_SIZE)
+    return tiles_x * tiles_y * GEMINI_TOKENS_PER_TILE
+
+
+# APP0 (JFIF) und APP14 (Adobe, Farbtransformation) bleiben, alle anderen APPn (EXIF/GPS, XMP, ICC, IPTC) und Kommentare fliegen raus
+_JPEG_KEEP_MARKERS = (0xE0, 0xEE)
+
+
+def strip_jpeg_metadata(data: bytes) -> Optional[bytes]:
+    """
+    Entfernt Metadaten-Segmente verlustfrei aus einem JPEG (ohne Neu-Kodieren).
+
+    Returns:
+        JPEG ohne APPn/COM-Segmente, None bei unerwartetem Aufbau
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+    out = bytearray(data[:2])
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Füllbyte
+            pos += 1
+            continue
+        if marker == 0xDA:  # Start of Scan: ab hier Bilddaten, keine Metadaten mehr
+            out += data[pos:]
+            return bytes(out)
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        end = pos + 2 + length
+        if length < 2 or end > len(data):
+            return None
+        is_metadata = (0xE0 <= marker <= 0xEF and marker not in _JPEG_KEEP_MARKERS) or marker == 0xFE
+        if not is_metadata:
+            out += data[pos:end]
+        pos = end
+    return None
+
+
+def normalize_image(
+    data: bytes,
+    config: Optional[ImageNormalizationConfig] = None,
+) -> NormalizedImage:
+    """
+    Normalisiert ein Bild für den Versand an Gemini.
+
+    CPU-gebunden: In async Code über asyncio.to_thread() aufrufen.
+
+    Args:
+        data: Rohe Bilddaten
+        config: Optional ImageNormalizationConfig
+
+    Returns:
+        NormalizedImage. Bei nicht dekodierbaren Bildern (oder ohne Pillow)
+        werden die Originaldaten mit dem erkannten MIME-Type zurückgegeben.
+    """
+    if config is None:
+        config = ImageNormalizationConfig()
+
+    start = time.perf_counter()
+    original_mime = sniff_mime_type(data)
+    passthrough = NormalizedImage(
+        data=data,
+        mime_type=original_mime,
+        original_mime_type=original_mime,
+        original_size_bytes=len(data),
+    )
+
+    if not config.enabled or Image is None:
+        return passthrough
+    if original_mime in ("image/heic", "image/heif") and not HEIF_SUPPORTED:
+        logger.debug("HEIC/HEIF ohne pillow-heif: Bild wird unverändert gesendet")
+        return passthrough
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            original_width, original_height = img.size
+            orientation = img.getexif().get(0x0112, 1)
+
+            if config.max_edge_px and img.format == "JPEG":
+                # JPEG direkt in reduzierter Auflösung dekodieren (DCT-Scaling), spart den Großteil der CPU-Zeit
+                img.draft("RGB", (config.max_edge_px, config.max_edge_px))
+
+            img = ImageOps.exif_transpose(img)
+
+            resized = False
+            if config.max_edge_px and max(img.size) > config.max_edge_px:
+                img.thumbnail((config.max_edge_px, config.max_edge_px), Image.Resampling.LANCZOS)
+                resized = True
+
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+
+            out = io.BytesIO()
+            # Ohne exif=... schreibt Pillow keine Metadaten
+            img.save(out, format="JPEG", quality=config.jpeg_quality, optimize=True)
+            encoded = out.getvalue()
+            width, height = img.size
+    except Exception as e:
+        logger.warning(f"⚠️ Bild-Normalisierung fehlgeschlagen ({original_mime}): {e}")
+        passthrough.duration_ms = (time.perf_counter() - start) * 1000
+        return passthrough
+
+    # Ein bereits kleines JPEG ohne Rotation nicht durch Neu-Kodieren vergrößern,
+    # Metadaten (EXIF/GPS) werden trotzdem verlustfrei entfernt
+    stripped = strip_jpeg_metadata(data) if original_mime == "image/jpeg" else None
+    if (
+        stripped is not None
+        and len(encoded) >= len(stripped)
+        and not resized
+        and orientation == 1
+    ):
+        passthrough.data = stripped
+        passthrough.width, passthrough.height = original_width, original_height
+        passthrough.original_width, passthrough.original_height = original_width, original_height
+        passthrough.duration_ms = (time.perf_counter() - start) * 1000
+        return passthrough
+
+    return NormalizedImage(
+        data=encoded,
+        mime_type="image/jpeg",
+        original_mime_type=original_mime,
+        original_size_bytes=len(data),
+        width=width,
+        height=height,
+        original_width=original_width,
+        original_height=original_height,
+        duration_ms=(time.perf_counter() - start) * 1000,
+    )
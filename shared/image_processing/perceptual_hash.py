@@ -0,0 +1,114 @@
+"""
+Perceptual Hashes (dHash / pHash) für die Duplikat-Erkennung.
+
+Beide Hashes sind 64 Bit und robust gegen Neu-Kodierung, Skalierung und
+leichte Helligkeitsunterschiede. Ähnliche Bilder haben eine kleine
+Hamming-Distanz:
+- dHash: Helligkeits-Gradienten auf 9x8 Pixeln (sehr schnell)
+- pHash: Vorzeichen der niedrigen DCT-Frequenzen auf 32x32 Pixeln (robuster
+  gegen Belichtung/Kontrast, daher zur Bestätigung von dHash-Kandidaten)
+
+Benötigt Pillow; die DCT ist in reinem Python (nur die 8x8 niedrigsten
+Frequenzen werden berechnet).
+"""
+
+import io
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+
+HASH_BITS = 64
+
+_PHASH_SIZE = 32
+_PHASH_LOW = 8
+# DCT-II Basis: _DCT[u][x] = cos((2x+1)uπ / 2N)
+_DCT = [
+    [math.cos((2 * x + 1) * u * math.pi / (2 * _PHASH_SIZE)) for x in range(_PHASH_SIZE)]
+    for u in range(_PHASH_LOW)
+]
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    """dHash und pHash eines Bildes als 64-Bit Integer."""
+    dhash: int
+    phash: int
+
+    def distance(self, other: "ImageHashes") -> int:
+        """Maximale Hamming-Distanz über beide Hashes."""
+        return max(hamming_distance(self.dhash, other.dhash), hamming_distance(self.phash, other.phash))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Anzahl unterschiedlicher Bits."""
+    return (a ^ b).bit_count()
+
+
+def hash_to_hex(value: int) -> str:
+    """64-Bit Hash als 16-stelliger Hex-String (Firestore kann nur signed int64)."""
+    return f"{value:016x}"
+
+
+def hash_from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+def _bits_to_int(bits: List[bool]) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _open_grayscale(data: bytes, size: tuple) -> "Image.Image":
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft("L", (size[0] * 4, size[1] * 4))
+        img = ImageOps.exif_transpose(img)
+        return img.convert("L").resize(size, Image.Resampling.LANCZOS)
+
+
+def dhash(data: bytes) -> int:
+    """Difference Hash: vergleicht benachbarte Pixel einer 9x8 Graustufen-Version."""
+    pixels = _open_grayscale(data, (9, 8)).tobytes()
+    bits = [pixels[row * 9 + col] > pixels[row * 9 + col + 1] for row in range(8) for col in range(8)]
+    return _bits_to_int(bits)
+
+
+def phash(data: bytes) -> int:
+    """Perceptual Hash: DCT einer 32x32 Graustufen-Version, Vergleich der 8x8 Tieffrequenzen mit dem Median."""
+    pixels = _open_grayscale(data, (_PHASH_SIZE, _PHASH_SIZE)).tobytes()
+    rows = [pixels[i * _PHASH_SIZE:(i + 1) * _PHASH_SIZE] for i in range(_PHASH_SIZE)]
+
+    # Separierbare DCT: erst Zeilen (nur 8 Frequenzen), dann Spalten
+    row_dct = [[sum(c * p for c, p in zip(basis, row)) for basis in _DCT] for row in rows]
+    coefficients = [
+        sum(_DCT[v][y] * row_dct[y][u] for y in range(_PHASH_SIZE))
+        for v in range(_PHASH_LOW)
+        for u in range(_PHASH_LOW)
+    ]
+
+    # DC-Anteil (Gesamthelligkeit) nicht in den Median einbeziehen
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    return _bits_to_int([c > median for c in coefficients])
+
+
+def compute_image_hashes(data: bytes) -> Optional[ImageHashes]:
+    """
+    Berechnet dHash und pHash. CPU-gebunden: in async Code über asyncio.to_thread() aufrufen.
+
+    Returns:
+        ImageHashes oder None, wenn Pillow fehlt oder das Bild nicht dekodierbar ist
+    """
+    if Image is None:
+        return None
+    try:
+        return ImageHashes(dhash=dhash(data), phash=phash(data))
+    except Exception:
+        return None
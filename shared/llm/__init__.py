@@ -0,0 +1,87 @@
+"""
+Gemeinsame Hilfsmittel für LLM-Aufrufe (Gemini) über alle Agents hinweg.
+"""
+
+from .json_extraction import (
+    JsonExtraction,
+    extract_last_json_object,
+    parse_last_json_object,
+)
+from .streaming import StreamingFieldWatcher
+from .context_cache import (
+    PromptPrefix,
+    PromptPrefixCache,
+    PromptCacheStats,
+    get_prompt_cache,
+    configure_prompt_cache,
+)
+from .hedging import (
+    HedgePolicy,
+    HedgeStats,
+    Hedger,
+    get_hedger,
+    reset_hedgers,
+    hedging_summary,
+)
+from .regions import (
+    RegionalClientPool,
+    get_region_pool,
+    configure_region_pool,
+)
+from .resilience import (
+    RetryPolicy,
+    RetryDecision,
+    CircuitBreaker,
+    CircuitOpenError,
+    classify_error,
+    retry_async,
+    get_circuit_breaker,
+    configure_circuit_breakers,
+    reset_circuit_breakers,
+)
+from .usage import (
+    LLMUsage,
+    ModelPrice,
+    PriceTable,
+    usage_from_response,
+    record_llm_call,
+    get_price_table,
+    configure_price_table,
+)
+
+__all__ = [
+    "JsonExtraction",
+    "extract_last_json_object",
+    "parse_last_json_object",
+    "StreamingFieldWatcher",
+    "PromptPrefix",
+    "PromptPrefixCache",
+    "PromptCacheStats",
+    "get_prompt_cache",
+    "configure_prompt_cache",
+    "HedgePolicy",
+    "HedgeStats",
+    "Hedger",
+    "get_hedger",
+    "reset_hedgers",
+    "hedging_summary",
+    "RegionalClientPool",
+    "get_region_pool",
+    "configure_region_pool",
+    "RetryPolicy",
+    "RetryDecision",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "classify_error",
+    "retry_async",
+    "get_circuit_breaker",
+    "configure_circuit_breakers",
+    "reset_circuit_breakers",
+    "LLMUsage",
+    "ModelPrice",
+    "PriceTable",
+    "usage_from_response",
+    "record_llm_call",
+    "get_price_table",
+    "configure_price_table",
+]
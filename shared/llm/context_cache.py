@@ -0,0 +1,393 @@
+"""
+Explizites Context Caching für statische Prompt-Präfixe.
+
+Ingestion, Condition Assessor und Preisanalyse schicken bei jedem Call dieselben
+System Instructions, Task Prompts und Tool-Definitionen mit. PromptPrefixCache
+legt diese Präfixe einmal als CachedContent an und referenziert sie danach nur
+noch per Name (weniger Input-Tokens, kürzere Time-to-First-Token).
+
+Ablauf pro Call (prepare_request):
+- Präfix bekannt und noch lange genug gültig -> Name verwenden
+- Läuft bald ab (refresh_margin_seconds) -> TTL per caches.update() verlängern
+- Unbekannt -> erst per caches.list() nach einem Cache mit gleichem display_name
+  suchen (anderer Prozess / Cold Start), sonst caches.create()
+- Präfix unter min_prefix_tokens oder Fehler beim Anlegen -> ohne Cache; der
+  Präfix steht trotzdem vorn im Request, damit implizites Caching greifen kann
+
+Gemini verlangt eine Mindestgröße für explizite Caches (je nach Modell 1024-4096
+Tokens). Kleinere Präfixe werden daher bewusst nicht angelegt.
+
+Metriken (record_usage) vergleichen gecachte und ungecachte Prompt-Tokens laut
+usage_metadata sowie die Latenz von Calls mit und ohne Cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_REFRESH_MARGIN_SECONDS = 300
+DEFAULT_MIN_PREFIX_TOKENS = 1024
+DEFAULT_FAILURE_BACKOFF_SECONDS = 600
+# Grobe Schätzung für die Mindestgröße (ohne count_tokens Call)
+CHARS_PER_TOKEN = 4
+
+
+# ============================================================================
+# PREFIX & STATS
+# ============================================================================
+
+@dataclass
+class PromptPrefix:
+    """
+    Statischer Anfang eines Requests.
+
+    Attributes:
+        key: Kurzer Name für Logs/Metriken (z.B. "ingestion")
+        model: Modell (Caches sind an ein Modell gebunden)
+        system_instruction: System Instructions
+        contents: Statische Inhalte vor den dynamischen (z.B. Task Prompt)
+        tools: Tool-Definitionen (z.B. Google Search Grounding)
+    """
+    key: str
+    model: str
+    system_instruction: Optional[str] = None
+    contents: List[str] = field(default_factory=list)
+    tools: Optional[List[types.Tool]] = None
+
+    @property
+    def fingerprint(self) -> str:
+        payload = {
+            "model": self.model,
+            "system_instruction": self.system_instruction,
+            "contents": self.contents,
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in self.tools or []],
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.key}-{self.fingerprint[:16]}"
+
+    @property
+    def estimated_tokens(self) -> int:
+        chars = len(self.system_instruction or "") + sum(len(text) for text in self.contents)
+        return chars // CHARS_PER_TOKEN
+
+    def content_objects(self) -> List[types.Content]:
+        if not self.contents:
+            return []
+        return [types.Content(role="user", parts=[types.Part(text=text) for text in self.contents])]
+
+
+@dataclass
+class PromptCacheStats:
+    """Gecachte vs. ungecachte Prompt-Tokens und Latenzen pro Präfix."""
+    requests: int = 0
+    cached_requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    cached_latency_ms: float = 0.0
+    uncached_latency_ms: float = 0.0
+    creations: int = 0
+    reuses: int = 0
+    refreshes: int = 0
+    failures: int = 0
+
+    @property
+    def uncached_tokens(self) -> int:
+        return self.prompt_tokens - self.cached_tokens
+
+    @property
+    def cached_token_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        uncached_requests = self.requests - self.cached_requests
+        return {
+            "requests": self.requests,
+            "cached_requests": self.cached_requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "uncached_tokens": self.uncached_tokens,
+            "cached_token_ratio": round(self.cached_token_ratio, 4),
+            "avg_latency_ms_cached": round(self.cached_latency_ms / self.cached_requests, 1) if self.cached_requests else None,
+            "avg_latency_ms_uncached": round(self.uncached_latency_ms / uncached_requests, 1) if uncached_requests else None,
+            "creations": self.creations,
+            "reuses": self.reuses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+@dataclass
+class _CacheEntry:
+    name: Optional[str]
+    expires_at: float
+    # Bei name=None: kein Cache bis retry_after (zu klein oder Fehler)
+    retry_after: float = 0.0
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class PromptPrefixCache:
+    """
+    Verwaltet CachedContents für statische Präfixe, pro genai.Client getrennt.
+
+    Usage:
+        cache = get_prompt_cache()
+        contents, config, cache_name = await cache.prepare_request(client, prefix, dynamic_contents, config)
+        response = await client.aio.models.generate_content(model=prefix.model, contents=contents, config=config)
+        cache.record_usage(prefix, response, cache_name, latency_ms)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        refresh_margin_seconds: int = DEFAULT_REFRESH_MARGIN_SECONDS,
+        min_prefix_tokens: int = DEFAULT_MIN_PREFIX_TOKENS,
+        failure_backoff_seconds: int = DEFAULT_FAILURE_BACKOFF_SECONDS,
+        clock=time.time,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_prefix_tokens = min_prefix_tokens
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self.clock = clock
+        self.stats: Dict[str, PromptCacheStats] = {}
+        self._entries: "weakref.WeakKeyDictionary[Any, Dict[str, _CacheEntry]]" = weakref.WeakKeyDictionary()
+        self._strong_entries: Dict[int, Dict[str, _CacheEntry]] = {}
+        self._loop_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+        self._state_lock = threading.Lock()
+
+    def _stats(self, key: str) -> PromptCacheStats:
+        with self._state_lock:
+            return self.stats.setdefault(key, PromptCacheStats())
+
+    def _client_entries(self, client: Any) -> Dict[str, _CacheEntry]:
+        with self._state_lock:
+            try:
+                return self._entries.setdefault(client, {})
+            except TypeError:
+                # Nicht weak-referenzierbar (z.B. Stubs): nach Identität
+                return self._strong_entries.setdefault(id(client), {})
+
+    def _lock(self, fingerprint: str) -> asyncio.Lock:
+        # asyncio.Lock ist an einen Event Loop gebunden (Handler nutzen evtl. mehrere nacheinander)
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            locks = self._loop_locks.setdefault(loop, {})
+            return locks.setdefault(fingerprint, asyncio.Lock())
+
+    def invalidate(self, client: Any, prefix: PromptPrefix) -> None:
+        """Vergisst den Cache eines Präfixes (z.B. wenn er serverseitig gelöscht wurde)."""
+        self._client_entries(client).pop(prefix.fingerprint, None)
+
+    async def get_cached_content(self, client: Any, prefix: PromptPrefix) -> Optional[str]:
+        """
+        Liefert den Namen des CachedContent für einen Präfix (legt ihn bei Bedarf an).
+
+        Returns:
+            Name (z.B. "projects/.../cachedContents/123") oder None, wenn ohne Cache gearbeitet wird
+        """
+        entries = self._client_entries(client)
+        fingerprint = prefix.fingerprint
+        entry = entries.get(fingerprint)
+        now = self.clock()
+        if entry is not None and entry.name is None and now < entry.retry_after:
+            return None
+        if entry is not None and entry.name and now < entry.expires_at - self.refresh_margin_seconds:
+            return entry.name
+
+        if prefix.estimated_tokens < self.min_prefix_tokens:
+            entries[fingerprint] = _CacheEntry(name=None, expires_at=0.0, retry_after=float("inf"))
+            logger.info(
+                f"ℹ️ Prompt prefix '{prefix.key}' (~{prefix.estimated_tokens} tokens) below explicit cache minimum "
+                f"({self.min_prefix_tokens}), relying on implicit caching"
+            )
+            return None
+
+        async with self._lock(fingerprint):
+            entry = entries.get(fingerprint)
+            now = self.clock()
+            if entry is not None and entry.name and now < entry.expires_at - self.refresh_margin_seconds:
+                return entry.name
+            try:
+                if entry is not None and entry.name:
+                    entry = await self._refresh(client, prefix, entry)
+                else:
+                    entry = await self._find_existing(client, prefix) or await self._create(client, prefix)
+            except Exception as e:
+                self._stats(prefix.key).failures += 1
+                logger.warning(f"⚠️ Context cache for '{prefix.key}' unavailable, sending full prompt: {e}")
+                entry = _CacheEntry(name=None, expires_at=0.0, retry_after=now + self.failure_backoff_seconds)
+            entries[fingerprint] = entry
+            return entry.name
+
+    def _expires_at(self, cached: types.CachedContent) -> float:
+        if cached.expire_time is not None:
+            return cached.expire_time.timestamp()
+        return self.clock() + self.ttl_seconds
+
+    async def _create(self, client: Any, prefix: PromptPrefix) -> _CacheEntry:
+        cached = await client.aio.caches.create(
+            model=prefix.model,
+            config=types.CreateCachedContentConfig(
+                display_name=prefix.display_name,
+                system_instruction=prefix.system_instruction,
+                contents=prefix.content_objects() or None,
+                tools=prefix.tools,
+                ttl=f"{self.ttl_seconds}s",
+            ),
+        )
+        self._stats(prefix.key).creations += 1
+        logger.info(f"🗄️ Created context cache {cached.name} for '{prefix.key}' (TTL {self.ttl_seconds}s)")
+        return _CacheEntry(name=cached.name, expires_at=self._expires_at(cached))
+
+    async def _refresh(self, client: Any, prefix: PromptPrefix, entry: _CacheEntry) -> _CacheEntry:
+        try:
+            cached = await client.aio.caches.update(
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+        except Exception as e:
+            # Bereits abgelaufen/gelöscht -> neu anlegen
+            logger.info(f"🔄 Context cache {entry.name} could not be extended ({e}), recreating")
+            return await self._create(client, prefix)
+        self._stats(prefix.key).refreshes += 1
+        logger.info(f"🔄 Extended context cache {cached.name or entry.name} for '{prefix.key}'")
+        return _CacheEntry(name=cached.name or entry.name, expires_at=self._expires_at(cached))
+
+    async def _find_existing(self, client: Any, prefix: PromptPrefix) -> Optional[_CacheEntry]:
+        """Sucht einen noch gültigen Cache mit gleichem display_name (andere Instanz, Cold Start)."""
+        min_expiry = self.clock() + self.refresh_margin_seconds
+        pager = await client.aio.caches.list()
+        async for cached in pager:
+            if cached.display_name != prefix.display_name or cached.expire_time is None:
+                continue
+            if cached.expire_time.timestamp() > min_expiry:
+                self._stats(prefix.key).reuses += 1
+                logger.info(f"♻️ Reusing context cache {cached.name} for '{prefix.key}'")
+                return _CacheEntry(name=cached.name, expires_at=cached.expire_time.timestamp())
+        return None
+
+    async def prepare_request(
+        self,
+        client: Any,
+        prefix: PromptPrefix,
+        contents: List[Any],
+        config: types.GenerateContentConfig,
+    ) -> Tuple[List[Any], types.GenerateContentConfig, Optional[str]]:
+        """
+        Baut Contents und Config für einen Call mit (oder ohne) Cache.
+
+        Args:
+            client: genai.Client
+            prefix: Statischer Präfix
+            contents: Dynamische Inhalte (Bilder, Buchdaten, ...)
+            config: Generation Config (system_instruction/tools werden durch den Präfix ersetzt)
+
+        Returns:
+            (contents, config, cache_name) - cache_name None ohne Cache
+        """
+        cache_name = await self.get_cached_content(client, prefix)
+        if cache_name:
+            # System Instructions und Tools stecken im Cache und dürfen nicht zusätzlich im Request stehen
+            update = {"cached_content": cache_name, "system_instruction": None, "tools": None}
+            return list(contents), config.model_copy(update=update), cache_name
+        update = {"system_instruction": prefix.system_instruction, "tools": prefix.tools}
+        return prefix.content_objects() + list(contents), config.model_copy(update=update), None
+
+    async def generate_content(
+        self,
+        client: Any,
+        prefix: PromptPrefix,
+        contents: List[Any],
+        config: types.GenerateContentConfig,
+    ) -> Any:
+        """
+        generate_content() mit Präfix-Cache und Metriken.
+
+        Wurde der Cache serverseitig gelöscht, wird einmal ohne Cache wiederholt.
+        """
+        request_contents, request_config, cache_name = await self.prepare_request(client, prefix, contents, config)
+        start = time.perf_counter()
+        try:
+            response = await client.aio.models.generate_content(
+                model=prefix.model, contents=request_contents, config=request_config
+            )
+        except Exception as e:
+            if not cache_name or not is_missing_cache_error(e):
+                raise
+            logger.warning(f"⚠️ Context cache {cache_name} vanished, retrying '{prefix.key}' without cache")
+            self.invalidate(client, prefix)
+            update = {"cached_content": None, "system_instruction": prefix.system_instruction, "tools": prefix.tools}
+            cache_name = None
+            start = time.perf_counter()
+            response = await client.aio.models.generate_content(
+                model=prefix.model,
+                contents=prefix.content_objects() + list(contents),
+                config=request_config.model_copy(update=update),
+            )
+        self.record_usage(prefix, response, cache_name, (time.perf_counter() - start) * 1000)
+        return response
+
+    def record_usage(self, prefix: PromptPrefix, response: Any, cache_name: Optional[str], latency_ms: float) -> None:
+        """Verbucht Prompt-Tokens (gecacht/ungecacht laut usage_metadata) und Latenz."""
+        usage = getattr(response, "usage_metadata", None)
+        stats = self._stats(prefix.key)
+        with self._state_lock:
+            stats.requests += 1
+            stats.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+            stats.cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+            if cache_name:
+                stats.cached_requests += 1
+                stats.cached_latency_ms += latency_ms
+            else:
+                stats.uncached_latency_ms += latency_ms
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Metriken aller Präfixe."""
+        with self._state_lock:
+            return {key: stats.to_dict() for key, stats in self.stats.items()}
+
+
+def is_missing_cache_error(error: Exception) -> bool:
+    """Ob ein Fehler bedeutet, dass der referenzierte CachedContent nicht mehr existiert."""
+    text = str(error).lower()
+    return "cachedcontent" in text.replace(" ", "").replace("_", "") and (
+        "not found" in text or "404" in text or "expired" in text
+    )
+
+
+_default_cache: Optional[PromptPrefixCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptPrefixCache:
+    """Liefert den prozessweiten Präfix-Cache."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = PromptPrefixCache()
+    return _default_cache
+
+
+def configure_prompt_cache(cache: Optional[PromptPrefixCache]) -> None:
+    """Setzt den prozessweiten Präfix-Cache. None setzt zurück."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
@@ -0,0 +1,297 @@
+"""
+Hedged Requests gegen Tail-Latenz einzelner Gemini Calls.
+
+Der p99 der Ingestion wird von wenigen Calls bestimmt, die ein Vielfaches des
+Medians brauchen. Ein Hedger beobachtet die Latenzen pro Schlüssel (z.B.
+Modell). Ist nach dem konfigurierten Perzentil (HedgePolicy.percentile) der
+letzten erfolgreichen Calls noch keine Antwort da, feuert er eine zweite,
+identische Anfrage - optional an einen anderen Client (zweite Region). Die
+erste erfolgreiche Antwort gewinnt, die andere Anfrage wird abgebrochen.
+Scheitert eine der beiden, läuft die andere weiter.
+
+Zusatzanfragen kosten Quota und Geld (abgebrochene Calls werden serverseitig
+ggf. trotzdem abgerechnet). Daher:
+
+- Hedging erst ab min_samples beobachteten Latenzen, nie vor min_delay_seconds
+- Budget: höchstens max_extra_ratio Zusatzanfragen bezogen auf die letzten
+  `window` Calls, sonst wird nur auf die erste Anfrage gewartet
+- HedgeStats misst Hedge-Rate, Gewinne der Zusatzanfrage und die Latenz mit
+  Hedging gegenüber der geschätzten Latenz ohne (p99 Verbesserung)
+
+Usage:
+    from shared.llm.hedging import HedgePolicy, get_hedger
+
+    hedger = get_hedger(f"gemini_ingestion:{model}", HedgePolicy(enabled=True))
+    response = await hedger.call(
+        lambda: client.aio.models.generate_content(model=model, contents=contents, config=config),
+        hedge=lambda: backup_client.aio.models.generate_content(model=model, contents=contents, config=config),
+    )
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    Einstellungen eines Hedgers.
+
+    Attributes:
+        enabled: Ohne enabled läuft jeder Call unverändert (nur die Latenz wird gemessen)
+        percentile: Perzentil der letzten Latenzen, nach dem die Zusatzanfrage startet
+        min_samples: Erst ab so vielen Messungen wird gehedged
+        min_delay_seconds: Untergrenze der Wartezeit vor der Zusatzanfrage
+        max_extra_ratio: Budget - Anteil Zusatzanfragen an den letzten `window` Calls
+        window: Anzahl Calls für Latenz-Perzentil und Budget
+    """
+    enabled: bool = False
+    percentile: float = 0.95
+    min_samples: int = 20
+    min_delay_seconds: float = 1.0
+    max_extra_ratio: float = 0.1
+    window: int = 200
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Perzentil (nearest rank) einer Liste; None bei leerer Liste."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+# ============================================================================
+# STATS
+# ============================================================================
+
+class HedgeStats:
+    """Metriken eines Hedgers (thread-safe)."""
+
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.failures = 0
+        # Latenz der ersten Anfrage allein; bei gewonnenem Hedge die Zeit bis zum Abbruch (Untergrenze)
+        self.primary_latencies: Deque[float] = deque(maxlen=window)
+        # Latenz, die der Aufrufer tatsächlich gesehen hat
+        self.effective_latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, primary_ms: Optional[float], effective_ms: Optional[float], hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            if hedged:
+                self.hedged += 1
+            if hedge_won:
+                self.hedge_wins += 1
+            if effective_ms is None:
+                self.failures += 1
+                return
+            if primary_ms is not None:
+                self.primary_latencies.append(primary_ms)
+            self.effective_latencies.append(effective_ms)
+
+    def record_budget_denied(self) -> None:
+        with self._lock:
+            self.budget_denied += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            primary = list(self.primary_latencies)
+            effective = list(self.effective_latencies)
+            calls = self.calls or 1
+            summary = {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / calls, 4),
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+                "failures": self.failures,
+            }
+        p99_effective = percentile(effective, 0.99)
+        p99_primary = percentile(primary, 0.99)
+        summary.update({
+            "p50_ms": round(percentile(effective, 0.5) or 0.0, 1),
+            "p99_ms": round(p99_effective or 0.0, 1),
+            # Schätzung ohne Hedging (Untergrenze, da abgebrochene Anfragen nur bis zum Abbruch zählen)
+            "p99_unhedged_ms": round(p99_primary or 0.0, 1),
+            "p99_improvement_ms": round(max(0.0, (p99_primary or 0.0) - (p99_effective or 0.0)), 1),
+        })
+        return summary
+
+
+# ============================================================================
+# HEDGER
+# ============================================================================
+
+class Hedger:
+    """
+    Führt Calls eines Schlüssels mit optionaler Zusatzanfrage aus.
+
+    Args:
+        key: Name für Logs und Metriken (z.B. "gemini_ingestion:gemini-2.5-pro")
+        policy: HedgePolicy
+        clock: Monotone Uhr in Sekunden (Tests)
+    """
+
+    def __init__(self, key: str, policy: Optional[HedgePolicy] = None, clock: Callable[[], float] = time.perf_counter):
+        self.key = key
+        self.policy = policy or HedgePolicy()
+        self.stats = HedgeStats(window=self.policy.window)
+        self._clock = clock
+        self._recent_hedges: Deque[bool] = deque(maxlen=self.policy.window)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Wartezeit in Sekunden vor der Zusatzanfrage; None solange zu wenige Messungen vorliegen."""
+        with self.stats._lock:
+            samples = list(self.stats.primary_latencies)
+        if len(samples) < self.policy.min_samples:
+            return None
+        threshold_ms = percentile(samples, self.policy.percentile) or 0.0
+        return max(self.policy.min_delay_seconds, threshold_ms / 1000)
+
+    def _track_call(self, hedged: bool) -> None:
+        with self._lock:
+            self._recent_hedges.append(hedged)
+
+    def _take_budget(self) -> bool:
+        """Reserviert eine Zusatzanfrage, wenn das Budget der letzten `window` Calls es erlaubt."""
+        with self._lock:
+            used = sum(self._recent_hedges)
+            allowed = self.policy.max_extra_ratio * (len(self._recent_hedges) + 1)
+            if used + 1 > allowed:
+                return False
+            self._recent_hedges.append(True)
+            return True
+
+    async def call(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        """
+        Führt primary aus und startet bei Bedarf hedge (Default: primary erneut).
+
+        Args:
+            primary: Erzeugt die erste Anfrage
+            hedge: Erzeugt die Zusatzanfrage (z.B. an eine zweite Region)
+
+        Returns:
+            Ergebnis der ersten erfolgreichen Anfrage
+
+        Raises:
+            Exception: Fehler der ersten Anfrage, wenn keine Anfrage erfolgreich war
+        """
+        start = self._clock()
+        primary_task = asyncio.ensure_future(primary())
+        delay = self.hedge_delay() if self.policy.enabled else None
+
+        hedge_task = None
+        try:
+            if delay is not None:
+                await asyncio.wait({primary_task}, timeout=delay)
+                if not primary_task.done():
+                    if self._take_budget():
+                        logger.info(f"🏁 {self.key}: no response after {delay:.1f}s, sending hedged request")
+                        hedge_task = asyncio.ensure_future((hedge or primary)())
+                    else:
+                        self.stats.record_budget_denied()
+
+            if hedge_task is None:
+                self._track_call(False)
+                try:
+                    result = await primary_task
+                except Exception:
+                    self.stats.record(None, None, hedged=False, hedge_won=False)
+                    raise
+                elapsed_ms = (self._clock() - start) * 1000
+                self.stats.record(elapsed_ms, elapsed_ms, hedged=False, hedge_won=False)
+                return result
+
+            pending = {primary_task, hedge_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    elapsed_ms = (self._clock() - start) * 1000
+                    hedge_won = task is hedge_task
+                    if hedge_won:
+                        logger.info(f"🏁 {self.key}: hedged request won after {elapsed_ms:.0f}ms")
+                    self.stats.record(elapsed_ms, elapsed_ms, hedged=True, hedge_won=hedge_won)
+                    return task.result()
+            # Beide Anfragen gescheitert: Fehler der ersten Anfrage weitergeben
+            self.stats.record(None, None, hedged=True, hedge_won=False)
+            raise primary_task.exception()
+
+        finally:
+            # Verlierer (bzw. beide bei Abbruch des Aufrufers) abbrechen
+            losers = [task for task in (primary_task, hedge_task) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = self.stats.summary()
+        summary["enabled"] = self.policy.enabled
+        delay = self.hedge_delay()
+        summary["hedge_delay_ms"] = round(delay * 1000, 1) if delay is not None else None
+        return summary
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+_hedgers: Dict[str, Hedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(key: str, policy: Optional[HedgePolicy] = None) -> Hedger:
+    """
+    Prozessweiter Hedger je Schlüssel.
+
+    Args:
+        key: Schlüssel (z.B. "gemini_ingestion:<modell>")
+        policy: Setzt die Policy des Hedgers (None = bestehende bzw. Default behalten)
+
+    Returns:
+        Hedger
+    """
+    with _hedgers_lock:
+        hedger = _hedgers.get(key)
+        if hedger is None:
+            hedger = Hedger(key, policy)
+            _hedgers[key] = hedger
+        elif policy is not None:
+            hedger.policy = policy
+        return hedger
+
+
+def reset_hedgers() -> None:
+    """Verwirft alle Hedger samt Latenz-Historie (Tests)."""
+    with _hedgers_lock:
+        _hedgers.clear()
+
+
+def hedging_summary() -> Dict[str, Dict[str, Any]]:
+    """Metriken aller Hedger für Logs/Health Checks."""
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {hedger.key: hedger.summary() for hedger in hedgers}
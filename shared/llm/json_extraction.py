@@ -0,0 +1,154 @@
+"""
+Linearer JSON-Extraktor für "chatty" LLM-Antworten.
+
+Gemini liefert (vor allem mit Search Grounding, wo kein response_schema
+möglich ist) oft Prosa vor und nach dem JSON, Markdown-Fences, Beispiel-
+Objekte im Text oder bei MAX_TOKENS ein abgeschnittenes Objekt.
+
+extract_last_json_object() findet in EINEM Durchlauf das letzte vollständige
+JSON-Objekt der obersten Ebene:
+- Ein Regex springt nur zwischen strukturrelevanten Zeichen ({ } [ ] " \\ , Newline),
+  Prosa wird übersprungen
+- Ein Klammer-Stack liefert alle balancierten {...}-Spannen; die zuletzt
+  geschlossene ist die äußerste am Ende des Texts
+- Ist sie kein valides JSON (z.B. "{Hinweis}" in der Prosa danach), wird die
+  nächste davorliegende, nicht enthaltene Spanne probiert. Diese Spannen sind
+  disjunkt, json.loads() sieht jedes Zeichen also höchstens einmal
+- Bricht der Text mitten im Objekt ab, wird es am letzten sicheren Punkt
+  (nach einem vollständigen Element) abgeschnitten und geschlossen
+
+Gesamtaufwand O(n), auch für pathologische Eingaben (z.B. tausende offene
+Klammern), bei denen raw_decode() an jeder "{" quadratisch wird.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Alle Zeichen, die den Scanner-Zustand ändern können
+_STRUCTURAL = re.compile(r'[{}\[\]"\\,\n]')
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+@dataclass
+class JsonExtraction:
+    """Gefundenes JSON-Objekt mit Position im Text."""
+    value: Dict[str, Any]
+    start: int
+    end: int
+    truncated: bool = False
+
+
+def _scan(text: str) -> Tuple[List[Tuple[int, int]], List[Tuple[int, str]], Optional[Tuple[int, int]]]:
+    """
+    Ein Durchlauf über den Text.
+
+    Returns:
+        (balancierte Objekt-Spannen in Schließ-Reihenfolge,
+         offener Stack am Ende als (Position, Klammer),
+         letzter sicherer Schnittpunkt im offenen Objekt als (Position, Stack-Tiefe))
+
+    Für den Schnittpunkt reicht die Tiefe: Jedes Pop unter diese Tiefe setzt
+    einen neuen Schnittpunkt, der Stack bis zur Tiefe ist am Ende also
+    unverändert.
+    """
+    spans: List[Tuple[int, int]] = []
+    stack: List[Tuple[int, str]] = []
+    in_string = False
+    skip_until = -1
+    safe_point: Optional[Tuple[int, int]] = None
+
+    for match in _STRUCTURAL.finditer(text):
+        pos = match.start()
+        if pos < skip_until:
+            continue
+        char = match.group()
+
+        if in_string:
+            if char == "\\":
+                skip_until = pos + 2
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                # JSON-Strings enthalten keine rohen Zeilenumbrüche: das war Prosa
+                in_string = False
+            continue
+
+        if char == '"':
+            # Anführungszeichen in Prosa außerhalb eines Objekts sind kein String
+            in_string = bool(stack)
+        elif char in "{[":
+            stack.append((pos, char))
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1][1]] != char:
+                # Unpassende Klammer: Prosa, Zustand zurücksetzen
+                stack.clear()
+                safe_point = None
+                continue
+            start, opener = stack.pop()
+            if opener == "{":
+                spans.append((start, pos + 1))
+            safe_point = (pos + 1, len(stack)) if stack else None
+        elif char == "," and stack:
+            safe_point = (pos, len(stack))
+
+    return spans, stack, safe_point
+
+
+def _loads_object(fragment: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = json.loads(fragment)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def extract_last_json_object(text: str, repair_truncated: bool = True) -> Optional[JsonExtraction]:
+    """
+    Findet das letzte vollständige JSON-Objekt der obersten Ebene.
+
+    Args:
+        text: LLM-Antwort (Prosa, Markdown-Fences, JSON)
+        repair_truncated: Ob ein am Ende abgeschnittenes Objekt geschlossen werden soll
+
+    Returns:
+        JsonExtraction oder None, wenn kein Objekt gefunden wurde
+    """
+    if not text:
+        return None
+
+    spans, open_stack, safe_point = _scan(text)
+
+    # Offenes Objekt am Textende: abgeschnittene Antwort, die nach allen vollständigen Objekten kommt
+    if repair_truncated and safe_point is not None and open_stack[0][1] == "{":
+        outer_start = open_stack[0][0]
+        cut, depth = safe_point
+        closers = "".join(_CLOSERS[char] for _, char in reversed(open_stack[:depth]))
+        value = _loads_object(text[outer_start:cut] + closers)
+        if value is not None:
+            return JsonExtraction(value=value, start=outer_start, end=len(text), truncated=True)
+
+    # Von hinten: nur Spannen probieren, die nicht in einer bereits probierten liegen
+    tried_start = len(text) + 1
+    for start, end in reversed(spans):
+        if start > tried_start:
+            continue
+        tried_start = start
+        value = _loads_object(text[start:end])
+        if value is not None:
+            return JsonExtraction(value=value, start=start, end=end)
+    return None
+
+
+def parse_last_json_object(text: str, repair_truncated: bool = True) -> Dict[str, Any]:
+    """
+    Wie extract_last_json_object(), liefert aber direkt das Dict.
+
+    Raises:
+        json.JSONDecodeError: Wenn kein valides JSON-Objekt gefunden wurde
+    """
+    extraction = extract_last_json_object(text, repair_truncated=repair_truncated)
+    if extraction is None:
+        raise json.JSONDecodeError("No valid JSON object found in response", text or "", 0)
+    return extraction.value
@@ -0,0 +1,304 @@
+"""
+Regionaler GenAI Client Pool mit quota-bewusstem Failover.
+
+Bisher war jede Stufe auf eine Region festgelegt (Ingestion europe-west1 bzw.
+GCP_REGION, Zustandsbewertung und Price Grounding us-central1, Preisanalyse
+europe-west1). Drosselt Vertex AI eine Region, steht die ganze Stufe. Der Pool
+kennt pro Stufe eine geordnete Liste bevorzugter Regionen und wählt pro Call:
+
+- Eine Region, deren letzter Call mit 429 scheiterte, rückt hinter die
+  übrigen; nach eviction_threshold 429 in Folge wird sie für
+  eviction_seconds (bzw. bis zum Retry-Hinweis des Servers) ausgesetzt.
+- Unter den verfügbaren Regionen gewinnt die bevorzugte, außer eine spätere
+  ist laut gleitendem Mittel der letzten Calls um mehr als latency_margin
+  schneller.
+- call() wechselt bei 429/503 sofort in die nächste Region; erst wenn alle
+  Regionen gescheitert sind, greift der Backoff von retry_async().
+
+Konfiguration (Umgebung):
+    LLM_REGIONS=europe-west1                        # alle Stufen in einer Region
+    LLM_REGIONS_INGESTION=europe-west1,europe-west4 # Reihenfolge pro Stufe
+    GCP_REGION                                      # wie bisher für Ingestion, Zustand, Listing
+
+Usage:
+    from shared.llm.regions import STAGE_PRICE_GROUNDING, get_region_pool
+
+    response = await get_region_pool().call(
+        STAGE_PRICE_GROUNDING,
+        lambda client: client.aio.models.generate_content(model=model, contents=prompt, config=config),
+    )
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from shared.clients import get_genai_client
+
+from .resilience import KIND_RATE_LIMITED, KIND_UNAVAILABLE, RetryDecision, classify_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STAGE_INGESTION = "ingestion"
+STAGE_CONDITION = "condition"
+STAGE_PRICE_GROUNDING = "price_grounding"
+STAGE_PRICING_ANALYSIS = "pricing_analysis"
+STAGE_LISTING = "listing"
+
+# Bisherige Regionen der Stufen (GCP_REGION überschreibt wie gehabt Ingestion, Zustand und Listing)
+DEFAULT_STAGE_REGIONS: Dict[str, List[str]] = {
+    STAGE_INGESTION: ["europe-west1"],
+    STAGE_CONDITION: ["us-central1"],
+    STAGE_PRICE_GROUNDING: ["us-central1"],
+    STAGE_PRICING_ANALYSIS: ["europe-west1"],
+    STAGE_LISTING: ["us-central1"],
+}
+GCP_REGION_STAGES = {STAGE_INGESTION, STAGE_CONDITION, STAGE_LISTING}
+
+# Fehler, bei denen eine andere Region helfen kann
+FAILOVER_KINDS = {KIND_RATE_LIMITED, KIND_UNAVAILABLE}
+
+
+def _parse_regions(value: Optional[str]) -> List[str]:
+    return [region.strip() for region in (value or "").split(",") if region.strip()]
+
+
+def load_region_preferences_from_env() -> Dict[str, List[str]]:
+    """
+    Regionen pro Stufe aus der Umgebung.
+
+    Reihenfolge: LLM_REGIONS_<STUFE> vor LLM_REGIONS vor GCP_REGION (nur
+    Ingestion, Zustand, Listing) vor DEFAULT_STAGE_REGIONS.
+
+    Returns:
+        Dict Stufe -> geordnete Regionen
+    """
+    global_regions = _parse_regions(os.environ.get("LLM_REGIONS"))
+    gcp_region = os.environ.get("GCP_REGION")
+    preferences = {}
+    for stage, defaults in DEFAULT_STAGE_REGIONS.items():
+        regions = _parse_regions(os.environ.get(f"LLM_REGIONS_{stage.upper()}")) or global_regions
+        if not regions and gcp_region and stage in GCP_REGION_STAGES:
+            regions = [gcp_region]
+        preferences[stage] = regions or list(defaults)
+    return preferences
+
+
+@dataclass
+class RegionHealth:
+    """Zustand einer Region (gleitende Latenz, 429-Serie, Sperre)."""
+    region: str
+    latency_ewma_ms: Optional[float] = None
+    consecutive_rate_limits: int = 0
+    evicted_until: float = 0.0
+    calls: int = 0
+    failures: int = 0
+    rate_limited: int = 0
+    evictions: int = 0
+    failovers: int = 0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "latency_ewma_ms": round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+            "evicted_for_seconds": round(max(0.0, self.evicted_until - now), 1),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "evictions": self.evictions,
+            "failovers": self.failovers,
+        }
+
+
+class RegionalClientPool:
+    """
+    GenAI Clients pro Region mit Auswahl nach Präferenz, Quota-Zustand und Latenz.
+
+    Args:
+        preferences: Stufe -> geordnete Regionen (None = load_region_preferences_from_env())
+        project: GCP Projekt (None = GCP_PROJECT)
+        eviction_threshold: 429 in Folge, nach denen eine Region ausgesetzt wird
+        eviction_seconds: Dauer der Sperre
+        latency_margin: Um diesen Anteil muss eine spätere Region schneller sein, um vorgezogen zu werden
+        ewma_alpha: Gewicht des neuesten Calls im gleitenden Mittel
+        client_factory: Baut den Client einer Region (Tests)
+        clock: Monotone Uhr in Sekunden (Tests)
+    """
+
+    def __init__(
+        self,
+        preferences: Optional[Dict[str, List[str]]] = None,
+        project: Optional[str] = None,
+        eviction_threshold: int = 3,
+        eviction_seconds: float = 60.0,
+        latency_margin: float = 0.3,
+        ewma_alpha: float = 0.2,
+        client_factory: Optional[Callable[[str], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.preferences = preferences if preferences is not None else load_region_preferences_from_env()
+        self.project = project
+        self.eviction_threshold = eviction_threshold
+        self.eviction_seconds = eviction_seconds
+        self.latency_margin = latency_margin
+        self.ewma_alpha = ewma_alpha
+        self._client_factory = client_factory
+        self._clock = clock
+        self._health: Dict[str, RegionHealth] = {}
+        self._lock = threading.Lock()
+
+    def _region(self, region: str) -> RegionHealth:
+        if region not in self._health:
+            self._health[region] = RegionHealth(region=region)
+        return self._health[region]
+
+    def regions_for(self, stage: str) -> List[str]:
+        """Konfigurierte Regionen einer Stufe in Präferenz-Reihenfolge."""
+        return list(self.preferences.get(stage) or DEFAULT_STAGE_REGIONS.get(stage) or ["europe-west1"])
+
+    def candidates(self, stage: str, regions: Optional[List[str]] = None) -> List[str]:
+        """
+        Regionen in der Reihenfolge, in der sie versucht werden.
+
+        Args:
+            stage: Stufe (STAGE_*)
+            regions: Explizite Regionen statt der Stufen-Präferenz
+
+        Returns:
+            Verfügbare Regionen (schnellste bevorzugte zuerst), danach ausgesetzte nach Ablauf der Sperre
+        """
+        ordered = list(regions) if regions else self.regions_for(stage)
+        now = self._clock()
+        with self._lock:
+            health = {region: self._region(region) for region in ordered}
+            available = [region for region in ordered if health[region].evicted_until <= now]
+            # Regionen, deren letzter Call gedrosselt wurde, nach hinten (stabile Sortierung hält die Präferenz)
+            available.sort(key=lambda region: health[region].consecutive_rate_limits > 0)
+            evicted = sorted(
+                (region for region in ordered if health[region].evicted_until > now),
+                key=lambda region: health[region].evicted_until,
+            )
+            if available:
+                best = available[0]
+                for region in available[1:]:
+                    if (health[region].consecutive_rate_limits > 0) != (health[best].consecutive_rate_limits > 0):
+                        continue
+                    best_latency = health[best].latency_ewma_ms
+                    latency = health[region].latency_ewma_ms
+                    if best_latency is not None and latency is not None and latency < best_latency * (1 - self.latency_margin):
+                        best = region
+                available.remove(best)
+                available.insert(0, best)
+        # Sind alle Regionen ausgesetzt, wird trotzdem die mit der kürzesten Restsperre versucht
+        return available + evicted
+
+    def client(self, region: str, project: Optional[str] = None) -> Any:
+        """GenAI Client der Region (prozessweit geteilt über shared.clients)."""
+        if self._client_factory is not None:
+            return self._client_factory(region)
+        project = project or self.project or os.environ.get("GCP_PROJECT")
+        return get_genai_client(project=project, location=region)
+
+    def record_success(self, region: str, latency_ms: float) -> None:
+        with self._lock:
+            health = self._region(region)
+            health.calls += 1
+            health.consecutive_rate_limits = 0
+            if health.latency_ewma_ms is None:
+                health.latency_ewma_ms = latency_ms
+            else:
+                health.latency_ewma_ms += self.ewma_alpha * (latency_ms - health.latency_ewma_ms)
+
+    def record_failure(self, region: str, decision: RetryDecision) -> None:
+        """Verbucht einen Fehler; nach eviction_threshold 429 in Folge wird die Region ausgesetzt."""
+        with self._lock:
+            health = self._region(region)
+            health.calls += 1
+            health.failures += 1
+            if decision.kind != KIND_RATE_LIMITED:
+                return
+            health.rate_limited += 1
+            health.consecutive_rate_limits += 1
+            if health.consecutive_rate_limits >= self.eviction_threshold:
+                pause = max(self.eviction_seconds, decision.retry_after or 0.0)
+                health.evicted_until = self._clock() + pause
+                health.consecutive_rate_limits = 0
+                health.evictions += 1
+                logger.warning(f"🌍 Region {region} rate limited repeatedly, evicted for {pause:.0f}s")
+
+    async def call(
+        self,
+        stage: str,
+        operation: Callable[[Any], Awaitable[T]],
+        regions: Optional[List[str]] = None,
+        project: Optional[str] = None,
+        description: str = "LLM call",
+    ) -> T:
+        """
+        Führt operation(client) in der besten Region aus, bei 429/503 in der nächsten.
+
+        Args:
+            stage: Stufe (STAGE_*)
+            operation: Erzeugt mit dem Client einer Region den Call
+            regions: Explizite Regionen statt der Stufen-Präferenz
+            project: GCP Projekt (None = Pool-Projekt bzw. GCP_PROJECT)
+            description: Für Logs
+
+        Returns:
+            Ergebnis des ersten erfolgreichen Calls
+
+        Raises:
+            Exception: Fehler der letzten Region bzw. der erste nicht regionsbezogene Fehler
+        """
+        candidates = self.candidates(stage, regions)
+        for index, region in enumerate(candidates):
+            call_start = time.perf_counter()
+            try:
+                result = await operation(self.client(region, project))
+            except Exception as e:
+                decision = classify_error(e)
+                self.record_failure(region, decision)
+                if decision.kind not in FAILOVER_KINDS or index == len(candidates) - 1:
+                    raise
+                with self._lock:
+                    self._region(candidates[index + 1]).failovers += 1
+                logger.warning(f"🌍 {description}: {decision.kind} in {region}, failing over to {candidates[index + 1]}")
+                continue
+            self.record_success(region, (time.perf_counter() - call_start) * 1000)
+            return result
+        raise RuntimeError(f"No region configured for stage {stage}")
+
+    def summary(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            regions = {region: health.to_dict(now) for region, health in self._health.items()}
+        return {"preferences": {stage: self.regions_for(stage) for stage in self.preferences}, "regions": regions}
+
+
+# ============================================================================
+# PROCESS-WIDE POOL
+# ============================================================================
+
+_default_pool: Optional[RegionalClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_region_pool() -> RegionalClientPool:
+    """Liefert den prozessweiten Pool (Präferenzen beim ersten Zugriff aus der Umgebung)."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = RegionalClientPool()
+    return _default_pool
+
+
+def configure_region_pool(pool: Optional[RegionalClientPool]) -> None:
+    """Setzt den prozessweiten Pool. None setzt zurück (Präferenzen werden neu gelesen)."""
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
@@ -0,0 +1,488 @@
+"""
+Gemeinsame Resilienz-Bausteine für LLM Calls: Fehlerklassifikation, Backoff mit
+Full Jitter, Retry-Hinweise des Servers und Circuit Breaker pro Modell.
+
+Bisher hatte jeder Agent eine eigene Retry-Schleife (Stringvergleich auf der
+Fehlermeldung, feste Exponential-Delays, teils blockierendes time.sleep). Viele
+Instanzen, die nach demselben 429 im selben Takt erneut anfragen, verlängern
+eine Quota-Erschöpfung. Daher:
+
+- classify_error(): typisierte Klassifikation (google.genai.errors.APIError,
+  google.api_core Exceptions, Timeouts/Netzwerkfehler); nur bei untypisierten
+  Exceptions wird auf HTTP-Status bzw. Status-Namen in der Meldung geprüft.
+- RetryPolicy.delay(): Full Jitter (zufällig zwischen 0 und dem exponentiellen
+  Deckel), bei Retry-After / google.rpc.RetryInfo mindestens dieser Wert.
+- CircuitBreaker: öffnet nach failure_threshold aufeinanderfolgenden 429/503
+  für open_seconds (bzw. bis zum Retry-Hinweis) und lässt danach einen
+  Probe-Call durch. Solange er offen ist, schlagen Calls sofort mit
+  CircuitOpenError fehl, ohne Vertex zu belasten.
+- retry_async(): verbindet alles für einen async Call.
+
+Usage:
+    from shared.llm.resilience import RetryPolicy, retry_async
+
+    response = await retry_async(
+        lambda: client.aio.models.generate_content(model=model, contents=contents, config=config),
+        policy=RetryPolicy(max_retries=3),
+        breaker_key=model,
+        description=f"grounding search {isbn}",
+    )
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Fehlerarten
+KIND_RATE_LIMITED = "rate_limited"  # 429 / RESOURCE_EXHAUSTED
+KIND_UNAVAILABLE = "unavailable"  # 500, 502, 503, 504
+KIND_TIMEOUT = "timeout"
+KIND_NETWORK = "network"
+KIND_CIRCUIT_OPEN = "circuit_open"
+KIND_CLIENT_ERROR = "client_error"  # übrige 4xx: Request ist falsch, Retry hilft nicht
+KIND_UNKNOWN = "unknown"
+
+RETRYABLE_STATUS_CODES = {408: KIND_TIMEOUT, 429: KIND_RATE_LIMITED, 500: KIND_UNAVAILABLE,
+                          502: KIND_UNAVAILABLE, 503: KIND_UNAVAILABLE, 504: KIND_UNAVAILABLE}
+RETRYABLE_STATUS_NAMES = {"RESOURCE_EXHAUSTED": KIND_RATE_LIMITED, "UNAVAILABLE": KIND_UNAVAILABLE,
+                          "DEADLINE_EXCEEDED": KIND_TIMEOUT, "INTERNAL": KIND_UNAVAILABLE}
+# Nur diese Arten zählen für den Circuit Breaker (Überlast bei Vertex, nicht eigene Fehler)
+BREAKER_KINDS = {KIND_RATE_LIMITED, KIND_UNAVAILABLE}
+
+_STATUS_IN_MESSAGE = re.compile(r"\b(408|429|500|502|503|504)\b")
+_STATUS_NAME_IN_MESSAGE = re.compile(r"\b(RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED)\b")
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+# ============================================================================
+# KLASSIFIKATION
+# ============================================================================
+
+@dataclass(frozen=True)
+class RetryDecision:
+    """Ergebnis der Fehlerklassifikation."""
+    retryable: bool
+    kind: str
+    status_code: Optional[int] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def trips_breaker(self) -> bool:
+        return self.kind in BREAKER_KINDS
+
+
+class CircuitOpenError(Exception):
+    """Der Circuit Breaker eines Modells ist offen - Call wurde nicht gesendet."""
+
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Circuit for {key} is open (Vertex overloaded), retry in {retry_after:.1f}s")
+
+
+def _parse_retry_after_header(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def _retry_info_delay(details: Any) -> Optional[float]:
+    """retryDelay aus google.rpc.RetryInfo im Fehler-JSON ("12s" oder {"seconds": 12})."""
+    if isinstance(details, dict):
+        details = details.get("error", details).get("details")
+    if not isinstance(details, list):
+        return None
+    for detail in details:
+        if not isinstance(detail, dict) or not str(detail.get("@type", "")).endswith("google.rpc.RetryInfo"):
+            continue
+        delay = detail.get("retryDelay")
+        if isinstance(delay, str):
+            match = _DURATION.match(delay)
+            if match:
+                return float(match.group(1))
+        elif isinstance(delay, dict):
+            return float(delay.get("seconds", 0)) + float(delay.get("nanos", 0)) / 1e9
+    return None
+
+
+def retry_after_from_error(error: BaseException) -> Optional[float]:
+    """Retry-Hinweis des Servers (Retry-After Header oder RetryInfo), in Sekunden."""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            delay = _parse_retry_after_header(headers.get("Retry-After") or headers.get("retry-after"))
+        except Exception:
+            delay = None
+        if delay is not None:
+            return delay
+    return _retry_info_delay(getattr(error, "details", None))
+
+
+def _typed_decision(error: BaseException) -> Optional[RetryDecision]:
+    if isinstance(error, CircuitOpenError):
+        return RetryDecision(retryable=False, kind=KIND_CIRCUIT_OPEN, retry_after=error.retry_after)
+
+    try:
+        from google.genai import errors as genai_errors
+    except ImportError:
+        genai_errors = None
+    if genai_errors is not None and isinstance(error, genai_errors.APIError):
+        code = getattr(error, "code", None)
+        kind = RETRYABLE_STATUS_CODES.get(code) or RETRYABLE_STATUS_NAMES.get(getattr(error, "status", None) or "")
+        if kind:
+            return RetryDecision(True, kind, code, retry_after_from_error(error))
+        return RetryDecision(False, KIND_CLIENT_ERROR if code and 400 <= code < 500 else KIND_UNKNOWN, code)
+
+    try:
+        from google.api_core import exceptions as core_exceptions
+    except ImportError:
+        core_exceptions = None
+    if core_exceptions is not None and isinstance(error, core_exceptions.GoogleAPICallError):
+        code = getattr(error, "code", None)
+        code = int(code) if isinstance(code, int) else None
+        kind = RETRYABLE_STATUS_CODES.get(code)
+        if kind:
+            return RetryDecision(True, kind, code, retry_after_from_error(error))
+        return RetryDecision(False, KIND_CLIENT_ERROR if code and 400 <= code < 500 else KIND_UNKNOWN, code)
+
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return RetryDecision(True, KIND_TIMEOUT)
+    if isinstance(error, ConnectionError):
+        return RetryDecision(True, KIND_NETWORK)
+    try:
+        import aiohttp
+        if isinstance(error, aiohttp.ClientError):
+            status = getattr(error, "status", None)
+            kind = RETRYABLE_STATUS_CODES.get(status) if status else KIND_NETWORK
+            return RetryDecision(bool(kind), kind or KIND_CLIENT_ERROR, status)
+    except ImportError:
+        pass
+    try:
+        import httpx
+        if isinstance(error, httpx.TransportError):
+            return RetryDecision(True, KIND_TIMEOUT if isinstance(error, httpx.TimeoutException) else KIND_NETWORK)
+    except ImportError:
+        pass
+    return None
+
+
+def classify_error(error: BaseException) -> RetryDecision:
+    """
+    Klassifiziert eine Exception als (nicht) retry-fähig.
+
+    Typisierte Fehler (GenAI APIError, google.api_core, Timeouts, Netzwerk) haben
+    Vorrang. Nur für untypisierte Exceptions wird die Meldung auf HTTP-Status
+    bzw. gRPC-Status-Namen geprüft.
+
+    Returns:
+        RetryDecision (retryable, kind, status_code, retry_after)
+    """
+    decision = _typed_decision(error)
+    if decision is not None:
+        return decision
+
+    message = str(error)
+    match = _STATUS_IN_MESSAGE.search(message)
+    if match:
+        code = int(match.group(1))
+        return RetryDecision(True, RETRYABLE_STATUS_CODES[code], code)
+    match = _STATUS_NAME_IN_MESSAGE.search(message)
+    if match:
+        return RetryDecision(True, RETRYABLE_STATUS_NAMES[match.group(1)])
+    lowered = message.lower()
+    if "resource has been exhausted" in lowered or "quota" in lowered or "rate limit" in lowered:
+        return RetryDecision(True, KIND_RATE_LIMITED)
+    if "timed out" in lowered or "timeout" in lowered:
+        return RetryDecision(True, KIND_TIMEOUT)
+    return RetryDecision(False, KIND_UNKNOWN)
+
+
+# ============================================================================
+# BACKOFF
+# ============================================================================
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry-Parameter.
+
+    Attributes:
+        max_retries: Retries nach dem ersten Versuch
+        base_delay_seconds: Deckel des ersten Retries
+        multiplier: Exponentielle Basis
+        max_delay_seconds: Maximaler Deckel
+        max_retry_after_seconds: Längster Retry-Hinweis, der noch abgewartet wird
+    """
+    max_retries: int = 3
+    base_delay_seconds: float = 2.0
+    multiplier: float = 2.0
+    max_delay_seconds: float = 60.0
+    max_retry_after_seconds: float = 120.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None, rng: Optional[random.Random] = None) -> float:
+        """
+        Wartezeit vor Retry Nr. attempt + 1 (attempt ab 0).
+
+        Full Jitter: zufällig in [0, min(max_delay, base * multiplier^attempt)].
+        Mit Retry-Hinweis wird mindestens dieser gewartet (plus Jitter, damit
+        Instanzen nicht gleichzeitig zurückkommen).
+        """
+        rng = rng or random
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after_seconds) + rng.uniform(0.0, self.base_delay_seconds)
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * (self.multiplier ** attempt))
+        return rng.uniform(0.0, cap)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit Breaker für ein Modell (thread-safe).
+
+    closed -> open nach failure_threshold aufeinanderfolgenden Überlastfehlern.
+    open -> half_open nach open_seconds (oder dem längeren Retry-Hinweis);
+    im half_open Zustand geht genau ein Probe-Call durch. Erfolg schließt,
+    ein weiterer Überlastfehler öffnet erneut.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == STATE_OPEN and self._clock() >= self._open_until:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: Wenn der Breaker offen ist (oder ein Probe-Call läuft)
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return
+            if state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.short_circuited += 1
+            remaining = max(self._open_until - self._clock(), 0.0)
+        raise CircuitOpenError(self.key, remaining)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                logger.info(f"🟢 Circuit for {self.key} closed again")
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Gibt einen abgebrochenen Probe-Call frei (z.B. CancelledError), ohne Erfolg oder Fehler zu verbuchen."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self, classify: Callable[[BaseException], RetryDecision] = classify_error) -> Iterator[None]:
+        """
+        before_call() + Verbuchen des Ergebnisses für einen Call im with-Block.
+
+        Fehler (Exception) werden klassifiziert verbucht. Bei Abbruch
+        (CancelledError, KeyboardInterrupt) wird nur der Probe-Call freigegeben,
+        sonst bliebe der Breaker im half_open Zustand dauerhaft blockiert.
+
+        Raises:
+            CircuitOpenError: Wenn der Breaker offen ist
+        """
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(classify(e))
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_success()
+
+    def record_failure(self, decision: RetryDecision) -> None:
+        """Verbucht einen Fehler; nur Überlastfehler (429/503) zählen."""
+        with self._lock:
+            if not decision.trips_breaker:
+                # Probe ohne Überlast-Signal: nächster Call darf erneut proben
+                self._probe_in_flight = False
+                return
+            self._failures += 1
+            state = self._current_state()
+            if state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                open_for = max(self.open_seconds, decision.retry_after or 0.0)
+                self._state = STATE_OPEN
+                self._open_until = self._clock() + open_for
+                self._probe_in_flight = False
+                self.times_opened += 1
+                logger.warning(
+                    f"🔴 Circuit for {self.key} opened for {open_for:.0f}s after {self._failures} "
+                    f"consecutive {decision.kind} errors"
+                )
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_breaker_defaults: Dict[str, Any] = {}
+
+
+def get_circuit_breaker(key: str) -> CircuitBreaker:
+    """Prozessweiter Circuit Breaker pro Schlüssel (Modellname)."""
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key, **_breaker_defaults)
+                _breakers[key] = breaker
+    return breaker
+
+
+def configure_circuit_breakers(**defaults: Any) -> None:
+    """Setzt Defaults (failure_threshold, open_seconds, clock) für neue Breaker und verwirft bestehende."""
+    with _breakers_lock:
+        _breaker_defaults.clear()
+        _breaker_defaults.update(defaults)
+        _breakers.clear()
+
+
+def reset_circuit_breakers() -> None:
+    """Verwirft alle Breaker und Defaults (Tests)."""
+    configure_circuit_breakers()
+
+
+def circuit_breaker_summary() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {key: breaker.to_dict() for key, breaker in breakers.items()}
+
+
+# ============================================================================
+# RETRY
+# ============================================================================
+
+async def retry_async(
+    operation: Callable[[], Awaitable[T]],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    breaker_key: Optional[str] = None,
+    description: str = "LLM call",
+    classify: Callable[[BaseException], RetryDecision] = classify_error,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> T:
+    """
+    Führt einen async Call mit Retries, Backoff und Circuit Breaker aus.
+
+    Args:
+        operation: Erzeugt pro Versuch eine neue Coroutine
+        policy: RetryPolicy
+        breaker_key: Schlüssel des Circuit Breakers (Modellname); None = ohne Breaker
+        description: Für Logs
+        classify: Fehlerklassifikation
+        sleep: Async Sleep (Tests)
+
+    Returns:
+        Ergebnis des ersten erfolgreichen Versuchs
+
+    Raises:
+        CircuitOpenError: Wenn der Breaker offen ist
+        Exception: Der letzte Fehler, wenn er nicht retry-fähig ist oder die Retries erschöpft sind
+    """
+    breaker = get_circuit_breaker(breaker_key) if breaker_key else None
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await operation()
+        except Exception as e:
+            decision = classify(e)
+            if breaker is not None:
+                breaker.record_failure(decision)
+            if not decision.retryable or attempt >= policy.max_retries:
+                raise
+            delay = policy.delay(attempt, decision.retry_after)
+            logger.warning(
+                f"⚠️ {description}: {decision.kind} (attempt {attempt + 1}/{policy.max_retries + 1}), "
+                f"retrying in {delay:.1f}s: {e}"
+            )
+            attempt += 1
+            await sleep(delay)
+            continue
+        except BaseException:
+            # Abgebrochener Call (CancelledError): Probe freigeben, nicht als Erfolg zählen
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
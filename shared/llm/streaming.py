@@ -0,0 +1,98 @@
+"""
+Inkrementelles Auslesen einzelner JSON-Felder aus einer gestreamten LLM-Antwort.
+
+Beim Streaming kommt das JSON in Stücken. Für frühe Events (z.B. Preisrecherche
+starten, sobald ISBN oder Titel/Autor feststehen) reicht es, einzelne
+String-Felder zu erkennen, sobald ihr Wert vollständig ist - lange bevor das
+gesamte Objekt parsebar ist.
+
+Jedes Stück wird nur zusammen mit einem kurzen Rückblick in den vorherigen
+Text durchsucht (Felder können über Stückgrenzen hinweg reichen), der
+Gesamtaufwand bleibt linear in der Antwortlänge.
+"""
+
+import json
+import re
+from typing import Dict, Iterable
+
+# Maximale Länge eines Felds (Key + Wert), das über Stückgrenzen hinweg noch erkannt wird
+DEFAULT_LOOKBACK_CHARS = 1024
+
+# Inhalt eines JSON-Strings (ohne rohe Zeilenumbrüche)
+_STRING_BODY = r'(?:[^"\\\n]|\\.)*'
+
+
+class StreamingFieldWatcher:
+    """
+    Erkennt vollständige String-Felder (und das erste Element von String-Listen) im Stream.
+
+    Es gilt jeweils das erste Vorkommen eines Keys.
+
+    Usage:
+        watcher = StreamingFieldWatcher(["isbn_13", "title"], list_keys=["authors"])
+        for chunk in stream:
+            new_fields = watcher.feed(chunk.text)
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        list_keys: Iterable[str] = (),
+        lookback_chars: int = DEFAULT_LOOKBACK_CHARS,
+    ):
+        self.keys = list(keys)
+        self.list_keys = list(list_keys)
+        self.lookback_chars = lookback_chars
+        self.fields: Dict[str, str] = {}
+        self._buffer: list = []
+        self._tail = ""
+
+        patterns = []
+        if self.keys:
+            patterns.append(
+                r'"(?P<key>' + "|".join(map(re.escape, self.keys)) + r')"\s*:\s*"(?P<value>' + _STRING_BODY + ')"'
+            )
+        if self.list_keys:
+            patterns.append(
+                r'"(?P<list_key>' + "|".join(map(re.escape, self.list_keys)) + r')"\s*:\s*\[\s*"(?P<list_value>'
+                + _STRING_BODY + ')"'
+            )
+        self._pattern = re.compile("|".join(patterns)) if patterns else None
+
+    @property
+    def text(self) -> str:
+        """Bisher empfangener Gesamttext."""
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> Dict[str, str]:
+        """
+        Verarbeitet ein Stück und liefert die dadurch neu vollständigen Felder.
+
+        Args:
+            chunk: Nächstes Textstück aus dem Stream
+
+        Returns:
+            Dict mit neu erkannten Feldern (Key -> Wert, JSON-Escapes aufgelöst)
+        """
+        if not chunk:
+            return {}
+        self._buffer.append(chunk)
+        window = self._tail + chunk
+        self._tail = window[-self.lookback_chars:]
+
+        found: Dict[str, str] = {}
+        if self._pattern is None:
+            return found
+        for match in self._pattern.finditer(window):
+            key = match.group("key") if match.groupdict().get("key") else match.group("list_key")
+            raw = match.group("value") if match.groupdict().get("key") else match.group("list_value")
+            if key in self.fields:
+                continue
+            try:
+                value = json.loads(f'"{raw}"').strip()
+            except ValueError:
+                continue
+            if value:
+                self.fields[key] = value
+                found[key] = value
+        return found
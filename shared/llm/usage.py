@@ -0,0 +1,273 @@
+"""
+Token- und Kostenerfassung für Gemini Calls.
+
+Jeder Call liefert usage_metadata (Prompt-, Antwort-, Cache-, Tool-Use- und
+Thinking-Tokens). usage_from_response() übernimmt diese Zahlen zusammen mit dem
+Modellnamen in ein LLMUsage und berechnet die Kosten in Euro aus einer
+Preistabelle. record_llm_call() verbucht das Ergebnis zusätzlich im
+MetricsCollector (record_api_call(cost=...)), damit Kosten pro Stufe und
+Modell vergleichbar werden.
+
+Die Preistabelle (Euro pro 1 Mio. Tokens, Grounding pro Request) ist über die
+Umgebungsvariable LLM_PRICE_TABLE (JSON oder Pfad zu einer JSON-Datei)
+oder configure_price_table() anpassbar:
+
+    {"models": {"gemini-2.5-pro": {"input": 1.15, "cached_input": 0.29, "output": 9.2}},
+     "grounding_per_request": 0.032}
+
+Usage:
+    from shared.llm.usage import record_llm_call
+
+    usage = record_llm_call("gemini_ingestion", "gemini-2.5-flash", response, duration_ms)
+    print(usage.cost_eur, usage.prompt_tokens)
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+TOKENS_PER_UNIT = 1_000_000
+
+
+# ============================================================================
+# PREISTABELLE
+# ============================================================================
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Preise eines Modells in Euro pro 1 Mio. Tokens."""
+    input: float
+    output: float
+    cached_input: Optional[float] = None
+
+    def cost(self, usage: "LLMUsage") -> float:
+        cached_rate = self.input if self.cached_input is None else self.cached_input
+        uncached = max(usage.prompt_tokens - usage.cached_tokens, 0) + usage.tool_use_prompt_tokens
+        return (
+            uncached * self.input
+            + usage.cached_tokens * cached_rate
+            + (usage.candidates_tokens + usage.thoughts_tokens) * self.output
+        ) / TOKENS_PER_UNIT
+
+
+# Listenpreise (Vertex AI, Kontext <= 200k Tokens), umgerechnet in Euro
+DEFAULT_MODEL_PRICES: Dict[str, ModelPrice] = {
+    "gemini-2.5-pro": ModelPrice(input=1.15, cached_input=0.29, output=9.20),
+    "gemini-2.5-flash-lite": ModelPrice(input=0.09, cached_input=0.023, output=0.37),
+    "gemini-2.5-flash": ModelPrice(input=0.28, cached_input=0.07, output=2.30),
+    "gemini-2.0-flash-lite": ModelPrice(input=0.07, output=0.28),
+    "gemini-2.0-flash": ModelPrice(input=0.14, cached_input=0.035, output=0.55),
+}
+# Google Search Grounding wird pro Request berechnet (35 $ / 1000 Requests)
+DEFAULT_GROUNDING_PER_REQUEST = 0.032
+
+
+@dataclass
+class PriceTable:
+    """
+    Preise je Modell plus Grounding-Gebühr pro Request.
+
+    Modelle werden exakt oder über den längsten Präfix gefunden
+    ("gemini-2.0-flash-001" -> "gemini-2.0-flash").
+    """
+    models: Dict[str, ModelPrice] = field(default_factory=lambda: dict(DEFAULT_MODEL_PRICES))
+    grounding_per_request: float = DEFAULT_GROUNDING_PER_REQUEST
+
+    def price_for(self, model: Optional[str]) -> Optional[ModelPrice]:
+        if not model:
+            return None
+        # Vertex liefert teils vollständige Ressourcennamen
+        name = model.rsplit("/", 1)[-1]
+        if name in self.models:
+            return self.models[name]
+        matches = [key for key in self.models if name.startswith(key)]
+        return self.models[max(matches, key=len)] if matches else None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PriceTable":
+        """Überschreibt bzw. ergänzt die Standardpreise."""
+        table = cls()
+        for model, prices in (data.get("models") or {}).items():
+            table.models[model] = ModelPrice(**prices)
+        if data.get("grounding_per_request") is not None:
+            table.grounding_per_request = float(data["grounding_per_request"])
+        return table
+
+
+def load_price_table_from_env() -> PriceTable:
+    """Liest LLM_PRICE_TABLE (JSON oder Dateipfad); Standardpreise bei Fehlen oder Fehlern."""
+    raw = os.environ.get("LLM_PRICE_TABLE", "").strip()
+    if not raw:
+        return PriceTable()
+    try:
+        if not raw.startswith("{"):
+            with open(raw, "r", encoding="utf-8") as f:
+                raw = f.read()
+        return PriceTable.from_dict(json.loads(raw))
+    except Exception as e:
+        logger.warning(f"⚠️ Invalid LLM_PRICE_TABLE, using default prices: {e}")
+        return PriceTable()
+
+
+_price_table: Optional[PriceTable] = None
+_price_table_lock = threading.Lock()
+_unpriced_models: set = set()
+
+
+def get_price_table() -> PriceTable:
+    """Liefert die prozessweite Preistabelle (beim ersten Zugriff aus der Umgebung)."""
+    global _price_table
+    if _price_table is None:
+        with _price_table_lock:
+            if _price_table is None:
+                _price_table = load_price_table_from_env()
+    return _price_table
+
+
+def configure_price_table(table: Optional[PriceTable]) -> None:
+    """Setzt die prozessweite Preistabelle. None lädt beim nächsten Zugriff neu."""
+    global _price_table
+    with _price_table_lock:
+        _price_table = table
+
+
+# ============================================================================
+# USAGE
+# ============================================================================
+
+class LLMUsage(BaseModel):
+    """Token-Verbrauch und Kosten eines (oder mehrerer zusammengefasster) LLM Calls."""
+    model: Optional[str] = Field(None, description="Modell (bei zusammengefassten Calls mit '+' verbunden)")
+    calls: int = Field(1, description="Anzahl der Calls")
+    prompt_tokens: int = Field(0, description="Prompt-Tokens inkl. gecachter Tokens")
+    candidates_tokens: int = Field(0, description="Antwort-Tokens")
+    cached_tokens: int = Field(0, description="Davon aus dem Context Cache")
+    tool_use_prompt_tokens: int = Field(0, description="Tokens aus Tool-Ergebnissen (z.B. Grounding)")
+    thoughts_tokens: int = Field(0, description="Thinking-Tokens (werden wie Antwort-Tokens berechnet)")
+    total_tokens: int = Field(0, description="Gesamt laut API")
+    grounded_requests: int = Field(0, description="Requests mit Google Search Grounding")
+    cost_eur: float = Field(0.0, description="Geschätzte Kosten in Euro")
+
+    @classmethod
+    def combine(cls, usages: Iterable[Optional["LLMUsage"]]) -> Optional["LLMUsage"]:
+        """Summiert mehrere Calls (z.B. Preissuche + Preisanalyse eines Buchs)."""
+        usages = [usage for usage in usages if usage is not None]
+        if not usages:
+            return None
+        models = []
+        for usage in usages:
+            for model in (usage.model or "").split("+"):
+                if model and model not in models:
+                    models.append(model)
+        summed = {
+            name: sum(getattr(usage, name) for usage in usages)
+            for name in cls.model_fields
+            if name != "model"
+        }
+        summed["cost_eur"] = round(summed["cost_eur"], 6)
+        return cls(model="+".join(models) or None, **summed)
+
+
+def _count(usage_metadata: Any, name: str) -> int:
+    return getattr(usage_metadata, name, None) or 0
+
+
+def _is_grounded(response: Any) -> bool:
+    for candidate in getattr(response, "candidates", None) or []:
+        grounding = getattr(candidate, "grounding_metadata", None)
+        if grounding is not None and (
+            getattr(grounding, "web_search_queries", None) or getattr(grounding, "grounding_chunks", None)
+        ):
+            return True
+    return False
+
+
+def usage_from_response(
+    response: Any,
+    model: Optional[str],
+    price_table: Optional[PriceTable] = None,
+) -> Optional[LLMUsage]:
+    """
+    Liest usage_metadata einer Gemini Response und berechnet die Kosten.
+
+    Args:
+        response: GenerateContentResponse (oder kompatibles Objekt)
+        model: Angefragtes Modell (model_version der Response hat Vorrang)
+        price_table: Optional eigene Preistabelle (sonst prozessweit)
+
+    Returns:
+        LLMUsage oder None, wenn die Response keine usage_metadata enthält
+    """
+    usage_metadata = getattr(response, "usage_metadata", None)
+    if usage_metadata is None:
+        return None
+    model = getattr(response, "model_version", None) or model
+    usage = LLMUsage(
+        model=model,
+        prompt_tokens=_count(usage_metadata, "prompt_token_count"),
+        candidates_tokens=_count(usage_metadata, "candidates_token_count"),
+        cached_tokens=_count(usage_metadata, "cached_content_token_count"),
+        tool_use_prompt_tokens=_count(usage_metadata, "tool_use_prompt_token_count"),
+        thoughts_tokens=_count(usage_metadata, "thoughts_token_count"),
+        total_tokens=_count(usage_metadata, "total_token_count"),
+        grounded_requests=1 if _is_grounded(response) else 0,
+    )
+
+    table = price_table or get_price_table()
+    price = table.price_for(model)
+    if price is None:
+        if model not in _unpriced_models:
+            _unpriced_models.add(model)
+            logger.warning(f"⚠️ No price configured for model {model!r} - cost recorded as 0")
+        return usage
+    usage.cost_eur = round(price.cost(usage) + usage.grounded_requests * table.grounding_per_request, 6)
+    return usage
+
+
+def record_llm_call(
+    api_name: str,
+    model: Optional[str],
+    response: Any,
+    duration_ms: float,
+    success: bool = True,
+) -> Optional[LLMUsage]:
+    """
+    Erfasst Usage und Kosten eines Calls und verbucht sie im MetricsCollector.
+
+    Args:
+        api_name: Name der Stufe für die Metriken (z.B. "gemini_ingestion")
+        model: Angefragtes Modell
+        response: Response oder None (fehlgeschlagener Call)
+        duration_ms: Dauer des Calls
+        success: Ob der Call erfolgreich war
+
+    Returns:
+        LLMUsage oder None ohne usage_metadata
+    """
+    usage = usage_from_response(response, model) if response is not None else None
+    try:
+        from shared.monitoring.metrics import get_metrics_collector
+
+        get_metrics_collector().record_api_call(
+            api_name,
+            duration_ms,
+            success,
+            cost=usage.cost_eur if usage else 0.0,
+            tokens=usage.total_tokens if usage else 0,
+        )
+    except Exception as e:
+        logger.debug(f"Metrics recording failed for {api_name}: {e}")
+    if usage is not None:
+        logger.info(
+            f"💶 {api_name} ({usage.model}): {usage.prompt_tokens} prompt "
+            f"({usage.cached_tokens} cached, {usage.tool_use_prompt_tokens} tool) + "
+            f"{usage.candidates_tokens + usage.thoughts_tokens} output tokens = {usage.cost_eur:.5f} €"
+        )
+    return usage
@@ -23,8 +23,9 @@ class APIMetrics:
     min_duration_ms: float = float('inf')
     max_duration_ms: float = 0.0
     estimated_cost: float = 0.0
+    total_tokens: int = 0
     
-    def record_call(self, duration_ms: float, success: bool, cost: float = 0.0):
+    def record_call(self, duration_ms: float, success: bool, cost: float = 0.0, tokens: int = 0):
         """Registriere einen API-Call"""
         self.total_calls += 1
         if success:
@@ -37,6 +38,7 @@ class APIMetrics:
         self.min_duration_ms = min(self.min_duration_ms, duration_ms)
         self.max_duration_ms = max(self.max_duration_ms, duration_ms)
         self.estimated_cost += cost
+        self.total_tokens += tokens
     
     @property
     def success_rate(self) -> float:
@@ -114,12 +116,12 @@ class MetricsCollector:
         self.error_types: Dict[str, int] = {}
     
     def record_api_call(self, api_name: str, duration_ms: float, 
-                       success: bool, cost: float = 0.0):
-        """Registriere einen API-Call"""
+                       success: bool, cost: float = 0.0, tokens: int = 0):
+        """Registriere einen API-Call (cost in Euro, tokens laut usage_metadata)"""
         if api_name not in self.api_metrics:
             self.api_metrics[api_name] = APIMetrics(api_name=api_name)
         
-        self.api_metrics[api_name].record_call(duration_ms, success, cost)
+        self.api_metrics[api_name].record_call(duration_ms, success, cost, tokens)
     
     def record_confidence(self, operation: str, confidence: float):
         """Registriere einen Confidence Score"""
@@ -154,6 +156,7 @@ class MetricsCollector:
             "summary": {
                 "total_api_calls": sum(m.total_calls for m in self.api_metrics.values()),
                 "total_cost": sum(m.estimated_cost for m in self.api_metrics.values()),
+                "total_tokens": sum(m.total_tokens for m in self.api_metrics.values()),
                 "overall_success_rate": self._calculate_overall_success_rate(),
                 "avg_response_time_ms": self._calculate_avg_response_time()
             }
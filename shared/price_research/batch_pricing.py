@@ -0,0 +1,112 @@
+"""
+Gepackte Preisanalyse für große Bestände (z.B. Nachlass mit 500 Büchern).
+
+Bücher, die die PricingEngine nicht selbst bepreisen kann, gehen sonst
+einzeln als Gemini-Call raus. Hier werden mehrere Bücher (Angebote +
+Zustand) in einen Request gepackt; die Antwort hat ein Schema mit einer
+Analyse pro Buch (book_id) und wird wieder auf die Bücher aufgeteilt.
+
+Die Batch-Größe richtet sich nach dem Token-Budget: so viele Bücher, wie
+in max_prompt_tokens (Eingabe) und max_output_tokens (Antwort) passen,
+höchstens max_books_per_call.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from shared.apis.price_grounding import MarketQueryResult
+from shared.llm.context_cache import CHARS_PER_TOKEN
+from shared.llm.usage import LLMUsage
+from shared.price_research.models import MarketAnalysis
+
+
+@dataclass(frozen=True)
+class BatchPricingConfig:
+    max_prompt_tokens: int = 16000  # Dynamischer Teil je Request (System Instruction liegt im Cache)
+    max_output_tokens: int = 8192
+    output_tokens_per_book: int = 400  # Eine MarketAnalysis als JSON inkl. Begründung
+    max_books_per_call: int = 20  # Mehr Bücher pro Antwort → mehr Verwechslungen
+    concurrency: int = 4  # Parallele Batch-Requests
+
+
+def load_batch_pricing_config_from_env() -> BatchPricingConfig:
+    """BatchPricingConfig mit Overrides aus PRICING_BATCH_MAX_PROMPT_TOKENS, PRICING_BATCH_MAX_BOOKS und PRICING_BATCH_CONCURRENCY."""
+    defaults = BatchPricingConfig()
+    return BatchPricingConfig(
+        max_prompt_tokens=int(os.environ.get("PRICING_BATCH_MAX_PROMPT_TOKENS", defaults.max_prompt_tokens)),
+        max_books_per_call=int(os.environ.get("PRICING_BATCH_MAX_BOOKS", defaults.max_books_per_call)),
+        concurrency=int(os.environ.get("PRICING_BATCH_CONCURRENCY", defaults.concurrency)),
+    )
+
+
+class BookMarketAnalysis(MarketAnalysis):
+    """MarketAnalysis eines Buchs innerhalb einer gepackten Antwort."""
+    book_id: str = Field(description="book_id exakt wie im Abschnitt === BUCH <book_id> ===")
+
+
+class BatchMarketAnalysis(BaseModel):
+    """Response Schema der gepackten Preisanalyse."""
+    analyses: List[BookMarketAnalysis] = Field(description="Genau eine Analyse pro Buch")
+
+
+@dataclass
+class PricingBatchItem:
+    """Ein Buch, das eine KI-Preisanalyse braucht."""
+    book_id: str
+    uid: str
+    title: Optional[str]
+    metadata: Dict[str, Any]
+    market_data: MarketQueryResult
+    condition_report: Optional[Dict] = None
+    prompt: str = ""  # Buch-Abschnitt (wie beim Einzel-Call)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return len(self.prompt) // CHARS_PER_TOKEN + 1
+
+
+def pack_pricing_batches(items: List[PricingBatchItem], config: Optional[BatchPricingConfig] = None) -> List[List[PricingBatchItem]]:
+    """
+    Teilt Bücher in Batches, die ins Token-Budget passen (Reihenfolge bleibt erhalten).
+
+    Ein einzelnes Buch über dem Budget bekommt einen eigenen Batch.
+    """
+    config = config or BatchPricingConfig()
+    max_books = max(1, min(config.max_books_per_call, config.max_output_tokens // config.output_tokens_per_book))
+    batches: List[List[PricingBatchItem]] = []
+    current: List[PricingBatchItem] = []
+    tokens = 0
+    for item in items:
+        if current and (len(current) >= max_books or tokens + item.prompt_tokens > config.max_prompt_tokens):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(item)
+        tokens += item.prompt_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_prompt(items: List[PricingBatchItem]) -> str:
+    """Packt die Buch-Abschnitte in einen Request."""
+    sections = [f"=== BUCH {item.book_id} ===\n{item.prompt.strip()}" for item in items]
+    return (
+        f"Analysiere die folgenden {len(items)} Bücher unabhängig voneinander. "
+        "Erstelle für JEDES Buch genau eine Analyse und übernimm die book_id exakt.\n\n"
+        + "\n\n".join(sections)
+    )
+
+
+def share_usage(usage: Optional[LLMUsage], parts: int) -> Optional[LLMUsage]:
+    """Anteil eines Buchs an den Kosten eines gepackten Calls (gleichmäßig verteilt)."""
+    if usage is None or parts <= 1:
+        return usage
+    shared = {
+        name: getattr(usage, name) // parts
+        for name, info in LLMUsage.model_fields.items()
+        if info.annotation is int and name != "calls"
+    }
+    return usage.model_copy(update={**shared, "cost_eur": round(usage.cost_eur / parts, 6)})
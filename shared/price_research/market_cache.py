@@ -0,0 +1,461 @@
+"""
+Zweistufiger Cache für Marktdaten (Ergebnis der Grounding-Preissuche).
+
+Die Preissuche ist ein Gemini 2.5 Pro Call mit bis zu 10 Suchanfragen
+(20-60s). Marktdaten hängen aber nur vom Buch ab, nicht vom Nutzer. Deshalb
+werden sie mandantenübergreifend gecacht:
+
+1. LRU im Prozess (Millisekunden)
+2. Firestore Collection `market_data` (Dokument je Schlüssel, Felder isbn +
+   timestamp passend zum bestehenden Index)
+
+Schlüssel: normalisierte ISBN-13, sonst Titel + Autor + Auflage (normalisiert).
+
+Frische:
+- Einträge mit Angeboten sind `ttl_seconds` frisch. Danach werden sie noch
+  `stale_seconds` lang ausgeliefert, während im Hintergrund neu gesucht wird
+  (stale-while-revalidate).
+- "Keine Angebote gefunden" wird `negative_ttl_seconds` lang gecacht (ohne
+  Stale-Phase). Fehlgeschlagene Suchen werden nie gecacht.
+
+Single-Flight: pro Schlüssel läuft genau eine Suche. Gleichzeitige Aufrufer im
+Prozess warten auf deren Ergebnis; mit einem Lease Store warten auch andere
+Instanzen, bis das Ergebnis im Store liegt (siehe single_flight.py).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from shared.apis.price_grounding import MarketQueryResult, PriceData
+from shared.price_research.single_flight import SingleFlight
+from shared.simplified_ingestion.isbn import normalize_isbn
+
+logger = logging.getLogger(__name__)
+
+STATE_FRESH = "fresh"
+STATE_STALE = "stale"
+STATE_MISS = "miss"
+
+
+@dataclass(frozen=True)
+class MarketCacheConfig:
+    enabled: bool = True
+    ttl_seconds: float = 3 * 24 * 3600  # Angebote gelten 3 Tage als aktuell
+    stale_seconds: float = 7 * 24 * 3600  # Danach bis zu 7 Tage ausliefern und im Hintergrund erneuern
+    negative_ttl_seconds: float = 12 * 3600  # "Keine Angebote" 12h merken
+    cache_size: int = 2048  # Einträge im Prozess-LRU
+    lease_seconds: float = 90.0  # Grounding-Suche dauert 20-60s
+    lease_poll_seconds: float = 1.0  # Wie oft Wartende im Store nachsehen
+    lease_wait_seconds: float = 120.0  # Danach sucht ein Wartender selbst
+
+
+def load_market_cache_config_from_env() -> MarketCacheConfig:
+    """
+    MarketCacheConfig mit Overrides aus der Umgebung.
+
+    MARKET_CACHE_ENABLED=false schaltet den Cache ab, MARKET_CACHE_TTL_HOURS,
+    MARKET_CACHE_STALE_HOURS und MARKET_CACHE_NEGATIVE_TTL_HOURS setzen die Fristen.
+    """
+    defaults = MarketCacheConfig()
+
+    def hours(name: str, default_seconds: float) -> float:
+        value = os.environ.get(name)
+        return float(value) * 3600 if value else default_seconds
+
+    return MarketCacheConfig(
+        enabled=os.environ.get("MARKET_CACHE_ENABLED", "true").lower() != "false",
+        ttl_seconds=hours("MARKET_CACHE_TTL_HOURS", defaults.ttl_seconds),
+        stale_seconds=hours("MARKET_CACHE_STALE_HOURS", defaults.stale_seconds),
+        negative_ttl_seconds=hours("MARKET_CACHE_NEGATIVE_TTL_HOURS", defaults.negative_ttl_seconds),
+    )
+
+
+# ============================================================================
+# SCHLÜSSEL
+# ============================================================================
+
+def _normalize_text(value: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", value or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def market_cache_key(
+    isbn: Optional[str] = None,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    edition: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Cache-Schlüssel eines Buchs.
+
+    Returns:
+        "isbn:<ISBN-13>", "title:<hash>" oder None ohne ISBN und Titel
+    """
+    isbn_13 = normalize_isbn(isbn)
+    if isbn_13:
+        return f"isbn:{isbn_13}"
+    digits = re.sub(r"[^0-9Xx]", "", isbn or "").upper()
+    if len(digits) in (10, 13):
+        # Ungültige Prüfziffer: trotzdem stabil nach den Ziffern cachen
+        return f"isbn:{digits}"
+    if not _normalize_text(title):
+        return None
+    identity = "|".join(_normalize_text(part) for part in (title, author, edition))
+    return "title:" + hashlib.sha1(identity.encode("utf-8")).hexdigest()[:24]
+
+
+# ============================================================================
+# EINTRÄGE & STORE
+# ============================================================================
+
+class MarketDataEntry(BaseModel):
+    """Gecachte Marktdaten eines Buchs."""
+    key: str
+    isbn: Optional[str] = None
+    title: Optional[str] = None
+    offers: List[Dict[str, Any]] = Field(default_factory=list)
+    confidence_score: float = 0.0
+    reasoning: str = ""
+    timestamp: datetime  # Zeitpunkt der Suche (UTC)
+
+    @property
+    def negative(self) -> bool:
+        return not self.offers
+
+    def age_seconds(self, now: float) -> float:
+        return max(0.0, now - self.timestamp.timestamp())
+
+    def to_result(self) -> MarketQueryResult:
+        # usage bleibt leer: ein Cache-Treffer kostet keine Tokens
+        return MarketQueryResult(
+            offers=[PriceData(**offer) for offer in self.offers],
+            confidence_score=self.confidence_score,
+            reasoning=self.reasoning,
+        )
+
+    @classmethod
+    def from_result(cls, key: str, result: MarketQueryResult, now: float, isbn: Optional[str] = None, title: Optional[str] = None) -> "MarketDataEntry":
+        return cls(
+            key=key,
+            isbn=key[len("isbn:"):] if key.startswith("isbn:") else normalize_isbn(isbn),
+            title=title,
+            offers=[asdict(offer) for offer in result.offers],
+            confidence_score=result.confidence_score,
+            reasoning=result.reasoning,
+            timestamp=datetime.fromtimestamp(now, tz=timezone.utc),
+        )
+
+
+class FirestoreMarketDataStore:
+    """Persistiert Marktdaten in Firestore (Dokument-ID = Cache-Schlüssel)."""
+
+    def __init__(self, db: Any, collection: str = "market_data"):
+        self.db = db
+        self.collection = collection
+
+    def get(self, key: str) -> Optional[MarketDataEntry]:
+        snapshot = self.db.collection(self.collection).document(key).get()
+        if not snapshot.exists:
+            return None
+        return MarketDataEntry.model_validate(snapshot.to_dict())
+
+    def put(self, entry: MarketDataEntry) -> None:
+        self.db.collection(self.collection).document(entry.key).set(entry.model_dump())
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+@dataclass
+class MarketCacheStats:
+    lookups: int = 0
+    memory_hits: int = 0
+    store_hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    searches: int = 0  # Tatsächlich ausgeführte Grounding-Suchen
+    coalesced_local: int = 0  # Auf eine laufende Suche im Prozess gewartet
+    coalesced_remote: int = 0  # Ergebnis der Suche einer anderen Instanz übernommen
+    lease_timeouts: int = 0  # Auf andere Instanz gewartet, dann doch selbst gesucht
+
+    def summary(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.store_hits
+        coalesced = self.coalesced_local + self.coalesced_remote
+        requested = self.searches + coalesced
+        return {
+            **asdict(self),
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "coalesce_rate": round(coalesced / requested, 3) if requested else 0.0,
+        }
+
+
+class MarketDataCache:
+    """
+    Marktdaten-Cache: LRU im Speicher, Read-Through auf einen Store.
+
+    Args:
+        store: z.B. FirestoreMarketDataStore (None = nur im Prozess)
+        config: MarketCacheConfig
+        clock: Zeitquelle in Sekunden (Tests)
+        leases: z.B. FirestoreLeaseStore für Single-Flight über Instanzen (None = nur im Prozess)
+    """
+
+    def __init__(self, store: Any = None, config: Optional[MarketCacheConfig] = None, clock: Callable[[], float] = time.time, leases: Any = None):
+        self.store = store
+        self.config = config or MarketCacheConfig()
+        self.clock = clock
+        self.leases = leases
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._flights = SingleFlight()
+        self.stats = MarketCacheStats()
+        self._cache: "OrderedDict[str, MarketDataEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _state(self, entry: MarketDataEntry) -> str:
+        age = entry.age_seconds(self.clock())
+        if entry.negative:
+            return STATE_FRESH if age < self.config.negative_ttl_seconds else STATE_MISS
+        if age < self.config.ttl_seconds:
+            return STATE_FRESH
+        if age < self.config.ttl_seconds + self.config.stale_seconds:
+            return STATE_STALE
+        return STATE_MISS
+
+    def _remember(self, entry: MarketDataEntry) -> None:
+        with self._lock:
+            self._cache[entry.key] = entry
+            self._cache.move_to_end(entry.key)
+            while len(self._cache) > self.config.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, key: str) -> Tuple[Optional[MarketDataEntry], str]:
+        """
+        Sucht einen Eintrag (erst Speicher, dann Store). Synchron, aus async Code über asyncio.to_thread().
+
+        Returns:
+            (Eintrag, STATE_FRESH | STATE_STALE | STATE_MISS)
+        """
+        with self._lock:
+            self.stats.lookups += 1
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        source = "memory"
+        if (entry is None or self._state(entry) != STATE_FRESH) and self.store is not None:
+            # Eine andere Instanz hat den Eintrag evtl. schon erneuert
+            try:
+                stored = self.store.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Marktdaten-Cache Lookup für {key} fehlgeschlagen: {e}")
+                stored = None
+            if stored is not None and (entry is None or stored.timestamp > entry.timestamp):
+                entry, source = stored, "store"
+                self._remember(stored)
+        if entry is None:
+            self._count(misses=1)
+            return None, STATE_MISS
+        state = self._state(entry)
+        if state == STATE_MISS:
+            self._count(misses=1)
+            return None, STATE_MISS
+        self._count(
+            memory_hits=int(source == "memory"),
+            store_hits=int(source == "store"),
+            stale_hits=int(state == STATE_STALE),
+            negative_hits=int(entry.negative),
+        )
+        return entry, state
+
+    def put(self, entry: MarketDataEntry) -> None:
+        """Legt einen Eintrag an bzw. überschreibt ihn (Store best effort)."""
+        self._remember(entry)
+        if self.store is not None:
+            try:
+                self.store.put(entry)
+            except Exception as e:
+                logger.warning(f"⚠️ Marktdaten {entry.key} nicht persistiert: {e}")
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+
+    async def _store_result(self, key: str, result: MarketQueryResult, isbn: Optional[str], title: Optional[str]) -> None:
+        if result.failed:
+            return
+        entry = MarketDataEntry.from_result(key, result, self.clock(), isbn=isbn, title=title)
+        await asyncio.to_thread(self.put, entry)
+
+    async def get_or_fetch(
+        self,
+        key: Optional[str],
+        fetch: Callable[[], Awaitable[MarketQueryResult]],
+        isbn: Optional[str] = None,
+        title: Optional[str] = None,
+    ) -> MarketQueryResult:
+        """
+        Liefert Marktdaten aus dem Cache oder über fetch() (Ergebnis wird gecacht).
+
+        Veraltete Einträge werden sofort geliefert und im Hintergrund über fetch() erneuert.
+
+        Args:
+            key: market_cache_key() des Buchs (None = ohne Cache)
+            fetch: Preissuche (z.B. PriceGroundingClient.search_market_prices)
+            isbn: ISBN für das Firestore-Dokument
+            title: Titel für das Firestore-Dokument
+
+        Returns:
+            MarketQueryResult (bei Treffern ohne usage)
+        """
+        if key is None or not self.config.enabled:
+            return await fetch()
+
+        entry, state = await asyncio.to_thread(self.lookup, key)
+        if state == STATE_FRESH:
+            logger.info(f"⚡ Marktdaten-Cache Treffer für {key} ({len(entry.offers)} Angebote)")
+            return entry.to_result()
+        if state == STATE_STALE:
+            logger.info(f"♻️ Veraltete Marktdaten für {key} geliefert, erneuere im Hintergrund")
+            self._refresh_in_background(key, fetch, isbn, title)
+            return entry.to_result()
+
+        return await self._search(key, fetch, isbn, title)
+
+    # ------------------------------------------------------------------
+    # Single-Flight
+    # ------------------------------------------------------------------
+
+    async def _search(self, key: str, fetch: Callable[[], Awaitable[MarketQueryResult]], isbn: Optional[str], title: Optional[str]) -> MarketQueryResult:
+        """Eine Suche pro Schlüssel: im Prozess über SingleFlight, über Instanzen per Lease."""
+        result, shared = await self._flights.do(key, lambda: self._lead(key, fetch, isbn, title))
+        if shared:
+            self._count(coalesced_local=1)
+            logger.info(f"🔗 Preissuche für {key} läuft bereits, Ergebnis geteilt")
+        return result
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[MarketQueryResult]], isbn: Optional[str], title: Optional[str]) -> MarketQueryResult:
+        self._count(searches=1)
+        result = await fetch()
+        await self._store_result(key, result, isbn, title)
+        return result
+
+    async def _lead(self, key: str, fetch: Callable[[], Awaitable[MarketQueryResult]], isbn: Optional[str], title: Optional[str]) -> MarketQueryResult:
+        if self.leases is None or self.store is None:
+            return await self._fetch_and_store(key, fetch, isbn, title)
+
+        deadline = time.monotonic() + self.config.lease_wait_seconds
+        while time.monotonic() < deadline:
+            try:
+                acquired = await asyncio.to_thread(self.leases.acquire, key, self.owner, self.config.lease_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Lease für {key} nicht verfügbar, suche ohne Koordination: {e}")
+                return await self._fetch_and_store(key, fetch, isbn, title)
+
+            if acquired:
+                try:
+                    return await self._fetch_and_store(key, fetch, isbn, title)
+                finally:
+                    try:
+                        await asyncio.to_thread(self.leases.release, key, self.owner)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Lease für {key} nicht freigegeben (läuft ab): {e}")
+
+            # Eine andere Instanz sucht gerade: auf ihr Ergebnis im Store warten
+            entry = await self._wait_for_remote(key, deadline)
+            if entry is not None:
+                self._count(coalesced_remote=1)
+                logger.info(f"🔗 Marktdaten für {key} von anderer Instanz übernommen")
+                return entry.to_result()
+            # Lease freigegeben ohne Ergebnis (z.B. Suche fehlgeschlagen) oder abgelaufen → selbst versuchen
+
+        self._count(lease_timeouts=1)
+        logger.warning(f"⏱️ Warten auf Preissuche für {key} abgebrochen, suche selbst")
+        return await self._fetch_and_store(key, fetch, isbn, title)
+
+    async def _wait_for_remote(self, key: str, deadline: float) -> Optional[MarketDataEntry]:
+        """Pollt den Store, bis ein frischer Eintrag da ist oder der fremde Lease endet."""
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.config.lease_poll_seconds)
+            entry = await asyncio.to_thread(self._fresh_from_store, key)
+            if entry is not None:
+                return entry
+            if not await asyncio.to_thread(self.leases.held, key):
+                return await asyncio.to_thread(self._fresh_from_store, key)
+        return None
+
+    def _fresh_from_store(self, key: str) -> Optional[MarketDataEntry]:
+        try:
+            entry = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Marktdaten-Cache Lookup für {key} fehlgeschlagen: {e}")
+            return None
+        if entry is None or self._state(entry) != STATE_FRESH:
+            return None
+        self._remember(entry)
+        return entry
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[MarketQueryResult]], isbn: Optional[str], title: Optional[str]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats.refreshes += 1
+
+        async def refresh() -> None:
+            try:
+                await self._search(key, fetch, isbn, title)
+            except Exception as e:
+                logger.warning(f"⚠️ Hintergrund-Erneuerung der Marktdaten für {key} fehlgeschlagen: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait_for_refreshes(self) -> None:
+        """Wartet auf laufende Hintergrund-Erneuerungen (Tests, Shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+_default_cache: Optional[MarketDataCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_market_data_cache() -> MarketDataCache:
+    """Liefert den prozessweiten Cache (nur im Speicher, wenn nicht konfiguriert)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = MarketDataCache(config=load_market_cache_config_from_env())
+    return _default_cache
+
+
+def configure_market_data_cache(cache: Optional[MarketDataCache]) -> None:
+    """Setzt den prozessweiten Cache (z.B. mit FirestoreMarketDataStore). None setzt zurück."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
@@ -1,6 +1,10 @@
 from typing import List, Optional, Dict
 from enum import Enum
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
+
+from shared.conditions import Condition  # Einheitliche Zustandsskala (re-export)
+from shared.llm.usage import LLMUsage
 
 class MarketStrategy(str, Enum):
     AGGRESSIVE = "aggressive"       # Unterbieten um jeden Preis (Liquidität vor Marge)
@@ -8,14 +12,6 @@ class MarketStrategy(str, Enum):
     PATIENT = "patient"             # Hoher Preis, warten auf den richtigen Käufer (Long-Tail)
     LIQUIDATION = "liquidation"     # Weg damit, egal wie billig
 
-class Condition(str, Enum):
-    NEW = "new"
-    LIKE_NEW = "like_new"
-    VERY_GOOD = "very_good"
-    GOOD = "good"
-    ACCEPTABLE = "acceptable"
-    POOR = "poor"
-
 class CompetitorOffer(BaseModel):
     """Repräsentiert ein bereinigtes Angebot der Konkurrenz."""
     seller_name: str = Field(description="Name des Verkäufers")
@@ -45,3 +41,8 @@ class MarketAnalysis(BaseModel):
     # Erklärung
     reasoning: str = Field(description="Warum dieser Preis? (Kurzfassung für UI)")
     internal_notes: Optional[str] = Field(description="Technische Details zur Entscheidung")
+    
+    # Kosten (nicht Teil des Response Schemas, wird nach dem Call gesetzt)
+    usage: SkipJsonSchema[Optional[LLMUsage]] = Field(
+        default=None, description="Token-Verbrauch und Kosten (Preissuche + Analyse)"
+    )
@@ -5,35 +5,78 @@ Koordiniert Preis-Recherche über multiple Quellen und führt intelligente Fusio
 
 import logging
 import asyncio
-import json
-from typing import List, Dict, Optional
+import time
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from google.cloud import firestore
-from google import genai
 from google.genai import types
 
 # Lokale Module (Shared)
 from shared.apis.price_grounding import PriceGroundingClient, PriceData, MarketQueryResult
 from shared.price_research.models import MarketAnalysis, CompetitorOffer, MarketStrategy, PriceRange
+from shared.price_research.market_cache import MarketDataCache, get_market_data_cache, market_cache_key
+from shared.price_research.pricing_engine import PricingEngine
+from shared.price_research.batch_pricing import (
+    BatchMarketAnalysis,
+    BatchPricingConfig,
+    PricingBatchItem,
+    batch_prompt,
+    pack_pricing_batches,
+    share_usage,
+)
+from shared.llm.context_cache import PromptPrefix, get_prompt_cache
+from shared.llm.json_extraction import parse_last_json_object
+from shared.llm.usage import LLMUsage, record_llm_call
+from shared.llm.regions import STAGE_PRICING_ANALYSIS, get_region_pool
+from shared.llm.resilience import RetryPolicy, retry_async
+from shared.clients import get_genai_client
 
 logger = logging.getLogger(__name__)
 
+PRICING_MODEL = "gemini-2.5-flash"
+PRICING_RETRY_POLICY = RetryPolicy(max_retries=2, base_delay_seconds=1.0)
+
+# Statischer Prompt-Teil der Preisanalyse (als System Instruction über den Context Cache referenziert)
+PRICING_ANALYSIS_INSTRUCTIONS = """
+Du bist ein professioneller Buchhändler-Algorithmus. Deine Aufgabe: Den optimalen Verkaufspreis ermitteln.
+
+DYNAMIK:
+- Wenn unser Zustand BESSER ist als der billigste Konkurrent -> Preis höher ansetzen.
+- Wenn unser Zustand SCHLECHTER ist -> Preis niedriger (oder Liquidations-Strategie).
+- Floor Price: Niemals unter 2.50€ (wegen Gebühren/Versand), außer es ist Schrott.
+
+AUFGABE:
+Erstelle eine JSON-Analyse gemäß Schema `MarketAnalysis`.
+"""
+
 class PriceResearchOrchestrator:
     """Orchestriert Multi-Source Price Research und KI-gestützte Preisfindung."""
     
-    def __init__(self, db: firestore.Client, grounding_client: PriceGroundingClient, project_id: str = None, location: str = "europe-west1"):
+    def __init__(self, db: firestore.Client, grounding_client: PriceGroundingClient, project_id: str = None, location: Optional[str] = None, market_cache: Optional[MarketDataCache] = None, pricing_engine: Optional[PricingEngine] = None):
         import os
         self.db = db
         self.grounding = grounding_client
+        # None = prozessweiter Marktdaten-Cache (mandantenübergreifend)
+        self._market_cache = market_cache
+        # Lokale Preisfindung; Gemini nur bei dünner oder widersprüchlicher Datenlage
+        self.pricing_engine = pricing_engine or PricingEngine()
         self.project_id = project_id or os.environ.get("GCP_PROJECT", "project-52b2fab8-15a1-4b66-9f3")
+        # None = Regionen der Stufe pricing_analysis aus dem Region Pool (Failover bei 429)
         self.location = location
         
-        # Initialisierung Gemini Client für Analyse (nicht Suche)
-        self.analysis_client = genai.Client(
-            vertexai=True,
-            project=self.project_id,
-            location=self.location
-        )
+        # Eigener Gemini Client für die Analyse (Tests); sonst prozessweit geteilte Clients je Region
+        self._analysis_client = None
+
+    @property
+    def analysis_client(self):
+        if self._analysis_client is not None:
+            return self._analysis_client
+        location = self.location or get_region_pool().regions_for(STAGE_PRICING_ANALYSIS)[0]
+        return get_genai_client(project=self.project_id, location=location)
+
+    @analysis_client.setter
+    def analysis_client(self, value):
+        self._analysis_client = value
 
     async def research_and_price(
         self, 
@@ -41,7 +84,8 @@ class PriceResearchOrchestrator:
         title: str, 
         book_id: str, 
         uid: str,
-        condition_report: Dict = None  # Das KI-Gutachten vom Condition Assessor
+        condition_report: Dict = None,  # Das KI-Gutachten vom Condition Assessor
+        metadata: Optional[Dict] = None,  # Bekannte Metadaten (z.B. früher Trigger), None = aus Firestore
     ) -> MarketAnalysis:
         """
         Hauptfunktion:
@@ -50,8 +94,91 @@ class PriceResearchOrchestrator:
         3. Gibt den optimalen Preis zurück.
         """
         
-        # 1. Metadaten laden (Autor, Verlag etc.)
-        metadata = await self._fetch_book_metadata(uid, book_id)
+        item, analysis = await self._prepare_book(isbn, title, book_id, uid, condition_report, metadata)
+        if item is None:
+            return analysis
+        if analysis is None:
+            analysis = await self._analyze_market_situation(item.market_data, condition_report, item.title, item.metadata)
+        return await self._finish(item, analysis)
+
+    async def research_and_price_batch(
+        self,
+        books: List[Dict],
+        config: Optional[BatchPricingConfig] = None,
+        concurrency: int = 8,
+    ) -> Dict[str, MarketAnalysis]:
+        """
+        Bepreist viele Bücher (z.B. einen Nachlass) mit gepackten KI-Analysen.
+
+        Marktdaten kommen wie beim Einzelbuch aus Cache bzw. Grounding, die
+        PricingEngine bepreist was sie kann. Nur die übrigen Bücher werden
+        gebündelt an Gemini geschickt (ein Request pro Batch, Größe nach Token-Budget).
+
+        Args:
+            books: Dicts mit book_id, uid und optional isbn, title, condition_report
+            config: BatchPricingConfig (Token-Budget, Bücher pro Call)
+            concurrency: Parallele Metadaten-/Marktdaten-Abfragen
+
+        Returns:
+            book_id -> MarketAnalysis (gespeichert wie beim Einzelbuch)
+        """
+        config = config or BatchPricingConfig()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def prepare(book: Dict):
+            async with semaphore:
+                return await self._prepare_book(
+                    book.get('isbn'), book.get('title'), book['book_id'], book['uid'], book.get('condition_report')
+                )
+
+        prepared = await asyncio.gather(*(prepare(book) for book in books))
+        results: Dict[str, MarketAnalysis] = {}
+        pending: List[PricingBatchItem] = []
+        for book, (item, analysis) in zip(books, prepared):
+            if item is None:
+                results[book['book_id']] = analysis
+            elif analysis is not None:
+                results[book['book_id']] = await self._finish(item, analysis)
+            else:
+                pending.append(item)
+
+        batches = pack_pricing_batches(pending, config)
+        logger.info(f"📦 Batch-Preisfindung: {len(books)} Bücher, {len(books) - len(pending)} ohne KI, {len(pending)} in {len(batches)} KI-Requests")
+        batch_semaphore = asyncio.Semaphore(config.concurrency)
+
+        async def analyze(batch: List[PricingBatchItem]) -> None:
+            async with batch_semaphore:
+                analyses = await self._analyze_market_batch(batch, config)
+            for item in batch:
+                analysis = analyses.get(item.book_id)
+                if analysis is None:
+                    # Fehlt in der Antwort (oder Batch fehlgeschlagen): einzeln nachholen
+                    analysis = await self._analyze_market_situation(item.market_data, item.condition_report, item.title, item.metadata)
+                results[item.book_id] = await self._finish(item, analysis)
+
+        await asyncio.gather(*(analyze(batch) for batch in batches))
+        return results
+
+    async def _prepare_book(
+        self,
+        isbn: str,
+        title: str,
+        book_id: str,
+        uid: str,
+        condition_report: Optional[Dict],
+        metadata: Optional[Dict] = None,
+    ) -> Tuple[Optional[PricingBatchItem], Optional[MarketAnalysis]]:
+        """
+        Metadaten + Marktdaten laden und (wenn möglich) lokal bepreisen.
+
+        Returns:
+            (None, Analyse) ohne Marktdaten, (Item, Analyse) bei lokalem Preis,
+            (Item, None) wenn eine KI-Analyse nötig ist
+        """
+        # 1. Metadaten laden (Autor, Verlag etc.); der frühe Trigger bringt sie mit,
+        # weil das Buch-Dokument dann noch nicht geschrieben ist
+        if metadata is None:
+            metadata = await self._fetch_book_metadata(uid, book_id)
         # Update isbn/title falls nötig
         if not isbn and metadata.get('isbn'): isbn = metadata.get('isbn')
         if not title and metadata.get('title'): title = metadata.get('title')
@@ -59,7 +186,7 @@ class PriceResearchOrchestrator:
         # SECURITY CHECK: Haben wir überhaupt eine ISBN oder einen Titel?
         if not isbn and not title:
             logger.warning(f"⚠️ Weder ISBN noch Titel für {book_id} gefunden. Abbruch des Groundings.")
-            return MarketAnalysis(
+            return None, MarketAnalysis(
                 recommended_price=0.0,
                 min_price_limit=0.0,
                 strategy_used=MarketStrategy.BALANCED,
@@ -76,7 +203,7 @@ class PriceResearchOrchestrator:
         if not market_data or not market_data.offers:
             logger.warning(f"⚠️ Keine Marktangebote gefunden. Nutze Fallback-Strategie.")
             # Fallback: Wenn wir GAR NICHTS finden -> Konservativer Startpreis oder Manuelle Prüfung?
-            return MarketAnalysis(
+            return None, MarketAnalysis(
                 recommended_price=0.0,
                 min_price_limit=0.0,
                 strategy_used=MarketStrategy.BALANCED,
@@ -84,15 +211,32 @@ class PriceResearchOrchestrator:
                 competitor_count=0,
                 market_price_range=PriceRange(min_price=0, max_price=0, avg_price=0),
                 reasoning="Keine Marktdaten gefunden. Manuelle Prüfung empfohlen.",
-                internal_notes="Grounding lieferte keine Ergebnisse."
+                internal_notes="Grounding lieferte keine Ergebnisse.",
+                usage=market_data.usage if market_data else None
             )
 
-        # 3. KI-Analyse: Zustand vs. Markt -> Preis
-        analysis = await self._analyze_market_situation(market_data, condition_report, title, metadata)
-        
-        # 4. Speichern (Historie)
-        await self._store_analysis_result(uid, book_id, analysis, market_data)
+        item = PricingBatchItem(
+            book_id=book_id,
+            uid=uid,
+            title=title,
+            metadata=metadata,
+            market_data=market_data,
+            condition_report=condition_report,
+            prompt=self._book_prompt(market_data, condition_report, title, metadata),
+        )
+
+        # 3. Preis: deterministisch aus den Angeboten, KI-Analyse nur als Fallback
+        decision = self.pricing_engine.price(market_data.offers, condition_report)
+        if decision.analysis is not None:
+            logger.info(f"🧮 Preis lokal berechnet: {decision.analysis.recommended_price}€ ({decision.analysis.strategy_used.value})")
+        else:
+            logger.info(f"🤖 KI-Preisanalyse nötig: {decision.fallback_reason}")
+        return item, decision.analysis
 
+    async def _finish(self, item: PricingBatchItem, analysis: MarketAnalysis) -> MarketAnalysis:
+        """Kosten zusammenfassen und speichern (Historie)."""
+        analysis.usage = LLMUsage.combine([item.market_data.usage, analysis.usage])
+        await self._store_analysis_result(item.uid, item.book_id, analysis, item.market_data)
         return analysis
 
     async def _analyze_market_situation(
@@ -107,6 +251,38 @@ class PriceResearchOrchestrator:
         Entscheidet: Sind wir besser als die Konkurrenz? Können wir mehr verlangen?
         """
         
+        prompt = self._book_prompt(market_data, condition_report, title, metadata)
+
+        # Gemini Config für Structured Output (Pydantic!)
+        config = types.GenerateContentConfig(
+            temperature=0.1,
+            response_mime_type="application/json",
+            response_schema=MarketAnalysis # Hier kommt Pydantic ins Spiel!
+        )
+
+        usage = None
+        try:
+            response, usage = await self._generate_analysis(prompt, config, f"Pricing analysis '{title}'")
+            data = parse_last_json_object(response.text)
+            data.pop("usage", None)
+            return MarketAnalysis(**data, usage=usage)
+
+        except Exception as e:
+            logger.error(f"❌ Fehler bei der KI-Preisanalyse: {e}", exc_info=True)
+            return MarketAnalysis(
+                recommended_price=0.0,
+                min_price_limit=0.0,
+                strategy_used=MarketStrategy.BALANCED,
+                confidence=0.0,
+                competitor_count=len(market_data.offers),
+                market_price_range=PriceRange(min_price=0, max_price=0, avg_price=0),
+                reasoning=f"KI-Fehler: {str(e)}",
+                internal_notes="Fehler im LLM Call.",
+                usage=usage
+            )
+
+    def _book_prompt(self, market_data: MarketQueryResult, condition_report: Optional[Dict], title: str, metadata: Dict) -> str:
+        """Dynamischer Prompt-Teil eines Buchs (Einzel-Call und gepackte Calls)."""
         # Daten für Prompt aufbereiten
         offers_summary = [
             f"- {o.seller} ({o.platform}): {o.price_eur}€ (Zustand: {o.condition})" 
@@ -116,9 +292,7 @@ class PriceResearchOrchestrator:
         my_condition = condition_report.get('grade', 'Unbekannt') if condition_report else "Gut (Standard)"
         my_defects = condition_report.get('defects', []) if condition_report else []
         
-        prompt = f"""
-        Du bist ein professioneller Buchhändler-Algorithmus. Deine Aufgabe: Den optimalen Verkaufspreis ermitteln.
-
+        return f"""
         BUCH:
         Titel: {title}
         Autor: {metadata.get('author', 'Unbekannt')}
@@ -130,61 +304,97 @@ class PriceResearchOrchestrator:
 
         MARKTLAGE (Konkurrenz):
         {chr(10).join(offers_summary)}
+        """
 
-        DYNAMIK:
-        - Wenn unser Zustand BESSER ist als der billigste Konkurrent -> Preis höher ansetzen.
-        - Wenn unser Zustand SCHLECHTER ist -> Preis niedriger (oder Liquidations-Strategie).
-        - Floor Price: Niemals unter 2.50€ (wegen Gebühren/Versand), außer es ist Schrott.
-        
-        AUFGABE:
-        Erstelle eine JSON-Analyse gemäß Schema `MarketAnalysis`.
+    async def _generate_analysis(self, prompt: str, config: types.GenerateContentConfig, description: str):
+        """Preisanalyse-Call über Context Cache, Region Pool und Retry. Returns: (response, usage)"""
+        prompt_prefix = PromptPrefix(
+            key="pricing_analysis",
+            model=PRICING_MODEL, # Schnell & Smart
+            system_instruction=PRICING_ANALYSIS_INSTRUCTIONS,
+        )
+        async def attempt():
+            call_start = time.perf_counter()
+            generate = lambda client: get_prompt_cache().generate_content(client, prompt_prefix, [prompt], config)
+            try:
+                if self._analysis_client is not None:
+                    response = await generate(self._analysis_client)
+                else:
+                    response = await get_region_pool().call(
+                        STAGE_PRICING_ANALYSIS,
+                        generate,
+                        regions=[self.location] if self.location else None,
+                        project=self.project_id,
+                        description=description,
+                    )
+            except Exception:
+                record_llm_call("gemini_pricing_analysis", PRICING_MODEL, None, (time.perf_counter() - call_start) * 1000, success=False)
+                raise
+            return response, record_llm_call("gemini_pricing_analysis", PRICING_MODEL, response, (time.perf_counter() - call_start) * 1000)
+
+        return await retry_async(
+            attempt,
+            policy=PRICING_RETRY_POLICY,
+            breaker_key=PRICING_MODEL,
+            description=description,
+        )
+
+    async def _analyze_market_batch(self, items: List[PricingBatchItem], config: BatchPricingConfig) -> Dict[str, MarketAnalysis]:
         """
+        Eine gepackte Gemini-Analyse für mehrere Bücher.
 
-        # Gemini Config für Structured Output (Pydantic!)
-        config = types.GenerateContentConfig(
+        Returns:
+            book_id -> MarketAnalysis (fehlende Bücher fehlen im Dict; bei Fehler leer)
+        """
+        if len(items) == 1:
+            item = items[0]
+            return {item.book_id: await self._analyze_market_situation(item.market_data, item.condition_report, item.title, item.metadata)}
+
+        generate_config = types.GenerateContentConfig(
             temperature=0.1,
             response_mime_type="application/json",
-            response_schema=MarketAnalysis # Hier kommt Pydantic ins Spiel!
+            response_schema=BatchMarketAnalysis,
+            max_output_tokens=config.max_output_tokens,
         )
-
         try:
-            response = await self.analysis_client.aio.models.generate_content(
-                model="gemini-2.5-flash", # Schnell & Smart
-                contents=prompt,
-                config=config
-            )
-            
-            text_result = response.text
-            if "```json" in text_result:
-                text_result = text_result.split("```json")[1].split("```")[0].strip()
-            elif "```" in text_result:
-                text_result = text_result.split("```")[1].split("```")[0].strip()
-                
-            data = json.loads(text_result)
-            return MarketAnalysis(**data)
-
+            response, usage = await self._generate_analysis(batch_prompt(items), generate_config, f"Batch pricing analysis ({len(items)} books)")
+            data = parse_last_json_object(response.text)
         except Exception as e:
-            logger.error(f"❌ Fehler bei der KI-Preisanalyse: {e}", exc_info=True)
-            return MarketAnalysis(
-                recommended_price=0.0,
-                min_price_limit=0.0,
-                strategy_used=MarketStrategy.BALANCED,
-                confidence=0.0,
-                competitor_count=len(market_data.offers),
-                market_price_range=PriceRange(min_price=0, max_price=0, avg_price=0),
-                reasoning=f"KI-Fehler: {str(e)}",
-                internal_notes="Fehler im LLM Call."
-            )
+            logger.error(f"❌ Gepackte KI-Preisanalyse für {len(items)} Bücher fehlgeschlagen: {e}")
+            return {}
+
+        expected = {item.book_id for item in items}
+        analyses: Dict[str, MarketAnalysis] = {}
+        for entry in data.get("analyses", []):
+            book_id = str(entry.pop("book_id", ""))
+            entry.pop("usage", None)
+            if book_id not in expected or book_id in analyses:
+                continue
+            try:
+                analyses[book_id] = MarketAnalysis(**entry, usage=share_usage(usage, len(items)))
+            except Exception as e:
+                logger.warning(f"⚠️ Ungültige Analyse für {book_id} in Batch-Antwort: {e}")
+        if len(analyses) < len(items):
+            logger.warning(f"⚠️ Batch-Antwort enthält {len(analyses)}/{len(items)} Bücher, Rest wird einzeln analysiert")
+        return analyses
+
+    @property
+    def market_cache(self) -> MarketDataCache:
+        return self._market_cache or get_market_data_cache()
 
     async def _get_market_data(self, isbn, title, metadata) -> Optional[MarketQueryResult]:
-        return await self.grounding.search_market_prices(
-            isbn=isbn,
-            title=title,
-            author=metadata.get('author'),
-            publisher=metadata.get('publisher'),
-            year=metadata.get('year'),
-            edition=metadata.get('edition')
-        )
+        async def fetch() -> MarketQueryResult:
+            return await self.grounding.search_market_prices(
+                isbn=isbn,
+                title=title,
+                author=metadata.get('author'),
+                publisher=metadata.get('publisher'),
+                year=metadata.get('year'),
+                edition=metadata.get('edition')
+            )
+
+        key = market_cache_key(isbn, title, metadata.get('author'), metadata.get('edition'))
+        return await self.market_cache.get_or_fetch(key, fetch, isbn=isbn, title=title)
 
     async def _fetch_book_metadata(self, uid, book_id) -> Dict:
         try:
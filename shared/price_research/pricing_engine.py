@@ -0,0 +1,183 @@
+"""
+Deterministische Preisfindung aus den Marktangeboten (NumPy, ohne LLM).
+
+Ablauf:
+1. Angebotspreise auf unseren Zustand umrechnen (Zustandsfaktoren aus shared.conditions)
+2. Ausreißer entfernen (IQR-Zaun und MAD-Score auf log-Preisen)
+3. Gewichtetes Quantil: Angebote mit ähnlichem Zustand zählen mehr,
+   das Quantil hängt von der MarketStrategy ab
+4. Floor-Regeln (Mindestpreis wegen Gebühren/Versand)
+
+Bei zu wenigen oder widersprüchlichen Angeboten liefert die Engine keine
+Analyse, sondern einen Grund; der Orchestrator fragt dann Gemini.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from shared.apis.price_grounding import PriceData
+from shared.conditions import CONDITION_PRICE_FACTORS, CONDITION_RANK, Condition, condition_of
+from shared.price_research.models import MarketAnalysis, MarketStrategy, PriceRange
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    floor_price: float = 2.50  # Niemals darunter (Gebühren/Versand)
+    min_offers: int = 3  # Weniger Angebote (nach Ausreißern) → LLM
+    max_dispersion: float = 0.5  # Robuste Streuung (MAD/Median der log-Preise) darüber → LLM
+    iqr_k: float = 1.5
+    mad_z: float = 3.5
+    condition_decay: float = 0.7  # Gewicht je Zustandsstufe Abstand: exp(-decay * Abstand)
+    # Preisfaktor je Zustand relativ zu "neu"
+    condition_factors: Mapping[Condition, float] = field(default_factory=lambda: dict(CONDITION_PRICE_FACTORS))
+    # Quantil der (zustandsbereinigten) Marktpreise je Strategie
+    strategy_quantiles: Mapping[MarketStrategy, float] = field(default_factory=lambda: {
+        MarketStrategy.LIQUIDATION: 0.10,
+        MarketStrategy.AGGRESSIVE: 0.30,
+        MarketStrategy.BALANCED: 0.50,
+        MarketStrategy.PATIENT: 0.75,
+    })
+    crowded_market: int = 15  # Ab so vielen Angeboten unterbieten
+    rare_market: int = 4  # Bis so viele Angebote geduldig bleiben
+    floor_quantile: float = 0.10  # Untergrenze: dieses Quantil ...
+    floor_discount: float = 0.85  # ... mal diesen Faktor
+
+
+@dataclass
+class PricingDecision:
+    """Ergebnis der Engine: Analyse oder Grund für den LLM-Fallback."""
+    analysis: Optional[MarketAnalysis] = None
+    fallback_reason: Optional[str] = None
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.analysis is None
+
+
+def weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    """Gewichtetes Quantil (lineare Interpolation über die kumulierten Gewichte)."""
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights) - 0.5 * weights
+    cumulative /= weights.sum()
+    return float(np.interp(q, cumulative, values))
+
+
+def outlier_mask(log_prices: np.ndarray, iqr_k: float, mad_z: float) -> np.ndarray:
+    """True für Preise, die weder den IQR-Zaun noch den MAD-Score verletzen."""
+    keep = np.ones(log_prices.shape, dtype=bool)
+    if log_prices.size >= 4:
+        q1, q3 = np.percentile(log_prices, [25, 75])
+        iqr = q3 - q1
+        keep &= (log_prices >= q1 - iqr_k * iqr) & (log_prices <= q3 + iqr_k * iqr)
+    median = np.median(log_prices)
+    mad = np.median(np.abs(log_prices - median))
+    if mad > 0:
+        keep &= 0.6745 * np.abs(log_prices - median) / mad <= mad_z
+    return keep
+
+
+class PricingEngine:
+    """
+    Berechnet MarketAnalysis direkt aus den Angeboten.
+
+    Args:
+        rules: PricingRules (Floor, Schwellen, Strategie-Quantile)
+    """
+
+    def __init__(self, rules: Optional[PricingRules] = None):
+        self.rules = rules or PricingRules()
+
+    def select_strategy(self, competitors: int, our_rank: int, market_ranks: np.ndarray) -> MarketStrategy:
+        """Strategie aus Angebotsdichte und unserem Zustand relativ zum Markt."""
+        rules = self.rules
+        typical_rank = float(np.median(market_ranks)) if market_ranks.size else our_rank
+        if competitors >= rules.crowded_market:
+            return MarketStrategy.LIQUIDATION if our_rank <= CONDITION_RANK[Condition.ACCEPTABLE] else MarketStrategy.AGGRESSIVE
+        if competitors <= rules.rare_market or our_rank > typical_rank:
+            return MarketStrategy.PATIENT
+        return MarketStrategy.BALANCED
+
+    def price(
+        self,
+        offers: List[PriceData],
+        condition_report: Optional[Dict] = None,
+        strategy: Optional[MarketStrategy] = None,
+    ) -> PricingDecision:
+        """
+        Preisempfehlung für unser Exemplar.
+
+        Args:
+            offers: Marktangebote aus der Grounding-Suche
+            condition_report: Gutachten des Condition Assessors (Feld 'grade')
+            strategy: Feste Strategie (None = aus Marktlage ableiten)
+
+        Returns:
+            PricingDecision (analysis=None → LLM-Fallback mit fallback_reason)
+        """
+        rules = self.rules
+        prices = np.array([o.price_eur for o in offers], dtype=float)
+        valid = np.isfinite(prices) & (prices > 0)
+        if valid.sum() < rules.min_offers:
+            return PricingDecision(fallback_reason=f"Zu wenige Angebote ({int(valid.sum())})")
+
+        ours = condition_of(condition_report.get("grade") if condition_report else None, Condition.GOOD)
+        our_rank = CONDITION_RANK[ours]
+        conditions = [condition_of(o.condition, Condition.GOOD) for o in offers]
+        ranks = np.array([CONDITION_RANK[c] for c in conditions], dtype=float)[valid]
+        factors = np.array([rules.condition_factors[c] for c in conditions], dtype=float)[valid]
+        prices = prices[valid]
+
+        # Auf unseren Zustand umgerechnet, in log-Preisen (Buchpreise sind rechtsschief)
+        adjusted = prices * rules.condition_factors[ours] / factors
+        log_adjusted = np.log(adjusted)
+        keep = outlier_mask(log_adjusted, rules.iqr_k, rules.mad_z)
+        if keep.sum() < rules.min_offers:
+            return PricingDecision(fallback_reason=f"Zu wenige Angebote nach Ausreißerfilter ({int(keep.sum())}/{prices.size})")
+
+        kept_log = log_adjusted[keep]
+        dispersion = float(np.median(np.abs(kept_log - np.median(kept_log))) / 0.6745)
+        if dispersion > rules.max_dispersion:
+            return PricingDecision(fallback_reason=f"Widersprüchliche Marktpreise (Streuung {dispersion:.2f})")
+
+        weights = np.exp(-rules.condition_decay * np.abs(ranks[keep] - our_rank))
+        strategy = strategy or self.select_strategy(int(keep.sum()), our_rank, ranks[keep])
+        quantile = rules.strategy_quantiles[strategy]
+        kept_adjusted = adjusted[keep]
+        recommended = weighted_quantile(kept_adjusted, weights, quantile)
+        floor = max(rules.floor_price, weighted_quantile(kept_adjusted, weights, rules.floor_quantile) * rules.floor_discount)
+        floor_applied = recommended < floor
+        recommended = round(max(recommended, floor), 2)
+
+        kept_prices = prices[keep]
+        coverage = min(1.0, keep.sum() / 10)
+        confidence = round(float(np.clip(0.4 + 0.4 * coverage + 0.2 * (1 - dispersion / rules.max_dispersion), 0.0, 1.0)), 2)
+
+        reasoning = (
+            f"{int(keep.sum())} vergleichbare Angebote ({kept_prices.min():.2f}€ - {kept_prices.max():.2f}€), "
+            f"auf Zustand '{ours.value}' umgerechnet. Strategie {strategy.value}: {int(quantile * 100)}%-Quantil"
+            + (f", angehoben auf Mindestpreis {floor:.2f}€." if floor_applied else ".")
+        )
+        analysis = MarketAnalysis(
+            recommended_price=recommended,
+            min_price_limit=round(floor, 2),
+            strategy_used=strategy,
+            confidence=confidence,
+            competitor_count=len(offers),
+            market_price_range=PriceRange(
+                min_price=round(float(kept_prices.min()), 2),
+                max_price=round(float(kept_prices.max()), 2),
+                avg_price=round(float(kept_prices.mean()), 2),
+            ),
+            reasoning=reasoning,
+            internal_notes=(
+                f"pricing_engine: kept={int(keep.sum())}/{prices.size} q={quantile} "
+                f"dispersion={dispersion:.3f} condition={ours.value}"
+            ),
+        )
+        return PricingDecision(analysis=analysis)
@@ -0,0 +1,147 @@
+"""
+Single-Flight für teure Suchen (z.B. Grounding-Preissuche je ISBN).
+
+- SingleFlight: innerhalb eines Prozesses läuft pro Schlüssel genau ein
+  Aufruf, gleichzeitige Coroutinen warten auf dessen Ergebnis.
+- FirestoreLeaseStore: über Instanzen hinweg hält der Sucher einen Lease
+  (Dokument in `market_data_leases`), andere Instanzen warten auf das
+  Ergebnis im gemeinsamen Store. Abgelaufene Leases (Instanz gestorben)
+  werden per Precondition übernommen.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Fasst gleichzeitige Aufrufe mit gleichem Schlüssel zu einem zusammen (pro Event Loop)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+    def in_flight(self, key: str) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return key in self._calls.get(loop, {})
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Führt fn() aus, außer für den Schlüssel läuft schon ein Aufruf.
+
+        Args:
+            key: Schlüssel (z.B. market_cache_key)
+            fn: Coroutine-Factory, nur vom ersten Aufrufer ausgeführt
+
+        Returns:
+            (Ergebnis, True wenn das Ergebnis eines anderen Aufrufers geteilt wurde)
+
+        Raises:
+            Exception: Fehler von fn() gehen an alle wartenden Aufrufer
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                calls = self._calls.setdefault(loop, {})
+                future = calls.get(key)
+                leader = future is None
+                if leader:
+                    future = calls[key] = loop.create_future()
+                    # Fehler ohne wartende Aufrufer nicht als "never retrieved" melden
+                    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+            if leader:
+                break
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                # Der Anführer wurde abgebrochen, nicht wir: neu versuchen
+                task = asyncio.current_task()
+                if future.cancelled() and not (task and task.cancelling()):
+                    continue
+                raise
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.get(loop, {}).pop(key, None)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class FirestoreLeaseStore:
+    """
+    Leases in Firestore: ein Dokument je Schlüssel mit owner und expires_at.
+
+    Sync API, aus async Code über asyncio.to_thread() aufrufen.
+    """
+
+    def __init__(self, db: Any, collection: str = "market_data_leases"):
+        self.db = db
+        self.collection = collection
+
+    def _ref(self, key: str) -> Any:
+        return self.db.collection(self.collection).document(key)
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Versucht den Lease zu bekommen (neu anlegen oder abgelaufenen übernehmen).
+
+        Returns:
+            True, wenn der Aufrufer jetzt Lease-Inhaber ist
+        """
+        ref = self._ref(key)
+        lease = {"owner": owner, "expires_at": _now() + timedelta(seconds=ttl_seconds)}
+        try:
+            ref.create(lease)
+            return True
+        except Exception:
+            pass  # Existiert bereits (AlreadyExists) → auf Ablauf prüfen
+        snapshot = ref.get()
+        if not snapshot.exists:
+            return False  # Gerade freigegeben: beim nächsten Versuch neu anlegen
+        current = snapshot.to_dict()
+        if current.get("expires_at") and current["expires_at"] > _now():
+            return False
+        try:
+            ref.update(lease, option=self.db.write_option(last_update_time=snapshot.update_time))
+        except Exception as e:
+            logger.debug(f"Lease {key} von anderer Instanz übernommen: {e}")
+            return False
+        logger.info(f"🔓 Abgelaufenen Lease {key} übernommen (vorher {current.get('owner')})")
+        return True
+
+    def held(self, key: str) -> bool:
+        """True, solange ein nicht abgelaufener Lease existiert."""
+        snapshot = self._ref(key).get()
+        if not snapshot.exists:
+            return False
+        expires_at = snapshot.to_dict().get("expires_at")
+        return bool(expires_at and expires_at > _now())
+
+    def release(self, key: str, owner: str) -> None:
+        """Gibt den eigenen Lease frei (fremde Leases bleiben unberührt)."""
+        ref = self._ref(key)
+        snapshot = ref.get()
+        if snapshot.exists and snapshot.to_dict().get("owner") == owner:
+            ref.delete()
@@ -0,0 +1,41 @@
+"""
+Record/Replay für externe Dienste (Gemini, Firestore, Pub/Sub, Cloud Storage).
+
+Einmal gegen die echten Dienste aufnehmen, danach offline und deterministisch
+abspielen - z.B. für Durchsatz-Benchmarks der Pipeline ohne Netzwerk
+(tests/benchmarks/bench_pipeline_replay.py).
+
+Usage:
+    from shared.replay import use_cassette
+
+    with use_cassette("cassettes/pipeline.json", mode="record"):
+        await ingest_book_with_gemini(request, config)
+
+    with use_cassette("cassettes/pipeline.json", replay_latency=True) as cassette:
+        await ingest_book_with_gemini(request, config)
+        print(cassette.summary())
+"""
+
+from .cassette import (
+    MODE_RECORD,
+    MODE_REPLAY,
+    Cassette,
+    CassetteMissError,
+    Interaction,
+)
+from .genai import CassetteGenAIClient
+from .gcp import CassetteFirestoreClient, CassettePublisher, CassetteStorageClient
+from .session import use_cassette
+
+__all__ = [
+    "MODE_RECORD",
+    "MODE_REPLAY",
+    "Cassette",
+    "CassetteMissError",
+    "Interaction",
+    "CassetteGenAIClient",
+    "CassetteFirestoreClient",
+    "CassettePublisher",
+    "CassetteStorageClient",
+    "use_cassette",
+]
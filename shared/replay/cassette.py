@@ -0,0 +1,244 @@
+"""
+Cassette: aufgezeichnete Interaktionen mit externen Diensten (Gemini, Firestore,
+Pub/Sub, Cloud Storage) als JSON-Datei.
+
+Im Modus "record" laufen die Calls gegen die echten Dienste und werden samt
+Latenz mitgeschrieben; im Modus "replay" liefert die Cassette die Antworten
+deterministisch zurück, optional mit den aufgezeichneten Latenzen
+(replay_latency, skaliert mit latency_scale).
+
+Zuordnung beim Replay:
+- Schlüssel: Fingerprint des Requests (kind + kanonische Request-Daten).
+  Gleiche Requests werden in Aufnahme-Reihenfolge beantwortet, danach wird die
+  letzte Antwort wiederholt (Benchmarks mit mehreren Durchläufen).
+- Ohne Treffer (z.B. anderer Context-Cache-Zustand als bei der Aufnahme) wird
+  die nächste ungenutzte Interaktion mit gleichem kind und Label (Modell,
+  Topic, Pfad) genommen, außer bei strict=True.
+- Schreibende Calls (Firestore set/update, Pub/Sub publish) brauchen keine
+  Antwort: ohne Treffer laufen sie ohne Latenz durch und landen in `writes`.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMissError(LookupError):
+    """Replay ohne passende Aufnahme."""
+
+
+@dataclass
+class Interaction:
+    """Eine aufgezeichnete Interaktion."""
+    kind: str  # z.B. "genai.generate_content", "firestore.get", "pubsub.publish"
+    key: str  # Fingerprint des Requests
+    label: str = ""  # Grobe Zuordnung ohne exakten Treffer (Modell, Topic, Collection)
+    request: Dict[str, Any] = field(default_factory=dict)  # Lesbare Zusammenfassung
+    response: Any = None
+    error: Optional[Dict[str, Any]] = None
+    latency_ms: float = 0.0
+    chunk_offsets_ms: Optional[List[float]] = None  # Streaming: Zeitpunkt jedes Chunks
+
+
+def to_jsonable(value: Any) -> Any:
+    """Wandelt Firestore-/SDK-Werte in JSON um (bytes als base64, Datumswerte ISO, Rest als str)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return to_jsonable(value.model_dump(mode="json", exclude_none=True))
+    return str(value)
+
+
+def from_jsonable(value: Any) -> Any:
+    """Gegenstück zu to_jsonable() für bytes."""
+    if isinstance(value, dict):
+        if set(value) == {"__bytes__"}:
+            return base64.b64decode(value["__bytes__"])
+        return {k: from_jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [from_jsonable(v) for v in value]
+    return value
+
+
+def _canonical(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return "sha1:" + hashlib.sha1(bytes(value)).hexdigest()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if hasattr(value, "model_dump"):
+        return _canonical(value.model_dump(exclude_none=True))
+    return str(value)
+
+
+def fingerprint(kind: str, payload: Any) -> str:
+    """Stabiler Schlüssel eines Requests (bytes gehen als Hash ein)."""
+    canonical = json.dumps({"kind": kind, "payload": _canonical(payload)}, sort_keys=True)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Aufnahme bzw. Wiedergabe von Interaktionen.
+
+    Args:
+        path: JSON-Datei der Cassette
+        mode: MODE_RECORD oder MODE_REPLAY
+        replay_latency: Ob beim Replay die aufgezeichnete Latenz abgewartet wird
+        latency_scale: Faktor auf die aufgezeichnete Latenz (z.B. 0.1)
+        strict: Replay nur mit exaktem Fingerprint-Treffer
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        mode: str = MODE_REPLAY,
+        replay_latency: bool = False,
+        latency_scale: float = 1.0,
+        strict: bool = False,
+    ):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path) if path else None
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.interactions: List[Interaction] = []
+        self.writes: List[Interaction] = []  # Beim Replay ausgeführte schreibende Calls
+        self.hits = 0
+        self.fallbacks = 0
+        self._used: List[bool] = []
+        self._last_by_key: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    # ------------------------------------------------------------------
+    # Datei
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str, **kwargs: Any) -> "Cassette":
+        """Lädt eine Cassette zum Replay."""
+        cassette = cls(path, mode=MODE_REPLAY, **kwargs)
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        cassette.interactions = [Interaction(**item) for item in data.get("interactions", [])]
+        cassette._used = [False] * len(cassette.interactions)
+        logger.info(f"📼 Loaded cassette {path} ({len(cassette.interactions)} interactions)")
+        return cassette
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Schreibt die Aufnahme als JSON."""
+        target = Path(path) if path else self.path
+        if target is None:
+            raise ValueError("Cassette has no path")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {"version": CASSETTE_VERSION, "interactions": [asdict(item) for item in self.interactions]}
+        target.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+        logger.info(f"📼 Saved cassette {target} ({len(payload['interactions'])} interactions)")
+
+    # ------------------------------------------------------------------
+    # Aufnahme / Wiedergabe
+    # ------------------------------------------------------------------
+
+    def record(self, interaction: Interaction) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+            self._used.append(False)
+
+    def find(self, kind: str, key: str, label: str = "", write: bool = False) -> Optional[Interaction]:
+        """
+        Nächste passende Interaktion für einen Request.
+
+        Raises:
+            CassetteMissError: Wenn ein lesender Request keine Aufnahme hat
+        """
+        with self._lock:
+            for index, item in enumerate(self.interactions):
+                if not self._used[index] and item.kind == kind and item.key == key:
+                    return self._take(index)
+            last = self._last_by_key.get((kind, key))
+            if last is not None:
+                self.hits += 1
+                return self.interactions[last]
+            if not self.strict:
+                for index, item in enumerate(self.interactions):
+                    if not self._used[index] and item.kind == kind and item.label == label:
+                        self.fallbacks += 1
+                        logger.debug(f"📼 No exact match for {kind} {label}, using next recording in order")
+                        return self._take(index)
+        if write:
+            return None
+        raise CassetteMissError(f"No recorded {kind} interaction for {label or key}")
+
+    def _take(self, index: int) -> Interaction:
+        item = self.interactions[index]
+        self._used[index] = True
+        self._last_by_key[(item.kind, item.key)] = index
+        self.hits += 1
+        return item
+
+    def record_write(self, interaction: Interaction) -> None:
+        with self._lock:
+            self.writes.append(interaction)
+
+    def delay_seconds(self, latency_ms: float) -> float:
+        if not self.replay_latency:
+            return 0.0
+        return max(0.0, latency_ms * self.latency_scale / 1000)
+
+    async def wait(self, latency_ms: float) -> None:
+        delay = self.delay_seconds(latency_ms)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def wait_sync(self, latency_ms: float) -> None:
+        delay = self.delay_seconds(latency_ms)
+        if delay:
+            time.sleep(delay)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds: Dict[str, int] = {}
+            for item in self.interactions:
+                kinds[item.kind] = kinds.get(item.kind, 0) + 1
+            return {
+                "mode": self.mode,
+                "interactions": len(self.interactions),
+                "kinds": kinds,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "writes": len(self.writes),
+            }
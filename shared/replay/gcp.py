@@ -0,0 +1,305 @@
+"""
+Cassette-Clients für Firestore, Pub/Sub und Cloud Storage.
+
+Abgedeckt ist die Oberfläche, die die Pipeline nutzt:
+- Firestore: collection(*path) / document(id) / get / set / update / add /
+  delete sowie where / order_by / limit / stream
+- Pub/Sub: publish(topic, data, **attributes).result(), topic_path()
+- Storage: bucket(name).blob(name).download_as_bytes()
+
+Lesende Calls werden beim Replay aus der Aufnahme beantwortet, schreibende
+Calls laufen ins Leere und werden in Cassette.writes protokolliert.
+"""
+
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cassette import Cassette, Interaction, fingerprint, from_jsonable, to_jsonable
+
+KIND_FS_GET = "firestore.get"
+KIND_FS_QUERY = "firestore.stream"
+KIND_FS_WRITE = "firestore.write"
+KIND_PUBLISH = "pubsub.publish"
+KIND_DOWNLOAD = "storage.download"
+
+
+def _call(cassette: Cassette, kind: str, key_payload: Any, label: str, request: Dict[str, Any], real_call, write: bool = False):
+    """Gemeinsamer Ablauf: aufnehmen (echter Call + Latenz) bzw. abspielen."""
+    key = fingerprint(kind, key_payload)
+    if cassette.recording:
+        start = time.perf_counter()
+        result, response = real_call()
+        cassette.record(Interaction(
+            kind=kind, key=key, label=label, request=request,
+            response=response, latency_ms=(time.perf_counter() - start) * 1000,
+        ))
+        return result, response
+    item = cassette.find(kind, key, label=label, write=write)
+    if write:
+        cassette.record_write(Interaction(kind=kind, key=key, label=label, request=request))
+    if item is None:
+        return None, None
+    cassette.wait_sync(item.latency_ms)
+    return None, item.response
+
+
+# ============================================================================
+# FIRESTORE
+# ============================================================================
+
+class CassetteSnapshot:
+    """Minimaler DocumentSnapshot."""
+
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], reference: Any = None):
+        self.id = doc_id
+        self._data = data
+        self.reference = reference
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value: Any = self._data or {}
+        for part in field_path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+
+def _snapshot_data(snapshot: Any) -> Optional[Dict[str, Any]]:
+    return to_jsonable(snapshot.to_dict()) if snapshot.exists else None
+
+
+class CassetteQuery:
+    def __init__(self, client: "CassetteFirestoreClient", path: Tuple[str, ...], ops: Tuple[Any, ...] = (), real: Any = None):
+        self._client = client
+        self._path = path
+        self._ops = ops
+        self._real = real
+
+    def _chain(self, op: Any, real: Any) -> "CassetteQuery":
+        return CassetteQuery(self._client, self._path, self._ops + (op,), real)
+
+    def where(self, *args: Any, **kwargs: Any) -> "CassetteQuery":
+        real = self._real.where(*args, **kwargs) if self._real is not None else None
+        filter_ = kwargs.get("filter")
+        op = ("where", [to_jsonable(a) for a in args], to_jsonable(vars(filter_)) if filter_ is not None else None)
+        return self._chain(op, real)
+
+    def order_by(self, field_path: str, **kwargs: Any) -> "CassetteQuery":
+        real = self._real.order_by(field_path, **kwargs) if self._real is not None else None
+        return self._chain(("order_by", field_path, to_jsonable(kwargs)), real)
+
+    def limit(self, count: int) -> "CassetteQuery":
+        real = self._real.limit(count) if self._real is not None else None
+        return self._chain(("limit", count), real)
+
+    def stream(self) -> List[CassetteSnapshot]:
+        path = "/".join(self._path)
+
+        def real_call():
+            docs = list(self._real.stream())
+            return docs, [{"id": doc.id, "data": _snapshot_data(doc)} for doc in docs]
+
+        result, response = _call(
+            self._client.cassette, KIND_FS_QUERY, {"path": path, "ops": self._ops}, path,
+            {"path": path, "ops": to_jsonable(self._ops)}, real_call,
+        )
+        if result is not None:
+            return result
+        return [CassetteSnapshot(doc["id"], from_jsonable(doc["data"])) for doc in response or []]
+
+    def get(self) -> List[CassetteSnapshot]:
+        return self.stream()
+
+
+class CassetteCollectionReference(CassetteQuery):
+    def __init__(self, client: "CassetteFirestoreClient", path: Tuple[str, ...], real: Any = None):
+        super().__init__(client, path, (), real)
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    def document(self, document_id: Optional[str] = None) -> "CassetteDocumentReference":
+        if document_id is None:
+            # Deterministische ID statt Zufalls-ID, damit Replay und Aufnahme übereinstimmen
+            document_id = self._client.next_auto_id("/".join(self._path))
+        real = self._real.document(document_id) if self._real is not None else None
+        return CassetteDocumentReference(self._client, self._path + (document_id,), real)
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[Any, "CassetteDocumentReference"]:
+        ref = self.document(document_id)
+        ref.set(document_data)
+        return None, ref
+
+
+class CassetteDocumentReference:
+    def __init__(self, client: "CassetteFirestoreClient", path: Tuple[str, ...], real: Any = None):
+        self._client = client
+        self._path = path
+        self._real = real
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    @property
+    def path(self) -> str:
+        return "/".join(self._path)
+
+    def collection(self, *path: str) -> CassetteCollectionReference:
+        real = self._real.collection(*path) if self._real is not None else None
+        return CassetteCollectionReference(self._client, self._path + tuple(path), real)
+
+    def get(self, *args: Any, **kwargs: Any) -> CassetteSnapshot:
+        def real_call():
+            snapshot = self._real.get(*args, **kwargs)
+            return snapshot, _snapshot_data(snapshot)
+
+        result, response = _call(self._client.cassette, KIND_FS_GET, self.path, self.path, {"path": self.path}, real_call)
+        if result is not None:
+            return result
+        return CassetteSnapshot(self.id, from_jsonable(response), reference=self)
+
+    def _write(self, operation: str, data: Any, call) -> Any:
+        def real_call():
+            return call(), None
+
+        result, _ = _call(
+            self._client.cassette, KIND_FS_WRITE, {"path": self.path, "op": operation, "data": to_jsonable(data)},
+            self.path, {"path": self.path, "op": operation, "data": to_jsonable(data)}, real_call, write=True,
+        )
+        return result
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> Any:
+        return self._write("set", document_data, lambda: self._real.set(document_data, merge=merge))
+
+    def update(self, field_updates: Dict[str, Any], *args: Any, **kwargs: Any) -> Any:
+        return self._write("update", field_updates, lambda: self._real.update(field_updates, *args, **kwargs))
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        return self._write("delete", None, lambda: self._real.delete(*args, **kwargs))
+
+
+class CassetteFirestoreClient:
+    """
+    Ersetzt firestore.Client für Aufnahme/Replay.
+
+    Args:
+        cassette: Cassette
+        real: Echter firestore.Client (nur beim Aufnehmen nötig)
+    """
+
+    def __init__(self, cassette: Cassette, real: Any = None):
+        if cassette.recording and real is None:
+            raise ValueError("Recording needs a real Firestore client")
+        self.cassette = cassette
+        self.real = real
+        self._auto_ids: Dict[str, int] = {}
+
+    def next_auto_id(self, collection_path: str) -> str:
+        count = self._auto_ids.get(collection_path, 0) + 1
+        self._auto_ids[collection_path] = count
+        return "replay-" + hashlib.sha1(f"{collection_path}#{count}".encode("utf-8")).hexdigest()[:20]
+
+    def collection(self, *path: str) -> CassetteCollectionReference:
+        parts = tuple(part for segment in path for part in segment.split("/"))
+        real = self.real.collection(*path) if self.real is not None else None
+        return CassetteCollectionReference(self, parts, real)
+
+    def document(self, *path: str) -> CassetteDocumentReference:
+        parts = tuple(part for segment in path for part in segment.split("/"))
+        real = self.real.document(*path) if self.real is not None else None
+        return CassetteDocumentReference(self, parts, real)
+
+
+# ============================================================================
+# PUB/SUB
+# ============================================================================
+
+class _DoneFuture:
+    def __init__(self, value: Any):
+        self._value = value
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self._value
+
+    def done(self) -> bool:
+        return True
+
+    def add_done_callback(self, callback) -> None:
+        callback(self)
+
+
+class CassettePublisher:
+    """Ersetzt pubsub_v1.PublisherClient (publish + topic_path)."""
+
+    def __init__(self, cassette: Cassette, real: Any = None):
+        if cassette.recording and real is None:
+            raise ValueError("Recording needs a real Pub/Sub publisher")
+        self.cassette = cassette
+        self.real = real
+        self._published = 0
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, ordering_key: str = "", **attributes: Any) -> _DoneFuture:
+        def real_call():
+            kwargs = {"ordering_key": ordering_key} if ordering_key else {}
+            message_id = self.real.publish(topic, data, **kwargs, **attributes).result()
+            return message_id, message_id
+
+        request = {"topic": topic, "data": to_jsonable(data), "attributes": to_jsonable(attributes)}
+        result, response = _call(self.cassette, KIND_PUBLISH, request, topic, request, real_call, write=True)
+        self._published += 1
+        return _DoneFuture(result or response or f"replay-{self._published}")
+
+
+# ============================================================================
+# CLOUD STORAGE
+# ============================================================================
+
+class _CassetteBlob:
+    def __init__(self, storage: "CassetteStorageClient", bucket: str, name: str):
+        self._storage = storage
+        self.bucket_name = bucket
+        self.name = name
+
+    def download_as_bytes(self, *args: Any, **kwargs: Any) -> bytes:
+        uri = f"gs://{self.bucket_name}/{self.name}"
+
+        def real_call():
+            data = self._storage.real.bucket(self.bucket_name).blob(self.name).download_as_bytes(*args, **kwargs)
+            return data, to_jsonable(data)
+
+        result, response = _call(self._storage.cassette, KIND_DOWNLOAD, uri, self.bucket_name, {"uri": uri}, real_call)
+        return result if result is not None else from_jsonable(response)
+
+
+class _CassetteBucket:
+    def __init__(self, storage: "CassetteStorageClient", name: str):
+        self._storage = storage
+        self.name = name
+
+    def blob(self, blob_name: str) -> _CassetteBlob:
+        return _CassetteBlob(self._storage, self.name, blob_name)
+
+
+class CassetteStorageClient:
+    """Ersetzt storage.Client für Downloads (bucket().blob().download_as_bytes())."""
+
+    def __init__(self, cassette: Cassette, real: Any = None):
+        if cassette.recording and real is None:
+            raise ValueError("Recording needs a real Storage client")
+        self.cassette = cassette
+        self.real = real
+
+    def bucket(self, bucket_name: str) -> _CassetteBucket:
+        return _CassetteBucket(self, bucket_name)
@@ -0,0 +1,183 @@
+"""
+Cassette-Client für google-genai (client.aio.models / client.aio.caches).
+
+Nimmt generate_content() und generate_content_stream() auf bzw. spielt sie ab.
+Context Caches werden beim Replay simuliert (create/update liefern einen
+stabilen Namen, list ist leer), damit der PromptPrefixCache sich wie online
+verhält, ohne dass Cache-Namen in den Request-Fingerprint eingehen.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from google.genai import errors, types
+
+from .cassette import Cassette, Interaction, fingerprint, to_jsonable
+
+KIND_GENERATE = "genai.generate_content"
+KIND_STREAM = "genai.generate_content_stream"
+
+# Gehen nicht in den Fingerprint ein: Cache-Namen sind pro Aufnahme verschieden
+VOLATILE_CONFIG_FIELDS = ("cached_content", "http_options")
+
+
+def request_key(kind: str, model: str, contents: Any, config: Any) -> str:
+    if config is not None and hasattr(config, "model_dump"):
+        config = {k: v for k, v in config.model_dump(exclude_none=True).items() if k not in VOLATILE_CONFIG_FIELDS}
+    return fingerprint(kind, {"model": model, "contents": contents, "config": config})
+
+
+def error_to_dict(error: BaseException) -> Dict[str, Any]:
+    return {
+        "type": type(error).__name__,
+        "code": getattr(error, "code", None),
+        "status": getattr(error, "status", None),
+        "message": getattr(error, "message", None) or str(error),
+    }
+
+
+def error_from_dict(data: Dict[str, Any]) -> BaseException:
+    """Rekonstruiert den aufgezeichneten Fehler (APIError mit Code, sonst RuntimeError)."""
+    code = data.get("code")
+    if isinstance(code, int):
+        body = {"error": {"code": code, "status": data.get("status"), "message": data.get("message")}}
+        error_class = errors.ServerError if code >= 500 else errors.ClientError if code >= 400 else errors.APIError
+        return error_class(code, body)
+    if data.get("type") in ("TimeoutError", "CancelledError"):
+        return TimeoutError(data.get("message"))
+    return RuntimeError(data.get("message"))
+
+
+def _summary(model: str, contents: Any) -> Dict[str, Any]:
+    items = contents if isinstance(contents, list) else [contents]
+    texts = [item for item in items if isinstance(item, str)]
+    return {"model": model, "parts": len(items), "text": (texts[-1][:200] if texts else None)}
+
+
+class _CassetteModels:
+    def __init__(self, owner: "CassetteGenAIClient"):
+        self._owner = owner
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None) -> types.GenerateContentResponse:
+        cassette = self._owner.cassette
+        key = request_key(KIND_GENERATE, model, contents, config)
+        if cassette.recording:
+            start = time.perf_counter()
+            try:
+                response = await self._owner.real.aio.models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                cassette.record(Interaction(
+                    kind=KIND_GENERATE, key=key, label=model, request=_summary(model, contents),
+                    error=error_to_dict(e), latency_ms=(time.perf_counter() - start) * 1000,
+                ))
+                raise
+            cassette.record(Interaction(
+                kind=KIND_GENERATE, key=key, label=model, request=_summary(model, contents),
+                response=to_jsonable(response), latency_ms=(time.perf_counter() - start) * 1000,
+            ))
+            return response
+
+        item = cassette.find(KIND_GENERATE, key, label=model)
+        await cassette.wait(item.latency_ms)
+        if item.error:
+            raise error_from_dict(item.error)
+        return types.GenerateContentResponse.model_validate(item.response)
+
+    async def generate_content_stream(self, model: str, contents: Any, config: Any = None) -> AsyncIterator[Any]:
+        cassette = self._owner.cassette
+        key = request_key(KIND_STREAM, model, contents, config)
+        if cassette.recording:
+            start = time.perf_counter()
+            stream = await self._owner.real.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+            return self._record_stream(stream, key, model, contents, start)
+        item = cassette.find(KIND_STREAM, key, label=model)
+        return self._replay_stream(item)
+
+    async def _record_stream(self, stream: Any, key: str, model: str, contents: Any, start: float) -> AsyncIterator[Any]:
+        chunks: List[Any] = []
+        offsets: List[float] = []
+        error = None
+        try:
+            async for chunk in stream:
+                chunks.append(to_jsonable(chunk))
+                offsets.append((time.perf_counter() - start) * 1000)
+                yield chunk
+        except Exception as e:
+            error = error_to_dict(e)
+            raise
+        finally:
+            self._owner.cassette.record(Interaction(
+                kind=KIND_STREAM, key=key, label=model, request=_summary(model, contents),
+                response=chunks, error=error, latency_ms=(time.perf_counter() - start) * 1000,
+                chunk_offsets_ms=offsets,
+            ))
+
+    async def _replay_stream(self, item: Interaction) -> AsyncIterator[Any]:
+        cassette = self._owner.cassette
+        offsets = item.chunk_offsets_ms or [0.0] * len(item.response or [])
+        previous = 0.0
+        for chunk, offset in zip(item.response or [], offsets):
+            await cassette.wait(offset - previous)
+            previous = offset
+            yield types.GenerateContentResponse.model_validate(chunk)
+        if item.error:
+            raise error_from_dict(item.error)
+
+
+class _ReplayPager:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+class _CassetteCaches:
+    """Context Caches: beim Aufnehmen echt, beim Replay simuliert."""
+
+    def __init__(self, owner: "CassetteGenAIClient"):
+        self._owner = owner
+
+    def _fake(self, name: str, display_name: Optional[str] = None, ttl_seconds: int = 3600) -> types.CachedContent:
+        return types.CachedContent(
+            name=name,
+            display_name=display_name,
+            expire_time=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+        )
+
+    async def create(self, model: str, config: Any = None) -> types.CachedContent:
+        if self._owner.cassette.recording:
+            return await self._owner.real.aio.caches.create(model=model, config=config)
+        display_name = getattr(config, "display_name", None) or model
+        digest = hashlib.sha1(f"{model}:{display_name}".encode("utf-8")).hexdigest()[:16]
+        return self._fake(f"cachedContents/replay-{digest}", display_name)
+
+    async def update(self, name: str, config: Any = None) -> types.CachedContent:
+        if self._owner.cassette.recording:
+            return await self._owner.real.aio.caches.update(name=name, config=config)
+        return self._fake(name)
+
+    async def list(self, config: Any = None) -> Any:
+        if self._owner.cassette.recording:
+            return await self._owner.real.aio.caches.list(config=config)
+        return _ReplayPager()
+
+
+class CassetteGenAIClient:
+    """
+    Ersetzt einen genai.Client (nur die async Oberfläche client.aio.*).
+
+    Args:
+        cassette: Cassette
+        real: Echter genai.Client (nur beim Aufnehmen nötig)
+    """
+
+    def __init__(self, cassette: Cassette, real: Any = None):
+        if cassette.recording and real is None:
+            raise ValueError("Recording needs a real genai client")
+        self.cassette = cassette
+        self.real = real
+        self.aio = SimpleNamespace(models=_CassetteModels(self), caches=_CassetteCaches(self))
@@ -0,0 +1,118 @@
+"""
+use_cassette(): hängt eine Cassette prozessweit in die Pipeline ein.
+
+Ersetzt für die Dauer des Kontexts
+- die GenAI Clients aller Stufen (über den Region Pool, ein Cassette-Client je Region),
+- den Firestore Client (shared.firestore.client),
+- Pub/Sub Publisher und Storage Client (shared.clients).
+
+Damit laufen ingest_book_with_gemini(), der Condition Assessor und der
+PriceResearchOrchestrator unverändert gegen die Cassette. API Keys werden im
+Kontext ausgeblendet, damit alle Calls den Vertex-Pfad über den Pool nehmen.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from shared.clients import (
+    get_genai_client,
+    get_publisher_client,
+    get_storage_client,
+    set_publisher_client,
+    set_storage_client,
+)
+from shared.firestore.client import get_firestore_client, set_firestore_client
+from shared.llm.regions import RegionalClientPool, configure_region_pool, get_region_pool
+
+from .cassette import MODE_RECORD, MODE_REPLAY, Cassette
+from .gcp import CassetteFirestoreClient, CassettePublisher, CassetteStorageClient
+from .genai import CassetteGenAIClient
+
+logger = logging.getLogger(__name__)
+
+# Beim Replay ausgeblendet: sonst gingen Grounding/Assessor am Pool vorbei direkt ins Netz
+API_KEY_VARIABLES = ("GOOGLE_API_KEY", "GEMINI_API_KEY")
+REPLAY_PROJECT = "replay-project"
+
+
+@contextmanager
+def use_cassette(
+    path: str,
+    mode: str = MODE_REPLAY,
+    replay_latency: bool = False,
+    latency_scale: float = 1.0,
+    strict: bool = False,
+    project: Optional[str] = None,
+) -> Iterator[Cassette]:
+    """
+    Nimmt alle Gemini-, Firestore-, Pub/Sub- und Storage-Calls auf bzw. spielt sie ab.
+
+    Args:
+        path: Cassette-Datei (JSON)
+        mode: MODE_RECORD (echte Dienste, schreibt die Datei am Ende) oder MODE_REPLAY
+        replay_latency: Aufgezeichnete Latenzen beim Replay abwarten
+        latency_scale: Faktor auf die Latenzen
+        strict: Replay nur mit exaktem Request-Fingerprint
+        project: GCP Projekt (Default: GCP_PROJECT bzw. "replay-project" beim Replay)
+
+    Yields:
+        Cassette
+    """
+    recording = mode == MODE_RECORD
+    if recording:
+        cassette = Cassette(path, mode=MODE_RECORD)
+    else:
+        cassette = Cassette.load(path, replay_latency=replay_latency, latency_scale=latency_scale, strict=strict)
+
+    project = project or os.environ.get("GCP_PROJECT") or (None if recording else REPLAY_PROJECT)
+    if recording and not project:
+        raise RuntimeError("Recording needs GCP_PROJECT (Vertex AI)")
+
+    saved_env = {name: os.environ.get(name) for name in ("GCP_PROJECT",) + API_KEY_VARIABLES}
+    os.environ["GCP_PROJECT"] = project
+    for name in API_KEY_VARIABLES:
+        os.environ.pop(name, None)
+
+    real_db = get_firestore_client() if recording else None
+    real_publisher = get_publisher_client() if recording else None
+    real_storage = get_storage_client() if recording else None
+
+    # Ein Client je Region: der PromptPrefixCache führt seine Einträge pro Client
+    genai_clients: Dict[str, CassetteGenAIClient] = {}
+    genai_lock = threading.Lock()
+
+    def client_for_region(region: str) -> Any:
+        with genai_lock:
+            if region not in genai_clients:
+                real = get_genai_client(project=project, location=region) if recording else None
+                genai_clients[region] = CassetteGenAIClient(cassette, real)
+            return genai_clients[region]
+
+    previous_pool = get_region_pool()
+    configure_region_pool(RegionalClientPool(
+        preferences=previous_pool.preferences,
+        project=project,
+        client_factory=client_for_region,
+    ))
+    set_firestore_client(CassetteFirestoreClient(cassette, real_db))
+    set_publisher_client(CassettePublisher(cassette, real_publisher))
+    set_storage_client(CassetteStorageClient(cassette, real_storage))
+    logger.info(f"📼 Cassette {path} active ({mode})")
+    try:
+        yield cassette
+    finally:
+        configure_region_pool(previous_pool)
+        set_firestore_client(real_db)
+        set_publisher_client(real_publisher)
+        set_storage_client(real_storage)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if recording:
+            cassette.save()
+        logger.info(f"📼 Cassette {path} done: {cassette.summary()}")
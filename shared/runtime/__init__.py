@@ -0,0 +1,33 @@
+"""
+Laufzeit der Agents: persistente Event Loop für Cloud Functions und Worker-Modus (Streaming Pull).
+"""
+
+from .loop import (
+    BackgroundLoop,
+    configure_background_loop,
+    get_background_loop,
+    run_coroutine,
+)
+from .worker import (
+    PubSubWorker,
+    PulledCloudEvent,
+    WorkerConfig,
+    WorkerStats,
+    load_worker_config_from_env,
+    run_worker,
+    subscription_path,
+)
+
+__all__ = [
+    "BackgroundLoop",
+    "configure_background_loop",
+    "get_background_loop",
+    "run_coroutine",
+    "PubSubWorker",
+    "PulledCloudEvent",
+    "WorkerConfig",
+    "WorkerStats",
+    "load_worker_config_from_env",
+    "run_worker",
+    "subscription_path",
+]
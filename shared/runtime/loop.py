@@ -0,0 +1,148 @@
+"""
+Persistente Event Loop für Cloud-Function-Handler.
+
+`asyncio.run()` pro Event baut jedes Mal eine neue Loop und schließt sie
+danach wieder. Alles, was an die Loop gebunden ist (aiohttp Sessions, der
+aio-Transport von google-genai, gRPC Channels), geht dabei verloren, und
+jeder Aufruf zahlt neue TLS Handshakes. BackgroundLoop hält stattdessen eine
+Loop für die Lebensdauer des Prozesses in einem Daemon-Thread offen. Die
+sync Handler reichen ihre Coroutines dort ein und warten auf das Ergebnis.
+Warme Aufrufe verwenden so offene Verbindungen weiter.
+
+Usage:
+    from shared.runtime import run_coroutine
+
+    @functions_framework.cloud_event
+    def handler(cloud_event):
+        return run_coroutine(_async_handler(cloud_event))
+
+Läuft der Aufrufer bereits in der Hintergrund-Loop, würde run() sich selbst
+blockieren; dann gibt es einen RuntimeError. Nach einem fork() (z.B. gunicorn
+preload) wird die Loop im Kindprozess neu gestartet.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    Eine Event Loop in einem Daemon-Thread, gestartet beim ersten run().
+
+    Args:
+        name: Name des Threads
+    """
+
+    def __init__(self, name: str = "agent-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._pid == os.getpid() and self._loop.is_running()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Die Loop (startet sie bei Bedarf)."""
+        if not self.running:
+            with self._lock:
+                if not self.running:
+                    self._start()
+        return self._loop
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def serve() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name=self.name, daemon=True)
+        self._thread.start()
+        started.wait()
+        self._loop = loop
+        self._pid = os.getpid()
+        logger.info(f"🔁 Background event loop started ({self.name})")
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Führt eine Coroutine auf der Hintergrund-Loop aus und wartet auf das Ergebnis.
+
+        Args:
+            coro: Coroutine
+            timeout: Maximale Wartezeit in Sekunden (None = unbegrenzt)
+
+        Returns:
+            Ergebnis der Coroutine (Exceptions werden weitergereicht)
+
+        Raises:
+            RuntimeError: Wenn aus der Hintergrund-Loop selbst aufgerufen
+            TimeoutError: Wenn timeout überschritten wird (die Coroutine wird abgebrochen)
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() called from inside the background loop; await instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stoppt und schließt die Loop (Tests, Prozessende)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._pid = None
+        if loop is None or not loop.is_running():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+# ============================================================================
+# PROZESSWEITE INSTANZ
+# ============================================================================
+
+_default_loop: Optional[BackgroundLoop] = None
+_default_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Liefert die prozessweite Hintergrund-Loop."""
+    global _default_loop
+    if _default_loop is None:
+        with _default_loop_lock:
+            if _default_loop is None:
+                _default_loop = BackgroundLoop()
+    return _default_loop
+
+
+def configure_background_loop(background_loop: Optional[BackgroundLoop]) -> None:
+    """Setzt die prozessweite Hintergrund-Loop. None stoppt und setzt zurück."""
+    global _default_loop
+    with _default_loop_lock:
+        previous, _default_loop = _default_loop, background_loop
+    if previous is not None and previous is not background_loop:
+        previous.stop()
+
+
+def run_coroutine(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Ersatz für asyncio.run() in sync Handlern: läuft auf der prozessweiten Loop."""
+    return get_background_loop().run(coro, timeout=timeout)
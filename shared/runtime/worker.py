@@ -0,0 +1,315 @@
+"""
+Worker-Runtime: Streaming Pull statt einer Cloud Function je Nachricht.
+
+Als Cloud Function verarbeitet jeder Agent genau eine Nachricht pro Aufruf,
+jeweils in einer frischen Event Loop. Im Worker-Modus hält ein langlebiger
+Prozess (z.B. Cloud Run mit min-instances) eine Streaming-Pull-Subscription
+offen und verarbeitet viele Nachrichten gleichzeitig auf einer Event Loop mit
+den prozessweit geteilten Clients.
+
+- Flow Control: maximal `max_messages` bzw. `max_bytes` ausstehende Nachrichten
+- Ack-Deadlines: der Subscriber Client verlängert die Leases ausstehender
+  Nachrichten bis `max_lease_duration_seconds` (lange LLM Calls)
+- Handler: derselbe Code wie im Cloud-Function-Modus. Übergeben wird ein
+  CloudEvent-kompatibles Objekt (cloud_event.data["message"]["data"]).
+  Async Handler laufen auf der Loop, sync Handler in einem Thread.
+- Ack/Nack: Erfolg und permanente Fehler (ValueError, KeyError) werden
+  bestätigt, alle anderen Fehler per Nack erneut zugestellt.
+
+Usage (in agents/<agent>/main.py):
+    if __name__ == "__main__":
+        run_worker(_async_ingestion_analysis_agent)
+
+    PUBSUB_SUBSCRIPTION=ingestion-sub WORKER_MAX_MESSAGES=64 python main.py
+"""
+
+import asyncio
+import base64
+import inspect
+import logging
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from shared.clients import get_subscriber_client
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Union[Any, Awaitable[Any]]]
+
+PUBSUB_EVENT_TYPE = "google.cloud.pubsub.topic.v1.messagePublished"
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """Flow Control und Nebenläufigkeit des Workers."""
+    max_messages: int = 64  # Ausstehende (gepullte, nicht bestätigte) Nachrichten
+    max_bytes: int = 64 * 1024 * 1024  # Ausstehende Bytes
+    max_concurrency: int = 64  # Gleichzeitig laufende Handler
+    max_lease_duration_seconds: int = 3600  # So lange werden Ack-Deadlines verlängert
+    min_lease_extension_seconds: int = 60  # Mindestens pro Verlängerung (lange LLM Calls)
+    shutdown_timeout_seconds: float = 30.0  # Laufende Handler beim Beenden abwarten
+    permanent_errors: Tuple[type, ...] = (ValueError, KeyError)  # Ack statt Nack
+
+
+def load_worker_config_from_env() -> WorkerConfig:
+    """WorkerConfig aus WORKER_MAX_MESSAGES, WORKER_MAX_BYTES, WORKER_CONCURRENCY, WORKER_MAX_LEASE_SECONDS."""
+    defaults = WorkerConfig()
+    max_messages = int(os.environ.get("WORKER_MAX_MESSAGES", defaults.max_messages))
+    return WorkerConfig(
+        max_messages=max_messages,
+        max_bytes=int(os.environ.get("WORKER_MAX_BYTES", defaults.max_bytes)),
+        max_concurrency=int(os.environ.get("WORKER_CONCURRENCY", max_messages)),
+        max_lease_duration_seconds=int(os.environ.get("WORKER_MAX_LEASE_SECONDS", defaults.max_lease_duration_seconds)),
+    )
+
+
+def subscription_path(subscription: str, project: Optional[str] = None) -> str:
+    """Vollständiger Subscription-Pfad; Kurznamen werden mit GCP_PROJECT ergänzt."""
+    if subscription.startswith("projects/"):
+        return subscription
+    project = project or os.environ.get("GCP_PROJECT") or os.environ.get("GOOGLE_CLOUD_PROJECT")
+    if not project:
+        raise ValueError(f"Subscription '{subscription}' needs GCP_PROJECT")
+    return f"projects/{project}/subscriptions/{subscription}"
+
+
+class PulledCloudEvent:
+    """
+    CloudEvent-kompatible Hülle um eine gepullte Pub/Sub Nachricht.
+
+    Entspricht dem, was functions_framework für Pub/Sub Trigger übergibt:
+    data["message"]["data"] ist base64-kodiert, Attribute über event["id"] usw.
+    """
+
+    def __init__(self, message: Any, subscription: str):
+        publish_time = getattr(message, "publish_time", None)
+        self.data: Dict[str, Any] = {
+            "message": {
+                "data": base64.b64encode(message.data or b"").decode("ascii"),
+                "attributes": dict(getattr(message, "attributes", None) or {}),
+                "messageId": getattr(message, "message_id", None),
+                "publishTime": publish_time.isoformat() if isinstance(publish_time, datetime) else publish_time,
+            },
+            "subscription": subscription,
+        }
+        self.attributes: Dict[str, Any] = {
+            "id": getattr(message, "message_id", None),
+            "source": subscription,
+            "type": PUBSUB_EVENT_TYPE,
+            "specversion": "1.0",
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        return self.attributes[key]
+
+    def get_data(self) -> Dict[str, Any]:
+        return self.data
+
+    def get_attributes(self) -> Dict[str, Any]:
+        return self.attributes
+
+
+@dataclass
+class WorkerStats:
+    """Zähler und Handler-Latenzen des Workers."""
+    received: int = 0
+    acked: int = 0
+    nacked: int = 0
+    permanent_failures: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    started_at: float = field(default_factory=time.monotonic)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+
+        def pct(q: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1) if latencies else None
+
+        return {
+            "received": self.received,
+            "acked": self.acked,
+            "nacked": self.nacked,
+            "permanent_failures": self.permanent_failures,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "messages_per_second": round((self.acked + self.nacked) / elapsed, 2),
+            "p50_ms": pct(0.5),
+            "p99_ms": pct(0.99),
+        }
+
+
+class PubSubWorker:
+    """
+    Verarbeitet Nachrichten einer oder mehrerer Subscriptions auf einer Event Loop.
+
+    Args:
+        config: WorkerConfig
+        subscriber: pubsub_v1.SubscriberClient (Default: prozessweiter Client)
+    """
+
+    def __init__(self, config: Optional[WorkerConfig] = None, subscriber: Any = None):
+        self.config = config or WorkerConfig()
+        self.stats = WorkerStats()
+        self._subscriber = subscriber
+        self._handlers: Dict[str, Handler] = {}
+        self._futures: List[Any] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._draining = False
+
+    def add(self, subscription: str, handler: Handler) -> "PubSubWorker":
+        """Registriert einen Handler für eine Subscription (Kurzname oder voller Pfad)."""
+        self._handlers[subscription_path(subscription)] = handler
+        return self
+
+    # ------------------------------------------------------------------
+    # Lebenszyklus
+    # ------------------------------------------------------------------
+
+    async def serve(self, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Pullt bis `stop` gesetzt ist (bzw. SIGTERM/SIGINT) und beendet dann geordnet.
+
+        Raises:
+            ValueError: Wenn kein Handler registriert ist
+        """
+        if not self._handlers:
+            raise ValueError("PubSubWorker has no subscriptions")
+        from google.cloud.pubsub_v1.types import FlowControl
+
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        self._draining = False
+        stop = stop or asyncio.Event()
+        self._install_signal_handlers(stop)
+
+        subscriber = self._subscriber or get_subscriber_client()
+        flow_control = FlowControl(
+            max_messages=self.config.max_messages,
+            max_bytes=self.config.max_bytes,
+            max_lease_duration=self.config.max_lease_duration_seconds,
+            min_duration_per_lease_extension=self.config.min_lease_extension_seconds,
+        )
+        for subscription, handler in self._handlers.items():
+            callback = self._callback(subscription, handler)
+            self._futures.append(subscriber.subscribe(subscription, callback=callback, flow_control=flow_control))
+            logger.info(
+                f"📥 Worker pulling {subscription} "
+                f"(max {self.config.max_messages} messages / {self.config.max_bytes // 1024 // 1024} MB, "
+                f"concurrency {self.config.max_concurrency})"
+            )
+
+        waiters = [asyncio.ensure_future(stop.wait())] + [asyncio.wrap_future(f) for f in self._futures]
+        try:
+            done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in done:
+                if waiter is not waiters[0] and waiter.exception():
+                    logger.error(f"❌ Streaming pull stopped: {waiter.exception()}")
+        finally:
+            await self._shutdown()
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def _shutdown(self) -> None:
+        """Keine neuen Nachrichten annehmen, laufende Handler abwarten, dann Streams schließen."""
+        self._draining = True
+        if self._tasks:
+            logger.info(f"⏳ Waiting for {len(self._tasks)} running handlers")
+            _, pending = await asyncio.wait(set(self._tasks), timeout=self.config.shutdown_timeout_seconds)
+            for task in pending:
+                task.cancel()
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+        logger.info(f"🛑 Worker stopped: {self.stats.summary()}")
+
+    def _install_signal_handlers(self, stop: asyncio.Event) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Nicht im Main Thread bzw. Plattform ohne Signal-Support
+                pass
+
+    # ------------------------------------------------------------------
+    # Nachrichten
+    # ------------------------------------------------------------------
+
+    def _callback(self, subscription: str, handler: Handler) -> Callable[[Any], None]:
+        def on_message(message: Any) -> None:
+            # Läuft im Thread des Subscriber Clients: nur an die Loop übergeben
+            if self._draining:
+                message.nack()
+                return
+            self._loop.call_soon_threadsafe(self._spawn, subscription, handler, message)
+        return on_message
+
+    def _spawn(self, subscription: str, handler: Handler, message: Any) -> None:
+        task = self._loop.create_task(self.process(subscription, handler, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def process(self, subscription: str, handler: Handler, message: Any) -> None:
+        """Führt den Handler für eine Nachricht aus und bestätigt sie (Ack/Nack)."""
+        self.stats.received += 1
+        async with self._semaphore:
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+            start = time.perf_counter()
+            try:
+                event = PulledCloudEvent(message, subscription)
+                if inspect.iscoroutinefunction(handler):
+                    await handler(event)
+                else:
+                    result = await asyncio.to_thread(handler, event)
+                    if inspect.isawaitable(result):
+                        await result
+            except self.config.permanent_errors as e:
+                logger.error(f"Permanent Error (No Retry) for message {message.message_id}: {e}", exc_info=True)
+                self.stats.permanent_failures += 1
+                self.stats.acked += 1
+                message.ack()
+            except Exception as e:
+                logger.error(f"Transient Error (Will Retry) for message {message.message_id}: {e}", exc_info=True)
+                self.stats.nacked += 1
+                message.nack()
+            else:
+                self.stats.acked += 1
+                message.ack()
+            finally:
+                self.stats.in_flight -= 1
+                self.stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+
+def run_worker(
+    handlers: Union[Handler, Dict[str, Handler]],
+    config: Optional[WorkerConfig] = None,
+) -> None:
+    """
+    Startet den Worker im aktuellen Prozess (blockiert bis SIGTERM).
+
+    Args:
+        handlers: Ein Handler für PUBSUB_SUBSCRIPTION oder {subscription: handler}
+        config: WorkerConfig (Default: aus der Umgebung)
+
+    Raises:
+        ValueError: Wenn PUBSUB_SUBSCRIPTION fehlt
+    """
+    if not isinstance(handlers, dict):
+        subscription = os.environ.get("PUBSUB_SUBSCRIPTION")
+        if not subscription:
+            raise ValueError("Worker mode needs PUBSUB_SUBSCRIPTION")
+        handlers = {subscription: handlers}
+    worker = PubSubWorker(config or load_worker_config_from_env())
+    for subscription, handler in handlers.items():
+        worker.add(subscription, handler)
+    asyncio.run(worker.serve())
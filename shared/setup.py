@@ -10,6 +10,8 @@ setup(
         "google-genai>=0.8.0",
         "requests",
         "dataclasses-json",
-        "aiohttp>=3.9.0"
+        "aiohttp>=3.9.0",
+        "Pillow>=10.0.0",
+        "zxing-cpp>=2.2.0"
     ],
 )
@@ -13,7 +13,9 @@ Features:
 
 Main API:
     ingest_book_with_gemini(): Hauptfunktion für Gemini API Call
-    ingest_book_with_retry(): Wrapper mit automatischem Retry
+    ingest_book_with_retry(): Wrapper mit automatischem Retry (optional mit Modell-Kaskade)
+    ingest_books_batch(): Viele Bücher mit begrenzter Parallelität (Async Iterator)
+    run_batch_prediction(): Offline Backlog-Ingestion über Vertex Batch Prediction
     BookIngestionRequest: Input Model
     BookIngestionResult: Output Model
 
@@ -48,9 +50,41 @@ __author__ = "BookScout Team"
 from .core import (
     ingest_book_with_gemini,
     ingest_book_with_retry,
+    ingest_book_with_cascade,
     prepare_images,
+    prepare_images_async,
     extract_grounding_metadata,
+    parse_ingestion_response,
     IngestionException,
+    EarlyIdentificationNotifier,
+    early_identification_covers,
+)
+from .batch import ingest_books_batch
+from .cascade import (
+    CascadeStats,
+    get_cascade_stats,
+    configure_cascade_stats,
+)
+from .duplicates import (
+    PerceptualHashIndex,
+    JsonlHashStore,
+    FirestoreHashStore,
+    get_duplicate_index,
+    configure_duplicate_index,
+)
+from .isbn import (
+    IsbnCatalog,
+    FirestoreIsbnStore,
+    get_isbn_catalog,
+    configure_isbn_catalog,
+    normalize_isbn,
+    is_valid_isbn13,
+)
+from .batch_prediction import (
+    run_batch_prediction,
+    LocalBatchJobService,
+    VertexBatchJobService,
+    BatchPredictionError,
 )
 
 # Models
@@ -60,6 +94,11 @@ from .models import (
     BookData,
     GroundingMetadata,
     IngestionError,
+    ImageFetchTiming,
+    BatchIngestionOutcome,
+    DuplicateIndexEntry,
+    IsbnCatalogEntry,
+    EarlyIdentification,
 )
 
 # Configuration
@@ -76,16 +115,45 @@ __all__ = [
     # Main functions
     "ingest_book_with_gemini",
     "ingest_book_with_retry",
+    "ingest_book_with_cascade",
+    "ingest_books_batch",
     "prepare_images",
+    "prepare_images_async",
     "extract_grounding_metadata",
+    "parse_ingestion_response",
+    "run_batch_prediction",
+    "LocalBatchJobService",
+    "VertexBatchJobService",
+    "BatchPredictionError",
+    "PerceptualHashIndex",
+    "JsonlHashStore",
+    "FirestoreHashStore",
+    "get_duplicate_index",
+    "configure_duplicate_index",
+    "IsbnCatalog",
+    "FirestoreIsbnStore",
+    "get_isbn_catalog",
+    "configure_isbn_catalog",
+    "CascadeStats",
+    "get_cascade_stats",
+    "configure_cascade_stats",
+    "normalize_isbn",
+    "is_valid_isbn13",
     
     "IngestionException",
+    "EarlyIdentificationNotifier",
+    "early_identification_covers",
     # Models
     "BookIngestionRequest",
     "BookIngestionResult",
     "BookData",
     "GroundingMetadata",
     "IngestionError",
+    "ImageFetchTiming",
+    "BatchIngestionOutcome",
+    "DuplicateIndexEntry",
+    "IsbnCatalogEntry",
+    "EarlyIdentification",
     
     # Configuration
     "IngestionConfig",
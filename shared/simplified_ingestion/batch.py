@@ -0,0 +1,167 @@
+"""
+Batch-Ingestion für große Buchmengen (z.B. Nachlass-Auflösungen mit 300-800 Büchern).
+
+Statt pro Buch eine eigene Pub/Sub Message und einen eigenen Event Loop zu
+nutzen, laufen hier viele BookIngestionRequests über denselben GenAI Client
+mit begrenzter Parallelität. Ergebnisse werden als Async Iterator geliefert,
+sobald sie fertig sind; Fehler bleiben auf das jeweilige Buch beschränkt.
+
+Usage (Library):
+    async for outcome in ingest_books_batch(requests, concurrency=16):
+        if outcome.success:
+            ...
+
+Usage (CLI):
+    python -m shared.simplified_ingestion.batch requests.jsonl results.jsonl --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import AsyncIterator, Iterable, Optional
+
+from .config import IngestionConfig, DEFAULT_CONFIG
+from .core import ingest_book_with_gemini, ingest_book_with_retry, IngestionException
+from .models import BookIngestionRequest, BatchIngestionOutcome, IngestionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# Sentinel für "Worker ist fertig"
+_DONE = object()
+
+
+async def _ingest_one(
+    request: BookIngestionRequest,
+    config: IngestionConfig,
+    with_retry: bool,
+) -> BatchIngestionOutcome:
+    """Verarbeitet ein Buch und fängt alle Fehler ab."""
+    try:
+        if with_retry:
+            result = await ingest_book_with_retry(request, config=config)
+        else:
+            result = await ingest_book_with_gemini(request, config)
+        return BatchIngestionOutcome(book_id=request.book_id, user_id=request.user_id, result=result)
+    except IngestionException as e:
+        return BatchIngestionOutcome(book_id=request.book_id, user_id=request.user_id, error=e.error)
+    except Exception as e:
+        logger.error(f"Book {request.book_id}: Unexpected batch error - {e}", exc_info=True)
+        return BatchIngestionOutcome(
+            book_id=request.book_id,
+            user_id=request.user_id,
+            error=IngestionError(
+                error_type=type(e).__name__,
+                error_message=str(e),
+                book_id=request.book_id,
+                user_id=request.user_id,
+                retry_possible=False,
+                image_count=len(request.image_urls),
+            ),
+        )
+
+
+async def ingest_books_batch(
+    requests: Iterable[BookIngestionRequest],
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    config: Optional[IngestionConfig] = None,
+    with_retry: bool = True,
+) -> AsyncIterator[BatchIngestionOutcome]:
+    """
+    Führt viele Ingestions mit begrenzter Parallelität durch.
+
+    Die Requests werden von einem festen Pool aus `concurrency` Workern
+    abgearbeitet (auch bei 800 Büchern gibt es nie mehr als `concurrency`
+    offene Gemini Calls). Ergebnisse kommen in Fertigstellungs-Reihenfolge.
+    Bricht der Aufrufer die Iteration ab, werden alle Worker abgebrochen.
+
+    Args:
+        requests: BookIngestionRequests (beliebiges Iterable, wird lazy gelesen)
+        concurrency: Maximale Anzahl gleichzeitig verarbeiteter Bücher
+        config: Optional IngestionConfig (nutzt DEFAULT_CONFIG wenn None)
+        with_retry: Ob ingest_book_with_retry() statt ingest_book_with_gemini() genutzt wird
+
+    Yields:
+        BatchIngestionOutcome pro Buch (Erfolg oder isolierter Fehler)
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    concurrency = max(1, concurrency)
+
+    request_iter = iter(requests)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            # Iteratoren sind nicht thread-safe, aber im selben Event Loop ist next() atomar
+            for request in request_iter:
+                results.put_nowait(await _ingest_one(request, config, with_retry))
+        finally:
+            results.put_nowait(_DONE)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    active = len(workers)
+    try:
+        while active:
+            item = await results.get()
+            if item is _DONE:
+                active -= 1
+                continue
+            yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+async def _run_cli(args: argparse.Namespace) -> int:
+    config = IngestionConfig(enable_grounding=not args.no_grounding)
+    if args.model:
+        config.model = args.model
+
+    with open(args.input, encoding="utf-8") as f:
+        requests = [BookIngestionRequest(**json.loads(line)) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    succeeded = failed = 0
+    with open(args.output, "w", encoding="utf-8") as out:
+        async for outcome in ingest_books_batch(requests, concurrency=args.concurrency, config=config):
+            out.write(outcome.model_dump_json() + "\n")
+            out.flush()
+            if outcome.success:
+                succeeded += 1
+            else:
+                failed += 1
+            logger.info(f"[{succeeded + failed}/{len(requests)}] {outcome.book_id}: {'✅' if outcome.success else '❌'}")
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Batch finished: {succeeded} succeeded, {failed} failed in {elapsed:.1f}s "
+        f"({len(requests) / elapsed if elapsed else 0:.2f} books/s)"
+    )
+    return 0 if failed == 0 else 1
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch-Ingestion aus einer JSONL-Datei mit BookIngestionRequests")
+    parser.add_argument("input", help="JSONL mit {book_id, user_id, image_urls} pro Zeile")
+    parser.add_argument("output", help="JSONL für die Ergebnisse (BatchIngestionOutcome pro Zeile)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY)
+    parser.add_argument("--model", default=None, help="Gemini Model (Default aus IngestionConfig)")
+    parser.add_argument("--no-grounding", action="store_true", help="Google Search Grounding deaktivieren")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(_run_cli(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
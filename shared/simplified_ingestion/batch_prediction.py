@@ -0,0 +1,549 @@
+"""
+Offline Batch-Prediction für nicht dringende Ingestion-Backlogs.
+
+Interaktive Uploads brauchen niedrige Latenz, nächtliche Backlogs nicht. Diese
+laufen statt über Online-`generate_content` über Vertex AI Batch Prediction
+(deutlich günstiger pro Token, Ergebnisse nach Minuten bis Stunden).
+
+Pipeline:
+1. BookIngestionRequests + System/Task Prompt als JSONL Request-Datei serialisieren
+2. Als Batch Job einreichen und bis zum Abschluss pollen
+3. Output-Dateien über denselben Parsing-Pfad wie ingest_book_with_gemini() parsen
+4. Ergebnisse gebündelt (WriteBatch, max. 500 Operationen) nach Firestore schreiben
+
+Für Tests und lokale Läufe gibt es LocalBatchJobService, der den Job-Service
+dateibasiert nachbildet.
+
+Usage:
+    service = VertexBatchJobService(client, gcs_prefix="gs://bucket/ingestion-batches")
+    outcomes = await run_batch_prediction(requests, service, db=firestore_client)
+"""
+
+import asyncio
+import dataclasses
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from google.genai import types
+
+from shared.clients import get_storage_client, module_available
+from shared.llm.usage import LLMUsage, usage_from_response
+
+from .config import IngestionConfig, DEFAULT_CONFIG
+from .core import (
+    prepare_images_async,
+    build_task_prompt,
+    build_generate_content_config,
+    parse_ingestion_response,
+)
+from .models import BookIngestionRequest, BatchIngestionOutcome, IngestionError
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_POLL_INTERVAL_SECONDS = 60.0
+DEFAULT_JOB_TIMEOUT_SECONDS = 24 * 60 * 60
+FIRESTORE_MAX_BATCH_SIZE = 500
+# Batch Prediction kostet die Hälfte der Online-Preise
+BATCH_PRICE_FACTOR = 0.5
+
+# Label-Key, über den Output-Zeilen ihrem Request zugeordnet werden
+# (Vertex liefert die Zeilen nicht zwingend in Input-Reihenfolge)
+INGESTION_KEY_LABEL = "ingestion_key"
+
+JOB_STATE_SUCCEEDED = "JOB_STATE_SUCCEEDED"
+JOB_STATE_PARTIALLY_SUCCEEDED = "JOB_STATE_PARTIALLY_SUCCEEDED"
+TERMINAL_JOB_STATES = {
+    JOB_STATE_SUCCEEDED,
+    JOB_STATE_PARTIALLY_SUCCEEDED,
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+@dataclass
+class BatchPredictionJob:
+    """Zustand eines eingereichten Batch Jobs."""
+    name: str
+    state: str
+    input_uri: str
+    output_uri: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_JOB_STATES
+
+    @property
+    def succeeded(self) -> bool:
+        return self.state in (JOB_STATE_SUCCEEDED, JOB_STATE_PARTIALLY_SUCCEEDED)
+
+
+class BatchPredictionError(Exception):
+    """Batch Job ist fehlgeschlagen, abgebrochen oder hat das Timeout überschritten."""
+
+    def __init__(self, message: str, job: Optional[BatchPredictionJob] = None):
+        super().__init__(message)
+        self.job = job
+
+
+# ============================================================================
+# REQUEST SERIALIZATION
+# ============================================================================
+
+def ingestion_key(request: BookIngestionRequest) -> str:
+    """
+    Stabiler Key für einen Request.
+
+    Vertex Labels erlauben nur Kleinbuchstaben, Ziffern, '-' und '_' (max. 63
+    Zeichen), Firestore IDs sind gemischt - daher ein Hash.
+    """
+    return hashlib.sha1(f"{request.user_id}/{request.book_id}".encode("utf-8")).hexdigest()
+
+
+def _dump(obj: Any) -> Any:
+    return obj.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def _uppercase_schema_types(schema: Any) -> Any:
+    """Die REST API erwartet Schema-Typen als Enum ("OBJECT" statt "object")."""
+    if isinstance(schema, dict):
+        return {
+            key: value.upper() if key == "type" and isinstance(value, str) else _uppercase_schema_types(value)
+            for key, value in schema.items()
+        }
+    if isinstance(schema, list):
+        return [_uppercase_schema_types(item) for item in schema]
+    return schema
+
+
+async def build_batch_request(
+    request: BookIngestionRequest,
+    config: Optional[IngestionConfig] = None,
+    system_instructions: Optional[str] = None,
+    task_prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Serialisiert einen BookIngestionRequest als Zeile für eine Batch-Prediction JSONL.
+
+    Prompt und Generation Config sind identisch zum Online-Call. gs:// Bilder
+    werden als fileData referenziert, alle anderen Quellen normalisiert inline.
+
+    Args:
+        request: BookIngestionRequest mit book_id, user_id, image_urls
+        config: Optional IngestionConfig (nutzt DEFAULT_CONFIG wenn None)
+        system_instructions: Optional System Instructions (nutzt SYSTEM_INSTRUCTIONS wenn None)
+        task_prompt: Optional Task Prompt (nutzt TASK_PROMPT_TEMPLATE wenn None)
+
+    Returns:
+        Dict im Format {"request": GenerateContentRequest}
+
+    Raises:
+        ValueError: Wenn keines der Bilder geladen werden konnte
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+
+    # Inline-Bytes für gs:// würden die Request-Datei unnötig aufblähen
+    image_config = dataclasses.replace(config, normalize_gcs_images=False)
+    image_parts, _ = await prepare_images_async(request.image_urls, image_config)
+
+    generate_config = _dump(build_generate_content_config(config, system_instructions))
+    body: Dict[str, Any] = {
+        "contents": [{
+            "role": "user",
+            "parts": [_dump(part) for part in image_parts] + [{"text": build_task_prompt(config, task_prompt)}],
+        }],
+        "systemInstruction": {"parts": [{"text": generate_config.pop("systemInstruction")}]},
+        "safetySettings": generate_config.pop("safetySettings", []),
+        "labels": {INGESTION_KEY_LABEL: ingestion_key(request)},
+    }
+    tools = generate_config.pop("tools", None)
+    if tools:
+        body["tools"] = tools
+    if "responseSchema" in generate_config:
+        generate_config["responseSchema"] = _uppercase_schema_types(generate_config["responseSchema"])
+    body["generationConfig"] = generate_config
+
+    return {"request": body}
+
+
+async def write_batch_input(
+    requests: Iterable[BookIngestionRequest],
+    path: str,
+    config: Optional[IngestionConfig] = None,
+    system_instructions: Optional[str] = None,
+    task_prompt: Optional[str] = None,
+) -> List[BatchIngestionOutcome]:
+    """
+    Schreibt die JSONL Request-Datei.
+
+    Returns:
+        Outcomes für Requests, die nicht serialisiert werden konnten (z.B.
+        keine ladbaren Bilder). Diese landen nicht in der Datei.
+    """
+    failed: List[BatchIngestionOutcome] = []
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            try:
+                line = await build_batch_request(request, config, system_instructions, task_prompt)
+            except Exception as e:
+                logger.warning(f"Book {request.book_id}: Konnte nicht serialisiert werden - {e}")
+                failed.append(_error_outcome(request, e, retry_possible=False))
+                continue
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            written += 1
+
+    logger.info(f"📝 Batch input written: {written} requests, {len(failed)} skipped -> {path}")
+    return failed
+
+
+# ============================================================================
+# JOB SERVICES
+# ============================================================================
+
+class LocalBatchJobService:
+    """
+    Dateibasierter Stand-in für den Vertex Batch Job Service.
+
+    Der Job wird beim Einreichen sofort mit `responder` abgearbeitet, der pro
+    Request-Dict ein GenerateContentResponse-Dict liefert (oder eine Exception
+    wirft, die als Zeilen-Status im Output landet - wie bei Vertex).
+    """
+
+    def __init__(self, directory: str, responder: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.directory = directory
+        self.responder = responder
+        self.jobs: Dict[str, BatchPredictionJob] = {}
+
+    async def submit(self, input_path: str, model: str, display_name: str) -> BatchPredictionJob:
+        name = f"local-{display_name}-{uuid.uuid4().hex[:8]}"
+        output_path = os.path.join(self.directory, f"{name}.predictions.jsonl")
+
+        with open(input_path, encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                request_body = json.loads(line)["request"]
+                try:
+                    entry = {"request": request_body, "response": self.responder(request_body), "status": ""}
+                except Exception as e:
+                    entry = {"request": request_body, "status": str(e)}
+                dst.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        job = BatchPredictionJob(name=name, state=JOB_STATE_SUCCEEDED, input_uri=input_path, output_uri=output_path)
+        self.jobs[name] = job
+        return job
+
+    async def get(self, job: BatchPredictionJob) -> BatchPredictionJob:
+        return self.jobs[job.name]
+
+    async def read_output(self, job: BatchPredictionJob) -> Iterator[Dict[str, Any]]:
+        with open(job.output_uri, encoding="utf-8") as f:
+            return iter([json.loads(line) for line in f if line.strip()])
+
+
+class VertexBatchJobService:
+    """
+    Vertex AI Batch Prediction über client.batches.
+
+    Input wird nach `gcs_prefix` hochgeladen, Vertex schreibt die Ergebnisse
+    als predictions.jsonl unter das Output-Prefix des Jobs.
+    """
+
+    def __init__(self, client: Any, gcs_prefix: str, storage_client: Any = None):
+        if not gcs_prefix.startswith("gs://"):
+            raise ValueError(f"gcs_prefix muss mit gs:// beginnen: {gcs_prefix}")
+        if storage_client is None:
+            if not module_available("google.cloud.storage"):
+                raise ImportError("google-cloud-storage ist für VertexBatchJobService erforderlich")
+            storage_client = get_storage_client()
+        self.client = client
+        self.gcs_prefix = gcs_prefix.rstrip("/")
+        self.storage_client = storage_client
+
+    def _split(self, uri: str):
+        bucket_name, _, blob_name = uri[len("gs://"):].partition("/")
+        return self.storage_client.bucket(bucket_name), blob_name
+
+    @staticmethod
+    def _to_job(batch_job: Any, input_uri: str) -> BatchPredictionJob:
+        state = getattr(batch_job.state, "value", batch_job.state) or "JOB_STATE_UNSPECIFIED"
+        dest = getattr(batch_job, "dest", None)
+        error = getattr(batch_job, "error", None)
+        return BatchPredictionJob(
+            name=batch_job.name,
+            state=str(state),
+            input_uri=input_uri,
+            output_uri=getattr(dest, "gcs_uri", None) if dest else None,
+            error=getattr(error, "message", None) if error else None,
+        )
+
+    async def submit(self, input_path: str, model: str, display_name: str) -> BatchPredictionJob:
+        run_prefix = f"{self.gcs_prefix}/{display_name}"
+        input_uri = f"{run_prefix}/input.jsonl"
+
+        bucket, blob_name = self._split(input_uri)
+        await asyncio.to_thread(bucket.blob(blob_name).upload_from_filename, input_path)
+
+        batch_job = await asyncio.to_thread(
+            self.client.batches.create,
+            model=model,
+            src=input_uri,
+            config=types.CreateBatchJobConfig(display_name=display_name, dest=f"{run_prefix}/output"),
+        )
+        logger.info(f"🚀 Batch job submitted: {batch_job.name} ({input_uri})")
+        return self._to_job(batch_job, input_uri)
+
+    async def get(self, job: BatchPredictionJob) -> BatchPredictionJob:
+        batch_job = await asyncio.to_thread(self.client.batches.get, name=job.name)
+        return self._to_job(batch_job, job.input_uri)
+
+    async def read_output(self, job: BatchPredictionJob) -> Iterator[Dict[str, Any]]:
+        bucket, prefix = self._split(job.output_uri)
+        blobs = await asyncio.to_thread(lambda: list(bucket.list_blobs(prefix=prefix)))
+
+        entries: List[Dict[str, Any]] = []
+        for blob in blobs:
+            if not blob.name.endswith(".jsonl"):
+                continue
+            text = await asyncio.to_thread(blob.download_as_text)
+            entries.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return iter(entries)
+
+
+# ============================================================================
+# OUTPUT PARSING
+# ============================================================================
+
+def _error_outcome(request: BookIngestionRequest, e: Any, retry_possible: bool) -> BatchIngestionOutcome:
+    return BatchIngestionOutcome(
+        book_id=request.book_id,
+        user_id=request.user_id,
+        error=IngestionError(
+            error_type=type(e).__name__ if isinstance(e, Exception) else "BatchPredictionError",
+            error_message=str(e),
+            book_id=request.book_id,
+            user_id=request.user_id,
+            retry_possible=retry_possible,
+            image_count=len(request.image_urls),
+        ),
+    )
+
+
+def batch_usage(response: types.GenerateContentResponse, model: Optional[str]) -> Optional[LLMUsage]:
+    """Usage einer Output-Zeile, Kosten mit Batch-Rabatt."""
+    usage = usage_from_response(response, model)
+    if usage is not None:
+        usage.cost_eur = round(usage.cost_eur * BATCH_PRICE_FACTOR, 6)
+    return usage
+
+
+def parse_batch_output(
+    entries: Iterable[Dict[str, Any]],
+    requests: Iterable[BookIngestionRequest],
+    model: Optional[str] = None,
+) -> List[BatchIngestionOutcome]:
+    """
+    Ordnet Output-Zeilen ihren Requests zu und parst sie wie einen Online-Call.
+
+    Requests ohne Output-Zeile (z.B. bei abgebrochenen Jobs) werden als
+    retry-fähige Fehler gemeldet.
+    """
+    pending = {ingestion_key(request): request for request in requests}
+    outcomes: List[BatchIngestionOutcome] = []
+
+    for entry in entries:
+        labels = (entry.get("request") or {}).get("labels") or {}
+        request = pending.pop(labels.get(INGESTION_KEY_LABEL), None)
+        if request is None:
+            logger.warning(f"⚠️ Batch output line without known {INGESTION_KEY_LABEL}: {labels}")
+            continue
+
+        status = entry.get("status")
+        if status or not entry.get("response"):
+            outcomes.append(_error_outcome(request, status or "Keine Response im Batch Output", retry_possible=True))
+            continue
+
+        try:
+            response = types.GenerateContentResponse.model_validate(entry["response"])
+            result = parse_ingestion_response(response, processing_time_ms=0.0)
+            result.usage = batch_usage(response, model)
+            outcomes.append(BatchIngestionOutcome(book_id=request.book_id, user_id=request.user_id, result=result))
+        except Exception as e:
+            logger.error(f"Book {request.book_id}: Batch output konnte nicht geparst werden - {e}")
+            outcomes.append(_error_outcome(request, e, retry_possible=False))
+
+    for request in pending.values():
+        outcomes.append(_error_outcome(request, "Kein Ergebnis im Batch Output", retry_possible=True))
+
+    return outcomes
+
+
+# ============================================================================
+# FIRESTORE BULK WRITE
+# ============================================================================
+
+def outcome_to_firestore_update(outcome: BatchIngestionOutcome) -> Dict[str, Any]:
+    """Firestore Update für ein Outcome (gleiches Mapping wie der Ingestion Agent)."""
+    result = outcome.result
+    if outcome.error is not None:
+        return {
+            "status": "analysis_failed",
+            "error_message": outcome.error.error_message,
+            "error_type": outcome.error.error_type,
+        }
+    if result is None or result.book_data is None:
+        return {
+            "status": "analysis_failed",
+            "error_message": "Gemini returned no book data.",
+            "error_type": "INGESTION_NO_DATA",
+        }
+
+    book_data = result.book_data
+    return {
+        "status": result.get_firestore_status(),
+        "title": book_data.title,
+        "authors": book_data.authors,
+        "isbn": book_data.isbn_13 or book_data.isbn_10,
+        "publisher": book_data.publisher,
+        "publication_year": book_data.publication_year,
+        "edition": book_data.edition,
+        "language": book_data.language,
+        "page_count": book_data.page_count,
+        "genre": book_data.genre,
+        "categories": book_data.categories,
+        "cover_url": book_data.cover_url,
+        "description": book_data.description,
+        "confidence_score": result.confidence,
+        "sources_used": result.sources_used,
+        "_metadata": {
+            "processing_time_ms": result.processing_time_ms,
+            "simplified_ingestion": True,
+            "batch_prediction": True,
+            "grounding_metadata": result.grounding_metadata.model_dump() if result.grounding_metadata else None,
+            "llm_usage": result.usage.model_dump() if result.usage else None,
+            "library_version": "v3.0.0",
+        },
+    }
+
+
+def write_outcomes_to_firestore(
+    db: Any,
+    outcomes: Iterable[BatchIngestionOutcome],
+    max_batch_size: int = FIRESTORE_MAX_BATCH_SIZE,
+) -> int:
+    """
+    Schreibt Outcomes gebündelt nach users/{uid}/books/{book_id}.
+
+    Args:
+        db: Firestore Client
+        outcomes: BatchIngestionOutcomes
+        max_batch_size: Operationen pro WriteBatch (Firestore Limit: 500)
+
+    Returns:
+        Anzahl geschriebener Dokumente
+    """
+    batch = db.batch()
+    pending = written = 0
+
+    for outcome in outcomes:
+        ref = db.collection("users").document(outcome.user_id).collection("books").document(outcome.book_id)
+        batch.update(ref, outcome_to_firestore_update(outcome))
+        pending += 1
+        if pending >= max_batch_size:
+            batch.commit()
+            written += pending
+            batch, pending = db.batch(), 0
+
+    if pending:
+        batch.commit()
+        written += pending
+
+    logger.info(f"💾 Firestore bulk write: {written} books updated")
+    return written
+
+
+# ============================================================================
+# ORCHESTRATION
+# ============================================================================
+
+async def wait_for_job(
+    service: Any,
+    job: BatchPredictionJob,
+    poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    timeout_seconds: float = DEFAULT_JOB_TIMEOUT_SECONDS,
+) -> BatchPredictionJob:
+    """Pollt den Job bis zu einem Endzustand."""
+    deadline = time.monotonic() + timeout_seconds
+    while not job.done:
+        if time.monotonic() >= deadline:
+            raise BatchPredictionError(f"Batch job {job.name} nach {timeout_seconds}s nicht fertig", job)
+        await asyncio.sleep(poll_interval_seconds)
+        job = await service.get(job)
+        logger.info(f"⏳ Batch job {job.name}: {job.state}")
+    return job
+
+
+async def run_batch_prediction(
+    requests: Iterable[BookIngestionRequest],
+    service: Any,
+    config: Optional[IngestionConfig] = None,
+    db: Any = None,
+    poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    timeout_seconds: float = DEFAULT_JOB_TIMEOUT_SECONDS,
+    system_instructions: Optional[str] = None,
+    task_prompt: Optional[str] = None,
+) -> List[BatchIngestionOutcome]:
+    """
+    Führt einen kompletten Batch-Prediction Durchlauf aus.
+
+    Args:
+        requests: BookIngestionRequests
+        service: LocalBatchJobService oder VertexBatchJobService
+        config: Optional IngestionConfig (nutzt DEFAULT_CONFIG wenn None)
+        db: Optional Firestore Client - wenn gesetzt, werden alle Outcomes gebündelt geschrieben
+        poll_interval_seconds: Abstand zwischen Status-Abfragen
+        timeout_seconds: Maximale Wartezeit auf den Job
+
+    Returns:
+        Ein BatchIngestionOutcome pro Request
+
+    Raises:
+        BatchPredictionError: Wenn der Job fehlschlägt oder nicht rechtzeitig fertig wird
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    requests = list(requests)
+    display_name = f"ingestion-{datetime.datetime.now(datetime.timezone.utc):%Y%m%d-%H%M%S}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.jsonl")
+        outcomes = await write_batch_input(requests, input_path, config, system_instructions, task_prompt)
+        failed_keys = {(o.user_id, o.book_id) for o in outcomes}
+        submitted = [r for r in requests if (r.user_id, r.book_id) not in failed_keys]
+
+        if submitted:
+            job = await service.submit(input_path, config.model, display_name)
+            job = await wait_for_job(service, job, poll_interval_seconds, timeout_seconds)
+            if not job.succeeded:
+                raise BatchPredictionError(f"Batch job {job.name} endete mit {job.state}: {job.error}", job)
+            outcomes.extend(parse_batch_output(await service.read_output(job), submitted, config.model))
+
+    succeeded = sum(1 for o in outcomes if o.success)
+    logger.info(f"✅ Batch prediction finished: {succeeded}/{len(outcomes)} books succeeded")
+
+    if db is not None:
+        await asyncio.to_thread(write_outcomes_to_firestore, db, outcomes)
+
+    return outcomes
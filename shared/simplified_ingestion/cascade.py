@@ -0,0 +1,185 @@
+"""
+Konfidenzgesteuerte Modell-Kaskade für die Ingestion.
+
+Viele Bücher mit gut lesbarer ISBN oder eindeutigem Cover braucht kein
+Pro-Modell mit Google Search. Mit IngestionConfig(enable_cascade=True) läuft
+zuerst ein schneller, ungegroundeter Call mit JSON-Schema
+(cascade_fast_model). Sein Ergebnis wird übernommen, wenn
+
+- die Confidence >= confidence_threshold_ingested ist und
+- eine ISBN mit gültiger Prüfziffer vorliegt.
+
+Sonst (oder bei Fehlern) eskaliert die Kaskade auf den konfigurierten Call
+(Modell + Grounding, mit Retries). Treffer aus Katalog bzw. Duplikat-Index
+zählen als eigene Stufe "local".
+
+CascadeStats misst pro Stufe Hit-Rate, Latenz und Kosten sowie pro Buch
+Latenz, Kosten und needs_review-Rate - auch ohne Kaskade, damit beide Modi
+vergleichbar sind.
+"""
+
+import dataclasses
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .config import IngestionConfig
+from .isbn import normalize_isbn
+from .models import BookIngestionResult
+
+logger = logging.getLogger(__name__)
+
+TIER_LOCAL = "local"  # Katalog / Duplikat-Index, kein Modell-Call
+TIER_FAST = "fast"  # Schnelles Modell ohne Grounding
+TIER_FULL = "full"  # Konfiguriertes Modell (mit Grounding)
+
+STATUS_FAILED = "failed"
+
+
+def fast_tier_config(config: IngestionConfig) -> IngestionConfig:
+    """Config der schnellen Stufe: ohne Grounding (also mit Response Schema), ohne Retries."""
+    return dataclasses.replace(
+        config,
+        model=config.cascade_fast_model,
+        enable_grounding=False,
+        enable_cascade=False,
+        retry_attempts=0,
+    )
+
+
+def full_tier_config(config: IngestionConfig) -> IngestionConfig:
+    """Config der Eskalationsstufe (konfiguriertes Modell, Grounding wie konfiguriert)."""
+    return dataclasses.replace(config, enable_cascade=False)
+
+
+def fast_result_rejection(result: BookIngestionResult, config: IngestionConfig) -> Optional[str]:
+    """
+    Prüft ein Ergebnis der schnellen Stufe.
+
+    Returns:
+        None wenn es übernommen werden kann, sonst der Grund für die Eskalation
+    """
+    if not result.success or result.book_data is None:
+        return "no book data"
+    if result.confidence < config.confidence_threshold_ingested:
+        return f"confidence {result.confidence:.2f} < {config.confidence_threshold_ingested:.2f}"
+    if normalize_isbn(result.book_data.isbn_13 or result.book_data.isbn_10) is None:
+        return "no ISBN with valid checksum"
+    return None
+
+
+# ============================================================================
+# STATS
+# ============================================================================
+
+@dataclass
+class CascadeTierStats:
+    """Metriken einer Stufe."""
+    tier: str
+    attempts: int = 0
+    accepted: int = 0
+    escalated: int = 0
+    errors: int = 0
+    total_latency_ms: float = 0.0
+    total_cost_eur: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.accepted / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency_ms / self.attempts if self.attempts else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "errors": self.errors,
+            "hit_rate": round(self.hit_rate, 4),
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "total_cost_eur": round(self.total_cost_eur, 6),
+        }
+
+
+@dataclass
+class CascadeStats:
+    """Metriken pro Stufe und pro Buch (thread-safe)."""
+    books: int = 0
+    total_latency_ms: float = 0.0
+    total_cost_eur: float = 0.0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    final_tiers: Dict[str, int] = field(default_factory=dict)
+    tiers: Dict[str, CascadeTierStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _tier(self, tier: str) -> CascadeTierStats:
+        if tier not in self.tiers:
+            self.tiers[tier] = CascadeTierStats(tier=tier)
+        return self.tiers[tier]
+
+    def record_attempt(
+        self,
+        tier: str,
+        latency_ms: float,
+        accepted: bool,
+        cost_eur: float = 0.0,
+        error: bool = False,
+    ) -> None:
+        """Verbucht einen Versuch einer Stufe (accepted=False bei der schnellen Stufe = Eskalation)."""
+        with self._lock:
+            stats = self._tier(tier)
+            stats.attempts += 1
+            stats.total_latency_ms += latency_ms
+            stats.total_cost_eur += cost_eur
+            if accepted:
+                stats.accepted += 1
+            else:
+                stats.escalated += 1
+            if error:
+                stats.errors += 1
+
+    def record_book(self, final_tier: str, latency_ms: float, status: str, cost_eur: float = 0.0) -> None:
+        """Verbucht das Endergebnis eines Buchs (status: ingested / needs_review / failed)."""
+        with self._lock:
+            self.books += 1
+            self.total_latency_ms += latency_ms
+            self.total_cost_eur += cost_eur
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.final_tiers[final_tier] = self.final_tiers.get(final_tier, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            books = self.books or 1
+            return {
+                "books": self.books,
+                "avg_latency_ms": round(self.total_latency_ms / books, 1),
+                "avg_cost_eur": round(self.total_cost_eur / books, 6),
+                "needs_review_rate": round(self.status_counts.get("needs_review", 0) / books, 4),
+                "failure_rate": round(self.status_counts.get(STATUS_FAILED, 0) / books, 4),
+                "final_tiers": dict(self.final_tiers),
+                "tiers": {tier: stats.to_dict() for tier, stats in self.tiers.items()},
+            }
+
+
+_default_stats: Optional[CascadeStats] = None
+_default_stats_lock = threading.Lock()
+
+
+def get_cascade_stats() -> CascadeStats:
+    """Liefert die prozessweiten Kaskaden-Metriken."""
+    global _default_stats
+    if _default_stats is None:
+        with _default_stats_lock:
+            if _default_stats is None:
+                _default_stats = CascadeStats()
+    return _default_stats
+
+
+def configure_cascade_stats(stats: Optional[CascadeStats]) -> None:
+    """Setzt die prozessweiten Kaskaden-Metriken. None setzt zurück."""
+    global _default_stats
+    with _default_stats_lock:
+        _default_stats = stats
@@ -9,7 +9,7 @@ Enthält:
 """
 
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 # ============================================================================
@@ -238,9 +238,30 @@ class IngestionConfig:
         confidence_threshold_ingested: Schwellenwert für "ingested" Status
         confidence_threshold_review: Schwellenwert für "needs_review" Status
         max_images: Maximale Anzahl Bilder pro Request
+        image_fetch_concurrency: Maximale Anzahl paralleler Bild-Downloads pro Buch
+        image_fetch_timeout_seconds: Timeout für einen einzelnen Bild-Download
+        image_fetch_deadline_seconds: Deadline für das Laden aller Bilder eines Buchs
+        normalize_images: Ob Bilder vor dem Gemini Call normalisiert werden (EXIF, Metadaten, Größe)
+        normalize_gcs_images: Ob gs:// Bilder dafür heruntergeladen werden (sonst Referenz per URI)
+        image_max_edge_px: Maximale Kantenlänge nach dem Skalieren (Identifikation braucht ~1024px)
+        image_jpeg_quality: JPEG-Qualität beim Neu-Kodieren
+        enable_barcode_scan: Ob EAN-13 Barcodes lokal dekodiert werden (ISBN-Fast-Path)
+        enable_duplicate_detection: Ob Cover per Perceptual Hash gegen bereits identifizierte Bücher geprüft werden
+        duplicate_max_distance: Maximale Hamming-Distanz (von 64 Bit) für einen Duplikat-Treffer
+        duplicate_global_scope: Ob auch Bücher anderer Tenants als Duplikat-Quelle genutzt werden
         enable_grounding: Ob Google Search Grounding aktiviert werden soll
+        enable_prompt_cache: Ob System Instructions, Task Prompt und Tools als Context Cache referenziert werden
+        enable_streaming: Ob die Antwort gestreamt wird (frühes Identifikations-Event, sobald ISBN bzw. Titel/Autor feststehen)
+        enable_cascade: Ob zuerst ein schneller Call ohne Grounding versucht wird (Eskalation bei Zweifel)
+        cascade_fast_model: Modell der schnellen Stufe
+        enable_hedging: Ob ein langsamer Gemini Call durch eine Zusatzanfrage abgesichert wird
+        hedge_percentile: Perzentil der letzten Latenzen, nach dem die Zusatzanfrage startet
+        hedge_min_samples: Mindestanzahl gemessener Calls, bevor gehedged wird
+        hedge_max_extra_ratio: Budget - maximaler Anteil Zusatzanfragen an allen Calls
+        hedge_region: Vertex AI Region der Zusatzanfrage (None = gleiche Region)
         retry_attempts: Anzahl Retry-Versuche bei Fehlern
-        retry_delay_seconds: Verzögerung zwischen Retries
+        retry_delay_seconds: Deckel der ersten Retry-Verzögerung (Full Jitter)
+        retry_max_delay_seconds: Maximale Retry-Verzögerung
     """
     
     # Gemini Configuration
@@ -254,14 +275,47 @@ class IngestionConfig:
     
     # Image Processing
     max_images: int = 10
+    image_fetch_concurrency: int = 8
+    image_fetch_timeout_seconds: float = 30.0
+    image_fetch_deadline_seconds: float = 60.0
+    normalize_images: bool = True
+    normalize_gcs_images: bool = True
+    image_max_edge_px: Optional[int] = 1024
+    image_jpeg_quality: int = 85
+    
+    # Lokaler Barcode-Scan (ISBN-Fast-Path)
+    enable_barcode_scan: bool = True
+    
+    # Duplikat-Erkennung (Perceptual Hash über das Cover)
+    enable_duplicate_detection: bool = True
+    duplicate_max_distance: int = 6
+    duplicate_global_scope: bool = False
     
     # Google Search Grounding
     enable_grounding: bool = True
     
+    # Context Caching für den statischen Prompt-Präfix
+    enable_prompt_cache: bool = True
+    
+    # Streaming (frühe Identifikation für die Preisrecherche)
+    enable_streaming: bool = False
+    
+    # Modell-Kaskade: schnelles Modell ohne Grounding zuerst, bei Zweifel eskalieren
+    enable_cascade: bool = False
+    cascade_fast_model: str = "gemini-2.5-flash"
+    
+    # Hedged Requests gegen Tail-Latenz
+    enable_hedging: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_max_extra_ratio: float = 0.1
+    hedge_region: Optional[str] = None
+    
     # Retry Configuration
     retry_attempts: int = 3
     retry_delay_seconds: float = 2.0
     retry_exponential_base: float = 2.0
+    retry_max_delay_seconds: float = 60.0
     
     def to_dict(self) -> Dict[str, Any]:
         """Konvertiert Config zu Dictionary."""
@@ -272,9 +326,30 @@ class IngestionConfig:
             "confidence_threshold_ingested": self.confidence_threshold_ingested,
             "confidence_threshold_review": self.confidence_threshold_review,
             "max_images": self.max_images,
+            "image_fetch_concurrency": self.image_fetch_concurrency,
+            "image_fetch_timeout_seconds": self.image_fetch_timeout_seconds,
+            "image_fetch_deadline_seconds": self.image_fetch_deadline_seconds,
+            "normalize_images": self.normalize_images,
+            "normalize_gcs_images": self.normalize_gcs_images,
+            "image_max_edge_px": self.image_max_edge_px,
+            "image_jpeg_quality": self.image_jpeg_quality,
+            "enable_barcode_scan": self.enable_barcode_scan,
+            "enable_duplicate_detection": self.enable_duplicate_detection,
+            "duplicate_max_distance": self.duplicate_max_distance,
+            "duplicate_global_scope": self.duplicate_global_scope,
             "enable_grounding": self.enable_grounding,
+            "enable_prompt_cache": self.enable_prompt_cache,
+            "enable_streaming": self.enable_streaming,
+            "enable_cascade": self.enable_cascade,
+            "cascade_fast_model": self.cascade_fast_model,
+            "enable_hedging": self.enable_hedging,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_min_samples": self.hedge_min_samples,
+            "hedge_max_extra_ratio": self.hedge_max_extra_ratio,
+            "hedge_region": self.hedge_region,
             "retry_attempts": self.retry_attempts,
             "retry_delay_seconds": self.retry_delay_seconds,
+            "retry_max_delay_seconds": self.retry_max_delay_seconds,
         }
 
 
@@ -3,45 +3,74 @@ Core-Logik für die Simplified Book Ingestion Pipeline.
 
 Hauptfunktionen:
 - prepare_images(): Lädt und konvertiert Bilder für Gemini
+- prepare_images_async(): Lädt alle Bilder eines Buchs parallel (Connection Pool)
 - ingest_book_with_gemini(): Hauptfunktion für Gemini API Call
 - extract_grounding_metadata(): Extrahiert Grounding-Daten
+- generate_streamed(): Gestreamter Call mit frühem Identifikations-Event
 - Retry Logic mit exponential backoff
 """
 
 import os
 import json
-import re
 import time
 import logging
 import datetime
 from pathlib import Path
-from typing import List, Optional, Any
+import inspect
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
 import asyncio
 from urllib.parse import urlparse, unquote
 
 try:
-    from google.cloud import storage
-except ImportError:
-    storage = None
-
-try:
-    from google import genai
     from google.genai import types
 except ImportError:
     raise ImportError(
         "google-genai is required. Install with: pip install 'google-genai>=0.3.0'"
     )
 
+import aiohttp
 import requests
 from io import BytesIO
 
+from shared.image_processing import (
+    ImageNormalizationConfig,
+    normalize_image,
+    sniff_mime_type,
+    mime_type_from_path,
+)
+from shared.image_processing.perceptual_hash import ImageHashes, compute_image_hashes
+from shared.image_processing.barcode import decode_ean13
+from shared.llm.json_extraction import extract_last_json_object
+from shared.llm.streaming import StreamingFieldWatcher
+from shared.llm.context_cache import PromptPrefix, get_prompt_cache, is_missing_cache_error
+from shared.llm.usage import LLMUsage, record_llm_call
+from shared.llm.hedging import HedgePolicy, get_hedger
+from shared.llm.regions import STAGE_INGESTION, get_region_pool
+from shared.llm.resilience import RetryDecision, RetryPolicy, classify_error, get_circuit_breaker, retry_async
+from shared.clients import get_storage_client, module_available
+
 from .models import (
     BookIngestionRequest,
     BookIngestionResult,
     BookData,
+    EarlyIdentification,
     GroundingMetadata,
     IngestionError,
+    ImageFetchTiming,
+    IsbnCatalogEntry,
+)
+from .cascade import (
+    STATUS_FAILED,
+    TIER_FAST,
+    TIER_FULL,
+    TIER_LOCAL,
+    fast_result_rejection,
+    fast_tier_config,
+    full_tier_config,
+    get_cascade_stats,
 )
+from .duplicates import get_duplicate_index
+from .isbn import get_isbn_catalog, isbn_from_barcodes, normalize_isbn
 from .config import (
     SYSTEM_INSTRUCTIONS,
     TASK_PROMPT_TEMPLATE,
@@ -54,9 +83,12 @@ from .config import (
 logger = logging.getLogger(__name__)
 
 # ============================================================================
-# GENAI INITIALIZATION (bei Modul-Import)
+# GENAI CLIENT (lazy, erst beim ersten Call)
 # ============================================================================
 
+# google-cloud-storage wird nur für gs:// Bilder gebraucht und erst dann importiert
+STORAGE_AVAILABLE = module_available("google.cloud.storage")
+
 def get_required_env(key: str) -> str:
     """Holt eine Umgebungsvariable oder wirft einen Fehler, wenn sie fehlt."""
     value = os.environ.get(key)
@@ -64,21 +96,30 @@ def get_required_env(key: str) -> str:
         raise RuntimeError(f"CRITICAL: Environment variable '{key}' is not set.")
     return value
 
-try:
-    project_id = get_required_env("GCP_PROJECT")
-    location = os.environ.get("GCP_REGION", "europe-west1") # Region kann optional bleiben mit Default
+
+# Optionaler Override (Tests, eigener Client); sonst nutzt get_client() den prozessweiten Client
+client = None
+
+
+def get_client(location: Optional[str] = None) -> Any:
+    """
+    Liefert den GenAI Client für die Ingestion (Vertex AI).
     
-    # google-genai SDK für Vertex AI konfigurieren
-    client = genai.Client(
-        vertexai=True,
-        project=project_id,
-        location=location,
-    )
-    logger.info(f"Google GenAI SDK for Vertex AI initialized successfully (project={project_id}, location={location})")
-except Exception as e:
-    logger.critical(f"Failed to initialize Google GenAI SDK: {e}")
-    # Fail fast: Ohne LLM läuft hier nichts
-    raise
+    Wird beim ersten Call gebaut, nicht beim Import: Cold Starts ohne Gemini
+    Call (Barcode-/Duplikat-Treffer, andere Handler) zahlen nicht dafür.
+    
+    Args:
+        location: Vertex AI Region (None = bevorzugte Ingestion-Region des Region Pools,
+            also LLM_REGIONS_INGESTION / LLM_REGIONS / GCP_REGION / europe-west1)
+    
+    Raises:
+        RuntimeError: Wenn GCP_PROJECT nicht gesetzt ist
+    """
+    if client is not None:
+        return client
+    project_id = get_required_env("GCP_PROJECT")
+    pool = get_region_pool()
+    return pool.client(location or pool.regions_for(STAGE_INGESTION)[0], project=project_id)
 
 
 # ============================================================================
@@ -96,6 +137,28 @@ class IngestionException(Exception):
 # IMAGE PREPARATION
 # ============================================================================
 
+def _resolve_local_path(url: str) -> Path:
+    """Wandelt eine file:// URL in einen lokalen Pfad um."""
+    # Extrahiere Pfad aus file:// URL
+    path_str = url.replace('file://', '')
+    # Behandle /D:/... Format auf Windows
+    if os.name == 'nt' and path_str.startswith('/'):
+        path_str = path_str[1:]
+    
+    # Unquote URL-encoded spaces etc.
+    path_str = unquote(path_str)
+    
+    path = Path(path_str)
+    # Fallback: Wenn Pfad nicht existiert, versuche absolut im Workspace
+    if not path.exists():
+        # Workspace Root ist d:/Neuer Ordner laut environment_details
+        workspace_root = Path('d:/Neuer Ordner')
+        # Wenn path_str mit / beginnt, entferne ihn für join
+        join_path = path_str[1:] if path_str.startswith('/') else path_str
+        path = workspace_root / join_path
+    return path
+
+
 def prepare_images(image_urls: List[str]) -> List[types.Part]:
     """
     Bereitet Bilder für Gemini vor.
@@ -120,35 +183,18 @@ def prepare_images(image_urls: List[str]) -> List[types.Part]:
         try:
             if url.startswith('gs://'):
                 logger.debug(f"Loading Cloud Storage image: {url}")
-                parts.append(types.Part.from_uri(file_uri=url, mime_type="image/jpeg"))
+                parts.append(types.Part.from_uri(file_uri=url, mime_type=mime_type_from_path(url)))
                 logger.info(f"Successfully loaded image from GCS: {url}")
             
             elif url.startswith(('http://', 'https://')):
                 logger.debug(f"Downloading image from URL: {url}")
                 response = requests.get(url, timeout=30)
                 response.raise_for_status()
-                parts.append(types.Part.from_bytes(data=response.content, mime_type="image/jpeg"))
+                parts.append(types.Part.from_bytes(data=response.content, mime_type=sniff_mime_type(response.content)))
                 logger.info(f"Successfully loaded image from URL: {url}")
             
             elif url.startswith('file://'):
-                # Extrahiere Pfad aus file:// URL
-                path_str = url.replace('file://', '')
-                # Behandle /D:/... Format auf Windows
-                if os.name == 'nt' and path_str.startswith('/'):
-                    path_str = path_str[1:]
-                
-                # Unquote URL-encoded spaces etc.
-                path_str = unquote(path_str)
-                
-                path = Path(path_str)
-                # Fallback: Wenn Pfad nicht existiert, versuche absolut im Workspace
-                if not path.exists():
-                    # Workspace Root ist d:/Neuer Ordner laut environment_details
-                    workspace_root = Path('d:/Neuer Ordner')
-                    # Wenn path_str mit / beginnt, entferne ihn für join
-                    join_path = path_str[1:] if path_str.startswith('/') else path_str
-                    path = workspace_root / join_path
-
+                path = _resolve_local_path(url)
                 logger.debug(f"Loading local image: {path}")
                 
                 if not path.exists():
@@ -157,7 +203,7 @@ def prepare_images(image_urls: List[str]) -> List[types.Part]:
                 
                 with open(path, 'rb') as f:
                     image_bytes = f.read()
-                parts.append(types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"))
+                parts.append(types.Part.from_bytes(data=image_bytes, mime_type=sniff_mime_type(image_bytes)))
                 logger.info(f"Successfully loaded local image: {path}")
             
             else:
@@ -175,6 +221,222 @@ def prepare_images(image_urls: List[str]) -> List[types.Part]:
     return parts
 
 
+# ----------------------------------------------------------------------------
+# Async Variante: Paralleler Download über einen gemeinsamen Connection Pool
+# ----------------------------------------------------------------------------
+
+# Eine Session pro Event Loop (eine Session ist an ihre Loop gebunden), dazu ihr Shutdown-Hook
+_http_sessions: Dict[asyncio.AbstractEventLoop, Tuple[aiohttp.ClientSession, AsyncIterator[None]]] = {}
+
+
+async def _close_with_loop(loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession) -> AsyncIterator[None]:
+    # Async-Generator als Shutdown-Hook: asyncio.run() schließt offene Generatoren
+    # (shutdown_asyncgens) noch auf der laufenden Loop, der finally-Block schließt die Session dort
+    try:
+        yield
+    finally:
+        entry = _http_sessions.get(loop)
+        if entry is not None and entry[0] is session:
+            del _http_sessions[loop]
+        await session.close()
+
+
+async def _get_http_session() -> aiohttp.ClientSession:
+    """
+    Liefert die aiohttp Session der laufenden Loop (Keep-Alive Connection Pool).
+    
+    Eine Session ist an ihren Event Loop gebunden. Jede Loop bekommt ihre
+    eigene Session; endet die Loop (z.B. asyncio.run() pro Event oder in
+    Tests), wird die Session mit ihr geschlossen.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _http_sessions.get(loop)
+    if entry is not None and not entry[0].closed:
+        return entry[0]
+    # Loops, die ohne shutdown_asyncgens geschlossen wurden, nicht festhalten
+    for stale in [other for other in _http_sessions if other.is_closed()]:
+        del _http_sessions[stale]
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, keepalive_timeout=30)
+    session = aiohttp.ClientSession(connector=connector)
+    closer = _close_with_loop(loop, session)
+    await closer.asend(None)  # Bis zum yield: die Loop registriert den Generator als offen
+    _http_sessions[loop] = (session, closer)
+    return session
+
+
+def _download_gcs_bytes(url: str) -> bytes:
+    """Lädt ein gs:// Objekt herunter (blockierend, in einem Thread aufrufen)."""
+    bucket_name, blob_name = url[len('gs://'):].split('/', 1)
+    return get_storage_client().bucket(bucket_name).blob(blob_name).download_as_bytes()
+
+
+def _scan_barcodes(data: bytes) -> Tuple[List[str], float]:
+    """Barcode-Scan mit Zeitmessung (läuft im Thread parallel zur Normalisierung)."""
+    start = time.perf_counter()
+    codes = decode_ean13(data)
+    return codes, (time.perf_counter() - start) * 1000
+
+
+async def _fetch_image(
+    url: str,
+    semaphore: asyncio.Semaphore,
+    config: IngestionConfig,
+) -> Tuple[Optional[types.Part], ImageFetchTiming]:
+    """Lädt und normalisiert ein einzelnes Bild und misst die Ladezeit."""
+    if url.startswith('gs://'):
+        source = "gcs"
+    elif url.startswith(('http://', 'https://')):
+        source = "http"
+    elif url.startswith('file://'):
+        source = "file"
+    else:
+        source = "unknown"
+    timing = ImageFetchTiming(url=url, source=source)
+    
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            image_bytes = None
+            if source == "gcs":
+                if config.normalize_images and config.normalize_gcs_images and STORAGE_AVAILABLE:
+                    image_bytes = await asyncio.wait_for(
+                        asyncio.to_thread(_download_gcs_bytes, url),
+                        timeout=config.image_fetch_timeout_seconds,
+                    )
+                else:
+                    # Ohne Normalisierung lädt Vertex AI das Bild selbst
+                    timing.mime_type = mime_type_from_path(url)
+                    timing.success = True
+                    return types.Part.from_uri(file_uri=url, mime_type=timing.mime_type), timing
+            
+            elif source == "http":
+                session = await _get_http_session()
+                client_timeout = aiohttp.ClientTimeout(total=config.image_fetch_timeout_seconds)
+                async with session.get(url, timeout=client_timeout) as response:
+                    response.raise_for_status()
+                    image_bytes = await response.read()
+            
+            elif source == "file":
+                path = _resolve_local_path(url)
+                if not path.exists():
+                    raise FileNotFoundError(f"File not found: {path}")
+                image_bytes = await asyncio.to_thread(path.read_bytes)
+            
+            else:
+                raise ValueError(f"Unbekanntes URL-Format: {url}")
+            
+            timing.size_bytes = len(image_bytes)
+            normalize_task = asyncio.to_thread(
+                normalize_image,
+                image_bytes,
+                ImageNormalizationConfig(
+                    max_edge_px=config.image_max_edge_px,
+                    jpeg_quality=config.image_jpeg_quality,
+                    enabled=config.normalize_images,
+                ),
+            )
+            if config.enable_barcode_scan:
+                # Scan auf den Originalbytes: nach dem Herunterskalieren sind Barcodes oft nicht mehr lesbar
+                normalized, (timing.barcodes, timing.barcode_ms) = await asyncio.gather(
+                    normalize_task, asyncio.to_thread(_scan_barcodes, image_bytes)
+                )
+            else:
+                normalized = await normalize_task
+            timing.sent_size_bytes = normalized.size_bytes
+            timing.mime_type = normalized.mime_type
+            timing.normalize_ms = normalized.duration_ms
+            timing.success = True
+            return types.Part.from_bytes(data=normalized.data, mime_type=normalized.mime_type), timing
+        
+        except Exception as e:
+            timing.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Fehler beim Laden von {url}: {timing.error}")
+            if source == "gcs":
+                # Fallback: Bild per URI referenzieren statt es zu verlieren
+                timing.mime_type = mime_type_from_path(url)
+                timing.success = True
+                return types.Part.from_uri(file_uri=url, mime_type=timing.mime_type), timing
+            return None, timing
+        
+        finally:
+            timing.duration_ms = (time.perf_counter() - start) * 1000
+
+
+async def prepare_images_async(
+    image_urls: List[str],
+    config: Optional[IngestionConfig] = None,
+) -> Tuple[List[types.Part], List[ImageFetchTiming]]:
+    """
+    Bereitet alle Bilder eines Buchs parallel für Gemini vor.
+    
+    Im Gegensatz zu prepare_images() blockiert diese Variante den Event Loop
+    nicht: HTTP-Downloads laufen über einen gemeinsamen Keep-Alive Connection
+    Pool, lokale Dateien werden in einem Thread gelesen. Die Parallelität ist
+    über config.image_fetch_concurrency begrenzt, alle Downloads eines Buchs
+    müssen innerhalb von config.image_fetch_deadline_seconds fertig sein.
+    
+    Jedes Bild wird anschließend normalisiert (siehe shared.image_processing):
+    EXIF-Orientierung, Metadaten entfernen, auf config.image_max_edge_px skalieren.
+    
+    Args:
+        image_urls: Liste von Bild-URLs oder Pfaden
+        config: Optional IngestionConfig (nutzt DEFAULT_CONFIG wenn None)
+        
+    Returns:
+        Tuple aus (Part-Objekte in Original-Reihenfolge, Ladezeiten pro Bild)
+        
+    Raises:
+        ValueError: Wenn keine gültigen Bilder geladen werden konnten
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    
+    semaphore = asyncio.Semaphore(max(1, config.image_fetch_concurrency))
+    tasks = [
+        asyncio.create_task(_fetch_image(url, semaphore, config))
+        for url in image_urls
+    ]
+    
+    start = time.perf_counter()
+    done, pending = await asyncio.wait(tasks, timeout=config.image_fetch_deadline_seconds)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning(
+            f"⏱️ Image deadline ({config.image_fetch_deadline_seconds}s) exceeded, "
+            f"dropping {len(pending)} of {len(image_urls)} images"
+        )
+    
+    parts: List[types.Part] = []
+    timings: List[ImageFetchTiming] = []
+    for url, task in zip(image_urls, tasks):
+        if task in done:
+            part, timing = task.result()
+        else:
+            part, timing = None, ImageFetchTiming(
+                url=url,
+                source="unknown",
+                duration_ms=config.image_fetch_deadline_seconds * 1000,
+                error="Deadline exceeded",
+            )
+        timings.append(timing)
+        if part is not None:
+            parts.append(part)
+    
+    total_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Prepared {len(parts)}/{len(image_urls)} images in {total_ms:.0f}ms "
+        f"(per image: {', '.join(f'{t.duration_ms:.0f}ms' for t in timings)}, "
+        f"bytes: {sum(t.size_bytes for t in timings)} -> {sum(t.sent_size_bytes for t in timings)})"
+    )
+    
+    if not parts:
+        raise ValueError("Keine gültigen Bilder gefunden")
+    
+    return parts, timings
+
+
 # ============================================================================
 # GROUNDING METADATA EXTRACTION
 # ============================================================================
@@ -228,6 +490,650 @@ def extract_grounding_metadata(response: Any) -> GroundingMetadata:
     return metadata
 
 
+# ============================================================================
+# REQUEST & RESPONSE HELPERS
+# ============================================================================
+
+SAFETY_SETTINGS = [
+    types.SafetySetting(
+        category=types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+        threshold=types.HarmBlockThreshold.BLOCK_NONE,
+    ),
+    types.SafetySetting(
+        category=types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+        threshold=types.HarmBlockThreshold.BLOCK_NONE,
+    ),
+    types.SafetySetting(
+        category=types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+        threshold=types.HarmBlockThreshold.BLOCK_NONE,
+    ),
+    types.SafetySetting(
+        category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+        threshold=types.HarmBlockThreshold.BLOCK_NONE,
+    ),
+    types.SafetySetting(
+        category=types.HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY,
+        threshold=types.HarmBlockThreshold.BLOCK_NONE,
+    ),
+]
+
+
+def build_hedge_policy(config: IngestionConfig) -> HedgePolicy:
+    """HedgePolicy für den Gemini Call aus der IngestionConfig."""
+    return HedgePolicy(
+        enabled=config.enable_hedging,
+        percentile=config.hedge_percentile,
+        min_samples=config.hedge_min_samples,
+        max_extra_ratio=config.hedge_max_extra_ratio,
+    )
+
+
+def build_task_prompt(config: IngestionConfig, task_prompt: Optional[str] = None) -> str:
+    """Baut den Task Prompt für einen Ingestion Call."""
+    if task_prompt is None:
+        task_prompt = TASK_PROMPT_TEMPLATE
+    
+    # Force explicit JSON request in prompt if grounding is enabled
+    # Since we can't use response_mime_type="application/json" with tools
+    if config.enable_grounding:
+        task_prompt += "\n\nWICHTIG: Antworte AUSSCHLIESSLICH mit einem validen JSON-Objekt. Kein Markdown, kein erklärender Text davor oder danach. Nur das rohe JSON."
+    return task_prompt
+
+
+def build_generate_content_config(
+    config: IngestionConfig,
+    system_instructions: Optional[str] = None,
+) -> types.GenerateContentConfig:
+    """
+    Baut die GenerateContentConfig für einen Ingestion Call.
+    
+    WICHTIG: Controlled Generation (response_schema) und Google Search Grounding 
+    können momentan nicht gleichzeitig genutzt werden.
+    """
+    if system_instructions is None:
+        system_instructions = SYSTEM_INSTRUCTIONS
+    
+    if config.enable_grounding:
+        logger.info("⚠️ Grounding is enabled: Disabling response_schema/mime_type to avoid API conflict.")
+        return types.GenerateContentConfig(
+            temperature=config.temperature,
+            max_output_tokens=config.max_output_tokens,
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+            system_instruction=system_instructions,
+            safety_settings=SAFETY_SETTINGS,
+        )
+    return types.GenerateContentConfig(
+        temperature=config.temperature,
+        max_output_tokens=config.max_output_tokens,
+        response_mime_type="application/json",
+        response_schema=JSON_RESPONSE_SCHEMA,
+        system_instruction=system_instructions,
+        safety_settings=SAFETY_SETTINGS,
+    )
+
+
+def build_prompt_prefix(
+    config: IngestionConfig,
+    system_instructions: Optional[str] = None,
+    task_prompt: Optional[str] = None,
+) -> PromptPrefix:
+    """
+    Statischer Präfix eines Ingestion Calls für das Context Caching.
+    
+    System Instructions, Task Prompt und Grounding-Tool sind für alle Bücher
+    gleich. Das JSON-Schema ist Teil der Generation Config und kann nicht in
+    einen CachedContent, es bleibt im Request.
+    """
+    return PromptPrefix(
+        key="ingestion",
+        model=config.model,
+        system_instruction=system_instructions if system_instructions is not None else SYSTEM_INSTRUCTIONS,
+        contents=[build_task_prompt(config, task_prompt)],
+        tools=[types.Tool(google_search=types.GoogleSearch())] if config.enable_grounding else None,
+    )
+
+
+def extract_response_text(response: Any) -> str:
+    """Extrahiert den Text aus einer Gemini Response (mit Fallback auf die Parts)."""
+    if hasattr(response, 'candidates') and response.candidates:
+        cand = response.candidates[0]
+        logger.info(f"📊 Candidate 0 Finish Reason: {getattr(cand, 'finish_reason', 'N/A')}")
+        
+        # Log Candidate-Struktur
+        if hasattr(cand, 'content'):
+            logger.info(f"📊 Candidate has content: {hasattr(cand.content, 'parts')}")
+            if hasattr(cand.content, 'parts') and cand.content.parts:
+                logger.info(f"📊 Number of parts: {len(cand.content.parts)}")
+
+    result_text = ""
+    try:
+        result_text = response.text
+    except Exception as e:
+        if hasattr(response, 'candidates') and response.candidates and \
+           response.candidates[0].content and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'text') and part.text:
+                    result_text = part.text
+                    break
+    return result_text or ""
+
+
+def parse_response_json(result_text: str) -> Any:
+    """
+    Findet das JSON-Ergebnis in einer (evtl. "chatty") Modell-Antwort.
+    
+    Raises:
+        json.JSONDecodeError: Wenn kein valides JSON-Objekt gefunden wurde
+    """
+    if not result_text or not result_text.strip():
+        logger.error("❌ Keine Text-Antwort von Gemini erhalten")
+        # Fallback JSON um Crash zu verhindern
+        raise json.JSONDecodeError("Leere Antwort von Gemini", "", 0)
+
+    logger.info(f"📝 Result Text (first 500 chars): {result_text[:500]}")
+    
+    # JSON Parsing: ein linearer Durchlauf findet das letzte vollständige Objekt
+    # (toleriert Markdown-Fences, Prosa davor/danach und abgeschnittene Antworten)
+    try:
+        extraction = extract_last_json_object(result_text)
+        if extraction is None:
+            raise json.JSONDecodeError("No valid JSON object found in response", result_text, 0)
+        if extraction.truncated:
+            logger.warning("⚠️ Response was truncated - using repaired JSON object")
+        result_json = extraction.value
+        logger.info(f"📋 JSON Top-level keys: {list(result_json.keys())}")
+
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ JSON DECODE ERROR: {e}")
+        logger.error(f"❌ Problematischer Text: {result_text}")
+        raise e
+    
+    return result_json
+
+
+def build_ingestion_result(
+    result_json: Any,
+    grounding_metadata: GroundingMetadata,
+    processing_time_ms: float,
+    image_fetch_timings: Optional[List[ImageFetchTiming]] = None,
+) -> BookIngestionResult:
+    """Konstruiert das BookIngestionResult aus dem geparsten Gemini JSON."""
+    book_data = None
+    # Flexibles Parsing: Suche nach verschiedenen möglichen Keys
+    possible_keys = ["book_data", "book", "book_identification", "data"]
+    book_data_dict = None
+    
+    if isinstance(result_json, dict):
+        # 1. Check for nested keys
+        for key in possible_keys:
+            if key in result_json:
+                book_data_dict = result_json[key]
+                logger.info(f"✅ Found book data using key: '{key}'")
+                break
+        
+        # 2. Check root-level structure (flat JSON)
+        if not book_data_dict:
+            # Prüfe auf 'metadata' key, den Gemini oft bei grounding nutzt
+            if "metadata" in result_json and isinstance(result_json["metadata"], dict):
+                # Flatten: Merge metadata into root or use as base
+                logger.info("✅ Found 'metadata' key - attempting to restructure for BookData")
+                book_data_dict = result_json["metadata"]
+                # Kopiere Top-Level Felder wie 'confidence_score' in das book_data_dict
+                for k, v in result_json.items():
+                    if k != "metadata" and k not in book_data_dict:
+                        book_data_dict[k] = v
+            
+            # Prüfe ob Root selbst schon BookData ist (title/authors/isbn)
+            elif "title" in result_json or "isbn" in result_json or "authors" in result_json:
+                 book_data_dict = result_json
+                 logger.info("✅ Using root JSON as book data (structure matches)")
+    
+    logger.info(f"🔍 Extracted book_data from result_json: {book_data_dict is not None}")
+    
+    if book_data_dict and isinstance(book_data_dict, dict):
+        logger.info(f"📚 book_data keys: {list(book_data_dict.keys())}")
+        if "metadata" not in book_data_dict:
+            book_data_dict["metadata"] = {}
+        book_data_dict["metadata"]["raw_gemini_response"] = result_json
+        try:
+            book_data = BookData(**book_data_dict)
+            logger.info(f"✅ BookData successfully created with title: {book_data.title}")
+        except Exception as ve:
+            logger.error(f"❌ BookData Validation Error: {ve}", exc_info=True)
+    else:
+        logger.warning(f"⚠️ No valid book_data in result_json!")
+        if isinstance(result_json, dict):
+            logger.warning(f"⚠️ result_json keys: {list(result_json.keys())}")
+    
+    # Der Erfolg hängt davon ab, ob wir Buchdaten extrahieren konnten
+    ingestion_success = book_data is not None
+
+    # --- CONFIDENCE EXTRACTION FIX ---
+    confidence = 0.0
+    if isinstance(result_json, dict):
+        # 1. Versuche Top-Level Keys
+        if "confidence" in result_json:
+            confidence = float(result_json["confidence"])
+        elif "confidence_score" in result_json:
+            confidence = float(result_json["confidence_score"])
+        # 2. Versuche im book_data_dict
+        elif book_data_dict and isinstance(book_data_dict, dict):
+            if "confidence" in book_data_dict:
+                confidence = float(book_data_dict["confidence"])
+            elif "confidence_score" in book_data_dict:
+                confidence = float(book_data_dict["confidence_score"])
+        
+        # Sanity Check
+        if confidence > 1.0: # Manchmal kommt 95 statt 0.95
+             confidence = confidence / 100.0
+    
+    logger.info(f"📊 Extracted Confidence: {confidence}")
+    # -------------------------------
+    
+    # Result erstellen
+    # WICHTIG: Nutze model_construct oder stelle sicher, dass BookData erkannt wird
+    result = BookIngestionResult(
+        success=ingestion_success,
+        book_data=book_data,
+        confidence=confidence,
+        sources_used=result_json.get("sources_used", []) if isinstance(result_json, dict) else [],
+        processing_time_ms=processing_time_ms,
+        grounding_metadata=grounding_metadata,
+        image_fetch_timings=image_fetch_timings or [],
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+    
+    logger.info(f"🎯 BookIngestionResult created - success: {result.success}, has_book_data: {result.book_data is not None}")
+    
+    return result
+
+
+def parse_ingestion_response(
+    response: Any,
+    processing_time_ms: float,
+    image_fetch_timings: Optional[List[ImageFetchTiming]] = None,
+) -> BookIngestionResult:
+    """
+    Parst eine Gemini Response zu einem BookIngestionResult.
+    
+    Gemeinsamer Parsing-Pfad für Online-Calls und Batch-Prediction Outputs.
+    
+    Raises:
+        json.JSONDecodeError: Wenn die Antwort kein valides JSON enthält
+    """
+    logger.info("🔍 Parsing: Extrahiere Text aus Response...")
+    result_json = parse_response_json(extract_response_text(response))
+    grounding_metadata = extract_grounding_metadata(response)
+    return build_ingestion_result(result_json, grounding_metadata, processing_time_ms, image_fetch_timings)
+
+
+def build_ingestion_error(request: BookIngestionRequest, e: Exception) -> IngestionError:
+    """Klassifiziert eine Exception (shared.llm.resilience) als (evtl. retry-fähigen) IngestionError."""
+    decision = classify_error(e)
+    
+    return IngestionError(
+        error_type=type(e).__name__,
+        error_message=str(e),
+        book_id=request.book_id,
+        user_id=request.user_id,
+        retry_possible=decision.retryable,
+        gemini_error_code=str(decision.status_code or getattr(e, 'code', '') or ''),
+        retry_after_seconds=decision.retry_after,
+        image_count=len(request.image_urls),
+    )
+
+
+# ============================================================================
+# BARCODE / ISBN FAST PATH
+# ============================================================================
+
+def barcode_isbn_from_timings(image_fetch_timings: List[ImageFetchTiming]) -> Optional[str]:
+    """Erste gültige ISBN-13 aus den beim Laden erkannten Barcodes."""
+    return isbn_from_barcodes(code for timing in image_fetch_timings for code in timing.barcodes)
+
+
+def same_isbn(book_data: Optional[BookData], isbn_13: str) -> bool:
+    """Ob die ISBN eines Ergebnisses (ISBN-13 oder -10) der gegebenen ISBN-13 entspricht."""
+    if book_data is None:
+        return False
+    return normalize_isbn(book_data.isbn_13 or book_data.isbn_10) == isbn_13
+
+
+def build_barcode_hint(isbn_13: str) -> str:
+    """Prompt-Zusatz, wenn die ISBN bereits lokal per Barcode erkannt wurde."""
+    return (
+        f"\n\nHINWEIS: Auf den Bildern wurde per Barcode-Scan die ISBN {isbn_13} erkannt "
+        "(Prüfziffer valide). Nutze sie als gesicherten Ausgangspunkt für die Identifikation "
+        "und gib sie als isbn_13 zurück."
+    )
+
+
+async def find_catalog_result(
+    isbn_13: str,
+    processing_time_ms: float,
+    image_fetch_timings: Optional[List[ImageFetchTiming]] = None,
+) -> Optional[BookIngestionResult]:
+    """Baut ein BookIngestionResult aus einem lokalen Katalog-Datensatz (oder None)."""
+    catalog = get_isbn_catalog()
+    # get() liest evtl. synchron aus Firestore
+    entry = await asyncio.to_thread(catalog.get, isbn_13)
+    if entry is None:
+        return None
+    
+    logger.info(f"⚡ ISBN {isbn_13} im lokalen Katalog gefunden - überspringe Gemini Call (hit rate {catalog.hit_rate:.1%})")
+    return BookIngestionResult(
+        success=True,
+        book_data=entry.book_data.model_copy(deep=True),
+        confidence=entry.confidence,
+        sources_used=list(entry.sources_used),
+        processing_time_ms=processing_time_ms,
+        grounding_metadata=entry.grounding_metadata.model_copy(deep=True),
+        barcode_isbn=isbn_13,
+        image_fetch_timings=image_fetch_timings or [],
+        model_tier=TIER_LOCAL,
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+
+
+def apply_barcode_isbn(result: BookIngestionResult, isbn_13: str) -> None:
+    """Der Barcode auf dem Exemplar ist verlässlicher als eine vom Modell gelesene/gesuchte ISBN."""
+    result.barcode_isbn = isbn_13
+    if result.book_data is None:
+        return
+    model_isbn = normalize_isbn(result.book_data.isbn_13 or result.book_data.isbn_10)
+    if model_isbn and model_isbn != isbn_13:
+        logger.warning(f"⚠️ Modell-ISBN {model_isbn} weicht vom Barcode {isbn_13} ab - nutze Barcode")
+    result.book_data.isbn_13 = isbn_13
+
+
+async def register_catalog_entry(
+    request: BookIngestionRequest,
+    result: BookIngestionResult,
+    config: IngestionConfig,
+) -> None:
+    """Nimmt ein sicher identifiziertes Buch mit gültiger ISBN in den lokalen Katalog auf."""
+    if not result.success or result.book_data is None or result.confidence < config.confidence_threshold_ingested:
+        return
+    isbn_13 = normalize_isbn(result.book_data.isbn_13 or result.book_data.isbn_10)
+    if isbn_13 is None:
+        return
+    entry = IsbnCatalogEntry(
+        isbn_13=isbn_13,
+        book_data=result.book_data,
+        confidence=result.confidence,
+        sources_used=result.sources_used,
+        grounding_metadata=result.grounding_metadata,
+        source_book_id=request.book_id,
+    )
+    await asyncio.to_thread(get_isbn_catalog().put, entry)
+
+
+# ============================================================================
+# DUPLICATE DETECTION
+# ============================================================================
+
+async def compute_cover_hashes(image_parts: List[types.Part]) -> Optional[ImageHashes]:
+    """
+    Berechnet die Perceptual Hashes des Covers (erstes Bild mit geladenen Bytes).
+    
+    Bilder, die nur als URI referenziert werden (gs:// ohne Download), können
+    nicht gehasht werden.
+    """
+    for part in image_parts:
+        inline_data = getattr(part, "inline_data", None)
+        if inline_data is not None and inline_data.data:
+            return await asyncio.to_thread(compute_image_hashes, inline_data.data)
+    return None
+
+
+def find_duplicate_result(
+    request: BookIngestionRequest,
+    cover_hashes: ImageHashes,
+    config: IngestionConfig,
+    processing_time_ms: float,
+    image_fetch_timings: Optional[List[ImageFetchTiming]] = None,
+) -> Optional[BookIngestionResult]:
+    """Baut ein BookIngestionResult aus einem Index-Treffer (oder None ohne Treffer)."""
+    index = get_duplicate_index(config.duplicate_max_distance)
+    match = index.find(
+        cover_hashes,
+        user_id=request.user_id,
+        include_global=config.duplicate_global_scope,
+        exclude_book_id=request.book_id,
+    )
+    stats = index.stats
+    if match is None:
+        logger.info(f"📇 Duplicate lookup miss for {request.book_id} (hit rate {stats.hit_rate:.1%} over {stats.lookups})")
+        return None
+    
+    entry = match.entry
+    logger.info(
+        f"♻️ Book {request.book_id} matches {entry.book_id} ({match.scope}, distance {match.distance}) - "
+        f"reusing previous identification (hit rate {stats.hit_rate:.1%} over {stats.lookups})"
+    )
+    return BookIngestionResult(
+        success=True,
+        book_data=entry.book_data.model_copy(deep=True),
+        confidence=entry.confidence,
+        sources_used=list(entry.sources_used),
+        processing_time_ms=processing_time_ms,
+        grounding_metadata=entry.grounding_metadata.model_copy(deep=True),
+        duplicate_of=entry.book_id,
+        image_fetch_timings=image_fetch_timings or [],
+        model_tier=TIER_LOCAL,
+        timestamp=datetime.datetime.now(datetime.timezone.utc)
+    )
+
+
+async def register_duplicate_candidate(
+    request: BookIngestionRequest,
+    cover_hashes: ImageHashes,
+    result: BookIngestionResult,
+    config: IngestionConfig,
+) -> None:
+    """Nimmt ein sicher identifiziertes Buch in den Index auf (unsichere Ergebnisse nicht)."""
+    if not result.success or result.book_data is None or result.confidence < config.confidence_threshold_ingested:
+        return
+    index = get_duplicate_index(config.duplicate_max_distance)
+    entry = index.make_entry(
+        request.user_id,
+        request.book_id,
+        cover_hashes,
+        book_data=result.book_data,
+        confidence=result.confidence,
+        sources_used=result.sources_used,
+        grounding_metadata=result.grounding_metadata,
+    )
+    # add() persistiert evtl. synchron (Firestore), daher im Thread
+    await asyncio.to_thread(index.add, entry)
+
+
+async def register_identification(
+    request: BookIngestionRequest,
+    result: BookIngestionResult,
+    config: IngestionConfig,
+    image_parts: Optional[List[types.Part]],
+) -> None:
+    """Registriert ein nachträglich angenommenes Ergebnis (Duplikat-Index nur mit geladenen Bildern)."""
+    if config.enable_duplicate_detection and image_parts:
+        cover_hashes = await compute_cover_hashes(image_parts)
+        if cover_hashes is not None:
+            await register_duplicate_candidate(request, cover_hashes, result, config)
+    await register_catalog_entry(request, result, config)
+
+
+# ============================================================================
+# STREAMING / FRÜHE IDENTIFIKATION
+# ============================================================================
+
+# Callback für frühe Identifikationen (sync oder async)
+EarlyIdentificationCallback = Callable[[EarlyIdentification], Union[None, Awaitable[None]]]
+
+# Felder, die im Stream beobachtet werden (Reihenfolge im Schema: title, authors, ..., isbn_13, isbn_10)
+STREAM_WATCH_KEYS = ("title", "isbn_13", "isbn_10", "publisher", "edition")
+STREAM_WATCH_LIST_KEYS = ("authors",)
+
+
+class EarlyIdentificationNotifier:
+    """
+    Feuert pro Ingestion höchstens EIN frühes Identifikations-Event.
+    
+    Der Callback läuft als eigener Task, damit er den Stream nicht ausbremst;
+    Fehler im Callback werden geloggt, brechen die Ingestion aber nie ab.
+    """
+    
+    def __init__(
+        self,
+        request: BookIngestionRequest,
+        callback: Optional[EarlyIdentificationCallback],
+        start_time: float,
+    ):
+        self.request = request
+        self.callback = callback
+        self.start_time = start_time
+        self.event: Optional[EarlyIdentification] = None
+        self._tasks: List[asyncio.Task] = []
+    
+    @property
+    def fired(self) -> bool:
+        return self.event is not None
+    
+    def fire(
+        self,
+        source: str,
+        isbn: Optional[str] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        publisher: Optional[str] = None,
+        edition: Optional[str] = None,
+    ) -> None:
+        """Feuert das Event (nur beim ersten Aufruf)."""
+        if self.callback is None or self.fired:
+            return
+        self.event = EarlyIdentification(
+            book_id=self.request.book_id,
+            user_id=self.request.user_id,
+            isbn=isbn,
+            title=title,
+            author=author,
+            publisher=publisher,
+            edition=edition,
+            source=source,
+            elapsed_ms=(time.time() - self.start_time) * 1000,
+        )
+        logger.info(
+            f"⚡ Early identification for {self.request.book_id} after {self.event.elapsed_ms:.0f}ms "
+            f"({source}): isbn={isbn}, title={title!r}, author={author!r}"
+        )
+        self._tasks.append(asyncio.ensure_future(self._run_callback(self.event)))
+    
+    def observe(self, fields: dict) -> None:
+        """Prüft die bisher im Stream erkannten Felder: valide ISBN oder Titel + erster Autor."""
+        if self.callback is None or self.fired:
+            return
+        isbn = normalize_isbn(fields.get("isbn_13")) or normalize_isbn(fields.get("isbn_10"))
+        title = fields.get("title")
+        author = fields.get("authors")
+        if isbn or (title and author):
+            self.fire(
+                "stream", isbn=isbn, title=title, author=author,
+                publisher=fields.get("publisher"), edition=fields.get("edition"),
+            )
+    
+    async def _run_callback(self, event: EarlyIdentification) -> None:
+        try:
+            outcome = self.callback(event)
+            if inspect.isawaitable(outcome):
+                await outcome
+        except Exception as e:
+            logger.warning(f"⚠️ Early identification callback failed for {event.book_id}: {e}", exc_info=True)
+    
+    async def drain(self) -> None:
+        """Wartet auf laufende Callbacks (z.B. Pub/Sub Publish)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+
+
+def early_identification_covers(event: EarlyIdentification, book_data: Optional[BookData]) -> bool:
+    """
+    Ob das finale Ergebnis der Preisrecherche nichts Neues liefert.
+
+    Nur dann reicht der frühe Job: jede ISBN, jeder Titel, Autor, Verlag oder
+    jede Auflage, die erst im finalen Ergebnis steht (oder abweicht), ändert
+    Cache-Schlüssel bzw. Prompt der Preisrecherche.
+    """
+    if book_data is None:
+        return True
+    final_isbn = normalize_isbn(book_data.isbn_13 or book_data.isbn_10) or book_data.isbn_13 or book_data.isbn_10
+    if final_isbn and final_isbn != event.isbn:
+        return False
+
+    def same(early: Optional[str], final: Optional[str]) -> bool:
+        return not final or (early or "").strip().casefold() == final.strip().casefold()
+
+    final_author = book_data.authors[0] if book_data.authors else None
+    return all((
+        same(event.title, book_data.title),
+        same(event.author, final_author),
+        same(event.publisher, book_data.publisher),
+        same(event.edition, book_data.edition),
+    ))
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text eines Stream-Chunks (nur Text-Parts, ohne Warnungen von .text bei gemischten Parts)."""
+    candidates = getattr(chunk, "candidates", None)
+    if candidates:
+        content = getattr(candidates[0], "content", None)
+        parts = getattr(content, "parts", None) or []
+        return "".join(part.text for part in parts if getattr(part, "text", None) and not getattr(part, "thought", False))
+    return getattr(chunk, "text", None) or ""
+
+
+async def generate_streamed(
+    local_client: Any,
+    config: IngestionConfig,
+    contents: List[Any],
+    generate_content_config: types.GenerateContentConfig,
+    notifier: EarlyIdentificationNotifier,
+) -> types.GenerateContentResponse:
+    """
+    Führt den Gemini Call gestreamt durch und beobachtet dabei ISBN, Titel und Autor.
+    
+    Returns:
+        Aus allen Chunks zusammengesetzte Response (voller Text, letztes Grounding,
+        Usage Metadata des letzten Chunks) - kompatibel zu parse_ingestion_response()
+    """
+    watcher = StreamingFieldWatcher(STREAM_WATCH_KEYS, list_keys=STREAM_WATCH_LIST_KEYS)
+    last_chunk = None
+    grounding_metadata = None
+    finish_reason = None
+    
+    stream = await local_client.aio.models.generate_content_stream(
+        model=config.model,
+        contents=contents,
+        config=generate_content_config,
+    )
+    async for chunk in stream:
+        last_chunk = chunk
+        candidates = getattr(chunk, "candidates", None)
+        if candidates:
+            grounding_metadata = getattr(candidates[0], "grounding_metadata", None) or grounding_metadata
+            finish_reason = getattr(candidates[0], "finish_reason", None) or finish_reason
+        if watcher.feed(_chunk_text(chunk)):
+            notifier.observe(watcher.fields)
+    
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=watcher.text)]),
+            finish_reason=finish_reason,
+            grounding_metadata=grounding_metadata,
+        )],
+        usage_metadata=getattr(last_chunk, "usage_metadata", None),
+    )
+
+
 # ============================================================================
 # MAIN INGESTION FUNCTION
 # ============================================================================
@@ -236,15 +1142,21 @@ async def ingest_book_with_gemini(
     request: BookIngestionRequest,
     config: Optional[IngestionConfig] = None,
     system_instructions: Optional[str] = None,
-    task_prompt: Optional[str] = None
+    task_prompt: Optional[str] = None,
+    on_early_identification: Optional[EarlyIdentificationCallback] = None,
+    images: Optional[Tuple[List[types.Part], List[ImageFetchTiming]]] = None,
+    register_results: bool = True,
 ) -> BookIngestionResult:
     """
     HAUPTFUNKTION: Führt die komplette Ingestion mit einem Gemini-Call durch.
     
     Pipeline:
     1. Initialisiere Gemini Client (falls noch nicht geschehen)
-    2. Lade und bereite Bilder vor
-    3. Führe EINEN Gemini API Call mit Google Search Grounding durch (wenn aktiviert)
+    2. Lade und bereite Bilder parallel vor
+       (Barcode-ISBN im lokalen Katalog oder bekanntes Cover laut Perceptual-Hash
+       Index -> vorheriges Ergebnis, kein Gemini Call)
+    3. Führe EINEN Gemini API Call mit Google Search Grounding durch (wenn aktiviert),
+       bei config.enable_streaming gestreamt mit frühem Identifikations-Event
     4. Parse JSON Response
     5. Extrahiere Grounding Metadata
     6. Konstruiere und validiere Result
@@ -254,6 +1166,11 @@ async def ingest_book_with_gemini(
         config: Optional IngestionConfig (nutzt DEFAULT_CONFIG wenn None)
         system_instructions: Optional System Instructions (nutzt SYSTEM_INSTRUCTIONS wenn None)
         task_prompt: Optional Task Prompt (nutzt TASK_PROMPT_TEMPLATE wenn None)
+        on_early_identification: Optional Callback (sync/async), der höchstens einmal
+            aufgerufen wird, sobald Barcode-ISBN bzw. ISBN oder Titel + Autor im Stream feststehen
+        images: Optional bereits geladene Bilder (Parts, Timings), z.B. aus einer vorherigen Kaskadenstufe
+        register_results: Ob sichere Ergebnisse in Duplikat-Index und ISBN-Katalog aufgenommen werden
+            (die schnelle Kaskadenstufe registriert erst nach der Annahme)
     
     Returns:
         BookIngestionResult mit allen Metadaten
@@ -265,294 +1182,141 @@ async def ingest_book_with_gemini(
     
     if config is None:
         config = DEFAULT_CONFIG
-    if system_instructions is None:
-        system_instructions = SYSTEM_INSTRUCTIONS
-    if task_prompt is None:
-        task_prompt = TASK_PROMPT_TEMPLATE
-    
-    # Force explicit JSON request in prompt if grounding is enabled
-    # Since we can't use response_mime_type="application/json" with tools
-    if config.enable_grounding:
-        task_prompt += "\n\nWICHTIG: Antworte AUSSCHLIESSLICH mit einem validen JSON-Objekt. Kein Markdown, kein erklärender Text davor oder danach. Nur das rohe JSON."
+    prompt_prefix = build_prompt_prefix(config, system_instructions, task_prompt)
+    task_prompt = prompt_prefix.contents[0]
+    # Buchspezifische Hinweise (z.B. Barcode-ISBN) - gehören nicht in den gecachten Präfix
+    prompt_hints: List[str] = []
+    notifier = EarlyIdentificationNotifier(request, on_early_identification, start_time)
     
     try:
         # 1. Bilder vorbereiten
         logger.info(
             f"Processing book {request.book_id}: Loading {len(request.image_urls)} images"
         )
-        image_parts = prepare_images(request.image_urls)
-        
-        # 3. Model konfigurieren
-        model_name = config.model
-        grounding_enabled = config.enable_grounding
-        logger.info(f"Generation Config: Model={model_name}, SearchGrounding={grounding_enabled}")
+        if images is None:
+            images = await prepare_images_async(request.image_urls, config)
+        image_parts, image_fetch_timings = images
         
-        # 4. Generation Config
-        # WICHTIG: Controlled Generation (response_schema) und Google Search Grounding 
-        # können momentan nicht gleichzeitig genutzt werden.
-        if grounding_enabled:
-            logger.info("⚠️ Grounding is enabled: Disabling response_schema/mime_type to avoid API conflict.")
-            generate_content_config = types.GenerateContentConfig(
-                temperature=config.temperature,
-                max_output_tokens=config.max_output_tokens,
-                tools=[types.Tool(google_search=types.GoogleSearch())],
-                system_instruction=system_instructions,
-                safety_settings=[
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                ]
+        # 2a. Barcode-Fast-Path: bekannte ISBN -> lokaler Datensatz, sonst ISBN als Hinweis in den Prompt
+        barcode_isbn = barcode_isbn_from_timings(image_fetch_timings) if config.enable_barcode_scan else None
+        if barcode_isbn:
+            logger.info(f"🏷️ Barcode ISBN erkannt: {barcode_isbn}")
+            cached = await find_catalog_result(
+                barcode_isbn,
+                processing_time_ms=(time.time() - start_time) * 1000,
+                image_fetch_timings=image_fetch_timings,
             )
-        else:
-            generate_content_config = types.GenerateContentConfig(
-                temperature=config.temperature,
-                max_output_tokens=config.max_output_tokens,
-                response_mime_type="application/json",
-                response_schema=JSON_RESPONSE_SCHEMA,
-                system_instruction=system_instructions,
-                safety_settings=[
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                    types.SafetySetting(
-                        category=types.HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY,
-                        threshold=types.HarmBlockThreshold.BLOCK_NONE,
-                    ),
-                ]
-            )
-        
-        # 6. Content zusammenstellen (Bilder + Prompt)
-        contents = image_parts + [task_prompt]
-        
-        # 7. API Call durchführen
-        logger.debug(f"Making Google GenAI API call with {len(image_parts)} images")
-        
-        try:
-            # Stellen Sie sicher, dass client initialisiert ist (Fallback)
-            local_client = client
-            if local_client is None:
-                 raise ValueError("Google GenAI Client is not initialized.")
-
-            response = local_client.models.generate_content(
-                model=config.model,
-                contents=contents,
-                config=generate_content_config
-            )
-            logger.info(f"📥 FULL GEMINI RESPONSE TYPE: {type(response)}")
-            
-        except Exception as e:
-            logger.error(f"❌ API CALL FEHLER: {e}", exc_info=True)
-            raise e
+            if cached is not None:
+                return cached
+            prompt_hints.append(build_barcode_hint(barcode_isbn))
+            notifier.fire("barcode", isbn=barcode_isbn)
         
-        # 7. Response parsen (Logik aus main.py übernommen und verbessert)
-        logger.info("🔍 Parsing: Extrahiere Text aus Response...")
-        
-        if hasattr(response, 'candidates') and response.candidates:
-            cand = response.candidates[0]
-            logger.info(f"📊 Candidate 0 Finish Reason: {getattr(cand, 'finish_reason', 'N/A')}")
-            
-            # Log Candidate-Struktur
-            if hasattr(cand, 'content'):
-                logger.info(f"📊 Candidate has content: {hasattr(cand.content, 'parts')}")
-                if hasattr(cand.content, 'parts') and cand.content.parts:
-                    logger.info(f"📊 Number of parts: {len(cand.content.parts)}")
-
-        result_text = ""
-        try:
-            result_text = response.text
-        except Exception as e:
-            if hasattr(response, 'candidates') and response.candidates and \
-               response.candidates[0].content and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        result_text = part.text
-                        break
+        # 2b. Duplikat-Check: bekanntes Cover -> vorheriges Ergebnis wiederverwenden
+        cover_hashes = None
+        if config.enable_duplicate_detection:
+            cover_hashes = await compute_cover_hashes(image_parts)
+            if cover_hashes is not None:
+                duplicate = find_duplicate_result(
+                    request,
+                    cover_hashes,
+                    config,
+                    processing_time_ms=(time.time() - start_time) * 1000,
+                    image_fetch_timings=image_fetch_timings,
+                )
+                # Die Barcode-ISBN dieses Exemplars schlägt das Cover: Ausgaben teilen sich oft ein Cover
+                if duplicate is not None and barcode_isbn and not same_isbn(duplicate.book_data, barcode_isbn):
+                    logger.info(
+                        f"🏷️ Duplicate {duplicate.duplicate_of} hat eine andere ISBN als der Barcode "
+                        f"({barcode_isbn}) - Identifikation durch das Modell"
+                    )
+                    duplicate = None
+                if duplicate is not None:
+                    return duplicate
         
-        if not result_text or not result_text.strip():
-            logger.error("❌ Keine Text-Antwort von Gemini erhalten")
-            # Fallback JSON um Crash zu verhindern
-            raise json.JSONDecodeError("Leere Antwort von Gemini", "", 0)
-
-        logger.info(f"📝 Result Text (first 500 chars): {result_text[:500]}")
+        # 3. Model & Generation Config
+        logger.info(f"Generation Config: Model={config.model}, SearchGrounding={config.enable_grounding}")
+        generate_content_config = build_generate_content_config(config, system_instructions)
         
-        # JSON Parsing: Robustere Logik für "Chatty" Models
-        try:
-            result_json = None
-            
-            # Strategie 1: Suche nach Markdown Code-Blöcken (z.B. ```json ... ```)
-            # Wir nehmen den LETZTEN Block, da Modelle oft erst ein Beispiel zeigen und dann das Ergebnis.
-            # Regex verbessert: Erlaubt optional json Tag, ignoriert Whitespace, non-greedy match für Inhalt
-            code_block_pattern = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
-            matches = code_block_pattern.findall(result_text)
-            
-            if matches:
-                logger.info(f"🔍 Found {len(matches)} JSON code blocks.")
-                # Versuche Blocks von hinten nach vorne zu parsen
-                for json_str in reversed(matches):
-                    try:
-                        result_json = json.loads(json_str)
-                        logger.info("✅ Valid JSON found in markdown code block (using last valid block)")
-                        break
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Strategie 2: Fallback - Suche alle JSON-Objekte im Rohtext
-            if result_json is None:
-                logger.info("⚠️ No valid code blocks found, scanning raw text for JSON objects...")
-                decoder = json.JSONDecoder()
-                idx = 0
-                candidates = []
-                
-                while idx < len(result_text):
-                    # Finde nächstes '{'
-                    start_idx = result_text.find('{', idx)
-                    if start_idx == -1:
-                        break
-                        
-                    try:
-                        obj, end_idx = decoder.raw_decode(result_text, start_idx)
-                        candidates.append(obj)
-                        idx = end_idx
-                    except json.JSONDecodeError:
-                        idx = start_idx + 1
-                
-                if candidates:
-                    logger.info(f"🔍 Found {len(candidates)} JSON candidates in raw text.")
-                    # Wir nehmen das letzte Objekt, da dies am wahrscheinlichsten das finale Ergebnis ist
-                    result_json = candidates[-1]
-                    logger.info("✅ Selected last valid JSON candidate from raw text")
-
-            if result_json is None:
-                raise json.JSONDecodeError("No valid JSON object found in response", result_text, 0)
-                
-            logger.info(f"📋 JSON Top-level keys: {list(result_json.keys())}")
-
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON DECODE ERROR: {e}")
-            logger.error(f"❌ Problematischer Text: {result_text}")
-            raise e
+        # Region pro Versuch wählen: gedrosselte Regionen rücken nach hinten, der nächste Retry wechselt
+        region = None if client is not None else get_region_pool().candidates(STAGE_INGESTION)[0]
+        local_client = get_client(location=region)
         
-        # 8. Grounding Metadata extrahieren
-        grounding_metadata = extract_grounding_metadata(response)
+        # 4. Content zusammenstellen: statischer Präfix (Context Cache) + Bilder + Hinweise
+        cache_name = None
+        uncached_contents = image_parts + [task_prompt + "".join(prompt_hints)]
+        uncached_config = generate_content_config
+        if config.enable_prompt_cache:
+            contents, generate_content_config, cache_name = await get_prompt_cache().prepare_request(
+                local_client,
+                prompt_prefix,
+                image_parts + [hint.strip() for hint in prompt_hints],
+                generate_content_config,
+            )
+        else:
+            contents = uncached_contents
         
-        # 9. Result konstruieren
-        book_data = None
-        # Flexibles Parsing: Suche nach verschiedenen möglichen Keys
-        possible_keys = ["book_data", "book", "book_identification", "data"]
-        book_data_dict = None
+        # 5. API Call durchführen
+        logger.debug(f"Making Google GenAI API call with {len(image_parts)} images (context cache: {cache_name})")
         
-        if isinstance(result_json, dict):
-            # 1. Check for nested keys
-            for key in possible_keys:
-                if key in result_json:
-                    book_data_dict = result_json[key]
-                    logger.info(f"✅ Found book data using key: '{key}'")
-                    break
-            
-            # 2. Check root-level structure (flat JSON)
-            if not book_data_dict:
-                # Prüfe auf 'metadata' key, den Gemini oft bei grounding nutzt
-                if "metadata" in result_json and isinstance(result_json["metadata"], dict):
-                    # Flatten: Merge metadata into root or use as base
-                    logger.info("✅ Found 'metadata' key - attempting to restructure for BookData")
-                    book_data_dict = result_json["metadata"]
-                    # Kopiere Top-Level Felder wie 'confidence_score' in das book_data_dict
-                    for k, v in result_json.items():
-                        if k != "metadata" and k not in book_data_dict:
-                            book_data_dict[k] = v
-                
-                # Prüfe ob Root selbst schon BookData ist (title/authors/isbn)
-                elif "title" in result_json or "isbn" in result_json or "authors" in result_json:
-                     book_data_dict = result_json
-                     logger.info("✅ Using root JSON as book data (structure matches)")
+        async def generate(call_client: Any, call_contents: List[Any], call_config: types.GenerateContentConfig) -> Any:
+            # Async Surface: blockiert den Event Loop nicht, mehrere Bücher können parallel laufen
+            if config.enable_streaming:
+                return await generate_streamed(call_client, config, call_contents, call_config, notifier)
+            return await call_client.aio.models.generate_content(
+                model=config.model,
+                contents=call_contents,
+                config=call_config
+            )
         
-        logger.info(f"🔍 Extracted book_data from result_json: {book_data_dict is not None}")
+        hedge = None
+        if config.enable_hedging and config.hedge_region and client is None:
+            # Context Caches sind regional: die Zusatzanfrage in der zweiten Region geht ohne Cache
+            hedge_client = get_client(location=config.hedge_region)
+            hedge = lambda: generate(hedge_client, uncached_contents, uncached_config)
+        hedger = get_hedger(f"gemini_ingestion:{config.model}", build_hedge_policy(config))
         
-        if book_data_dict and isinstance(book_data_dict, dict):
-            logger.info(f"📚 book_data keys: {list(book_data_dict.keys())}")
-            if "metadata" not in book_data_dict:
-                book_data_dict["metadata"] = {}
-            book_data_dict["metadata"]["raw_gemini_response"] = result_json
+        # Circuit Breaker pro Modell: bei anhaltenden 429/503 sofort scheitern statt Vertex weiter zu belasten.
+        # guard() verbucht Erfolg/Fehler und gibt den Probe-Call auch bei Abbruch wieder frei
+        call_start = time.perf_counter()
+        with get_circuit_breaker(config.model).guard():
             try:
-                book_data = BookData(**book_data_dict)
-                logger.info(f"✅ BookData successfully created with title: {book_data.title}")
-            except Exception as ve:
-                logger.error(f"❌ BookData Validation Error: {ve}", exc_info=True)
-        else:
-            logger.warning(f"⚠️ No valid book_data in result_json!")
-            if isinstance(result_json, dict):
-                logger.warning(f"⚠️ result_json keys: {list(result_json.keys())}")
-        
-        processing_time = (time.time() - start_time) * 1000
-        
-        # Der Erfolg hängt davon ab, ob wir Buchdaten extrahieren konnten
-        ingestion_success = book_data is not None
-
-        # --- CONFIDENCE EXTRACTION FIX ---
-        confidence = 0.0
-        if isinstance(result_json, dict):
-            # 1. Versuche Top-Level Keys
-            if "confidence" in result_json:
-                confidence = float(result_json["confidence"])
-            elif "confidence_score" in result_json:
-                confidence = float(result_json["confidence_score"])
-            # 2. Versuche im book_data_dict
-            elif book_data_dict and isinstance(book_data_dict, dict):
-                if "confidence" in book_data_dict:
-                    confidence = float(book_data_dict["confidence"])
-                elif "confidence_score" in book_data_dict:
-                    confidence = float(book_data_dict["confidence_score"])
-            
-            # Sanity Check
-            if confidence > 1.0: # Manchmal kommt 95 statt 0.95
-                 confidence = confidence / 100.0
+                response = await hedger.call(
+                    lambda: generate(local_client, contents, generate_content_config),
+                    hedge=hedge,
+                )
+                logger.info(f"📥 FULL GEMINI RESPONSE TYPE: {type(response)}")
+                
+            except Exception as e:
+                logger.error(f"❌ API CALL FEHLER: {e}", exc_info=True)
+                if region:
+                    get_region_pool().record_failure(region, classify_error(e))
+                record_llm_call("gemini_ingestion", config.model, None, (time.perf_counter() - call_start) * 1000, success=False)
+                if cache_name and is_missing_cache_error(e):
+                    # Cache serverseitig weg: der nächste Versuch legt ihn neu an
+                    get_prompt_cache().invalidate(local_client, prompt_prefix)
+                raise e
         
-        logger.info(f"📊 Extracted Confidence: {confidence}")
-        # -------------------------------
+        call_ms = (time.perf_counter() - call_start) * 1000
+        if region:
+            get_region_pool().record_success(region, call_ms)
+        usage = record_llm_call("gemini_ingestion", config.model, response, call_ms)
+        if config.enable_prompt_cache:
+            get_prompt_cache().record_usage(prompt_prefix, response, cache_name, call_ms)
         
-        # Result erstellen
-        # WICHTIG: Nutze model_construct oder stelle sicher, dass BookData erkannt wird
-        result = BookIngestionResult(
-            success=ingestion_success,
-            book_data=book_data,
-            confidence=confidence,
-            sources_used=result_json.get("sources_used", []) if isinstance(result_json, dict) else [],
-            processing_time_ms=processing_time,
-            grounding_metadata=grounding_metadata,
-            timestamp=datetime.datetime.now(datetime.timezone.utc)
+        # 6. Response parsen und Result konstruieren
+        result = parse_ingestion_response(
+            response,
+            processing_time_ms=(time.time() - start_time) * 1000,
+            image_fetch_timings=image_fetch_timings,
         )
+        result.usage = usage
         
-        logger.info(f"🎯 BookIngestionResult created - success: {result.success}, has_book_data: {result.book_data is not None}")
+        if barcode_isbn:
+            apply_barcode_isbn(result, barcode_isbn)
+        if register_results:
+            if cover_hashes is not None:
+                await register_duplicate_candidate(request, cover_hashes, result, config)
+            await register_catalog_entry(request, result, config)
         
         return result
     
@@ -561,22 +1325,10 @@ async def ingest_book_with_gemini(
         
     except Exception as e:
         logger.error(f"Book {request.book_id}: Ingestion failed - {e}", exc_info=True)
-        
-        error_str = str(e).lower()
-        retry_possible = any(
-            keyword in error_str
-            for keyword in ["rate", "limit", "quota", "503", "429", "timeout", "unavailable", "exhausted"]
-        )
-        
-        raise IngestionException(IngestionError(
-            error_type=type(e).__name__,
-            error_message=str(e),
-            book_id=request.book_id,
-            user_id=request.user_id,
-            retry_possible=retry_possible,
-            gemini_error_code=str(getattr(e, 'code', '')),
-            image_count=len(request.image_urls),
-        ))
+        raise IngestionException(build_ingestion_error(request, e))
+    
+    finally:
+        await notifier.drain()
 
 
 # ============================================================================
@@ -587,16 +1339,19 @@ async def ingest_book_with_retry(
     request: BookIngestionRequest,
     config: Optional[IngestionConfig] = None,
     max_retries: Optional[int] = None,
+    on_early_identification: Optional[EarlyIdentificationCallback] = None,
 ) -> BookIngestionResult:
     """
     Wrapper mit automatischem Retry bei transienten Fehlern.
     
-    Nutzt exponential backoff für Retries.
+    Nutzt exponential backoff für Retries. Mit config.enable_cascade läuft
+    zuerst die schnelle Stufe der Modell-Kaskade (siehe cascade.py).
     
     Args:
         request: BookIngestionRequest
         config: Optional IngestionConfig
         max_retries: Optional maximale Anzahl Retries (überschreibt config)
+        on_early_identification: Optional Callback, über alle Versuche höchstens einmal aufgerufen
         
     Returns:
         BookIngestionResult
@@ -610,55 +1365,160 @@ async def ingest_book_with_retry(
     if max_retries is None:
         max_retries = config.retry_attempts
     
-    last_error = None
+    # Ein Retry (oder die Eskalation) soll kein zweites frühes Event auslösen
+    early_fired = False
     
-    for attempt in range(max_retries + 1):
-        try:
-            result = await ingest_book_with_gemini(request, config)
-            
-            if attempt > 0:
-                logger.info(
-                    f"Book {request.book_id}: Succeeded on retry attempt {attempt}"
-                )
-            
-            return result
+    def early_once(event: EarlyIdentification):
+        nonlocal early_fired
+        if early_fired:
+            return None
+        early_fired = True
+        return on_early_identification(event)
+    
+    callback = early_once if on_early_identification else None
+    start = time.perf_counter()
+    stats = get_cascade_stats()
+    
+    try:
+        if config.enable_cascade:
+            result = await ingest_book_with_cascade(request, config, max_retries, callback)
+        else:
+            result = await _ingest_with_retries(request, config, max_retries, callback)
+            result.model_tier = result.model_tier or TIER_FULL
+    except IngestionException:
+        stats.record_book(TIER_FULL, (time.perf_counter() - start) * 1000, STATUS_FAILED)
+        raise
+    
+    stats.record_book(
+        result.model_tier,
+        (time.perf_counter() - start) * 1000,
+        result.get_firestore_status(config.confidence_threshold_ingested),
+        cost_eur=result.usage.cost_eur if result.usage else 0.0,
+    )
+    return result
+
+
+async def ingest_book_with_cascade(
+    request: BookIngestionRequest,
+    config: IngestionConfig,
+    max_retries: int,
+    on_early_identification: Optional[EarlyIdentificationCallback] = None,
+) -> BookIngestionResult:
+    """
+    Modell-Kaskade: schneller Call ohne Grounding, bei Zweifel der konfigurierte Call.
+    
+    Die Bilder werden einmal geladen und von beiden Stufen genutzt. Die Usage
+    eines eskalierten Buchs enthält beide Calls.
+    
+    Args:
+        request: BookIngestionRequest
+        config: IngestionConfig mit enable_cascade
+        max_retries: Retries der Eskalationsstufe
+        on_early_identification: Optional Callback (höchstens einmal über beide Stufen)
         
-        except IngestionException as e:
-            last_error = e.error if hasattr(e, 'error') else IngestionError(
-                error_type="UNKNOWN",
-                error_message=str(e),
-                book_id=request.book_id,
-                user_id=request.user_id,
-                retry_possible=False
-            )
-            
-            if not last_error.retry_possible:
-                logger.error(
-                    f"Book {request.book_id}: Permanent error, no retry: {last_error.error_message}"
-                )
-                raise e
-            
-            if attempt >= max_retries:
-                logger.error(
-                    f"Book {request.book_id}: Max retries ({max_retries}) reached"
-                )
-                raise
-            
-            delay = config.retry_delay_seconds * (config.retry_exponential_base ** attempt)
-            logger.warning(
-                f"Book {request.book_id}: Transient error (attempt {attempt + 1}/{max_retries + 1}), "
-                f"retrying in {delay:.1f}s: {last_error.error_message}"
-            )
-            
-            await asyncio.sleep(delay)
+    Returns:
+        BookIngestionResult mit model_tier (local, fast oder full)
+        
+    Raises:
+        IngestionException: Wenn auch die Eskalationsstufe scheitert
+    """
+    stats = get_cascade_stats()
+    fast_config = fast_tier_config(config)
     
-    if last_error:
-        raise IngestionException(last_error)
-    else:
-        raise IngestionException(IngestionError(
-            error_type="UNKNOWN_ERROR",
-            error_message="Max retries reached without clear error",
-            book_id=request.book_id,
-            user_id=request.user_id,
-            retry_possible=False,
-        ))
+    try:
+        images = await prepare_images_async(request.image_urls, config)
+    except Exception as e:
+        # Die Stufen laden selbst (mit Retries der Eskalationsstufe)
+        logger.warning(f"Book {request.book_id}: Image preload for cascade failed - {e}")
+        images = None
+    
+    fast_start = time.perf_counter()
+    fast_result: Optional[BookIngestionResult] = None
+    try:
+        fast_result = await ingest_book_with_gemini(
+            request,
+            fast_config,
+            on_early_identification=on_early_identification,
+            images=images,
+            register_results=False,
+        )
+        rejection = None if fast_result.model_tier == TIER_LOCAL else fast_result_rejection(fast_result, config)
+    except IngestionException as e:
+        rejection = f"error: {e.error.error_message if hasattr(e, 'error') else e}"
+    fast_ms = (time.perf_counter() - fast_start) * 1000
+    fast_usage = fast_result.usage if fast_result else None
+    
+    if fast_result is not None and rejection is None:
+        tier = fast_result.model_tier or TIER_FAST
+        fast_result.model_tier = tier
+        stats.record_attempt(tier, fast_ms, accepted=True, cost_eur=fast_usage.cost_eur if fast_usage else 0.0)
+        if tier == TIER_FAST:
+            await register_identification(request, fast_result, config, images[0] if images else None)
+        logger.info(f"🪜 Book {request.book_id}: accepted {tier} tier ({fast_config.model}) after {fast_ms:.0f}ms")
+        return fast_result
+    
+    stats.record_attempt(
+        TIER_FAST,
+        fast_ms,
+        accepted=False,
+        cost_eur=fast_usage.cost_eur if fast_usage else 0.0,
+        error=fast_result is None,
+    )
+    logger.info(f"🪜 Book {request.book_id}: escalating from {fast_config.model} to {config.model} ({rejection})")
+    
+    full_start = time.perf_counter()
+    try:
+        result = await _ingest_with_retries(
+            request, full_tier_config(config), max_retries, on_early_identification, images=images
+        )
+    except IngestionException:
+        stats.record_attempt(TIER_FULL, (time.perf_counter() - full_start) * 1000, accepted=False, error=True)
+        raise
+    stats.record_attempt(
+        TIER_FULL,
+        (time.perf_counter() - full_start) * 1000,
+        accepted=True,
+        cost_eur=result.usage.cost_eur if result.usage else 0.0,
+    )
+    result.model_tier = result.model_tier or TIER_FULL
+    result.usage = LLMUsage.combine([fast_usage, result.usage])
+    return result
+
+
+async def _ingest_with_retries(
+    request: BookIngestionRequest,
+    config: IngestionConfig,
+    max_retries: int,
+    on_early_identification: Optional[EarlyIdentificationCallback] = None,
+    images: Optional[Tuple[List[types.Part], List[ImageFetchTiming]]] = None,
+) -> BookIngestionResult:
+    """Retries mit Full-Jitter-Backoff und Retry-Hinweisen (shared.llm.resilience) um ingest_book_with_gemini()."""
+    policy = RetryPolicy(
+        max_retries=max_retries,
+        base_delay_seconds=config.retry_delay_seconds,
+        multiplier=config.retry_exponential_base,
+        max_delay_seconds=config.retry_max_delay_seconds,
+    )
+    return await retry_async(
+        lambda: ingest_book_with_gemini(
+            request,
+            config,
+            on_early_identification=on_early_identification,
+            images=images,
+        ),
+        policy=policy,
+        description=f"Book {request.book_id}",
+        classify=classify_ingestion_exception,
+        sleep=asyncio.sleep,
+    )
+
+
+def classify_ingestion_exception(error: BaseException) -> RetryDecision:
+    """Retry-Entscheidung aus dem bereits klassifizierten IngestionError."""
+    if isinstance(error, IngestionException) and hasattr(error, "error"):
+        return RetryDecision(
+            retryable=error.error.retry_possible,
+            kind=error.error.error_type,
+            retry_after=error.error.retry_after_seconds,
+        )
+    return classify_error(error)
@@ -0,0 +1,339 @@
+"""
+Duplikat-Erkennung über Perceptual Hashes der Cover-Bilder.
+
+Im Antiquariatsbestand sind Duplikate häufig (dritte Ausgabe desselben
+Taschenbuchs, erneuter Upload nach einem fehlgeschlagenen Lauf). Vor dem
+Gemini Call wird das Cover gegen alle bereits sicher identifizierten Bücher
+geprüft; bei einem Treffer werden BookData und Grounding-Ergebnis
+wiederverwendet statt erneut einen Pro-Call mit Search zu bezahlen.
+
+Lookup (Multi-Index Hashing):
+    Der 64-Bit dHash wird in (max_distance + 1) Bänder zerlegt. Zwei Hashes mit
+    Distanz <= max_distance stimmen nach dem Schubfachprinzip in mindestens
+    einem Band exakt überein. Pro Band gibt es eine Hash-Tabelle, geprüft
+    werden nur die Kandidaten aus den passenden Buckets (bei 100k Einträgen
+    wenige hundert statt 100k Vergleiche). Kandidaten müssen zusätzlich im
+    pHash innerhalb der Distanz liegen.
+
+Scopes:
+    Jeder Eintrag liegt im Scope seines Tenants und im globalen Scope. Der
+    globale Scope wird nur abgefragt, wenn duplicate_global_scope aktiv ist.
+
+Persistenz:
+    JsonlHashStore (lokale Datei / Snapshot) oder FirestoreHashStore. Der
+    Store wird beim ersten Lookup lazy geladen, neue Einträge werden angehängt.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.image_processing.perceptual_hash import (
+    HASH_BITS,
+    ImageHashes,
+    hamming_distance,
+    hash_from_hex,
+    hash_to_hex,
+)
+
+from .models import DuplicateIndexEntry
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "*"
+DEFAULT_MAX_DISTANCE = 6
+
+
+@dataclass
+class DuplicateIndexStats:
+    """Hit-Rate Metriken des Index."""
+    lookups: int = 0
+    tenant_hits: int = 0
+    global_hits: int = 0
+    candidates_checked: int = 0
+    total_lookup_ms: float = 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.tenant_hits + self.global_hits
+
+    @property
+    def misses(self) -> int:
+        return self.lookups - self.hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def avg_lookup_ms(self) -> float:
+        return self.total_lookup_ms / self.lookups if self.lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "tenant_hits": self.tenant_hits,
+            "global_hits": self.global_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "avg_lookup_ms": round(self.avg_lookup_ms, 3),
+            "candidates_checked": self.candidates_checked,
+        }
+
+
+@dataclass
+class DuplicateMatch:
+    """Treffer eines Lookups."""
+    entry: DuplicateIndexEntry
+    distance: int
+    scope: str
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+class JsonlHashStore:
+    """Persistiert Index-Einträge als JSON Lines (eine Zeile pro Eintrag)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Iterable[DuplicateIndexEntry]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return [DuplicateIndexEntry.model_validate_json(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def append(self, entry: DuplicateIndexEntry) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(entry.model_dump_json() + "\n")
+
+
+class FirestoreHashStore:
+    """Persistiert Index-Einträge in einer Firestore Collection (ein Dokument pro Buch)."""
+
+    def __init__(self, db: Any, collection: str = "perceptual_hashes"):
+        self.db = db
+        self.collection = collection
+
+    def load(self) -> Iterable[DuplicateIndexEntry]:
+        return [
+            DuplicateIndexEntry.model_validate(doc.to_dict())
+            for doc in self.db.collection(self.collection).stream()
+        ]
+
+    def append(self, entry: DuplicateIndexEntry) -> None:
+        doc_id = f"{entry.user_id}_{entry.book_id}"
+        self.db.collection(self.collection).document(doc_id).set(entry.model_dump(mode="json"))
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+class PerceptualHashIndex:
+    """
+    In-Memory Index über Cover-Hashes mit Multi-Index Hashing.
+
+    Thread-safe (Einträge werden aus asyncio.to_thread() heraus hinzugefügt).
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, store: Any = None):
+        if not 0 <= max_distance < HASH_BITS:
+            raise ValueError(f"max_distance muss zwischen 0 und {HASH_BITS - 1} liegen")
+        self.max_distance = max_distance
+        self.store = store
+        self.stats = DuplicateIndexStats()
+
+        # Bänder möglichst gleich breit: (shift, mask) pro Band
+        band_count = max_distance + 1
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for i in range(band_count):
+            width = HASH_BITS // band_count + (1 if i < HASH_BITS % band_count else 0)
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        self._entries: List[DuplicateIndexEntry] = []
+        self._hashes: List[ImageHashes] = []
+        self._keys: Dict[Tuple[str, str], int] = {}
+        # scope -> pro Band: Band-Wert -> Entry-Indizes
+        self._tables: Dict[str, List[Dict[int, List[int]]]] = {}
+        self._lock = threading.Lock()
+        self._loaded = store is None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._keys)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            try:
+                for entry in self.store.load():
+                    self._insert(entry)
+                logger.info(
+                    f"📇 Duplicate index loaded: {len(self._keys)} entries "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+                )
+            except Exception as e:
+                logger.error(f"❌ Duplicate index konnte nicht geladen werden: {e}", exc_info=True)
+            self._loaded = True
+
+    def _insert(self, entry: DuplicateIndexEntry) -> None:
+        hashes = ImageHashes(dhash=hash_from_hex(entry.dhash), phash=hash_from_hex(entry.phash))
+        key = (entry.user_id, entry.book_id)
+        if key in self._keys:
+            # Neu-Identifikation desselben Buchs: Ergebnis ersetzen, Hash-Buckets bleiben gültig wenn gleich
+            position = self._keys[key]
+            if self._hashes[position] == hashes:
+                self._entries[position] = entry
+                return
+            # Anderes Cover: alte Position aus den Buckets nehmen, damit es nicht mehr matcht
+            self._unlink(position)
+
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._hashes.append(hashes)
+        self._keys[key] = position
+
+        for scope in (entry.user_id, GLOBAL_SCOPE):
+            tables = self._tables.setdefault(scope, [{} for _ in self._bands])
+            for table, (shift, mask) in zip(tables, self._bands):
+                table.setdefault((hashes.dhash >> shift) & mask, []).append(position)
+
+    def _unlink(self, position: int) -> None:
+        """Entfernt eine Position aus allen Band-Buckets (der Slot in _entries bleibt als toter Eintrag)."""
+        entry = self._entries[position]
+        dhash = self._hashes[position].dhash
+        for scope in (entry.user_id, GLOBAL_SCOPE):
+            for table, (shift, mask) in zip(self._tables.get(scope, ()), self._bands):
+                band = (dhash >> shift) & mask
+                bucket = table.get(band)
+                if bucket and position in bucket:
+                    bucket.remove(position)
+                    if not bucket:
+                        del table[band]
+
+    def add(self, entry: DuplicateIndexEntry) -> None:
+        """Fügt einen Eintrag hinzu und persistiert ihn (best effort)."""
+        self._ensure_loaded()
+        with self._lock:
+            self._insert(entry)
+        if self.store is not None:
+            try:
+                self.store.append(entry)
+            except Exception as e:
+                logger.warning(f"⚠️ Duplicate index entry für {entry.book_id} nicht persistiert: {e}")
+
+    def _search(self, hashes: ImageHashes, scope: str, exclude: Optional[Tuple[str, str]]) -> Optional[DuplicateMatch]:
+        tables = self._tables.get(scope)
+        if not tables:
+            return None
+
+        candidates = set()
+        for table, (shift, mask) in zip(tables, self._bands):
+            candidates.update(table.get((hashes.dhash >> shift) & mask, ()))
+        self.stats.candidates_checked += len(candidates)
+
+        best: Optional[DuplicateMatch] = None
+        for position in candidates:
+            entry = self._entries[position]
+            if exclude == (entry.user_id, entry.book_id):
+                continue
+            candidate = self._hashes[position]
+            if hamming_distance(hashes.dhash, candidate.dhash) > self.max_distance:
+                continue
+            distance = hashes.distance(candidate)
+            if distance <= self.max_distance and (best is None or distance < best.distance):
+                best = DuplicateMatch(entry=entry, distance=distance, scope=scope)
+        return best
+
+    def find(
+        self,
+        hashes: ImageHashes,
+        user_id: str,
+        include_global: bool = False,
+        exclude_book_id: Optional[str] = None,
+    ) -> Optional[DuplicateMatch]:
+        """
+        Sucht das ähnlichste bekannte Cover.
+
+        Args:
+            hashes: Hashes des neuen Covers
+            user_id: Tenant, dessen Scope zuerst durchsucht wird
+            include_global: Ob danach auch der globale Scope durchsucht wird
+            exclude_book_id: Buch-ID, die nicht als Treffer zählt (Re-Analyse desselben Buchs)
+
+        Returns:
+            DuplicateMatch oder None
+        """
+        self._ensure_loaded()
+        start = time.perf_counter()
+        exclude = (user_id, exclude_book_id) if exclude_book_id else None
+
+        with self._lock:
+            match = self._search(hashes, user_id, exclude)
+            if match is None and include_global:
+                match = self._search(hashes, GLOBAL_SCOPE, exclude)
+
+            self.stats.lookups += 1
+            self.stats.total_lookup_ms += (time.perf_counter() - start) * 1000
+            if match is not None:
+                if match.scope == GLOBAL_SCOPE:
+                    self.stats.global_hits += 1
+                else:
+                    self.stats.tenant_hits += 1
+        return match
+
+    @staticmethod
+    def make_entry(
+        user_id: str,
+        book_id: str,
+        hashes: ImageHashes,
+        **result_fields: Any,
+    ) -> DuplicateIndexEntry:
+        """Baut einen Eintrag aus Hashes und den Feldern eines BookIngestionResult."""
+        return DuplicateIndexEntry(
+            user_id=user_id,
+            book_id=book_id,
+            dhash=hash_to_hex(hashes.dhash),
+            phash=hash_to_hex(hashes.phash),
+            **result_fields,
+        )
+
+
+# ============================================================================
+# DEFAULT INDEX
+# ============================================================================
+
+_default_index: Optional[PerceptualHashIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_duplicate_index(max_distance: int = DEFAULT_MAX_DISTANCE) -> PerceptualHashIndex:
+    """
+    Liefert den prozessweiten Index (In-Memory, ohne Persistenz wenn nicht konfiguriert).
+    """
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = PerceptualHashIndex(max_distance=max_distance)
+    return _default_index
+
+
+def configure_duplicate_index(index: Optional[PerceptualHashIndex]) -> None:
+    """Setzt den prozessweiten Index (z.B. mit FirestoreHashStore). None setzt zurück."""
+    global _default_index
+    with _default_index_lock:
+        _default_index = index
@@ -0,0 +1,181 @@
+"""
+ISBN-Prüfung und lokaler Metadaten-Katalog für den Barcode-Fast-Path.
+
+Ablauf in ingest_book_with_gemini():
+1. Beim Laden der Bilder werden EAN-13 Barcodes lokal dekodiert
+   (shared.image_processing.barcode)
+2. isbn_from_barcodes() wählt den ersten Code mit Buchland-Präfix (978/979)
+   und gültiger Prüfziffer
+3. Gibt es im IsbnCatalog bereits einen Datensatz, wird er ohne Gemini Call
+   übernommen (Latenz: Bild laden + Scan + ein Firestore-Read)
+4. Sonst geht die ISBN als gesicherter Hinweis in den Prompt; sichere
+   Ergebnisse landen anschließend im Katalog
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from .models import IsbnCatalogEntry
+
+logger = logging.getLogger(__name__)
+
+BOOKLAND_PREFIXES = ("978", "979")
+DEFAULT_CATALOG_CACHE_SIZE = 10_000
+
+
+# ============================================================================
+# ISBN HELPERS
+# ============================================================================
+
+def is_valid_isbn13(value: str) -> bool:
+    """Prüft Format und Prüfziffer einer ISBN-13 / EAN-13 (nur Ziffern)."""
+    if len(value) != 13 or not value.isdigit():
+        return False
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(value[:12]))
+    return (10 - total % 10) % 10 == int(value[12])
+
+
+def is_valid_isbn10(value: str) -> bool:
+    """Prüft Format und Prüfziffer einer ISBN-10 (letzte Stelle darf 'X' sein)."""
+    if len(value) != 10 or not value[:9].isdigit() or not (value[9].isdigit() or value[9] in "Xx"):
+        return False
+    check = 10 if value[9] in "Xx" else int(value[9])
+    total = sum(int(digit) * (10 - i) for i, digit in enumerate(value[:9])) + check
+    return total % 11 == 0
+
+
+def isbn10_to_isbn13(value: str) -> str:
+    """Wandelt eine (gültige) ISBN-10 in die zugehörige ISBN-13 um."""
+    base = "978" + value[:9]
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(base))
+    return base + str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value: Optional[str]) -> Optional[str]:
+    """
+    Normalisiert eine ISBN-10 oder ISBN-13 auf eine gültige ISBN-13.
+
+    Returns:
+        ISBN-13 ohne Trennzeichen oder None bei ungültiger Prüfziffer
+    """
+    if not value:
+        return None
+    cleaned = re.sub(r"[^0-9Xx]", "", value)
+    if len(cleaned) == 13 and cleaned.startswith(BOOKLAND_PREFIXES) and is_valid_isbn13(cleaned):
+        return cleaned
+    if len(cleaned) == 10 and is_valid_isbn10(cleaned):
+        return isbn10_to_isbn13(cleaned)
+    return None
+
+
+def isbn_from_barcodes(codes: Iterable[str]) -> Optional[str]:
+    """Erste EAN-13 mit Buchland-Präfix und gültiger Prüfziffer (andere Barcodes, z.B. Preis-EANs, werden ignoriert)."""
+    for code in codes:
+        if code.startswith(BOOKLAND_PREFIXES) and is_valid_isbn13(code):
+            return code
+    return None
+
+
+# ============================================================================
+# CATALOG
+# ============================================================================
+
+class FirestoreIsbnStore:
+    """Persistiert Katalog-Einträge in Firestore (Dokument-ID = ISBN-13)."""
+
+    def __init__(self, db: Any, collection: str = "isbn_catalog"):
+        self.db = db
+        self.collection = collection
+
+    def get(self, isbn_13: str) -> Optional[IsbnCatalogEntry]:
+        snapshot = self.db.collection(self.collection).document(isbn_13).get()
+        if not snapshot.exists:
+            return None
+        return IsbnCatalogEntry.model_validate(snapshot.to_dict())
+
+    def put(self, entry: IsbnCatalogEntry) -> None:
+        self.db.collection(self.collection).document(entry.isbn_13).set(entry.model_dump(mode="json"))
+
+
+class IsbnCatalog:
+    """
+    Lokaler Metadaten-Katalog: LRU im Speicher, optional Read-Through auf einen Store.
+
+    Thread-safe; Store-Zugriffe sind synchron und sollten aus async Code über
+    asyncio.to_thread() erfolgen.
+    """
+
+    def __init__(self, store: Any = None, cache_size: int = DEFAULT_CATALOG_CACHE_SIZE):
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, IsbnCatalogEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def _remember(self, entry: IsbnCatalogEntry) -> None:
+        with self._lock:
+            self._cache[entry.isbn_13] = entry
+            self._cache.move_to_end(entry.isbn_13)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, isbn_13: str) -> Optional[IsbnCatalogEntry]:
+        """Sucht einen Datensatz (erst Speicher, dann Store)."""
+        with self._lock:
+            self.lookups += 1
+            entry = self._cache.get(isbn_13)
+            if entry is not None:
+                self._cache.move_to_end(isbn_13)
+                self.hits += 1
+                return entry
+
+        if self.store is None:
+            return None
+        try:
+            entry = self.store.get(isbn_13)
+        except Exception as e:
+            logger.warning(f"⚠️ ISBN-Katalog Lookup für {isbn_13} fehlgeschlagen: {e}")
+            return None
+        if entry is not None:
+            self._remember(entry)
+            with self._lock:
+                self.hits += 1
+        return entry
+
+    def put(self, entry: IsbnCatalogEntry) -> None:
+        """Legt einen Datensatz an bzw. überschreibt ihn (Store best effort)."""
+        self._remember(entry)
+        if self.store is not None:
+            try:
+                self.store.put(entry)
+            except Exception as e:
+                logger.warning(f"⚠️ ISBN-Katalog Eintrag {entry.isbn_13} nicht persistiert: {e}")
+
+
+_default_catalog: Optional[IsbnCatalog] = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_isbn_catalog() -> IsbnCatalog:
+    """Liefert den prozessweiten Katalog (In-Memory, ohne Persistenz wenn nicht konfiguriert)."""
+    global _default_catalog
+    if _default_catalog is None:
+        with _default_catalog_lock:
+            if _default_catalog is None:
+                _default_catalog = IsbnCatalog()
+    return _default_catalog
+
+
+def configure_isbn_catalog(catalog: Optional[IsbnCatalog]) -> None:
+    """Setzt den prozessweiten Katalog (z.B. mit FirestoreIsbnStore). None setzt zurück."""
+    global _default_catalog
+    with _default_catalog_lock:
+        _default_catalog = catalog
@@ -15,6 +15,8 @@ import logging
 import re
 import json
 
+from shared.llm.usage import LLMUsage
+
 logger = logging.getLogger(__name__)
 
 # --- Validator Functions ---
@@ -226,6 +228,23 @@ class GroundingMetadata(BaseModel):
     source_urls: List[str] = Field(default_factory=list, description="Verwendete Quellen-URLs")
 
 
+class ImageFetchTiming(BaseModel):
+    """
+    Messwerte für das Laden eines einzelnen Bildes.
+    """
+    url: str = Field(..., description="Bild-URL oder Pfad")
+    source: str = Field(..., description="Quelle (http, gcs, file, unknown)")
+    duration_ms: float = Field(0.0, ge=0, description="Ladezeit in ms")
+    size_bytes: int = Field(0, ge=0, description="Anzahl geladener Bytes")
+    sent_size_bytes: int = Field(0, ge=0, description="Anzahl an Gemini gesendeter Bytes (nach Normalisierung)")
+    mime_type: Optional[str] = Field(None, description="MIME-Type des gesendeten Bildes")
+    normalize_ms: float = Field(0.0, ge=0, description="Dauer der Normalisierung in ms")
+    barcodes: List[str] = Field(default_factory=list, description="Auf dem Bild erkannte EAN-13 Barcodes")
+    barcode_ms: float = Field(0.0, ge=0, description="Dauer des Barcode-Scans in ms")
+    success: bool = Field(False, description="Ob das Bild geladen werden konnte")
+    error: Optional[str] = Field(None, description="Fehlermeldung bei Misserfolg")
+
+
 def find_and_extract_book_data(data: Union[Dict, Any]) -> Optional[Dict]:
     """
     Sucht rekursiv nach 'book_identification' oder 'book_data' in einem Dict.
@@ -257,6 +276,26 @@ class BookIngestionResult(BaseModel):
         default_factory=GroundingMetadata,
         description="Google Search Grounding Metadata"
     )
+    duplicate_of: Optional[str] = Field(
+        None,
+        description="Buch-ID, deren Ergebnis per Perceptual-Hash-Treffer wiederverwendet wurde"
+    )
+    barcode_isbn: Optional[str] = Field(
+        None,
+        description="Lokal per Barcode erkannte ISBN-13 (Prüfziffer valide)"
+    )
+    image_fetch_timings: List[ImageFetchTiming] = Field(
+        default_factory=list,
+        description="Ladezeiten der einzelnen Bilder"
+    )
+    usage: Optional[LLMUsage] = Field(
+        None,
+        description="Token-Verbrauch und Kosten des Gemini Calls (None ohne Call, z.B. Katalog-Treffer)"
+    )
+    model_tier: Optional[str] = Field(
+        None,
+        description="Stufe, die das Ergebnis geliefert hat: local (Katalog/Duplikat), fast oder full"
+    )
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Zeitstempel")
 
     @model_validator(mode='before')
@@ -330,6 +369,7 @@ class IngestionError(BaseModel):
     retry_possible: bool = Field(True, description="Ob ein Retry sinnvoll ist")
     
     gemini_error_code: Optional[str] = Field(None, description="Gemini API Error Code")
+    retry_after_seconds: Optional[float] = Field(None, description="Retry-Hinweis des Servers (Retry-After / RetryInfo)")
     grounding_failed: bool = Field(False, description="Ob Grounding fehlgeschlagen ist")
     image_count: int = Field(0, ge=0, description="Anzahl der verarbeiteten Bilder")
     
@@ -347,3 +387,78 @@ class IngestionError(BaseModel):
             }
         }
     }
+
+
+class BatchIngestionOutcome(BaseModel):
+    """
+    Ergebnis eines einzelnen Buchs innerhalb einer Batch-Ingestion.
+    
+    Genau eines von result/error ist gesetzt.
+    """
+    book_id: str = Field(..., description="Buch-ID aus dem Request")
+    user_id: str = Field(..., description="User-ID aus dem Request")
+    result: Optional[BookIngestionResult] = Field(None, description="Ergebnis bei Erfolg")
+    error: Optional[IngestionError] = Field(None, description="Fehler bei Misserfolg")
+    
+    @property
+    def success(self) -> bool:
+        return self.result is not None and self.result.success
+
+
+class DuplicateIndexEntry(BaseModel):
+    """
+    Eintrag im Perceptual-Hash Index: Cover-Hashes plus das Ergebnis der
+    ursprünglichen Identifikation, das bei einem Treffer wiederverwendet wird.
+    
+    Hashes sind Hex-Strings, da Firestore nur signed int64 speichern kann.
+    """
+    user_id: str = Field(..., description="Tenant, dem das Original-Buch gehört")
+    book_id: str = Field(..., description="Buch-ID des Originals")
+    dhash: str = Field(..., description="64-Bit dHash des Covers (Hex)")
+    phash: str = Field(..., description="64-Bit pHash des Covers (Hex)")
+    book_data: BookData = Field(..., description="Identifizierte Buchdaten")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence der Original-Identifikation")
+    sources_used: List[str] = Field(default_factory=list, description="Verwendete Quellen")
+    grounding_metadata: GroundingMetadata = Field(
+        default_factory=GroundingMetadata,
+        description="Grounding Metadata der Original-Identifikation"
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow, description="Zeitstempel")
+
+
+class IsbnCatalogEntry(BaseModel):
+    """
+    Lokaler Metadaten-Datensatz zu einer ISBN.
+    
+    Wird nach sicheren Identifikationen angelegt; ein Barcode-Treffer auf einen
+    vorhandenen Datensatz spart den kompletten Gemini Call.
+    """
+    isbn_13: str = Field(..., description="ISBN-13 (Prüfziffer valide)")
+    book_data: BookData = Field(..., description="Identifizierte Buchdaten")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence der Original-Identifikation")
+    sources_used: List[str] = Field(default_factory=list, description="Verwendete Quellen")
+    grounding_metadata: GroundingMetadata = Field(
+        default_factory=GroundingMetadata,
+        description="Grounding Metadata der Original-Identifikation"
+    )
+    source_book_id: Optional[str] = Field(None, description="Buch-ID, aus der der Datensatz stammt")
+    updated_at: datetime = Field(default_factory=datetime.utcnow, description="Zeitstempel")
+
+
+class EarlyIdentification(BaseModel):
+    """
+    Frühe Identifikation eines Buchs, noch bevor die Ingestion abgeschlossen ist.
+    
+    Quelle ist entweder ein lokal dekodierter Barcode oder ein Feld, das im
+    gestreamten Gemini-Output bereits vollständig ist. Reicht aus, um die
+    Preisrecherche parallel zum Rest der Generierung zu starten.
+    """
+    book_id: str = Field(..., description="Buch-ID")
+    user_id: str = Field(..., description="User-ID")
+    isbn: Optional[str] = Field(None, description="ISBN-13 (Prüfziffer valide)")
+    title: Optional[str] = Field(None, description="Titel")
+    author: Optional[str] = Field(None, description="Erster Autor")
+    publisher: Optional[str] = Field(None, description="Verlag (falls schon im Stream)")
+    edition: Optional[str] = Field(None, description="Edition/Auflage (falls schon im Stream)")
+    source: str = Field(..., description="Herkunft: 'barcode' oder 'stream'")
+    elapsed_ms: float = Field(..., ge=0, description="Zeit seit Start der Ingestion")
@@ -0,0 +1,91 @@
+"""
+Benchmark: Bild-Normalisierung vor Gemini Calls.
+
+Vergleicht pro Buch (Fotos aus test_books/) die Originalbilder mit den
+normalisierten Bildern:
+- Bytes, die an Gemini hochgeladen werden
+- Geschätzte Upload-Zeit bei gegebener Bandbreite
+- Geschätzte Image-Tokens (768px Kacheln à 258 Tokens)
+- CPU-Zeit der Normalisierung
+
+Usage:
+    python tests/benchmarks/bench_image_normalization.py [--max-edge 1024] [--uplink-mbps 50]
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from shared.image_processing import ImageNormalizationConfig, estimate_image_tokens, normalize_image
+
+TEST_BOOKS_DIR = Path(__file__).resolve().parents[2] / "test_books"
+
+
+def group_by_book(paths):
+    """Gruppiert Fotos nach Buch anhand des Dateinamen-Präfixes."""
+    books = defaultdict(list)
+    for path in paths:
+        books[path.stem.split("_")[0]].append(path)
+    return books
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-edge", type=int, default=1024, help="Maximale Kantenlänge (px)")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG-Qualität")
+    parser.add_argument("--uplink-mbps", type=float, default=50.0, help="Angenommene Upload-Bandbreite")
+    args = parser.parse_args()
+
+    config = ImageNormalizationConfig(max_edge_px=args.max_edge, jpeg_quality=args.quality)
+    bytes_per_second = args.uplink_mbps * 1_000_000 / 8
+
+    books = group_by_book(sorted(TEST_BOOKS_DIR.glob("*.jpg")))
+    if not books:
+        print(f"❌ Keine Testbilder in {TEST_BOOKS_DIR}")
+        return 1
+
+    print(f"Max Edge: {args.max_edge}px, Quality: {args.quality}, Uplink: {args.uplink_mbps} Mbit/s\n")
+    header = f"{'Buch':<16}{'Bilder':>7}{'Original':>12}{'Normalisiert':>14}{'Gespart':>9}{'Upload alt':>12}{'Upload neu':>12}{'CPU':>8}{'Tokens':>16}"
+    print(header)
+    print("-" * len(header))
+
+    totals = defaultdict(float)
+    for book, paths in books.items():
+        original_bytes = sent_bytes = 0
+        cpu_ms = 0.0
+        tokens_before = tokens_after = 0
+        for path in paths:
+            normalized = normalize_image(path.read_bytes(), config)
+            original_bytes += normalized.original_size_bytes
+            sent_bytes += normalized.size_bytes
+            cpu_ms += normalized.duration_ms
+            tokens_before += estimate_image_tokens(normalized.original_width, normalized.original_height)
+            tokens_after += estimate_image_tokens(normalized.width, normalized.height)
+
+        upload_before_ms = original_bytes / bytes_per_second * 1000
+        upload_after_ms = sent_bytes / bytes_per_second * 1000
+        saved_pct = (1 - sent_bytes / original_bytes) * 100 if original_bytes else 0.0
+        print(
+            f"{book:<16}{len(paths):>7}{original_bytes / 1e6:>10.2f}MB{sent_bytes / 1e6:>12.2f}MB"
+            f"{saved_pct:>8.0f}%{upload_before_ms:>10.0f}ms{upload_after_ms:>10.0f}ms{cpu_ms:>6.0f}ms"
+            f"{tokens_before:>8} -> {tokens_after:<5}"
+        )
+        totals["books"] += 1
+        totals["original"] += original_bytes
+        totals["sent"] += sent_bytes
+        totals["saved_ms"] += upload_before_ms - upload_after_ms - cpu_ms
+        totals["tokens_saved"] += tokens_before - tokens_after
+
+    print("-" * len(header))
+    print(f"Ø Bytes gespart pro Buch:   {(totals['original'] - totals['sent']) / totals['books'] / 1e6:.2f} MB")
+    print(f"Ø Latenz gespart pro Buch:  {totals['saved_ms'] / totals['books']:.0f} ms (Upload minus Normalisierungs-CPU)")
+    print(f"Ø Image-Tokens gespart:     {totals['tokens_saved'] / totals['books']:.0f} pro Buch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: Import-Zeit (Cold Start) jedes Entry Points mit Budget.
+
+Jeder Entry Point wird mehrfach in einem frischen Interpreter importiert
+(Median zählt). Es sind keine Credentials gesetzt: Baut ein Modul beim Import
+einen GCP/GenAI Client, schlägt der Import fehl oder hängt an der
+Metadata-Server-Suche - beides fällt hier auf.
+
+Exit Code 1, wenn ein Entry Point sein Budget überschreitet oder beim Import
+scheitert. Entry Points mit fehlenden optionalen Paketen (z.B. firebase_admin
+lokal) werden übersprungen.
+
+Usage:
+    python tests/benchmarks/bench_import_time.py [--repeat 5] [--scale 1.0] [--only ingestion-agent]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Name -> (Verzeichnis relativ zum Repo, Modul, Budget in ms)
+ENTRY_POINTS = {
+    "shared.simplified_ingestion": (".", "shared.simplified_ingestion", 2500),
+    "ingestion-agent": ("agents/ingestion-agent", "main", 3500),
+    "condition-assessor": ("agents/condition-assessor", "main", 3500),
+    "price-research-agent": ("agents/price-research-agent", "main", 3500),
+    "strategist-agent": ("agents/strategist-agent", "main", 3500),
+    "ambassador-agent": ("agents/ambassador-agent", "main", 3500),
+    "sentinel-agent": ("agents/sentinel-agent", "main", 2000),
+    "sentinel-webhook": ("agents/sentinel-webhook", "main", 1500),
+    "dashboard-backend": ("dashboard/backend", "main", 3500),
+}
+
+_PROBE = """
+import json, sys, time
+sys.path[:0] = [{root!r}, {directory!r}]
+start = time.perf_counter()
+try:
+    __import__({module!r})
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": e.name}}))
+    sys.exit(0)
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+
+def _environment(workdir):
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("GOOGLE_", "GCLOUD", "CLOUDSDK"))}
+    env.update({
+        "GCP_PROJECT": "bench-project",
+        "GCS_BUCKET_NAME": "bench-bucket",
+        # Kein ADC: ein Client-Bau beim Import würde scheitern
+        "GOOGLE_APPLICATION_CREDENTIALS": os.path.join(workdir, "missing-credentials.json"),
+        "NO_GCE_CHECK": "True",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def measure(name, repeat=5, timeout=60.0):
+    """
+    Importiert einen Entry Point `repeat`-mal in frischen Interpretern.
+
+    Returns:
+        Dict mit median_ms/runs, oder skipped (fehlendes Paket) bzw. error
+    """
+    directory, module, _ = ENTRY_POINTS[name]
+    directory = os.path.join(ROOT, directory)
+    code = _PROBE.format(root=ROOT, directory=directory, module=module)
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _environment(workdir)
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, "-c", code], cwd=workdir, env=env,
+                capture_output=True, text=True, timeout=timeout,
+            )
+            if proc.returncode != 0:
+                return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            if "missing" in result:
+                return {"skipped": f"missing package {result['missing']}"}
+            runs.append(result["ms"])
+    return {"median_ms": statistics.median(runs), "runs": runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor auf alle Budgets (langsame CI-Runner)")
+    parser.add_argument("--only", action="append", choices=sorted(ENTRY_POINTS), help="Nur diese Entry Points")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'entry point':<30} {'median':>10} {'budget':>10}  status")
+    for name in args.only or ENTRY_POINTS:
+        budget = ENTRY_POINTS[name][2] * args.scale
+        result = measure(name, repeat=args.repeat)
+        if "skipped" in result:
+            print(f"{name:<30} {'-':>10} {budget:>8.0f}ms  skipped ({result['skipped']})")
+            continue
+        if "error" in result:
+            failed = True
+            print(f"{name:<30} {'-':>10} {budget:>8.0f}ms  IMPORT FAILED: {result['error']}")
+            continue
+        over = result["median_ms"] > budget
+        failed |= over
+        print(f"{name:<30} {result['median_ms']:>8.0f}ms {budget:>8.0f}ms  {'OVER BUDGET' if over else 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark: JSON-Extraktion aus pathologischen 50-100 KB LLM-Antworten.
+
+Vergleicht den linearen Extraktor (shared.llm.json_extraction) mit den
+bisherigen Strategien:
+- ingestion_legacy: DOTALL Code-Block Regex, dann raw_decode() an jeder "{"
+- grounding_legacy: gieriges (\\{.*\\}) aus PriceGroundingClient
+- condition_legacy: ```-Replace + json.loads aus dem Condition Assessor
+
+"-" bedeutet: Strategie findet kein bzw. nicht das letzte Objekt.
+
+Usage:
+    python tests/benchmarks/bench_json_extraction.py [--size-kb 80] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from shared.llm.json_extraction import extract_last_json_object
+
+ANSWER = {
+    "book_data": {"title": "Der Process", "authors": ["Franz Kafka"], "isbn_13": "9783596294312"},
+    "confidence": 0.91,
+    "sources_used": ["dnb.de", "booklooker.de"],
+}
+
+
+def ingestion_legacy(text):
+    pattern = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+    for json_str in reversed(pattern.findall(text)):
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            continue
+    decoder = json.JSONDecoder()
+    idx, candidates = 0, []
+    while idx < len(text):
+        start = text.find("{", idx)
+        if start == -1:
+            break
+        try:
+            obj, end = decoder.raw_decode(text, start)
+            candidates.append(obj)
+            idx = end
+        except json.JSONDecodeError:
+            idx = start + 1
+    return candidates[-1] if candidates else None
+
+
+def grounding_legacy(text):
+    match = re.search(r"(\{.*\})", text, re.DOTALL)
+    try:
+        return json.loads(match.group(1)) if match else None
+    except json.JSONDecodeError:
+        return None
+
+
+def condition_legacy(text):
+    try:
+        return json.loads(text.replace("```json", "").replace("```", "").strip())
+    except json.JSONDecodeError:
+        return None
+
+
+def linear(text):
+    extraction = extract_last_json_object(text)
+    return extraction.value if extraction else None
+
+
+def build_cases(size):
+    answer = json.dumps(ANSWER, ensure_ascii=False)
+    prose = "Laut Suchergebnis (Quelle: {dnb}) ist die Ausgabe von 1990 {vgl. Impressum}. "
+    nested_open = '{"book": {"meta": {"source": "search", "note": "'
+    return {
+        "grounded prose + fenced answer": prose * (size // len(prose)) + f"\n```json\n{answer}\n```\nHinweis: {{Ende}}",
+        "unclosed braces + answer": "{" * size + "\n" + answer,
+        "many small objects + answer": '{"snippet": "x"} ' * (size // 17) + answer,
+        "nested unclosed prefixes": (nested_open + "x\n") * (size // (len(nested_open) + 2)) + answer,
+        "truncated answer": prose * (size // len(prose)) + answer[:-25],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=80, help="Ungefähre Größe der Antworten")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    strategies = {
+        "linear": linear,
+        "ingestion_legacy": ingestion_legacy,
+        "grounding_legacy": grounding_legacy,
+        "condition_legacy": condition_legacy,
+    }
+
+    print(f"{'case':<34} {'KB':>5} " + " ".join(f"{name:>18}" for name in strategies))
+    for case, text in build_cases(args.size_kb * 1024).items():
+        cells = []
+        for strategy in strategies.values():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                value = strategy(text)
+            ms = (time.perf_counter() - start) * 1000 / args.repeat
+            correct = isinstance(value, dict) and value.get("book_data", {}).get("title") == "Der Process"
+            cells.append(f"{ms:>14.1f}ms {'✓' if correct else '-'}")
+        print(f"{case:<34} {len(text) // 1024:>5} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
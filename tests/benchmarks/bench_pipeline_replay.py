@@ -0,0 +1,141 @@
+"""
+Benchmark: Pipeline-Durchsatz offline über Record/Replay-Cassetten.
+
+Pro Buch laufen die drei LLM-Stufen der Pipeline unverändert:
+1. ingest_book_with_gemini (Identifikation)
+2. Condition Assessor (process_assessment)
+3. PriceResearchOrchestrator.research_and_price (Grounding + Analyse)
+
+Einmal live aufnehmen (braucht GCP_PROJECT, Vertex AI, Firestore, Pub/Sub):
+    python tests/benchmarks/bench_pipeline_replay.py --record books.jsonl --cassette pipeline.json
+
+Danach beliebig oft ohne Netz abspielen:
+    python tests/benchmarks/bench_pipeline_replay.py --cassette pipeline.json [--replay-latency] \
+        [--latency-scale 0.1] [--concurrency 8] [--repeat 3]
+
+books.jsonl: eine Zeile je Buch mit user_id, book_id, image_urls (gs://...).
+Die Bücherliste wird neben der Cassette gespeichert (<cassette>.books.json).
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from shared.apis.price_grounding import PriceGroundingClient
+from shared.firestore.client import get_firestore_client
+from shared.llm.hedging import percentile
+from shared.price_research.orchestrator import PriceResearchOrchestrator
+from shared.replay import MODE_RECORD, MODE_REPLAY, use_cassette
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_gemini
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+STAGES = ("ingestion", "condition", "pricing")
+
+
+def load_condition_assessor():
+    """Lädt agents/condition-assessor/main.py (Verzeichnisname ist kein Modulname)."""
+    path = REPO_ROOT / "agents" / "condition-assessor" / "main.py"
+    spec = importlib.util.spec_from_file_location("condition_assessor_main", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_book(book, assessor, orchestrator, timings):
+    """Ein Buch durch alle drei Stufen; schreibt die Stufen-Latenzen in timings."""
+    start = time.perf_counter()
+    result = await ingest_book_with_gemini(
+        BookIngestionRequest(book_id=book["book_id"], user_id=book["user_id"], image_urls=book["image_urls"]),
+        IngestionConfig(),
+    )
+    timings["ingestion"].append((time.perf_counter() - start) * 1000)
+    book_data = result.book_data.model_dump(exclude={"metadata"}) if result.book_data else {}
+
+    start = time.perf_counter()
+    await assessor.process_assessment(
+        book["user_id"], book["book_id"], [{"gcs_uri": url} for url in book["image_urls"]], book_data,
+    )
+    timings["condition"].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await orchestrator.research_and_price(
+        isbn=book_data.get("isbn_13") or book_data.get("isbn_10") or "",
+        title=book_data.get("title") or "",
+        book_id=book["book_id"],
+        uid=book["user_id"],
+    )
+    timings["pricing"].append((time.perf_counter() - start) * 1000)
+
+
+async def run_pipeline(books, concurrency, repeat):
+    assessor = load_condition_assessor()
+    orchestrator = PriceResearchOrchestrator(get_firestore_client(), PriceGroundingClient())
+    timings = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def guarded(book):
+        nonlocal failures
+        async with semaphore:
+            try:
+                await run_book(book, assessor, orchestrator, timings)
+            except Exception as e:
+                failures += 1
+                print(f"❌ {book['book_id']}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(guarded(book) for _ in range(repeat) for book in books))
+    return time.perf_counter() - start, timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", required=True, help="Cassette-Datei (JSON)")
+    parser.add_argument("--record", metavar="BOOKS_JSONL", help="Live aufnehmen mit diesen Büchern")
+    parser.add_argument("--replay-latency", action="store_true", help="Aufgezeichnete Latenzen abwarten")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Faktor auf die Latenzen")
+    parser.add_argument("--concurrency", type=int, default=4, help="Bücher parallel")
+    parser.add_argument("--repeat", type=int, default=1, help="Durchläufe über alle Bücher (nur Replay)")
+    args = parser.parse_args()
+
+    books_path = Path(args.cassette + ".books.json")
+    if args.record:
+        books = [json.loads(line) for line in Path(args.record).read_text(encoding="utf-8").splitlines() if line.strip()]
+        books_path.write_text(json.dumps(books, indent=1), encoding="utf-8")
+        mode, repeat = MODE_RECORD, 1
+    else:
+        if not books_path.exists():
+            print(f"❌ Keine Bücherliste {books_path} - zuerst mit --record aufnehmen")
+            return 1
+        books = json.loads(books_path.read_text(encoding="utf-8"))
+        mode, repeat = MODE_REPLAY, args.repeat
+
+    with use_cassette(args.cassette, mode=mode, replay_latency=args.replay_latency, latency_scale=args.latency_scale) as cassette:
+        elapsed, timings, failures = asyncio.run(run_pipeline(books, args.concurrency, repeat))
+
+    total = len(books) * repeat
+    latency = f"{args.latency_scale}x" if args.replay_latency else "aus"
+    print(f"\nModus: {mode}, Bücher: {total}, Concurrency: {args.concurrency}, Latenz: {latency}")
+    header = f"{'Stufe':<12}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if values:
+            print(f"{stage:<12}{len(values):>6}{percentile(values, 0.5):>10.1f}{percentile(values, 0.99):>10.1f}")
+    print("-" * len(header))
+    print(f"Durchsatz: {(total - failures) / elapsed:.2f} Bücher/s ({elapsed:.2f}s, {failures} Fehler)")
+    print(f"Cassette: {cassette.summary()}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Gemeinsame Fixtures für die Offline-Unit-Tests der Shared Library.
+
+Die Tests laufen ohne Netzwerk und ohne GCP-Credentials.
+"""
+
+import os
+import sys
+
+# Projekt-Root in den Pfad, damit 'shared' importierbar ist
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+# Der GenAI Client braucht eine Projekt-ID, stellt aber ohne Call keine Verbindung her
+os.environ.setdefault("GCP_PROJECT", "test-project")
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _fresh_ingestion_state():
+    """Jeder Test startet mit leerem Duplikat-Index, ISBN-Katalog, Marktdaten-Cache, geschlossenen Circuit Breakern und ohne Latenz-/Regions-Historie."""
+    from shared.llm.hedging import reset_hedgers
+    from shared.llm.regions import configure_region_pool
+    from shared.llm.resilience import reset_circuit_breakers
+    from shared.price_research.market_cache import configure_market_data_cache
+    from shared.simplified_ingestion import configure_duplicate_index, configure_isbn_catalog
+
+    configure_duplicate_index(None)
+    configure_isbn_catalog(None)
+    configure_market_data_cache(None)
+    reset_circuit_breakers()
+    reset_hedgers()
+    configure_region_pool(None)
+    yield
+    configure_duplicate_index(None)
+    configure_isbn_catalog(None)
+    configure_market_data_cache(None)
+    reset_circuit_breakers()
+    reset_hedgers()
+    configure_region_pool(None)
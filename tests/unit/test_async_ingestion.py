@@ -0,0 +1,82 @@
+"""
+Tests für die async Ingestion: mehrere Bücher laufen parallel in einem Event Loop.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from shared.simplified_ingestion import (
+    BookIngestionRequest,
+    IngestionConfig,
+    ingest_book_with_gemini,
+    ingest_book_with_retry,
+)
+from shared.simplified_ingestion import core
+
+MODEL_LATENCY_SECONDS = 0.3
+
+RESPONSE_JSON = {
+    "success": True,
+    "book_data": {"title": "Der Process", "authors": ["Franz Kafka"], "isbn_13": "9783596294312"},
+    "confidence": 0.9,
+    "sources_used": ["dnb.de"],
+}
+
+
+class StubModels:
+    """Simuliert client.aio.models mit fester Latenz."""
+
+    def __init__(self, latency: float, failures: int = 0):
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.calls <= self.failures:
+            raise RuntimeError("429 Resource has been exhausted")
+        return SimpleNamespace(text=json.dumps(RESPONSE_JSON), candidates=[])
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    models = StubModels(MODEL_LATENCY_SECONDS)
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+    return models
+
+
+def _request(i: int) -> BookIngestionRequest:
+    return BookIngestionRequest(book_id=f"book-{i}", user_id="user-1", image_urls=[f"gs://bucket/{i}.jpg"])
+
+
+CONFIG = IngestionConfig(normalize_gcs_images=False, retry_delay_seconds=0.01)
+
+
+def test_concurrent_ingestions_take_max_not_sum_latency(stub_models):
+    n = 10
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(ingest_book_with_gemini(_request(i), CONFIG) for i in range(n)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+
+    assert stub_models.calls == n
+    assert all(r.success and r.book_data.title == "Der Process" for r in results)
+    # Seriell wären es n * 0.3s = 3s
+    assert elapsed < MODEL_LATENCY_SECONDS * 3
+
+
+def test_retry_awaits_async_call(stub_models):
+    stub_models.failures = 1
+
+    result = asyncio.run(ingest_book_with_retry(_request(0), CONFIG))
+
+    assert result.success
+    assert stub_models.calls == 2
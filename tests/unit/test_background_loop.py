@@ -0,0 +1,93 @@
+"""
+Tests für die persistente Hintergrund-Loop (Ersatz für asyncio.run pro Event).
+"""
+
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from shared.runtime import BackgroundLoop, configure_background_loop, get_background_loop, run_coroutine
+
+
+@pytest.fixture(autouse=True)
+def _fresh_loop():
+    configure_background_loop(None)
+    yield
+    configure_background_loop(None)
+
+
+def test_loop_and_loop_bound_state_survive_across_invocations():
+    class Session:
+        """Steht für einen an die Loop gebundenen Transport (aiohttp, genai aio, gRPC)."""
+        instances = 0
+
+        def __init__(self):
+            Session.instances += 1
+            self.loop = asyncio.get_running_loop()
+
+    sessions = {}
+
+    async def handler():
+        session = sessions.get("default")
+        if session is None or session.loop is not asyncio.get_running_loop():
+            session = sessions["default"] = Session()
+        await asyncio.sleep(0)
+        return session.loop
+
+    loops = {run_coroutine(handler()) for _ in range(5)}
+
+    assert len(loops) == 1 and not loops.pop().is_closed()
+    assert Session.instances == 1
+
+
+def test_exceptions_propagate_and_concurrent_callers_share_the_loop():
+    async def fail():
+        raise ValueError("Missing required fields")
+
+    with pytest.raises(ValueError):
+        run_coroutine(fail())
+
+    async def slow(n):
+        await asyncio.sleep(0.05)
+        return n
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda n: run_coroutine(slow(n)), range(8)))
+    assert results == list(range(8))
+
+
+def test_timeout_cancels_and_reentry_is_rejected():
+    background = BackgroundLoop("test-loop")
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(TimeoutError):
+        background.run(hang(), timeout=0.05)
+
+    async def nested():
+        return background.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        background.run(nested())
+
+    background.run(asyncio.sleep(0.01))
+    assert cancelled == [True]
+    background.stop()
+    assert not background.running
+
+
+def test_configure_none_stops_the_default_loop():
+    run_coroutine(asyncio.sleep(0))
+    default = get_background_loop()
+    assert default.running
+
+    configure_background_loop(None)
+
+    assert not default.running and get_background_loop() is not default
@@ -0,0 +1,127 @@
+"""
+Tests für den lokalen Barcode/ISBN-Fast-Path vor dem Gemini Call.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from shared.simplified_ingestion import (
+    BookData,
+    BookIngestionRequest,
+    BookIngestionResult,
+    IngestionConfig,
+    get_isbn_catalog,
+    ingest_book_with_gemini,
+    is_valid_isbn13,
+    normalize_isbn,
+)
+from shared.simplified_ingestion import core
+from shared.simplified_ingestion.isbn import isbn_from_barcodes
+
+zxingcpp = pytest.importorskip("zxingcpp")
+np = pytest.importorskip("numpy")
+
+ISBN = "9783518459201"
+
+
+def test_isbn_checksums():
+    assert is_valid_isbn13(ISBN)
+    assert not is_valid_isbn13("9783518459202")
+    assert normalize_isbn("3-518-45920-1") == ISBN
+    assert normalize_isbn("ISBN 978-3-518-45920-1") == ISBN
+    assert normalize_isbn("3-518-45920-4") is None
+    # Preis-EAN (kein Buchland-Präfix) und ungültige Prüfziffer werden übersprungen
+    assert isbn_from_barcodes(["4006381333931", "9783518459202", ISBN]) == ISBN
+
+
+def _back_cover(path, code=ISBN):
+    """Rückseiten-Foto mit Barcode unten rechts."""
+    barcode = Image.fromarray(np.asarray(zxingcpp.create_barcode(code, zxingcpp.BarcodeFormat.EAN13).to_image(scale=4)))
+    img = Image.effect_noise((1600, 2200), 20).convert("RGB")
+    img.paste(Image.new("RGB", (barcode.width + 80, barcode.height + 80), "white"), (1000, 1800))
+    img.paste(barcode.convert("RGB"), (1040, 1840))
+    img.save(path, format="JPEG", quality=90)
+    return path.as_uri()
+
+
+class RecordingModels:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, model, contents, config):
+        self.prompts.append(contents[-1])
+        await asyncio.sleep(0.5)
+        payload = {"book_data": {"title": "Der Process", "authors": ["Franz Kafka"], "isbn_13": "9783596294312"}, "confidence": 0.9}
+        return SimpleNamespace(text=json.dumps(payload), candidates=[])
+
+
+@pytest.fixture
+def models(monkeypatch):
+    stub = RecordingModels()
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=stub)))
+    return stub
+
+
+CONFIG = IngestionConfig(enable_grounding=False, enable_duplicate_detection=False)
+
+
+def test_barcode_isbn_goes_into_prompt_and_overrides_model(tmp_path, models):
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[_back_cover(tmp_path / "back.jpg")])
+
+    result = asyncio.run(ingest_book_with_gemini(request, CONFIG))
+
+    assert ISBN in models.prompts[0]
+    assert result.barcode_isbn == ISBN
+    assert result.book_data.isbn_13 == ISBN
+    assert result.image_fetch_timings[0].barcodes == [ISBN]
+    assert get_isbn_catalog().get(ISBN).source_book_id == "book-1"
+
+
+def test_known_isbn_skips_gemini_call(tmp_path, models):
+    first = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[_back_cover(tmp_path / "a.jpg")])
+    second = BookIngestionRequest(book_id="book-2", user_id="user-2", image_urls=[_back_cover(tmp_path / "b.jpg")])
+
+    asyncio.run(ingest_book_with_gemini(first, CONFIG))
+    start = time.perf_counter()
+    result = asyncio.run(ingest_book_with_gemini(second, CONFIG))
+    elapsed = time.perf_counter() - start
+
+    assert len(models.prompts) == 1
+    assert result.book_data.title == "Der Process"
+    assert result.barcode_isbn == ISBN
+    assert elapsed < 0.5
+
+
+def test_barcode_scan_can_be_disabled(tmp_path, models):
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[_back_cover(tmp_path / "back.jpg")])
+    config = IngestionConfig(enable_grounding=False, enable_duplicate_detection=False, enable_barcode_scan=False)
+
+    result = asyncio.run(ingest_book_with_gemini(request, config))
+
+    assert result.barcode_isbn is None
+    assert ISBN not in models.prompts[0]
+
+
+def test_barcode_isbn_beats_cover_duplicate_of_another_edition(tmp_path, models, monkeypatch):
+    other_edition = BookIngestionResult(
+        success=True,
+        book_data=BookData(title="Der Process", isbn_13="9783596294312"),
+        confidence=0.95,
+        processing_time_ms=1.0,
+        duplicate_of="book-0",
+    )
+    monkeypatch.setattr(core, "find_duplicate_result", lambda *args, **kwargs: other_edition.model_copy(deep=True))
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[_back_cover(tmp_path / "back.jpg")])
+    config = IngestionConfig(enable_grounding=False, enable_duplicate_detection=True)
+
+    result = asyncio.run(ingest_book_with_gemini(request, config))
+
+    # Gleiches Cover, andere ISBN: das Modell identifiziert, die Barcode-ISBN bleibt
+    assert len(models.prompts) == 1
+    assert result.duplicate_of is None
+    assert result.book_data.isbn_13 == ISBN
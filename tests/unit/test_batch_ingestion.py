@@ -0,0 +1,84 @@
+"""
+Tests für ingest_books_batch(): begrenzte Parallelität, Streaming, Fehler-Isolation.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_books_batch
+from shared.simplified_ingestion import core
+
+RESPONSE_JSON = {"book_data": {"title": "Momo", "authors": ["Michael Ende"]}, "confidence": 0.85}
+
+
+class CountingModels:
+    """Stub für client.aio.models, zählt gleichzeitige Calls."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, contents, config):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+            if any("broken" in getattr(getattr(p, "file_data", None), "file_uri", "") for p in contents):
+                raise ValueError("400 Invalid image")
+            return SimpleNamespace(text=json.dumps(RESPONSE_JSON), candidates=[])
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def models(monkeypatch):
+    stub = CountingModels()
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=stub)))
+    return stub
+
+
+CONFIG = IngestionConfig(normalize_gcs_images=False)
+
+
+def _requests(n: int, broken=()):
+    return [
+        BookIngestionRequest(
+            book_id=f"book-{i}",
+            user_id="estate-1",
+            image_urls=[f"gs://bucket/{'broken' if i in broken else 'ok'}-{i}.jpg"],
+        )
+        for i in range(n)
+    ]
+
+
+def test_batch_bounds_concurrency_and_isolates_failures(models):
+    async def run():
+        return [o async for o in ingest_books_batch(_requests(20, broken={3, 11}), concurrency=4, config=CONFIG)]
+
+    outcomes = asyncio.run(run())
+
+    assert len(outcomes) == 20
+    assert models.max_in_flight == 4
+    failed = {o.book_id for o in outcomes if not o.success}
+    assert failed == {"book-3", "book-11"}
+    assert all(o.error.error_type == "ValueError" for o in outcomes if not o.success)
+    assert all(o.result.book_data.title == "Momo" for o in outcomes if o.success)
+
+
+def test_batch_streams_results_and_stops_on_break(models):
+    async def run():
+        seen = []
+        async for outcome in ingest_books_batch(_requests(50), concurrency=5, config=CONFIG):
+            seen.append(outcome)
+            if len(seen) == 3:
+                break
+        await asyncio.sleep(0.1)
+        return seen
+
+    seen = asyncio.run(run())
+
+    assert len(seen) == 3
+    assert models.in_flight == 0
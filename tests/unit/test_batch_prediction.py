@@ -0,0 +1,133 @@
+"""
+Tests für den Offline Batch-Prediction Modus mit dem dateibasierten Job-Service.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from shared.simplified_ingestion import (
+    BookIngestionRequest,
+    IngestionConfig,
+    LocalBatchJobService,
+    run_batch_prediction,
+)
+from shared.simplified_ingestion.batch_prediction import (
+    INGESTION_KEY_LABEL,
+    build_batch_request,
+    ingestion_key,
+    write_outcomes_to_firestore,
+)
+
+
+def _response(book_data, confidence):
+    text = "Ergebnis:\n```json\n" + json.dumps({"book_data": book_data, "confidence": confidence}) + "\n```"
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 1200, "candidatesTokenCount": 150},
+    }
+
+
+def _requests(n: int):
+    return [
+        BookIngestionRequest(book_id=f"Book{i}", user_id="estate-1", image_urls=[f"gs://bucket/book-{i}.jpg"])
+        for i in range(n)
+    ]
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def update(self, ref, data):
+        self.ops.append((ref, data))
+
+    def commit(self):
+        self.db.commits.append(self.ops)
+        for ref, data in self.ops:
+            self.db.docs[ref] = data
+
+
+class FakeRef:
+    def __init__(self, path):
+        self.path = path
+
+    def collection(self, name):
+        return FakeRef(self.path + (name,))
+
+    def document(self, name):
+        return FakeRef(self.path + (name,))
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __eq__(self, other):
+        return self.path == other.path
+
+
+class FakeDb(FakeRef):
+    def __init__(self):
+        super().__init__(())
+        self.docs = {}
+        self.commits = []
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def test_batch_request_uses_same_prompts_and_file_uris():
+    request = _requests(1)[0]
+    line = asyncio.run(build_batch_request(request, IngestionConfig(enable_grounding=False)))
+
+    body = line["request"]
+    parts = body["contents"][0]["parts"]
+    assert parts[0] == {"fileData": {"fileUri": "gs://bucket/book-0.jpg", "mimeType": "image/jpeg"}}
+    assert "text" in parts[-1]
+    assert body["systemInstruction"]["parts"][0]["text"]
+    assert body["generationConfig"]["responseMimeType"] == "application/json"
+    assert body["generationConfig"]["responseSchema"]["type"] == "OBJECT"
+    assert "tools" not in body
+    assert body["labels"][INGESTION_KEY_LABEL] == ingestion_key(request)
+
+
+def test_run_batch_prediction_parses_output_and_writes_in_bulk(tmp_path):
+    def responder(request_body):
+        key = request_body["labels"][INGESTION_KEY_LABEL]
+        if key == ingestion_key(requests[2]):
+            raise RuntimeError("RESOURCE_EXHAUSTED")
+        if key == ingestion_key(requests[3]):
+            return _response({"title": "Unsicher", "authors": []}, 40)
+        return _response({"title": "Momo", "authors": ["Michael Ende"], "isbn_13": "9783522202107"}, 0.9)
+
+    requests = _requests(5)
+    db = FakeDb()
+    service = LocalBatchJobService(str(tmp_path), responder)
+
+    outcomes = asyncio.run(run_batch_prediction(requests, service, db=db, poll_interval_seconds=0))
+
+    by_id = {o.book_id: o for o in outcomes}
+    assert len(outcomes) == 5
+    assert by_id["Book0"].result.book_data.title == "Momo"
+    assert by_id["Book0"].result.confidence == pytest.approx(0.9)
+    assert by_id["Book3"].result.confidence == pytest.approx(0.4)
+    assert by_id["Book2"].error.retry_possible
+    assert "RESOURCE_EXHAUSTED" in by_id["Book2"].error.error_message
+
+    docs = {ref.path[-1]: data for ref, data in db.docs.items()}
+    assert docs["Book0"]["status"] == "ingested"
+    assert docs["Book0"]["isbn"] == "9783522202107"
+    assert docs["Book3"]["status"] == "needs_review"
+    assert docs["Book2"]["status"] == "analysis_failed"
+    assert len(db.commits) == 1
+
+
+def test_firestore_writes_are_chunked(tmp_path):
+    requests = _requests(7)
+    service = LocalBatchJobService(str(tmp_path), lambda body: _response({"title": "X", "authors": []}, 0.8))
+    outcomes = asyncio.run(run_batch_prediction(requests, service, poll_interval_seconds=0))
+
+    db = FakeDb()
+    assert write_outcomes_to_firestore(db, outcomes, max_batch_size=3) == 7
+    assert [len(ops) for ops in db.commits] == [3, 3, 1]
@@ -0,0 +1,76 @@
+"""
+Tests für die gepackte Preisanalyse (shared.price_research.batch_pricing).
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from shared.apis.price_grounding import MarketQueryResult, PriceData
+from shared.llm.usage import LLMUsage
+from shared.price_research.batch_pricing import BatchPricingConfig, PricingBatchItem, pack_pricing_batches
+from shared.price_research.orchestrator import PriceResearchOrchestrator
+
+
+def item(book_id, prompt_chars=400):
+    market = MarketQueryResult(offers=[], confidence_score=0.5, reasoning="")
+    return PricingBatchItem(book_id=book_id, uid="u1", title=f"Titel {book_id}", metadata={}, market_data=market, prompt="x" * prompt_chars)
+
+
+def test_batch_size_adapts_to_the_token_budget():
+    items = [item(f"b{i}") for i in range(10)]  # je ~101 Tokens
+
+    assert [len(b) for b in pack_pricing_batches(items, BatchPricingConfig(max_prompt_tokens=350))] == [3, 3, 3, 1]
+    # Antwortbudget: 2000 / 400 = 5 Bücher pro Call
+    assert [len(b) for b in pack_pricing_batches(items, BatchPricingConfig(max_output_tokens=2000))] == [5, 5]
+    # Ein Buch über dem Budget bekommt einen eigenen Batch
+    assert [len(b) for b in pack_pricing_batches([item("big", 4000), item("small")], BatchPricingConfig(max_prompt_tokens=500))] == [1, 1]
+
+
+def analysis_json(book_id, price):
+    return {
+        "book_id": book_id, "recommended_price": price, "min_price_limit": 2.5, "strategy_used": "balanced",
+        "confidence": 0.6, "competitor_count": 2, "market_price_range": {"min_price": 5, "max_price": 30, "avg_price": 12},
+        "reasoning": "dünne Datenlage", "internal_notes": None,
+    }
+
+
+def test_sparse_books_share_one_call_and_are_split_back():
+    orchestrator = PriceResearchOrchestrator(db=None, grounding_client=None)
+    stored, prompts = {}, []
+    sparse = MarketQueryResult(offers=[PriceData("A", 12.0, "Gut"), PriceData("B", 30.0, "Wie neu")], confidence_score=0.5, reasoning="")
+    crowded = MarketQueryResult(offers=[PriceData(str(i), 9.0 + i * 0.2, "Gut") for i in range(8)], confidence_score=0.9, reasoning="")
+
+    async def metadata(uid, book_id):
+        return {"title": f"Titel {book_id}", "isbn": None}
+
+    async def market_data(isbn, title, metadata):
+        return crowded if title.endswith("engine") else sparse
+
+    async def generate(prompt, config, description):
+        prompts.append(prompt)
+        # Modell vergisst das letzte Buch → wird einzeln nachgeholt
+        ids = [line.split()[2] for line in prompt.splitlines() if line.startswith("=== BUCH")]
+        if ids:
+            body = {"analyses": [analysis_json(book_id, 10.0 + n) for n, book_id in enumerate(ids[:-1])]}
+        else:
+            body = {k: v for k, v in analysis_json("-", 99.0).items() if k != "book_id"}
+        return SimpleNamespace(text=json.dumps(body)), LLMUsage(model="gemini-2.5-flash", prompt_tokens=900, candidates_tokens=300, cost_eur=0.003)
+
+    async def store(uid, book_id, analysis, data):
+        stored[book_id] = analysis
+
+    orchestrator._fetch_book_metadata = metadata
+    orchestrator._get_market_data = market_data
+    orchestrator._generate_analysis = generate
+    orchestrator._store_analysis_result = store
+
+    books = [{"book_id": f"b{i}", "uid": "u1"} for i in range(4)] + [{"book_id": "engine", "uid": "u1"}]
+    results = asyncio.run(orchestrator.research_and_price_batch(books))
+
+    assert set(results) == set(stored) == {"b0", "b1", "b2", "b3", "engine"}
+    assert len(prompts) == 2  # ein gepackter Call für 4 Bücher + ein Einzel-Nachholer
+    assert [results[f"b{i}"].recommended_price for i in range(3)] == [10.0, 11.0, 12.0]
+    assert results["b3"].recommended_price == 99.0
+    assert results["b0"].usage.prompt_tokens == 225  # Anteil am gepackten Call
+    assert "pricing_engine" in results["engine"].internal_notes
@@ -0,0 +1,52 @@
+"""
+Tests für die einheitliche Zustandsskala (shared.conditions).
+"""
+
+import pytest
+
+from shared.conditions import ABAA_GRADES, ABAA_PRICE_FACTORS, CONDITION_PRICE_FACTORS, CONDITION_RANK, Condition, normalize_condition
+from shared.price_research import models
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Wie neu", Condition.LIKE_NEW),
+    ("Gebraucht - Sehr gut", Condition.VERY_GOOD),
+    ("sehr gut erhalten, Schutzumschlag fehlt", Condition.VERY_GOOD),
+    ("Gut", Condition.GOOD),
+    ("Akzeptabel", Condition.ACCEPTABLE),
+    ("Neu / OVP", Condition.NEW),
+    ("Mäßig", Condition.ACCEPTABLE),
+    ("Gebraucht", Condition.GOOD),
+    ("like_new", Condition.LIKE_NEW),
+    # ABAA-Grades des Condition Assessors
+    ("Fine", Condition.LIKE_NEW),
+    ("Very Fine", Condition.VERY_GOOD),
+    ("Fair", Condition.ACCEPTABLE),
+    ("Poor", Condition.POOR),
+])
+def test_vocabularies_map_to_the_canonical_scale(text, expected):
+    assert normalize_condition(text).condition is expected
+
+
+def test_typos_use_the_fuzzy_fallback_and_noise_stays_unknown():
+    match = normalize_condition("Sehr gutt")
+    assert match.condition is Condition.VERY_GOOD and match.method == "fuzzy"
+    assert normalize_condition("Akzeptbel").condition is Condition.ACCEPTABLE
+    assert normalize_condition("Taschenbuch, 240 Seiten") is None
+    assert normalize_condition("") is None and normalize_condition(None) is None
+
+
+def test_scale_is_ordered_and_shared_with_pricing_models():
+    assert models.Condition is Condition
+    by_rank = sorted(Condition, key=CONDITION_RANK.get)
+    factors = [CONDITION_PRICE_FACTORS[c] for c in by_rank]
+    assert factors == sorted(factors)
+    # Offers und unser Gutachten sind direkt vergleichbar
+    assert normalize_condition("Sehr gut").rank > normalize_condition(ABAA_GRADES[Condition.GOOD]).rank
+
+
+def test_abaa_override_factors_cover_every_grade():
+    # Dashboard-Override: Fine bleibt 1.0, Very Fine 0.85 (unabhängig von den Faktoren der feineren Skala)
+    assert set(ABAA_PRICE_FACTORS) == set(ABAA_GRADES.values())
+    assert ABAA_PRICE_FACTORS[ABAA_GRADES[normalize_condition("Fine").condition]] == 1.0
+    assert ABAA_PRICE_FACTORS[ABAA_GRADES[normalize_condition("sehr gut").condition]] == 0.85
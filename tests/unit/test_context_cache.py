@@ -0,0 +1,162 @@
+"""
+Tests für das Context Caching statischer Prompt-Präfixe.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.genai import types
+
+from shared.llm import PromptPrefix, PromptPrefixCache
+
+LONG_INSTRUCTIONS = "Du bist ein Experte für Bücher. " * 400  # ~3200 Tokens geschätzt
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCaches:
+    def __init__(self, clock, existing=()):
+        self.clock = clock
+        self.created = []
+        self.updated = []
+        self.existing = list(existing)
+
+    def _cached(self, name, display_name, ttl):
+        expire = datetime.fromtimestamp(self.clock() + int(ttl.rstrip("s")), tz=timezone.utc)
+        return types.CachedContent(name=name, display_name=display_name, expire_time=expire)
+
+    async def create(self, model, config):
+        self.created.append(config)
+        return self._cached(f"cachedContents/{len(self.created)}", config.display_name, config.ttl)
+
+    async def update(self, name, config):
+        self.updated.append(name)
+        return self._cached(name, None, config.ttl)
+
+    async def list(self):
+        async def pager():
+            for cached in self.existing:
+                yield cached
+        return pager()
+
+
+class FakeModels:
+    def __init__(self, fail_cached_once=False):
+        self.calls = []
+        self.fail_cached_once = fail_cached_once
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append((contents, config))
+        if config.cached_content and self.fail_cached_once:
+            self.fail_cached_once = False
+            raise RuntimeError(f"404 NOT_FOUND: CachedContent {config.cached_content} not found")
+        cached = 3000 if config.cached_content else 0
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=3300, cached_content_token_count=cached)
+        return SimpleNamespace(text="{}", usage_metadata=usage)
+
+
+class FakeClient:
+    def __init__(self, clock, existing=(), fail_cached_once=False):
+        self.aio = SimpleNamespace(caches=FakeCaches(clock, existing), models=FakeModels(fail_cached_once))
+
+
+def _prefix(instructions=LONG_INSTRUCTIONS):
+    return PromptPrefix(key="ingestion", model="gemini-2.5-flash", system_instruction=instructions, contents=["Task"])
+
+
+CONFIG = types.GenerateContentConfig(temperature=0.1, system_instruction="wird ersetzt")
+
+
+def test_prefix_is_created_once_and_referenced():
+    clock = Clock()
+    cache = PromptPrefixCache(ttl_seconds=3600, refresh_margin_seconds=300, clock=clock)
+    client = FakeClient(clock)
+
+    async def run():
+        for _ in range(3):
+            await cache.generate_content(client, _prefix(), ["Bild"], CONFIG)
+
+    asyncio.run(run())
+
+    assert len(client.aio.caches.created) == 1
+    assert client.aio.caches.created[0].system_instruction == LONG_INSTRUCTIONS
+    contents, config = client.aio.models.calls[-1]
+    assert contents == ["Bild"]
+    assert config.cached_content == "cachedContents/1"
+    assert config.system_instruction is None
+    stats = cache.summary()["ingestion"]
+    assert stats["cached_requests"] == 3
+    assert stats["cached_tokens"] == 9000
+    assert stats["uncached_tokens"] == 900
+
+
+def test_prefix_is_refreshed_before_expiry():
+    clock = Clock()
+    cache = PromptPrefixCache(ttl_seconds=3600, refresh_margin_seconds=300, clock=clock)
+    client = FakeClient(clock)
+
+    async def run():
+        await cache.get_cached_content(client, _prefix())
+        clock.now += 3400  # noch 200s gültig, innerhalb der Refresh-Marge
+        return await cache.get_cached_content(client, _prefix())
+
+    assert asyncio.run(run()) == "cachedContents/1"
+    assert client.aio.caches.updated == ["cachedContents/1"]
+    assert len(client.aio.caches.created) == 1
+
+
+def test_existing_cache_of_other_instance_is_reused():
+    clock = Clock()
+    prefix = _prefix()
+    existing = types.CachedContent(
+        name="cachedContents/other",
+        display_name=prefix.display_name,
+        expire_time=datetime.fromtimestamp(clock() + 1800, tz=timezone.utc),
+    )
+    client = FakeClient(clock, existing=[existing])
+    cache = PromptPrefixCache(clock=clock)
+
+    assert asyncio.run(cache.get_cached_content(client, prefix)) == "cachedContents/other"
+    assert client.aio.caches.created == []
+
+
+def test_small_prefix_is_sent_inline():
+    clock = Clock()
+    cache = PromptPrefixCache(clock=clock)
+    client = FakeClient(clock)
+
+    asyncio.run(cache.generate_content(client, _prefix("Kurz."), ["Bild"], CONFIG))
+
+    assert client.aio.caches.created == []
+    contents, config = client.aio.models.calls[0]
+    assert contents[0].parts[0].text == "Task"
+    assert contents[1:] == ["Bild"]
+    assert config.system_instruction == "Kurz."
+    assert config.cached_content is None
+    assert cache.summary()["ingestion"]["cached_token_ratio"] == 0.0
+
+
+def test_vanished_cache_falls_back_to_full_prompt():
+    clock = Clock()
+    cache = PromptPrefixCache(clock=clock)
+    client = FakeClient(clock, fail_cached_once=True)
+
+    async def run():
+        await cache.generate_content(client, _prefix(), ["Bild"], CONFIG)
+        await cache.generate_content(client, _prefix(), ["Bild"], CONFIG)
+
+    asyncio.run(run())
+
+    first_retry = client.aio.models.calls[1][1]
+    assert first_retry.cached_content is None
+    assert first_retry.system_instruction == LONG_INSTRUCTIONS
+    # Nach dem Fehler wird der Cache neu angelegt
+    assert len(client.aio.caches.created) == 2
+    assert client.aio.models.calls[2][1].cached_content == "cachedContents/2"
@@ -0,0 +1,172 @@
+"""
+Tests für die Perceptual-Hash Duplikat-Erkennung: Index-Lookup, Scopes,
+Persistenz und das Überspringen des Gemini Calls bei bekannten Covern.
+"""
+
+import asyncio
+import io
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from PIL import Image
+
+from shared.image_processing.perceptual_hash import ImageHashes, compute_image_hashes, hamming_distance, hash_to_hex
+from shared.simplified_ingestion import (
+    BookData,
+    BookIngestionRequest,
+    IngestionConfig,
+    JsonlHashStore,
+    PerceptualHashIndex,
+    get_duplicate_index,
+    ingest_book_with_gemini,
+)
+from shared.simplified_ingestion import core
+
+
+def _entry(index, user_id, book_id, hashes, title="Momo"):
+    return index.make_entry(user_id, book_id, hashes, book_data=BookData(title=title), confidence=0.9)
+
+
+def _flip(value: int, bits: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+def test_lookup_matches_brute_force_at_100k_entries():
+    rng = random.Random(42)
+    index = PerceptualHashIndex(max_distance=6)
+    template = _entry(index, "user-0", "book-0", ImageHashes(dhash=0, phash=0))
+    stored = []
+    for i in range(100_000):
+        hashes = ImageHashes(dhash=rng.getrandbits(64), phash=rng.getrandbits(64))
+        stored.append(hashes)
+        # model_copy statt 100k validierter Einträge hält den Test schnell
+        index._insert(template.model_copy(update={
+            "user_id": f"user-{i % 50}",
+            "book_id": f"book-{i}",
+            "dhash": hash_to_hex(hashes.dhash),
+            "phash": hash_to_hex(hashes.phash),
+        }))
+
+    queries = []
+    for i in rng.sample(range(len(stored)), 200):
+        original = stored[i]
+        queries.append((i, ImageHashes(dhash=_flip(original.dhash, 5, rng), phash=_flip(original.phash, 3, rng))))
+
+    start = time.perf_counter()
+    matches = [index.find(q, user_id="other", include_global=True) for _, q in queries]
+    avg_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    for (i, _), match in zip(queries, matches):
+        assert match is not None and match.entry.book_id == f"book-{i}"
+    print(f"avg lookup at 100k entries: {avg_ms:.3f}ms")
+    assert avg_ms < 20
+    assert index.stats.hit_rate == 1.0
+    assert index.stats.candidates_checked < len(queries) * 5_000
+
+    # Zufällige Hashes sind im Mittel 32 Bit entfernt -> kein Treffer
+    miss = ImageHashes(dhash=rng.getrandbits(64), phash=rng.getrandbits(64))
+    assert index.find(miss, user_id="other", include_global=True) is None
+    assert index.stats.misses == 1
+
+
+def test_tenant_scope_and_global_scope():
+    index = PerceptualHashIndex(max_distance=4)
+    hashes = ImageHashes(dhash=0x0F0F0F0F0F0F0F0F, phash=0x123456789ABCDEF0)
+    index.add(_entry(index, "tenant-a", "book-1", hashes))
+
+    assert index.find(hashes, user_id="tenant-a").scope == "tenant-a"
+    assert index.find(hashes, user_id="tenant-b") is None
+    assert index.find(hashes, user_id="tenant-b", include_global=True).scope == "*"
+    # Re-Analyse desselben Buchs soll nicht sich selbst treffen
+    assert index.find(hashes, user_id="tenant-a", exclude_book_id="book-1") is None
+    assert index.stats.to_dict()["tenant_hits"] == 1
+    assert index.stats.to_dict()["global_hits"] == 1
+
+
+def test_reidentified_book_with_new_cover_drops_the_old_hashes():
+    index = PerceptualHashIndex(max_distance=4)
+    old = ImageHashes(dhash=0x0F0F0F0F0F0F0F0F, phash=0x123456789ABCDEF0)
+    new = ImageHashes(dhash=0xF0F0F0F0F0F0F0F0, phash=0x0FEDCBA987654321)
+    index.add(_entry(index, "tenant-a", "book-1", old))
+    index.add(_entry(index, "tenant-a", "book-1", new, title="Momo (2. Auflage)"))
+
+    assert len(index) == 1
+    assert index.find(old, user_id="tenant-a", include_global=True) is None
+    assert index.find(new, user_id="tenant-a").entry.book_data.title == "Momo (2. Auflage)"
+
+
+def test_jsonl_store_persists_entries(tmp_path):
+    store = JsonlHashStore(str(tmp_path / "hashes.jsonl"))
+    hashes = ImageHashes(dhash=(1 << 63) | 5, phash=7)
+    index = PerceptualHashIndex(store=store)
+    index.add(_entry(index, "tenant-a", "book-1", hashes, title="Der Process"))
+
+    reloaded = PerceptualHashIndex(store=JsonlHashStore(str(tmp_path / "hashes.jsonl")))
+    match = reloaded.find(hashes, user_id="tenant-a")
+    assert len(reloaded) == 1
+    assert match.entry.book_data.title == "Der Process"
+
+
+def _cover(path, quality=90, scale=1.0):
+    rng = random.Random(7)
+    img = Image.new("RGB", (600, 900), (240, 230, 200))
+    for _ in range(40):
+        x, y = rng.randrange(600), rng.randrange(900)
+        img.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, x + 120, y + 80))
+    if scale != 1.0:
+        img = img.resize((int(600 * scale), int(900 * scale)))
+    img.save(path, format="JPEG", quality=quality)
+    return path.as_uri()
+
+
+def test_hashes_survive_reencoding(tmp_path):
+    _cover(tmp_path / "a.jpg")
+    _cover(tmp_path / "b.jpg", quality=50, scale=0.6)
+    original = compute_image_hashes((tmp_path / "a.jpg").read_bytes())
+    copy = compute_image_hashes((tmp_path / "b.jpg").read_bytes())
+    other = compute_image_hashes(_noise_jpeg())
+    assert original.distance(copy) <= 6
+    assert hamming_distance(original.dhash, other.dhash) > 6
+
+
+def _noise_jpeg():
+    buffer = io.BytesIO()
+    Image.effect_noise((600, 900), 80).convert("RGB").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class CountingModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        payload = {"book_data": {"title": "Momo", "authors": ["Michael Ende"]}, "confidence": 0.9}
+        return SimpleNamespace(text=json.dumps(payload), candidates=[])
+
+
+def test_known_cover_skips_gemini_call(tmp_path, monkeypatch):
+    models = CountingModels()
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+    config = IngestionConfig(enable_grounding=False)
+
+    first = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[_cover(tmp_path / "1.jpg")])
+    second = BookIngestionRequest(
+        book_id="book-2", user_id="user-1", image_urls=[_cover(tmp_path / "2.jpg", quality=60, scale=0.8)]
+    )
+    other_tenant = BookIngestionRequest(book_id="book-3", user_id="user-2", image_urls=first.image_urls)
+
+    result1 = asyncio.run(ingest_book_with_gemini(first, config))
+    result2 = asyncio.run(ingest_book_with_gemini(second, config))
+    result3 = asyncio.run(ingest_book_with_gemini(other_tenant, config))
+
+    assert models.calls == 2
+    assert result1.duplicate_of is None
+    assert result2.duplicate_of == "book-1"
+    assert result2.book_data.title == "Momo"
+    assert result3.duplicate_of is None
+    assert get_duplicate_index().stats.tenant_hits == 1
@@ -0,0 +1,130 @@
+"""
+Tests für Hedged Requests (shared.llm.hedging) und deren Einsatz in der Ingestion.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from shared.llm.hedging import HedgePolicy, Hedger, get_hedger
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_gemini
+from shared.simplified_ingestion import core
+
+POLICY = HedgePolicy(enabled=True, percentile=0.9, min_samples=5, min_delay_seconds=0.02, max_extra_ratio=0.5)
+
+
+def _warm_up(hedger: Hedger, samples: int = 10, latency_ms: float = 20.0) -> None:
+    for _ in range(samples):
+        hedger.stats.record(latency_ms, latency_ms, hedged=False, hedge_won=False)
+        hedger._track_call(False)
+
+
+def _after(seconds, value, log=None, error=None):
+    async def run():
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(f"cancelled {value}")
+            raise
+        if error:
+            raise error
+        return value
+    return run
+
+
+def test_no_hedge_without_latency_history():
+    hedger = Hedger("test", POLICY)
+
+    result = asyncio.run(hedger.call(_after(0.05, "primary"), hedge=_after(0.0, "hedge")))
+
+    assert result == "primary"
+    assert hedger.stats.hedged == 0
+    assert hedger.hedge_delay() is None
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    hedger = Hedger("test", POLICY)
+    _warm_up(hedger)
+    log = []
+
+    result = asyncio.run(hedger.call(_after(1.0, "primary", log), hedge=_after(0.0, "hedge", log)))
+
+    assert result == "hedge"
+    assert log == ["cancelled primary"]
+    summary = hedger.summary()
+    assert summary["hedged"] == 1 and summary["hedge_wins"] == 1
+    # Ohne Hedge hätte der Call mindestens bis zum Abbruch gedauert
+    assert summary["p99_unhedged_ms"] >= summary["p99_ms"]
+
+
+def test_failed_request_does_not_abort_the_other():
+    hedger = Hedger("test", POLICY)
+    _warm_up(hedger)
+
+    # Erste Anfrage scheitert nach dem Hedge: die Zusatzanfrage liefert trotzdem
+    result = asyncio.run(hedger.call(
+        _after(0.05, "primary", error=RuntimeError("503 UNAVAILABLE")),
+        hedge=_after(0.08, "hedge"),
+    ))
+    assert result == "hedge"
+
+    # Scheitert die erste Anfrage vor der Hedge-Schwelle, wird nicht gehedged
+    with pytest.raises(ValueError):
+        asyncio.run(hedger.call(_after(0.0, "primary", error=ValueError("bad")), hedge=_after(0.0, "hedge")))
+    assert hedger.stats.hedged == 1
+
+
+def test_hedge_budget_caps_extra_requests():
+    hedger = Hedger("test", HedgePolicy(
+        enabled=True, percentile=0.5, min_samples=5, min_delay_seconds=0.01, max_extra_ratio=0.1
+    ))
+    _warm_up(hedger, samples=10, latency_ms=5.0)
+
+    async def run_all():
+        for _ in range(10):
+            await hedger.call(_after(0.03, "primary"), hedge=_after(0.0, "hedge"))
+
+    asyncio.run(run_all())
+
+    # 10% von bis zu 20 Calls im Fenster: höchstens zwei Zusatzanfragen
+    assert hedger.stats.hedged == 2
+    assert hedger.stats.budget_denied == 8
+
+
+def test_ingestion_hedges_slow_gemini_call(monkeypatch):
+    payload = {"book_data": {"title": "Der Process", "authors": ["Franz Kafka"]}, "confidence": 0.9}
+    calls = []
+
+    class Models:
+        async def generate_content(self, model, contents, config):
+            calls.append(model)
+            # Erste Anfrage hängt, die Zusatzanfrage antwortet sofort
+            await asyncio.sleep(5.0 if len(calls) == 1 else 0.0)
+            return types.GenerateContentResponse(candidates=[types.Candidate(
+                content=types.Content(role="model", parts=[types.Part(text=json.dumps(payload))])
+            )])
+
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=Models())))
+    config = IngestionConfig(
+        model="gemini-test",
+        normalize_gcs_images=False,
+        enable_duplicate_detection=False,
+        enable_barcode_scan=False,
+        enable_prompt_cache=False,
+        enable_hedging=True,
+        hedge_min_samples=5,
+    )
+    hedger = get_hedger("gemini_ingestion:gemini-test", core.build_hedge_policy(config))
+    _warm_up(hedger)
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+    # Hedge nach min_delay_seconds (1s), lange bevor die erste Anfrage antwortet
+    result = asyncio.run(asyncio.wait_for(ingest_book_with_gemini(request, config), timeout=3.0))
+
+    assert result.book_data.title == "Der Process"
+    assert calls == ["gemini-test", "gemini-test"]
+    assert hedger.stats.hedge_wins == 1
@@ -0,0 +1,95 @@
+"""
+Tests für shared.image_processing: Format-Erkennung, EXIF, Metadaten, Skalierung.
+"""
+
+import io
+
+from PIL import Image
+
+from shared.image_processing import (
+    ImageNormalizationConfig,
+    estimate_image_tokens,
+    mime_type_from_path,
+    normalize_image,
+    sniff_mime_type,
+)
+
+
+def _encode(img: Image.Image, fmt: str, **kwargs) -> bytes:
+    out = io.BytesIO()
+    img.save(out, format=fmt, **kwargs)
+    return out.getvalue()
+
+
+def test_sniff_mime_type():
+    assert sniff_mime_type(_encode(Image.new("RGB", (4, 4)), "JPEG")) == "image/jpeg"
+    assert sniff_mime_type(_encode(Image.new("RGB", (4, 4)), "PNG")) == "image/png"
+    assert sniff_mime_type(_encode(Image.new("RGB", (4, 4)), "WEBP")) == "image/webp"
+    assert sniff_mime_type(b"\x00\x00\x00\x18ftypheic\x00\x00") == "image/heic"
+    assert sniff_mime_type(b"garbage", default="application/octet-stream") == "application/octet-stream"
+    assert mime_type_from_path("gs://bucket/uploads/u/IMG_1.HEIC") == "image/heic"
+
+
+def test_large_image_is_downscaled_and_exif_applied_and_stripped():
+    img = Image.new("RGB", (4000, 3000), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotate 90 CW
+    exif[0x010F] = "PhoneMaker"
+    data = _encode(img, "JPEG", exif=exif, quality=95)
+
+    normalized = normalize_image(data, ImageNormalizationConfig(max_edge_px=1024))
+
+    assert normalized.mime_type == "image/jpeg"
+    assert (normalized.original_width, normalized.original_height) == (4000, 3000)
+    # Orientation 6 dreht Querformat in Hochformat
+    assert (normalized.width, normalized.height) == (768, 1024)
+    assert normalized.size_bytes < normalized.original_size_bytes
+    with Image.open(io.BytesIO(normalized.data)) as out:
+        assert out.size == (768, 1024)
+        assert len(out.getexif()) == 0
+
+
+def test_png_with_alpha_is_reencoded_as_jpeg():
+    img = Image.new("RGBA", (2000, 1000), (0, 0, 255, 128))
+    normalized = normalize_image(_encode(img, "PNG"), ImageNormalizationConfig(max_edge_px=512))
+
+    assert normalized.original_mime_type == "image/png"
+    assert normalized.mime_type == "image/jpeg"
+    assert (normalized.width, normalized.height) == (512, 256)
+
+
+def test_small_jpeg_is_passed_through_unchanged():
+    noise = Image.effect_noise((200, 300), 64).convert("RGB")
+    data = _encode(noise, "JPEG", quality=30)
+    normalized = normalize_image(data, ImageNormalizationConfig(max_edge_px=1024, jpeg_quality=95))
+
+    assert normalized.data == data
+    assert normalized.bytes_saved == 0
+
+
+def test_small_jpeg_passthrough_drops_exif_and_gps():
+    noise = Image.effect_noise((200, 300), 64).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    exif.get_ifd(0x8825)[2] = (52.0, 31.0, 12.0)  # GPSLatitude
+    data = _encode(noise, "JPEG", quality=30, exif=exif)
+    normalized = normalize_image(data, ImageNormalizationConfig(max_edge_px=1024, jpeg_quality=95))
+
+    assert normalized.size_bytes < len(data)
+    assert normalized.data.endswith(data[data.index(b"\xff\xda"):])  # Bilddaten unverändert
+    with Image.open(io.BytesIO(normalized.data)) as out:
+        assert len(out.getexif()) == 0
+
+
+def test_undecodable_data_falls_back_to_original():
+    data = b"\x89PNG\r\n\x1a\n-truncated"
+    normalized = normalize_image(data)
+
+    assert normalized.data == data
+    assert normalized.mime_type == "image/png"
+
+
+def test_estimate_image_tokens():
+    assert estimate_image_tokens(300, 300) == 258
+    assert estimate_image_tokens(768, 1024) == 2 * 258
+    assert estimate_image_tokens(3024, 4032) == 4 * 6 * 258
@@ -0,0 +1,57 @@
+"""
+Tests für den linearen JSON-Extraktor (shared.llm.json_extraction) und seine Aufrufer.
+"""
+
+import json
+import time
+
+import pytest
+
+from shared.apis.price_grounding import PriceGroundingClient
+from shared.llm import extract_last_json_object, parse_last_json_object
+from shared.simplified_ingestion.core import parse_response_json
+
+ANSWER = {"book_data": {"title": "Momo", "authors": ["Michael Ende"]}, "confidence": 0.9}
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(ANSWER),
+    "Hier das Ergebnis:\n```json\n" + json.dumps(ANSWER) + "\n```\nViel Erfolg! {Ende}",
+    'Beispiel: {"book_data": {"title": "Beispiel"}}\nAntwort: ' + json.dumps(ANSWER),
+    'Stray { brace and "quotes" before ' + json.dumps(ANSWER) + " trailing prose",
+])
+def test_finds_last_complete_object(text):
+    assert parse_last_json_object(text) == ANSWER
+
+
+def test_braces_and_quotes_inside_strings():
+    text = 'Text {"a": "x } y \\" {", "b": [1, {"c": "]"}]} Ende'
+    assert parse_last_json_object(text) == {"a": 'x } y " {', "b": [1, {"c": "]"}]}
+
+
+def test_repairs_truncated_object():
+    text = 'Ergebnis: {"book_data": {"title": "Momo", "authors": ["Michael Ende", "Ander'
+    extraction = extract_last_json_object(text)
+    assert extraction.truncated
+    assert extraction.value == {"book_data": {"title": "Momo", "authors": ["Michael Ende"]}}
+    assert extract_last_json_object(text, repair_truncated=False) is None
+
+
+def test_no_object_raises_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        parse_last_json_object("Leider keine Daten {gefunden")
+
+
+def test_pathological_input_is_linear():
+    # raw_decode() an jeder "{" brauchte hierfür mehrere Sekunden
+    text = "{" * 100_000 + "\n" + json.dumps(ANSWER)
+    start = time.perf_counter()
+    assert parse_last_json_object(text) == ANSWER
+    assert time.perf_counter() - start < 0.5
+
+
+def test_callers_use_shared_extractor():
+    text = "Gefunden:\n```json\n" + json.dumps({"offers": [], "overall_confidence_score": 0.4}) + "\n```\n{Quelle}"
+    client = PriceGroundingClient.__new__(PriceGroundingClient)
+    assert client._parse_json_response(text)["overall_confidence_score"] == 0.4
+    assert parse_response_json("Antwort " + json.dumps(ANSWER) + " Ende") == ANSWER
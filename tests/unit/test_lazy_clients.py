@@ -0,0 +1,76 @@
+"""
+Tests für die lazy Client-Factories und den Import ohne Credentials.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+
+import pytest
+
+from shared.clients import LazyClient, LazyClientPool
+
+BENCH_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "bench_import_time.py")
+
+
+def _bench():
+    spec = importlib.util.spec_from_file_location("bench_import_time", BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_lazy_client_builds_once_across_threads():
+    built = []
+
+    def factory():
+        time.sleep(0.01)
+        built.append(object())
+        return built[-1]
+
+    lazy = LazyClient(factory, "stub")
+    assert not lazy.initialized
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(result is built[0] for result in results)
+
+
+def test_failed_factory_is_retried():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no credentials")
+        return "client"
+
+    lazy = LazyClient(factory)
+    with pytest.raises(RuntimeError):
+        lazy.get()
+    assert lazy.get() == "client"
+
+
+def test_pool_keeps_one_instance_per_key():
+    pool = LazyClientPool(lambda region: object(), "stub")
+    first = pool.get(("p", "europe-west1"), region="europe-west1")
+    assert pool.get(("p", "europe-west1"), region="europe-west1") is first
+    assert pool.get(("p", "us-central1"), region="us-central1") is not first
+
+
+@pytest.mark.parametrize("entry_point", ["ingestion-agent", "condition-assessor", "sentinel-webhook"])
+def test_entry_point_imports_without_credentials(entry_point):
+    bench = _bench()
+    result = bench.measure(entry_point, repeat=1)
+    if "skipped" in result:
+        pytest.skip(result["skipped"])
+    assert "error" not in result, result.get("error")
+    # Großzügig gegenüber dem Benchmark-Budget: hier geht es um den Client-Bau beim Import
+    assert result["median_ms"] < 3 * bench.ENTRY_POINTS[entry_point][2]
@@ -0,0 +1,131 @@
+"""
+Tests für die Token- und Kostenerfassung der Gemini Calls.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from shared.llm import LLMUsage, ModelPrice, PriceTable, configure_price_table, usage_from_response
+from shared.llm.usage import load_price_table_from_env
+from shared.monitoring.metrics import get_metrics_collector
+from shared.price_research.models import MarketAnalysis
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_gemini
+from shared.simplified_ingestion import core
+
+
+def _response(prompt=10_000, cached=0, candidates=500, tool=0, thoughts=0, grounded=False, text="{}"):
+    grounding = types.GroundingMetadata(web_search_queries=["isbn 9783596294312"]) if grounded else None
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            grounding_metadata=grounding,
+        )],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt,
+            cached_content_token_count=cached or None,
+            candidates_token_count=candidates,
+            tool_use_prompt_token_count=tool or None,
+            thoughts_token_count=thoughts or None,
+            total_token_count=prompt + candidates + tool + thoughts,
+        ),
+    )
+
+
+TABLE = PriceTable(
+    models={"gemini-test": ModelPrice(input=1.0, cached_input=0.25, output=10.0)},
+    grounding_per_request=0.03,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    configure_price_table(None)
+    get_metrics_collector().reset()
+    yield
+    configure_price_table(None)
+
+
+def test_cost_splits_cached_tool_and_output_tokens():
+    usage = usage_from_response(
+        _response(prompt=10_000, cached=8_000, candidates=500, tool=1_000, thoughts=500, grounded=True),
+        "gemini-test",
+        TABLE,
+    )
+
+    # 2000 ungecacht + 1000 Tool zu 1.0, 8000 gecacht zu 0.25, 1000 Output zu 10.0, plus Grounding
+    assert usage.cost_eur == pytest.approx((3_000 * 1.0 + 8_000 * 0.25 + 1_000 * 10.0) / 1e6 + 0.03)
+    assert usage.cached_tokens == 8_000
+    assert usage.tool_use_prompt_tokens == 1_000
+    assert usage.grounded_requests == 1
+
+
+def test_versioned_model_uses_longest_prefix_and_unknown_costs_nothing():
+    table = PriceTable()
+    assert table.price_for("gemini-2.5-flash-lite-001") is table.models["gemini-2.5-flash-lite"]
+    assert table.price_for("publishers/google/models/gemini-2.0-flash-001") is table.models["gemini-2.0-flash"]
+
+    usage = usage_from_response(_response(), "unknown-model", table)
+    assert usage.prompt_tokens == 10_000
+    assert usage.cost_eur == 0.0
+    assert usage_from_response(SimpleNamespace(text="{}"), "gemini-test", table) is None
+
+
+def test_price_table_from_env_overrides_defaults(monkeypatch):
+    monkeypatch.setenv("LLM_PRICE_TABLE", json.dumps({
+        "models": {"gemini-2.5-pro": {"input": 2.0, "output": 20.0}},
+        "grounding_per_request": 0,
+    }))
+    table = load_price_table_from_env()
+
+    assert table.models["gemini-2.5-pro"].input == 2.0
+    assert table.grounding_per_request == 0.0
+    # Nicht überschriebene Modelle behalten ihre Standardpreise
+    assert "gemini-2.5-flash" in table.models
+
+
+def test_combine_sums_calls_of_one_book():
+    search = LLMUsage(model="gemini-2.5-pro", prompt_tokens=1_000, candidates_tokens=300, cost_eur=0.04)
+    analysis = LLMUsage(model="gemini-2.5-flash", prompt_tokens=600, candidates_tokens=200, cost_eur=0.001)
+
+    total = LLMUsage.combine([search, None, analysis])
+
+    assert total.model == "gemini-2.5-pro+gemini-2.5-flash"
+    assert total.calls == 2
+    assert total.prompt_tokens == 1_600
+    assert total.cost_eur == pytest.approx(0.041)
+
+
+def test_usage_is_not_part_of_the_market_analysis_schema():
+    assert "usage" not in MarketAnalysis.model_json_schema()["properties"]
+
+
+def test_ingestion_result_and_metrics_carry_usage(monkeypatch):
+    configure_price_table(TABLE)
+    payload = {"book_data": {"title": "Der Process", "authors": ["Franz Kafka"]}, "confidence": 0.9}
+
+    class Models:
+        async def generate_content(self, model, contents, config):
+            return _response(text=json.dumps(payload))
+
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=Models())))
+    config = IngestionConfig(
+        model="gemini-test",
+        normalize_gcs_images=False,
+        enable_duplicate_detection=False,
+        enable_barcode_scan=False,
+        enable_prompt_cache=False,
+    )
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+    result = asyncio.run(ingest_book_with_gemini(request, config))
+
+    assert result.usage.model == "gemini-test"
+    assert result.usage.cost_eur == pytest.approx((10_000 * 1.0 + 500 * 10.0) / 1e6)
+    stats = get_metrics_collector().get_api_stats("gemini_ingestion")
+    assert stats["total_calls"] == 1
+    assert stats["estimated_cost"] == pytest.approx(result.usage.cost_eur)
+    assert stats["total_tokens"] == 10_500
@@ -0,0 +1,122 @@
+"""
+Tests für den zweistufigen Marktdaten-Cache (shared.price_research.market_cache).
+"""
+
+import asyncio
+
+from shared.apis.price_grounding import MarketQueryResult, PriceData
+from shared.price_research.market_cache import (
+    MarketCacheConfig,
+    MarketDataCache,
+    market_cache_key,
+)
+
+HOUR = 3600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MemoryStore:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, entry):
+        self.entries[entry.key] = entry
+
+
+class Search:
+    """Zählt Grounding-Suchen und liefert vorgegebene Ergebnisse."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.results[min(self.calls, len(self.results)) - 1]
+
+
+def offers(price):
+    return MarketQueryResult(offers=[PriceData(seller="Antiquariat", price_eur=price, condition="Gut", platform="zvab")], confidence_score=0.8, reasoning="ok")
+
+
+def make_cache(store=None, clock=None):
+    config = MarketCacheConfig(ttl_seconds=24 * HOUR, stale_seconds=48 * HOUR, negative_ttl_seconds=2 * HOUR)
+    return MarketDataCache(store=store, config=config, clock=clock or Clock())
+
+
+def test_key_normalizes_isbn_and_title():
+    assert market_cache_key("3-499-22517-4") == market_cache_key("978-3-499-22517-8") == "isbn:9783499225178"
+    assert market_cache_key(None, "Der Process ", "Franz Kafka") == market_cache_key("", "der  process", "FRANZ KAFKA")
+    assert market_cache_key(None, "Der Process", "Franz Kafka", "2. Auflage") != market_cache_key(None, "Der Process", "Franz Kafka")
+    assert market_cache_key(None, None) is None
+
+
+def test_miss_fetches_once_and_other_instances_hit_the_store():
+    store = MemoryStore()
+    cache = make_cache(store)
+    search = Search(offers(12.5))
+    key = market_cache_key("9783499225178")
+
+    first = asyncio.run(cache.get_or_fetch(key, search, isbn="9783499225178"))
+    second = asyncio.run(cache.get_or_fetch(key, search))
+    assert search.calls == 1
+    assert second.offers[0].price_eur == first.offers[0].price_eur == 12.5
+    assert second.usage is None  # Treffer kosten keine Tokens
+    assert store.entries[key].isbn == "9783499225178"
+
+    # Neue Instanz (anderer Mandant / Container): Treffer aus Firestore statt neuer Suche
+    other = make_cache(store)
+    asyncio.run(other.get_or_fetch(key, search))
+    assert search.calls == 1 and other.stats.store_hits == 1
+
+
+def test_no_offers_are_cached_briefly_but_failures_are_not():
+    clock = Clock()
+    cache = make_cache(clock=clock)
+    empty = MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Keine Angebote")
+    failed = MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Suche fehlgeschlagen", failed=True)
+
+    search = Search(failed, empty, offers(9.0))
+    asyncio.run(cache.get_or_fetch("isbn:1", search))
+    asyncio.run(cache.get_or_fetch("isbn:1", search))
+    assert search.calls == 2  # Fehlschlag nicht gecacht
+
+    asyncio.run(cache.get_or_fetch("isbn:1", search))
+    assert search.calls == 2 and cache.stats.negative_hits == 1
+
+    clock.now += 3 * HOUR  # negative TTL abgelaufen
+    assert asyncio.run(cache.get_or_fetch("isbn:1", search)).offers[0].price_eur == 9.0
+    assert search.calls == 3
+
+
+def test_stale_entries_are_served_while_refreshing_in_background():
+    clock = Clock()
+    cache = make_cache(clock=clock)
+    search = Search(offers(10.0), offers(14.0))
+
+    async def scenario():
+        await cache.get_or_fetch("isbn:2", search)
+        clock.now += 30 * HOUR  # älter als ttl, innerhalb stale
+        stale = await asyncio.gather(*(cache.get_or_fetch("isbn:2", search) for _ in range(3)))
+        await cache.wait_for_refreshes()
+        fresh = await cache.get_or_fetch("isbn:2", search)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert [r.offers[0].price_eur for r in stale] == [10.0, 10.0, 10.0]
+    assert fresh.offers[0].price_eur == 14.0
+    assert search.calls == 2 and cache.stats.refreshes == 1
+
+    clock.now += 100 * HOUR  # jenseits von ttl + stale: blockierende Neusuche
+    asyncio.run(cache.get_or_fetch("isbn:2", search))
+    assert search.calls == 3
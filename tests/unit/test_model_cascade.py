@@ -0,0 +1,149 @@
+"""
+Tests für die Modell-Kaskade der Ingestion (schnelles Modell zuerst, Eskalation bei Zweifel).
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from shared.simplified_ingestion import (
+    BookIngestionRequest,
+    IngestionConfig,
+    configure_cascade_stats,
+    get_cascade_stats,
+    ingest_book_with_retry,
+)
+from shared.simplified_ingestion import core
+
+FAST_MODEL = "gemini-fast"
+FULL_MODEL = "gemini-full"
+
+
+def _payload(confidence, isbn="9783596294312"):
+    return {
+        "book_data": {"title": "Der Process", "authors": ["Franz Kafka"], "isbn_13": isbn},
+        "confidence": confidence,
+        "sources_used": ["cover"],
+    }
+
+
+class TieredModels:
+    """Stub für client.aio.models: Antwort je Modell, merkt sich Calls und Grounding."""
+
+    def __init__(self, fast_payload=None, fast_error=None):
+        self.fast_payload = fast_payload
+        self.fast_error = fast_error
+        self.calls = []
+
+    async def generate_content(self, model, contents, config):
+        grounded = bool(config.tools)
+        self.calls.append((model, grounded, config.response_schema is not None))
+        if model == FAST_MODEL:
+            if self.fast_error:
+                raise RuntimeError(self.fast_error)
+            payload = self.fast_payload
+        else:
+            payload = _payload(0.92)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=json.dumps(payload))]))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1000, candidates_token_count=100, total_token_count=1100
+            ),
+        )
+
+
+CONFIG = IngestionConfig(
+    model=FULL_MODEL,
+    cascade_fast_model=FAST_MODEL,
+    enable_cascade=True,
+    enable_grounding=True,
+    enable_prompt_cache=False,
+    enable_duplicate_detection=False,
+    enable_barcode_scan=False,
+    normalize_gcs_images=False,
+    retry_delay_seconds=0.0,
+)
+
+REQUEST = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    configure_cascade_stats(None)
+    yield
+    configure_cascade_stats(None)
+
+
+def _install(monkeypatch, models):
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+
+
+def test_confident_fast_result_with_valid_isbn_is_accepted(monkeypatch):
+    models = TieredModels(fast_payload=_payload(0.9))
+    _install(monkeypatch, models)
+
+    result = asyncio.run(ingest_book_with_retry(REQUEST, CONFIG))
+
+    assert result.model_tier == "fast"
+    # Schnelle Stufe: ohne Grounding, mit Response Schema
+    assert models.calls == [(FAST_MODEL, False, True)]
+    summary = get_cascade_stats().summary()
+    assert summary["tiers"]["fast"]["hit_rate"] == 1.0
+    assert summary["final_tiers"] == {"fast": 1}
+    assert summary["needs_review_rate"] == 0.0
+
+
+@pytest.mark.parametrize("fast_payload", [
+    _payload(0.55),  # Confidence unter confidence_threshold_ingested
+    _payload(0.95, isbn="9783596294313"),  # Prüfziffer falsch
+    _payload(0.95, isbn=None),  # keine ISBN
+])
+def test_doubtful_fast_result_escalates_to_grounded_call(monkeypatch, fast_payload):
+    models = TieredModels(fast_payload=fast_payload)
+    _install(monkeypatch, models)
+
+    result = asyncio.run(ingest_book_with_retry(REQUEST, CONFIG))
+
+    assert result.model_tier == "full"
+    assert result.confidence == 0.92
+    assert models.calls == [(FAST_MODEL, False, True), (FULL_MODEL, True, False)]
+    # Kosten pro Buch enthalten beide Calls
+    assert result.usage.calls == 2
+    tiers = get_cascade_stats().summary()["tiers"]
+    assert tiers["fast"]["escalated"] == 1
+    assert tiers["full"]["accepted"] == 1
+
+
+def test_fast_tier_error_escalates_and_images_load_once(monkeypatch):
+    models = TieredModels(fast_error="400 INVALID_ARGUMENT")
+    _install(monkeypatch, models)
+    loads = []
+    original = core.prepare_images_async
+
+    async def counting(image_urls, config):
+        loads.append(image_urls)
+        return await original(image_urls, config)
+
+    monkeypatch.setattr(core, "prepare_images_async", counting)
+
+    result = asyncio.run(ingest_book_with_retry(REQUEST, CONFIG))
+
+    assert result.model_tier == "full"
+    assert len(loads) == 1
+    assert get_cascade_stats().summary()["tiers"]["fast"]["errors"] == 1
+
+
+def test_without_cascade_only_the_configured_call_runs(monkeypatch):
+    models = TieredModels(fast_payload=_payload(0.9))
+    _install(monkeypatch, models)
+    config = IngestionConfig(**{**CONFIG.__dict__, "enable_cascade": False})
+
+    result = asyncio.run(ingest_book_with_retry(REQUEST, config))
+
+    assert models.calls == [(FULL_MODEL, True, False)]
+    assert result.model_tier == "full"
+    # Auch ohne Kaskade werden Buch-Metriken erfasst (Vergleichsbasis)
+    assert get_cascade_stats().summary()["books"] == 1
@@ -0,0 +1,210 @@
+"""
+Tests für die Transactional Outbox (shared.firestore.outbox).
+"""
+
+import itertools
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from shared.firestore.client import set_firestore_client, update_book
+from shared.firestore.outbox import (
+    OUTBOX_COLLECTION,
+    OutboxConfig,
+    OutboxEvent,
+    OutboxRelay,
+    commit_with_events,
+    configure_outbox_relay,
+)
+
+_ids = itertools.count()
+
+
+class FakeFirestore:
+    """In-Memory Firestore mit Batches, Update-Preconditions und einfachen Queries."""
+
+    def __init__(self):
+        self.docs = {}
+        self.versions = {}
+        self.fail_commit = False
+
+    def collection(self, *path):
+        return FakeCollection(self, "/".join(path))
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def write_option(self, last_update_time):
+        return ("version", last_update_time)
+
+    def apply(self, op, path, data=None, option=None):
+        if option is not None and self.versions.get(path) != option[1]:
+            raise RuntimeError("FailedPrecondition")
+        if op == "delete":
+            self.docs.pop(path, None)
+        elif op == "set":
+            self.docs[path] = dict(data)
+        else:
+            if path not in self.docs:
+                raise RuntimeError("NotFound")
+            self.docs[path].update(data)
+        self.versions[path] = next(_ids)
+
+    def outbox(self):
+        return {p: d for p, d in self.docs.items() if p.startswith(OUTBOX_COLLECTION + "/")}
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self.db, self.path, self.id = db, path, path.split("/")[-1]
+
+    def get(self):
+        data = self.db.docs.get(self.path)
+        return SimpleNamespace(
+            id=self.id, reference=self, exists=data is not None,
+            to_dict=lambda: dict(data), update_time=self.db.versions.get(self.path),
+        )
+
+    def set(self, data):
+        self.db.apply("set", self.path, data)
+
+    def update(self, data, option=None):
+        self.db.apply("update", self.path, data, option)
+
+
+class FakeCollection:
+    def __init__(self, db, path, filters=(), count=None):
+        self.db, self.path, self.filters, self.count = db, path, filters, count
+
+    def document(self, doc_id=None):
+        return FakeDocument(self.db, f"{self.path}/{doc_id or 'auto%d' % next(_ids)}")
+
+    def where(self, field, op, value):
+        assert op == "<="
+        return FakeCollection(self.db, self.path, self.filters + ((field, value),), self.count)
+
+    def limit(self, count):
+        return FakeCollection(self.db, self.path, self.filters, count)
+
+    def stream(self):
+        matches = []
+        for path, data in list(self.db.docs.items()):
+            if path.rsplit("/", 1)[0] != self.path:
+                continue
+            if all(data.get(f) is not None and data[f] <= v for f, v in self.filters):
+                matches.append(FakeDocument(self.db, path).get())
+        return matches[: self.count]
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db, self.ops = db, []
+
+    def set(self, ref, data):
+        self.ops.append(("set", ref.path, data))
+
+    def update(self, ref, data):
+        self.ops.append(("update", ref.path, data))
+
+    def delete(self, ref):
+        self.ops.append(("delete", ref.path, None))
+
+    def commit(self):
+        if self.db.fail_commit:
+            raise RuntimeError("commit failed")
+        for op, path, data in self.ops:
+            self.db.apply(op, path, data)
+
+
+class FakePublisher:
+    def __init__(self, fail=False):
+        self.messages = []
+        self.fail = fail
+        self.threads = set()
+
+    def publish(self, topic, data, **attributes):
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("pubsub unavailable")
+        self.messages.append((topic, json.loads(data), attributes))
+        return SimpleNamespace(result=lambda timeout=None: f"msg-{len(self.messages)}")
+
+
+@pytest.fixture
+def db():
+    fake = FakeFirestore()
+    set_firestore_client(fake)
+    yield fake
+    set_firestore_client(None)
+    configure_outbox_relay(None)
+
+
+def test_status_change_and_event_commit_together_and_publish_in_background(db):
+    publisher = FakePublisher()
+    relay = OutboxRelay(db=db, publisher=publisher, sweep=False)
+    configure_outbox_relay(relay)
+    db.docs["users/u1/books/b1"] = {"status": "processing_condition"}
+
+    event = OutboxEvent("projects/p/topics/condition-assessment-completed", {"bookId": "b1", "uid": "u1"}, {"origin": "test"})
+    update_book("u1", "b1", {"status": "condition_assessed"}, events=[event])
+
+    assert db.docs["users/u1/books/b1"]["status"] == "condition_assessed"
+    assert relay.flush(timeout=5)
+    assert publisher.messages == [("projects/p/topics/condition-assessment-completed", {"bookId": "b1", "uid": "u1"}, {"origin": "test"})]
+    assert publisher.threads == {"outbox-relay"}
+    assert db.outbox() == {}  # veröffentlichte Einträge werden gelöscht
+
+
+def test_failed_commit_publishes_nothing(db):
+    publisher = FakePublisher()
+    configure_outbox_relay(OutboxRelay(db=db, publisher=publisher, sweep=False))
+    db.fail_commit = True
+    batch = db.batch()
+    batch.set(db.collection("users", "u1", "books").document("b2"), {"status": "pending_analysis"})
+
+    with pytest.raises(RuntimeError):
+        commit_with_events(batch, [OutboxEvent("projects/p/topics/trigger-ingestion", {"bookId": "b2"})])
+
+    assert db.docs == {} and publisher.messages == []
+
+
+def test_sweep_publishes_entries_left_by_a_crashed_writer_exactly_once(db):
+    # Writer committet, stirbt aber vor der Übergabe an den Relay
+    crashed = OutboxRelay(OutboxConfig(stale_after_seconds=0), db=db, publisher=FakePublisher(), sweep=False)
+    configure_outbox_relay(crashed)
+    crashed.enqueue = lambda staged: None
+    batch = db.batch()
+    batch.update(FakeDocument(db, "users/u1/books/b3"), {"status": "ingested"})
+    db.docs["users/u1/books/b3"] = {"status": "ingesting"}
+    commit_with_events(batch, [OutboxEvent("projects/p/topics/price-research-requests", {"bookId": "b3"})])
+    assert len(db.outbox()) == 1
+
+    publisher = FakePublisher()
+    survivor = OutboxRelay(OutboxConfig(stale_after_seconds=0), db=db, publisher=publisher, sweep=False)
+    claimed_by_both = [snapshot for snapshot in db.collection(OUTBOX_COLLECTION).stream()]
+
+    assert survivor.sweep() == 1
+    # Ein zweiter Relay mit veraltetem Snapshot scheitert an der Precondition
+    with pytest.raises(RuntimeError):
+        claimed_by_both[0].reference.update({"next_attempt_at": None}, option=db.write_option(claimed_by_both[0].update_time))
+    assert [m[1] for m in publisher.messages] == [{"bookId": "b3"}]
+    assert db.outbox() == {}
+
+
+def test_failed_publishes_back_off_and_end_up_dead(db):
+    publisher = FakePublisher(fail=True)
+    relay = OutboxRelay(OutboxConfig(stale_after_seconds=0, max_attempts=2, backoff_seconds=0), db=db, publisher=publisher, sweep=False)
+    configure_outbox_relay(relay)
+    commit_with_events(db.batch(), [OutboxEvent("projects/p/topics/t", {"bookId": "b4"})])
+    assert relay.flush(timeout=5)
+
+    (entry,) = db.outbox().values()
+    assert entry["attempts"] == 1 and entry["next_attempt_at"] is not None
+
+    relay.sweep()
+    (entry,) = db.outbox().values()
+    assert entry["attempts"] == 2 and entry["next_attempt_at"] is None and "dead_at" in entry
+    assert relay.sweep() == 0
+    assert relay.stats.dead == 1
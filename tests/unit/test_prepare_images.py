@@ -0,0 +1,108 @@
+"""
+Tests für prepare_images_async(): paralleler Download, Deadline und Timings.
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from shared.simplified_ingestion import IngestionConfig, prepare_images_async
+
+IMAGE_BYTES = b"\xff\xd8\xff\xe0fake-jpeg"
+DELAY_SECONDS = 0.3
+
+
+async def _start_server(delay: float):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        if request.match_info["name"] == "missing.jpg":
+            raise web.HTTPNotFound()
+        return web.Response(body=IMAGE_BYTES, content_type="image/jpeg")
+
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_http_images_are_fetched_concurrently():
+    async def run():
+        runner, base = await _start_server(DELAY_SECONDS)
+        try:
+            urls = [f"{base}/img{i}.jpg" for i in range(5)]
+            start = time.perf_counter()
+            parts, timings = await prepare_images_async(urls, IngestionConfig(image_fetch_concurrency=8))
+            elapsed = time.perf_counter() - start
+        finally:
+            await runner.cleanup()
+        return parts, timings, elapsed
+
+    parts, timings, elapsed = asyncio.run(run())
+
+    assert len(parts) == 5
+    # Seriell wären es 5 * 0.3s = 1.5s
+    assert elapsed < DELAY_SECONDS * 3
+    assert all(t.success and t.source == "http" for t in timings)
+    assert all(t.size_bytes == len(IMAGE_BYTES) for t in timings)
+    assert all(t.duration_ms >= DELAY_SECONDS * 1000 * 0.9 for t in timings)
+
+
+def test_failed_images_are_reported_and_skipped(tmp_path):
+    local_file = tmp_path / "cover.jpg"
+    local_file.write_bytes(IMAGE_BYTES)
+
+    async def run():
+        runner, base = await _start_server(0)
+        try:
+            urls = [f"{base}/missing.jpg", f"file://{local_file}", "gs://bucket/back.jpg"]
+            return await prepare_images_async(urls, IngestionConfig(normalize_gcs_images=False))
+        finally:
+            await runner.cleanup()
+
+    parts, timings = asyncio.run(run())
+
+    assert len(parts) == 2
+    assert [t.success for t in timings] == [False, True, True]
+    assert timings[0].error
+    assert [t.source for t in timings] == ["http", "file", "gcs"]
+
+
+def test_deadline_drops_slow_images():
+    async def run():
+        runner, base = await _start_server(1.0)
+        try:
+            config = IngestionConfig(image_fetch_deadline_seconds=0.2, normalize_gcs_images=False)
+            urls = [f"{base}/slow.jpg", "gs://bucket/cover.jpg"]
+            start = time.perf_counter()
+            parts, timings = await prepare_images_async(urls, config)
+            return parts, timings, time.perf_counter() - start
+        finally:
+            await runner.cleanup()
+
+    parts, timings, elapsed = asyncio.run(run())
+
+    assert len(parts) == 1
+    assert elapsed < 1.0
+    assert timings[0].error == "Deadline exceeded"
+    assert timings[1].success
+
+
+def test_http_session_is_per_loop_and_closed_with_it():
+    from shared.simplified_ingestion import core
+
+    async def session_of_loop():
+        session = await core._get_http_session()
+        assert session is await core._get_http_session()
+        return session
+
+    first = asyncio.run(session_of_loop())
+    second = asyncio.run(session_of_loop())
+
+    assert first is not second
+    assert first.closed and second.closed
+    assert core._http_sessions == {}
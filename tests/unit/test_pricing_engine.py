@@ -0,0 +1,112 @@
+"""
+Tests für die deterministische Preisfindung (shared.price_research.pricing_engine).
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from shared.apis.price_grounding import MarketQueryResult, PriceData
+from shared.price_research.models import MarketStrategy
+from shared.price_research.orchestrator import PriceResearchOrchestrator
+from shared.price_research.pricing_engine import PricingEngine, weighted_quantile
+
+
+def offer(price, condition="Gut"):
+    return PriceData(seller="Händler", price_eur=price, condition=condition, platform="zvab")
+
+
+MARKET = [offer(p, c) for p, c in [
+    (8.0, "Gut"), (8.5, "Gut"), (9.0, "Sehr gut"), (9.5, "Gut"), (10.0, "Wie neu"),
+    (11.0, "Sehr gut"), (7.5, "Akzeptabel"), (9.9, "Gut"), (250.0, "Gut"),  # Sammlerpreis-Ausreißer
+]]
+
+
+def test_outliers_are_dropped_and_result_is_repeatable():
+    engine = PricingEngine()
+    first = engine.price(MARKET, {"grade": "Good"}).analysis
+    second = engine.price(MARKET, {"grade": "Good"}).analysis
+
+    assert first == second
+    assert first.market_price_range.max_price < 250
+    assert 7.5 <= first.recommended_price <= 11.0
+    assert first.min_price_limit >= 2.5
+    assert first.competitor_count == len(MARKET)
+    assert "kept=8/9" in first.internal_notes
+
+
+def test_strategy_and_condition_move_the_price():
+    engine = PricingEngine()
+    balanced = engine.price(MARKET, {"grade": "Good"}, strategy=MarketStrategy.BALANCED).analysis
+    patient = engine.price(MARKET, {"grade": "Good"}, strategy=MarketStrategy.PATIENT).analysis
+    worse = engine.price(MARKET, {"grade": "Poor"}, strategy=MarketStrategy.BALANCED).analysis
+
+    assert patient.recommended_price > balanced.recommended_price > worse.recommended_price
+    assert worse.recommended_price >= worse.min_price_limit >= 2.5
+
+
+def test_sparse_or_contradictory_markets_fall_back_to_the_llm():
+    engine = PricingEngine()
+    assert engine.price([offer(9.0), offer(10.0)]).needs_llm
+    scattered = [offer(p) for p in (3.0, 12.0, 45.0, 6.0, 90.0, 20.0)]
+    decision = engine.price(scattered)
+    assert decision.needs_llm and "Streuung" in decision.fallback_reason
+
+
+def test_weighted_quantile_matches_numpy_for_equal_weights():
+    values = np.array([5.0, 1.0, 3.0, 2.0, 4.0])
+    assert weighted_quantile(values, np.ones(5), 0.5) == np.median(values)
+
+
+def test_orchestrator_skips_the_analysis_call_when_the_engine_decides():
+    orchestrator = PriceResearchOrchestrator(db=None, grounding_client=None)
+    stored = []
+
+    async def market_data(*args):
+        return MarketQueryResult(offers=MARKET, confidence_score=0.9, reasoning="ok")
+
+    async def no_llm(*args):
+        raise AssertionError("LLM darf nicht aufgerufen werden")
+
+    async def store(uid, book_id, analysis, data):
+        stored.append(analysis)
+
+    async def metadata(uid, book_id):
+        return {}
+
+    orchestrator._fetch_book_metadata = metadata
+    orchestrator._get_market_data = market_data
+    orchestrator._analyze_market_situation = no_llm
+    orchestrator._store_analysis_result = store
+
+    start = time.perf_counter()
+    analysis = asyncio.run(orchestrator.research_and_price("9783499225178", "Titel", "b1", "u1", {"grade": "Good"}))
+
+    assert analysis.recommended_price > 0 and analysis.usage is None
+    assert stored == [analysis]
+    assert time.perf_counter() - start < 1.0
+
+
+def test_orchestrator_uses_passed_metadata_instead_of_the_book_document():
+    orchestrator = PriceResearchOrchestrator(db=None, grounding_client=None)
+    seen = []
+
+    async def unwritten_book(uid, book_id):
+        raise AssertionError("Früher Trigger darf das Buch-Dokument nicht lesen")
+
+    async def market_data(isbn, title, metadata):
+        seen.append(metadata)
+        return MarketQueryResult(offers=MARKET, confidence_score=0.9, reasoning="ok")
+
+    async def store(uid, book_id, analysis, data):
+        pass
+
+    orchestrator._fetch_book_metadata = unwritten_book
+    orchestrator._get_market_data = market_data
+    orchestrator._store_analysis_result = store
+    metadata = {"title": "Titel", "author": "Franz Kafka", "publisher": "Fischer", "year": None, "edition": "3. Auflage"}
+
+    asyncio.run(orchestrator.research_and_price(None, "Titel", "b1", "u1", {"grade": "Good"}, metadata=metadata))
+
+    assert seen == [metadata]
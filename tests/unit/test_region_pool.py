@@ -0,0 +1,151 @@
+"""
+Tests für den regionalen GenAI Client Pool (Präferenz, Eviction bei 429, Latenz, Failover).
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors, types
+
+from shared.llm.regions import (
+    STAGE_CONDITION,
+    STAGE_INGESTION,
+    STAGE_PRICE_GROUNDING,
+    RegionalClientPool,
+    configure_region_pool,
+    load_region_preferences_from_env,
+)
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_retry
+from shared.simplified_ingestion import core
+
+REGIONS = ["europe-west1", "europe-west4", "us-central1"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _quota_error():
+    return errors.APIError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}})
+
+
+def _pool(clock=None, **kwargs):
+    return RegionalClientPool(
+        preferences={STAGE_INGESTION: list(REGIONS)},
+        client_factory=lambda region: region,
+        clock=clock or Clock(),
+        **kwargs,
+    )
+
+
+def test_preferences_from_env(monkeypatch):
+    monkeypatch.setenv("GCP_REGION", "europe-west3")
+    assert load_region_preferences_from_env()[STAGE_CONDITION] == ["europe-west3"]
+    assert load_region_preferences_from_env()[STAGE_PRICE_GROUNDING] == ["us-central1"]
+
+    # Eine Einstellung legt alle Stufen in dieselbe Region, pro Stufe lässt sich übersteuern
+    monkeypatch.setenv("LLM_REGIONS", "europe-west1")
+    monkeypatch.setenv("LLM_REGIONS_INGESTION", "europe-west1, europe-west4")
+    preferences = load_region_preferences_from_env()
+    assert preferences[STAGE_PRICE_GROUNDING] == ["europe-west1"]
+    assert preferences[STAGE_CONDITION] == ["europe-west1"]
+    assert preferences[STAGE_INGESTION] == ["europe-west1", "europe-west4"]
+
+
+def test_repeated_rate_limits_evict_region_until_pause_expires():
+    clock = Clock()
+    pool = _pool(clock, eviction_threshold=2, eviction_seconds=60)
+    decision = SimpleNamespace(kind="rate_limited", retry_after=None)
+
+    pool.record_failure("europe-west1", decision)
+    # Schon ein 429 stellt die Region hinter die übrigen
+    assert pool.candidates(STAGE_INGESTION)[0] == "europe-west4"
+    pool.record_failure("europe-west1", decision)
+    assert pool.candidates(STAGE_INGESTION) == ["europe-west4", "us-central1", "europe-west1"]
+    assert pool.summary()["regions"]["europe-west1"]["evictions"] == 1
+
+    clock.now += 61
+    assert pool.candidates(STAGE_INGESTION)[0] == "europe-west1"
+
+
+def test_clearly_faster_region_is_preferred():
+    pool = _pool(latency_margin=0.3)
+    pool.record_success("europe-west1", 4000)
+    pool.record_success("europe-west4", 3500)
+    # Nur 12.5% schneller: Präferenz bleibt
+    assert pool.candidates(STAGE_INGESTION)[0] == "europe-west1"
+
+    pool.record_success("europe-west4", 500)
+    pool.record_success("europe-west4", 500)
+    assert pool.candidates(STAGE_INGESTION)[0] == "europe-west4"
+
+
+def test_call_fails_over_on_quota_errors_only():
+    pool = _pool()
+    seen = []
+
+    async def operation(region):
+        seen.append(region)
+        if region == "europe-west1":
+            raise _quota_error()
+        return f"ok from {region}"
+
+    assert asyncio.run(pool.call(STAGE_INGESTION, operation)) == "ok from europe-west4"
+    assert seen == ["europe-west1", "europe-west4"]
+    assert pool.summary()["regions"]["europe-west4"]["failovers"] == 1
+
+    async def invalid(region):
+        seen.append(region)
+        raise errors.APIError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "bad"}})
+
+    seen.clear()
+    with pytest.raises(errors.APIError):
+        asyncio.run(pool.call(STAGE_INGESTION, invalid))
+    # Ein fehlerhafter Request wird nicht in allen Regionen wiederholt
+    assert len(seen) == 1
+
+
+def test_ingestion_retry_moves_to_next_region_after_429(monkeypatch):
+    payload = {"book_data": {"title": "Der Process", "authors": ["Franz Kafka"]}, "confidence": 0.9}
+    calls = []
+
+    def regional_client(region):
+        class Models:
+            async def generate_content(self, model, contents, config):
+                calls.append(region)
+                if region == "europe-west1":
+                    raise _quota_error()
+                return types.GenerateContentResponse(candidates=[types.Candidate(
+                    content=types.Content(role="model", parts=[types.Part(text=json.dumps(payload))])
+                )])
+        return SimpleNamespace(aio=SimpleNamespace(models=Models()))
+
+    clients = {region: regional_client(region) for region in REGIONS}
+
+    async def no_sleep(delay):
+        return None
+
+    configure_region_pool(RegionalClientPool(
+        preferences={STAGE_INGESTION: ["europe-west1", "europe-west4"]},
+        client_factory=lambda region: clients[region],
+    ))
+    monkeypatch.setattr(core.asyncio, "sleep", no_sleep)
+    config = IngestionConfig(
+        model="gemini-test",
+        normalize_gcs_images=False,
+        enable_duplicate_detection=False,
+        enable_barcode_scan=False,
+        enable_prompt_cache=False,
+    )
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+    result = asyncio.run(ingest_book_with_retry(request, config))
+
+    assert result.book_data.title == "Der Process"
+    assert calls == ["europe-west1", "europe-west4"]
@@ -0,0 +1,203 @@
+"""
+Tests für Record/Replay (shared.replay): Gemini, Firestore und Pub/Sub offline.
+"""
+
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors, types
+
+from shared.clients import get_publisher_client
+from shared.firestore.client import get_firestore_client
+from shared.llm.resilience import classify_error
+from shared.replay import (
+    MODE_RECORD,
+    Cassette,
+    CassetteFirestoreClient,
+    CassetteGenAIClient,
+    CassetteMissError,
+    CassettePublisher,
+    Interaction,
+    use_cassette,
+)
+from shared.replay.genai import KIND_GENERATE
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_gemini
+from shared.simplified_ingestion import core
+
+PAYLOAD = {"book_data": {"title": "Der Process", "authors": ["Franz Kafka"]}, "confidence": 0.9}
+
+
+def _response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=1200, candidates_token_count=80),
+    )
+
+
+class LiveModels:
+    """Stub für den echten Client beim Aufnehmen."""
+
+    def __init__(self, fail_first=False):
+        self.calls = 0
+        self.fail_first = fail_first
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        if self.fail_first and self.calls == 1:
+            raise errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota"}})
+        return _response(json.dumps(PAYLOAD))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        async def chunks():
+            for text in ('{"book_data": {"title": "Der Process"', ', "authors": ["Franz Kafka"]}, "confidence": 0.9}'):
+                yield _response(text)
+        return chunks()
+
+
+def _live_client(models):
+    return SimpleNamespace(aio=SimpleNamespace(models=models))
+
+
+def test_generate_content_roundtrip_including_errors(tmp_path):
+    path = tmp_path / "gemini.json"
+    live = LiveModels(fail_first=True)
+    recorder = CassetteGenAIClient(Cassette(str(path), mode=MODE_RECORD), _live_client(live))
+
+    async def record():
+        with pytest.raises(errors.ClientError):
+            await recorder.aio.models.generate_content(model="gemini-test", contents=["Buch?"])
+        return await recorder.aio.models.generate_content(model="gemini-test", contents=["Buch?"])
+
+    recorded = asyncio.run(record())
+    recorder.cassette.save()
+
+    replay = CassetteGenAIClient(Cassette.load(str(path)))
+
+    async def play():
+        with pytest.raises(errors.ClientError) as excinfo:
+            await replay.aio.models.generate_content(model="gemini-test", contents=["Buch?"])
+        assert classify_error(excinfo.value).kind == "rate_limited"
+        return await replay.aio.models.generate_content(model="gemini-test", contents=["Buch?"])
+
+    replayed = asyncio.run(play())
+    assert replayed.text == recorded.text
+    assert replayed.usage_metadata.prompt_token_count == 1200
+    assert live.calls == 2
+
+
+def test_stream_replay_and_strict_miss(tmp_path):
+    path = tmp_path / "stream.json"
+    recorder = CassetteGenAIClient(Cassette(str(path), mode=MODE_RECORD), _live_client(LiveModels()))
+
+    async def consume(client, contents):
+        stream = await client.aio.models.generate_content_stream(model="gemini-test", contents=contents)
+        return "".join([chunk.text async for chunk in stream])
+
+    recorded = asyncio.run(consume(recorder, ["cover"]))
+    recorder.cassette.save()
+
+    replay = CassetteGenAIClient(Cassette.load(str(path)))
+    assert asyncio.run(consume(replay, ["cover"])) == recorded
+    assert json.loads(recorded)["confidence"] == 0.9
+
+    strict = CassetteGenAIClient(Cassette.load(str(path), strict=True))
+    with pytest.raises(CassetteMissError):
+        asyncio.run(consume(strict, ["anderes Cover"]))
+
+
+def test_recorded_latency_is_replayed_scaled():
+    cassette = Cassette(replay_latency=True, latency_scale=0.5)
+    cassette.interactions = [Interaction(
+        kind=KIND_GENERATE, key="k", label="gemini-test", response=_response("{}").model_dump(mode="json"), latency_ms=200,
+    )]
+    cassette._used = [False]
+    client = CassetteGenAIClient(cassette)
+
+    start = time.perf_counter()
+    asyncio.run(client.aio.models.generate_content(model="gemini-test", contents=["x"]))
+
+    assert time.perf_counter() - start >= 0.09
+
+
+class LiveDoc:
+    def __init__(self, store, path):
+        self.store, self.path, self.id = store, path, path.split("/")[-1]
+
+    def get(self):
+        data = self.store.get(self.path)
+        return SimpleNamespace(id=self.id, exists=data is not None, to_dict=lambda: dict(data))
+
+    def set(self, data, merge=False):
+        self.store[self.path] = dict(data)
+
+    def update(self, data):
+        self.store[self.path].update(data)
+
+    def collection(self, *path):
+        return LiveCollection(self.store, "/".join((self.path,) + path))
+
+
+class LiveCollection:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def document(self, doc_id):
+        return LiveDoc(self.store, f"{self.path}/{doc_id}")
+
+
+def test_firestore_reads_replay_and_writes_are_logged(tmp_path):
+    path = tmp_path / "firestore.json"
+    store = {"users/u1/books/b1": {"status": "ingested", "title": "Der Process"}}
+    live = SimpleNamespace(collection=lambda *p: LiveCollection(store, "/".join(p)))
+    live_publisher = SimpleNamespace(publish=lambda topic, data, **kw: SimpleNamespace(result=lambda: "msg-1"))
+
+    cassette = Cassette(str(path), mode=MODE_RECORD)
+    db = CassetteFirestoreClient(cassette, live)
+    book = db.collection("users").document("u1").collection("books").document("b1")
+    assert book.get().to_dict()["title"] == "Der Process"
+    book.update({"status": "condition_assessed"})
+    assert CassettePublisher(cassette, live_publisher).publish("projects/p/topics/t", b"{}").result() == "msg-1"
+    cassette.save()
+
+    with use_cassette(str(path)) as replay:
+        replay_book = get_firestore_client().collection("users", "u1", "books").document("b1")
+        assert replay_book.get().to_dict() == {"status": "ingested", "title": "Der Process"}
+        replay_book.update({"status": "condition_assessed"})
+        assert get_publisher_client().publish("projects/p/topics/t", b"{}").result() == "msg-1"
+
+    assert [write.request["op"] for write in replay.writes if write.kind == "firestore.write"] == ["update"]
+    assert store["users/u1/books/b1"]["status"] == "condition_assessed"
+
+
+def test_ingestion_runs_offline_from_cassette(tmp_path, monkeypatch):
+    path = tmp_path / "ingestion.json"
+    config = IngestionConfig(
+        model="gemini-test",
+        normalize_gcs_images=False,
+        enable_duplicate_detection=False,
+        enable_barcode_scan=False,
+        enable_prompt_cache=False,
+    )
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+    live = LiveModels()
+    cassette = Cassette(str(path), mode=MODE_RECORD)
+    monkeypatch.setattr(core, "client", CassetteGenAIClient(cassette, _live_client(live)))
+    recorded = asyncio.run(ingest_book_with_gemini(request, config))
+    cassette.save()
+    monkeypatch.setattr(core, "client", None)
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "secret")
+    with use_cassette(str(path)) as replay:
+        replayed = asyncio.run(ingest_book_with_gemini(request, config))
+
+    assert replayed.success and replayed.confidence == recorded.confidence
+    assert (replayed.book_data.title, replayed.book_data.authors) == (recorded.book_data.title, recorded.book_data.authors)
+    assert replay.summary()["hits"] == 1 and replay.summary()["fallbacks"] == 0
+    assert live.calls == 1
+    # Umgebung wird wiederhergestellt
+    assert os.environ["GOOGLE_API_KEY"] == "secret"
@@ -0,0 +1,181 @@
+"""
+Tests für Fehlerklassifikation, Backoff und Circuit Breaker (shared.llm.resilience).
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from google.genai import errors
+
+from shared.llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    classify_error,
+    configure_circuit_breakers,
+    get_circuit_breaker,
+    retry_async,
+)
+from shared.simplified_ingestion import BookIngestionRequest, IngestionConfig, ingest_book_with_retry
+from shared.simplified_ingestion import core
+from shared.simplified_ingestion.core import IngestionException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _api_error(code, status, retry_delay=None, headers=None):
+    details = []
+    if retry_delay:
+        details.append({"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay})
+    body = {"error": {"code": code, "status": status, "message": "quota", "details": details}}
+    response = httpx.Response(code, headers=headers or {}) if headers else None
+    return errors.APIError(code, body, response)
+
+
+def test_classification_is_typed_first():
+    quota = classify_error(_api_error(429, "RESOURCE_EXHAUSTED", retry_delay="12s"))
+    assert (quota.retryable, quota.kind, quota.retry_after) == (True, "rate_limited", 12.0)
+    assert quota.trips_breaker
+
+    header = classify_error(_api_error(503, "UNAVAILABLE", headers={"Retry-After": "7"}))
+    assert (header.kind, header.retry_after) == ("unavailable", 7.0)
+
+    # 400 mit "quota" in der Meldung bleibt ein Client-Fehler
+    bad_request = classify_error(_api_error(400, "INVALID_ARGUMENT"))
+    assert (bad_request.retryable, bad_request.kind) == (False, "client_error")
+
+    assert classify_error(asyncio.TimeoutError()).kind == "timeout"
+    assert classify_error(CircuitOpenError("m", 3.0)).retryable is False
+
+
+def test_untyped_errors_fall_back_to_status_in_message():
+    assert classify_error(RuntimeError("503 Service Unavailable")).kind == "unavailable"
+    assert classify_error(RuntimeError("429 Resource has been exhausted")).kind == "rate_limited"
+    assert classify_error(ValueError("Keine gültigen Bilder gefunden")).retryable is False
+
+
+def test_full_jitter_stays_below_cap_and_honors_retry_after():
+    policy = RetryPolicy(base_delay_seconds=2.0, multiplier=2.0, max_delay_seconds=10.0)
+    rng = random.Random(7)
+    delays = [policy.delay(3, rng=rng) for _ in range(200)]
+    assert all(0.0 <= d <= 10.0 for d in delays)
+    # Full Jitter streut über den ganzen Bereich statt alle Instanzen im selben Takt
+    assert min(delays) < 2.0 and max(delays) > 8.0
+    assert 12.0 <= policy.delay(0, retry_after=12.0, rng=rng) <= 14.0
+
+
+def test_retry_async_retries_transient_errors_only():
+    sleeps = []
+    calls = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise _api_error(503, "UNAVAILABLE")
+        return "ok"
+
+    assert asyncio.run(retry_async(flaky, policy=RetryPolicy(max_retries=3), sleep=fake_sleep)) == "ok"
+    assert len(sleeps) == 2
+
+    async def invalid():
+        raise _api_error(400, "INVALID_ARGUMENT")
+
+    with pytest.raises(errors.APIError):
+        asyncio.run(retry_async(invalid, policy=RetryPolicy(max_retries=3), sleep=fake_sleep))
+    assert len(sleeps) == 2
+
+
+def test_breaker_opens_short_circuits_and_recovers_after_probe():
+    clock = Clock()
+    breaker = CircuitBreaker("gemini-test", failure_threshold=2, open_seconds=30, clock=clock)
+    overload = classify_error(_api_error(429, "RESOURCE_EXHAUSTED"))
+
+    breaker.record_failure(overload)
+    breaker.before_call()
+    breaker.record_failure(overload)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 31
+    breaker.before_call()  # Probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # nur ein Probe-Call gleichzeitig
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.to_dict()["short_circuited"] == 2
+
+
+def test_cancelled_half_open_probe_releases_the_breaker():
+    clock = Clock()
+    configure_circuit_breakers(failure_threshold=1, open_seconds=30, clock=clock)
+    breaker = get_circuit_breaker("gemini-test")
+    breaker.record_failure(classify_error(_api_error(503, "UNAVAILABLE")))
+    clock.now += 31
+
+    async def cancelled_probe():
+        task = asyncio.create_task(retry_async(lambda: asyncio.sleep(60), breaker_key="gemini-test"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_probe())
+    # Abbruch zählt weder als Erfolg noch als Fehler, der nächste Call darf proben
+    assert breaker.state == "half_open"
+    with breaker.guard():
+        pass
+    assert breaker.state == "closed"
+
+    breaker.record_failure(classify_error(_api_error(503, "UNAVAILABLE")))
+    clock.now += 31
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.guard():
+            raise KeyboardInterrupt
+    breaker.before_call()  # Probe wieder frei
+
+
+def test_open_breaker_fails_ingestion_fast_without_model_call(monkeypatch):
+    calls = []
+
+    class Models:
+        async def generate_content(self, model, contents, config):
+            calls.append(model)
+            raise _api_error(429, "RESOURCE_EXHAUSTED")
+
+    async def no_sleep(delay):
+        return None
+
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=Models())))
+    monkeypatch.setattr(core.asyncio, "sleep", no_sleep)
+    configure_circuit_breakers(failure_threshold=2, open_seconds=60)
+    config = IngestionConfig(
+        model="gemini-test",
+        normalize_gcs_images=False,
+        enable_duplicate_detection=False,
+        enable_barcode_scan=False,
+        enable_prompt_cache=False,
+        retry_attempts=5,
+    )
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=["gs://bucket/1.jpg"])
+
+    with pytest.raises(IngestionException) as excinfo:
+        asyncio.run(ingest_book_with_retry(request, config))
+
+    # Zwei 429 öffnen den Breaker, der dritte Versuch wird nicht mehr gesendet
+    assert len(calls) == 2
+    assert excinfo.value.error.error_type == "CircuitOpenError"
+    assert excinfo.value.error.retry_possible is False
+    assert get_circuit_breaker("gemini-test").state == "open"
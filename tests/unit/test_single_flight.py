@@ -0,0 +1,135 @@
+"""
+Tests für das Single-Flight der Preissuche (shared.price_research.single_flight).
+"""
+
+import asyncio
+import time
+
+from shared.apis.price_grounding import MarketQueryResult, PriceData
+from shared.price_research.market_cache import MarketCacheConfig, MarketDataCache
+from shared.price_research.single_flight import SingleFlight
+
+
+class MemoryStore:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, entry):
+        self.entries[entry.key] = entry
+
+
+class MemoryLeases:
+    """Lease Store wie FirestoreLeaseStore, aber im Speicher."""
+
+    def __init__(self):
+        self.leases = {}
+
+    def acquire(self, key, owner, ttl_seconds):
+        lease = self.leases.get(key)
+        if lease and lease[1] > time.monotonic() and lease[0] != owner:
+            return False
+        self.leases[key] = (owner, time.monotonic() + ttl_seconds)
+        return True
+
+    def held(self, key):
+        lease = self.leases.get(key)
+        return bool(lease and lease[1] > time.monotonic())
+
+    def release(self, key, owner):
+        if self.leases.get(key, (None,))[0] == owner:
+            del self.leases[key]
+
+
+class SlowSearch:
+    def __init__(self, delay=0.05, result=None):
+        self.delay = delay
+        self.calls = 0
+        self.result = result or MarketQueryResult(
+            offers=[PriceData(seller="Buchhandlung", price_eur=19.9, condition="Wie neu", platform="booklooker")],
+            confidence_score=0.9,
+            reasoning="ok",
+        )
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+CONFIG = MarketCacheConfig(lease_seconds=5, lease_poll_seconds=0.01, lease_wait_seconds=2)
+
+
+def test_concurrent_lookups_for_the_same_isbn_run_one_search():
+    cache = MarketDataCache(config=CONFIG)
+    search = SlowSearch()
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_fetch("isbn:9783499225178", search) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+
+    assert search.calls == 1
+    assert {r.offers[0].price_eur for r in results} == {19.9}
+    assert cache.stats.searches == 1 and cache.stats.coalesced_local == 9
+    assert cache.stats.summary()["coalesce_rate"] == 0.9
+
+
+def test_second_instance_waits_for_the_lease_holder_instead_of_searching():
+    store, leases = MemoryStore(), MemoryLeases()
+    price_research = MarketDataCache(store=store, config=CONFIG, leases=leases)
+    strategist = MarketDataCache(store=store, config=CONFIG, leases=leases)
+    search = SlowSearch(delay=0.1)
+
+    async def scenario():
+        first = asyncio.create_task(price_research.get_or_fetch("isbn:1", search))
+        await asyncio.sleep(0.02)  # Lease ist vergeben
+        second = await strategist.get_or_fetch("isbn:1", search)
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert search.calls == 1
+    assert second.offers[0].price_eur == first.offers[0].price_eur
+    assert strategist.stats.coalesced_remote == 1 and strategist.stats.searches == 0
+    assert leases.leases == {}  # Lease nach der Suche freigegeben
+
+
+def test_failed_search_releases_the_lease_and_a_waiter_searches_itself():
+    store, leases = MemoryStore(), MemoryLeases()
+    failing = SlowSearch(result=MarketQueryResult(offers=[], confidence_score=0.0, reasoning="Fehler", failed=True))
+    working = SlowSearch(delay=0.01)
+    a = MarketDataCache(store=store, config=CONFIG, leases=leases)
+    b = MarketDataCache(store=store, config=CONFIG, leases=leases)
+
+    async def scenario():
+        first = asyncio.create_task(a.get_or_fetch("isbn:2", failing))
+        await asyncio.sleep(0.01)
+        second = await b.get_or_fetch("isbn:2", working)
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first.failed and not second.failed
+    assert failing.calls == 1 and working.calls == 1
+
+
+def test_errors_reach_all_waiters_and_the_key_is_released():
+    flights = SingleFlight()
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("grounding down")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("k", boom) for _ in range(3)), return_exceptions=True)
+        return results, flights.in_flight("k")
+
+    results, in_flight = asyncio.run(scenario())
+
+    assert len(calls) == 1 and all(isinstance(r, RuntimeError) for r in results)
+    assert not in_flight
@@ -0,0 +1,192 @@
+"""
+Tests für die gestreamte Ingestion mit frühem Identifikations-Event.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from shared.llm import StreamingFieldWatcher
+from shared.simplified_ingestion import (
+    BookData,
+    BookIngestionRequest,
+    EarlyIdentification,
+    IngestionConfig,
+    early_identification_covers,
+    ingest_book_with_gemini,
+    ingest_book_with_retry,
+)
+from shared.simplified_ingestion import core
+
+PAYLOAD = {
+    "book_data": {
+        "title": "Der Process",
+        "authors": ["Franz Kafka", "Max Brod"],
+        "publisher": "Fischer",
+        "isbn_13": "978-3-596-29431-2",
+        "description": "Roman über einen Prozess, der nie erklärt wird.",
+    },
+    "confidence": 0.9,
+    "sources_used": ["dnb.de"],
+}
+
+CONFIG = IngestionConfig(
+    enable_grounding=False,
+    enable_duplicate_detection=False,
+    enable_barcode_scan=False,
+    enable_streaming=True,
+)
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_watcher_finds_fields_across_chunk_boundaries():
+    watcher = StreamingFieldWatcher(["title", "isbn_13"], list_keys=["authors"])
+    found = {}
+    for chunk in _chunks("Hier das Ergebnis:\n```json\n" + json.dumps(PAYLOAD, ensure_ascii=False), size=3):
+        found.update(watcher.feed(chunk))
+
+    assert found == {"title": "Der Process", "authors": "Franz Kafka", "isbn_13": "978-3-596-29431-2"}
+    assert watcher.text.endswith("}")
+
+
+def test_watcher_ignores_incomplete_values_and_keeps_first_occurrence():
+    watcher = StreamingFieldWatcher(["title"])
+    assert watcher.feed('{"title": "Der Pro') == {}
+    assert watcher.feed('cess", "x": {"title": "Anderer"}}') == {"title": "Der Process"}
+    assert watcher.fields == {"title": "Der Process"}
+
+
+class StreamingModels:
+    """Stub für client.aio.models: liefert die Antwort stückweise mit Pausen."""
+
+    def __init__(self, payload=PAYLOAD, delay=0.02, fail_first=False):
+        self.text = json.dumps(payload, ensure_ascii=False)
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = 0
+        self.finished_at = None
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+        if self.fail_first and self.calls == 1:
+            raise RuntimeError("503 Service Unavailable")
+
+        async def stream():
+            for chunk in _chunks(self.text):
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=chunk, candidates=[])
+            self.finished_at = time.perf_counter()
+
+        return stream()
+
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.jpg"
+    Image.new("RGB", (200, 300), (120, 80, 40)).save(path, format="JPEG")
+    return path.as_uri()
+
+
+def _install(monkeypatch, models):
+    monkeypatch.setattr(core, "client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+
+
+def test_early_event_fires_before_stream_ends(monkeypatch, cover):
+    models = StreamingModels()
+    _install(monkeypatch, models)
+    events = []
+
+    async def on_early(event):
+        events.append((time.perf_counter(), event))
+
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[cover])
+    result = asyncio.run(ingest_book_with_gemini(request, CONFIG, on_early_identification=on_early))
+
+    assert len(events) == 1
+    fired_at, event = events[0]
+    assert fired_at < models.finished_at
+    assert event.source == "stream"
+    assert event.title == "Der Process"
+    assert event.author == "Franz Kafka"
+    # ISBN steht im Stream erst nach Titel und Autor
+    assert event.isbn is None
+    # Das zusammengesetzte Ergebnis entspricht dem ungestreamten
+    assert result.book_data.title == "Der Process"
+    assert result.book_data.authors == ["Franz Kafka", "Max Brod"]
+    assert result.confidence == 0.9
+
+
+def test_valid_isbn_alone_triggers_event(monkeypatch, cover):
+    payload = {"book_data": {"isbn_13": "9783596294312", "title": "Der Process", "authors": ["Franz Kafka"]}, "confidence": 0.9}
+    _install(monkeypatch, StreamingModels(payload=payload, delay=0))
+    events = []
+
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[cover])
+    asyncio.run(ingest_book_with_gemini(request, CONFIG, on_early_identification=events.append))
+
+    assert [(e.isbn, e.title) for e in events] == [("9783596294312", None)]
+
+
+def test_callback_errors_do_not_fail_ingestion(monkeypatch, cover):
+    _install(monkeypatch, StreamingModels(delay=0))
+
+    def broken(event):
+        raise RuntimeError("pubsub down")
+
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[cover])
+    result = asyncio.run(ingest_book_with_gemini(request, CONFIG, on_early_identification=broken))
+
+    assert result.success
+
+
+def test_retry_fires_early_event_only_once(monkeypatch, cover):
+    monkeypatch.setattr(core.asyncio, "sleep", _no_sleep(asyncio.sleep))
+    models = StreamingModels(delay=0)
+    _install(monkeypatch, models)
+    events = []
+
+    # Event im ersten Versuch, danach Fehler: Retry darf kein zweites Event senden
+    original = core.generate_streamed
+
+    async def flaky(local_client, config, contents, generate_content_config, notifier):
+        if models.calls == 0:
+            notifier.fire("stream", title="Der Process", author="Franz Kafka")
+            models.calls += 1
+            raise RuntimeError("503 Service Unavailable")
+        return await original(local_client, config, contents, generate_content_config, notifier)
+
+    monkeypatch.setattr(core, "generate_streamed", flaky)
+
+    request = BookIngestionRequest(book_id="book-1", user_id="user-1", image_urls=[cover])
+    result = asyncio.run(ingest_book_with_retry(request, CONFIG, on_early_identification=events.append))
+
+    assert result.success
+    assert len(events) == 1
+
+
+def _no_sleep(real_sleep):
+    async def sleep(delay, *args, **kwargs):
+        # Backoff überspringen, Stream-Pausen (0) bleiben erhalten
+        return await real_sleep(0)
+    return sleep
+
+
+def test_final_trigger_is_skipped_only_when_the_final_identity_adds_nothing():
+    early = EarlyIdentification(
+        book_id="book-1", user_id="user-1", title="Der Process", author="Franz Kafka", source="stream", elapsed_ms=800,
+    )
+
+    assert early_identification_covers(early, BookData(title="der process ", authors=["Franz Kafka", "Max Brod"]))
+    # ISBN, Verlag oder Auflage kommen erst im finalen Ergebnis -> neuer Preis-Job
+    assert not early_identification_covers(early, BookData(title="Der Process", authors=["Franz Kafka"], isbn_13="9783596294312"))
+    assert not early_identification_covers(early, BookData(title="Der Process", authors=["Franz Kafka"], publisher="Fischer"))
+    barcode = EarlyIdentification(book_id="book-1", user_id="user-1", isbn="9783596294312", source="barcode", elapsed_ms=50)
+    assert not early_identification_covers(barcode, BookData(title="Der Process", isbn_13="9783596294312"))
+    assert early_identification_covers(barcode, BookData(isbn_10="3596294312"))
@@ -0,0 +1,112 @@
+"""
+Tests für die Worker-Runtime (Streaming Pull, Flow Control, Ack/Nack).
+"""
+
+import asyncio
+import base64
+import concurrent.futures
+import json
+import threading
+
+from shared.runtime import PubSubWorker, PulledCloudEvent, WorkerConfig
+
+
+class FakeMessage:
+    def __init__(self, payload, message_id="m1"):
+        self.data = json.dumps(payload).encode("utf-8")
+        self.attributes = {"origin": "test"}
+        self.message_id = message_id
+        self.publish_time = None
+        self.acked = self.nacked = False
+
+    def ack(self):
+        self.acked = True
+
+    def nack(self):
+        self.nacked = True
+
+
+class FakeSubscriber:
+    """Liefert Nachrichten aus einem eigenen Thread an den Callback, wie der echte Client."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.flow_control = None
+        self.future = concurrent.futures.Future()
+
+    def subscribe(self, subscription, callback, flow_control):
+        self.subscription = subscription
+        self.flow_control = flow_control
+        threading.Thread(target=lambda: [callback(m) for m in self.messages], daemon=True).start()
+        return self.future
+
+
+def _run(worker, until):
+    async def main():
+        stop = asyncio.Event()
+
+        async def watch():
+            while not until():
+                await asyncio.sleep(0.01)
+            stop.set()
+
+        watcher = asyncio.create_task(watch())
+        await asyncio.wait_for(worker.serve(stop), timeout=5)
+        await watcher
+
+    asyncio.run(main())
+
+
+def test_pulled_event_matches_cloud_function_payload():
+    event = PulledCloudEvent(FakeMessage({"bookId": "b1"}, "42"), "projects/p/subscriptions/s")
+
+    assert json.loads(base64.b64decode(event.data["message"]["data"])) == {"bookId": "b1"}
+    assert event.data["message"]["attributes"] == {"origin": "test"}
+    assert event["id"] == "42"
+
+
+def test_messages_run_concurrently_with_ack_nack_and_flow_control(monkeypatch):
+    monkeypatch.setenv("GCP_PROJECT", "proj")
+    messages = [FakeMessage({"n": i}, f"m{i}") for i in range(8)]
+    messages.append(FakeMessage({"fail": "permanent"}, "bad"))
+    messages.append(FakeMessage({"fail": "transient"}, "retry"))
+    running = {"now": 0, "max": 0}
+
+    async def handler(cloud_event):
+        payload = json.loads(base64.b64decode(cloud_event.data["message"]["data"]))
+        if payload.get("fail") == "permanent":
+            raise ValueError("missing fields")
+        if payload.get("fail") == "transient":
+            raise RuntimeError("firestore timeout")
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.05)
+        running["now"] -= 1
+
+    subscriber = FakeSubscriber(messages)
+    worker = PubSubWorker(WorkerConfig(max_messages=16, max_bytes=1024, max_concurrency=4), subscriber=subscriber)
+    worker.add("ingestion-sub", handler)
+    _run(worker, lambda: worker.stats.acked + worker.stats.nacked == len(messages))
+
+    assert subscriber.subscription == "projects/proj/subscriptions/ingestion-sub"
+    assert subscriber.flow_control.max_messages == 16 and subscriber.flow_control.max_bytes == 1024
+    assert running["max"] == 4  # begrenzt durch max_concurrency, aber parallel
+    assert all(m.acked for m in messages[:9])
+    assert messages[-1].nacked and not messages[-1].acked
+    assert worker.stats.permanent_failures == 1
+    assert subscriber.future.cancelled()
+
+
+def test_sync_handlers_run_in_threads(monkeypatch):
+    monkeypatch.setenv("GCP_PROJECT", "proj")
+    threads = []
+    message = FakeMessage({"bookId": "b1"})
+
+    def sentinel(cloud_event):
+        threads.append(threading.current_thread())
+
+    worker = PubSubWorker(subscriber=FakeSubscriber([message]))
+    worker.add("projects/other/subscriptions/sales", sentinel)
+    _run(worker, lambda: message.acked)
+
+    assert threads and threads[0] is not threading.main_thread()